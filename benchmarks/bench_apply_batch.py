@@ -0,0 +1,76 @@
+"""
+Ops/sec of a payment run of deposits and transfers across many accounts, applied one
+operation at a time versus with TransactionService.apply_batch().
+
+    python -m benchmarks.bench_apply_batch --operations 5000 --accounts 200
+"""
+
+import argparse
+import random
+import time
+from database.queries.account import create_account
+from models.money import Money
+from models.operation import Operation
+from services.transaction_service import TransactionService
+
+
+def payment_run(rng, accounts, count):
+    operations = []
+    for _ in range(count):
+        amount = Money(rng.randint(1, 10_000))
+        if rng.random() < 0.5:
+            operations.append(Operation("deposit", rng.choice(accounts), "USD", amount))
+        else:
+            from_account, to_account = rng.sample(accounts, 2)
+            operations.append(
+                Operation("transfer", from_account, "USD", amount, to_account)
+            )
+    return operations
+
+
+def apply_one_by_one(service, operations):
+    for operation in operations:
+        if operation.type == "deposit":
+            service.deposit(operation.account_id, operation.currency, operation.amount)
+        else:
+            service.transfer(
+                operation.account_id,
+                operation.to_account_id,
+                operation.currency,
+                operation.currency,
+                operation.amount,
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    service = TransactionService()
+    rng = random.Random(args.seed)
+
+    results = {}
+    for name, apply in (
+        ("one by one", apply_one_by_one),
+        ("apply_batch", lambda service, operations: service.apply_batch(operations)),
+    ):
+        with service.repository.db_conn.transaction() as conn:
+            accounts = [
+                create_account(conn, {"USD": Money.parse(1_000_000)})
+                for _ in range(args.accounts)
+            ]
+        operations = payment_run(rng, accounts, args.operations)
+
+        start = time.perf_counter()
+        apply(service, operations)
+        results[name] = args.operations / (time.perf_counter() - start)
+
+    for name, ops_per_second in results.items():
+        print(f"{name:<12} {ops_per_second:10.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Throughput and latency of deposits and withdrawals with N concurrent clients, through
+AsyncTransactionService on one event loop versus the blocking TransactionService
+called from one thread per client. Both sides use a pool of --pool-size connections.
+
+    python -m benchmarks.bench_async_load --clients 100 1000 --operations 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from database.async_connection import AsyncDatabaseConnection
+from database.connection import DatabaseConnection
+from database.connection_parameters import (
+    POOL_DEFAULTS,
+    get_database_parameters,
+)
+from database.queries.account import create_account
+from models.money import Money
+from services.async_transaction_service import AsyncTransactionService
+from services.transaction_service import TransactionService
+
+
+def new_accounts(db_conn, count):
+    """One funded account per client, so clients never wait on each other's rows."""
+    with db_conn.transaction() as conn:
+        return [
+            create_account(conn, {"USD": Money.parse(1_000_000)}) for _ in range(count)
+        ]
+
+
+def summary(latencies, errors, elapsed):
+    """(completed ops/s, p50 ms, p99 ms, failed operations)"""
+    if not latencies:
+        return 0.0, float("nan"), float("nan"), errors
+    latencies.sort()
+    return (
+        len(latencies) / elapsed,
+        statistics.median(latencies) * 1000,
+        latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000,
+        errors,
+    )
+
+
+async def run_async_clients(service, accounts, operations, amount):
+    latencies = []
+    errors = 0
+
+    async def client(account_id):
+        nonlocal errors
+        for i in range(operations):
+            start = time.perf_counter()
+            try:
+                if i % 2:
+                    await service.withdraw(account_id, "USD", amount)
+                else:
+                    await service.deposit(account_id, "USD", amount)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    await service.db_conn.open()
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(account_id) for account_id in accounts))
+        return summary(latencies, errors, time.perf_counter() - start)
+    finally:
+        await service.db_conn.close()
+
+
+def run_threaded_clients(service, accounts, operations, amount):
+    latencies = []
+    errors = []
+
+    def client(account_id):
+        for i in range(operations):
+            start = time.perf_counter()
+            try:
+                if i % 2:
+                    service.withdraw(account_id, "USD", amount)
+                else:
+                    service.deposit(account_id, "USD", amount)
+            except Exception:
+                # Typically a pool checkout timeout
+                errors.append(account_id)
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(accounts)) as executor:
+        list(executor.map(client, accounts))
+    return summary(latencies, len(errors), time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--operations", type=int, default=20, help="per client")
+    parser.add_argument("--pool-size", type=int, default=20)
+    args = parser.parse_args()
+
+    cfg = get_database_parameters("database/database.ini")
+    pool_params = dict(POOL_DEFAULTS, min_size=args.pool_size, max_size=args.pool_size)
+    # The first DatabaseConnection fixes the pool of the singleton the services share.
+    db_conn = DatabaseConnection(cfg["postgresql"], pool_params)
+    service = TransactionService()
+    amount = Money.parse("1.00")
+
+    for clients in args.clients:
+        results = {}
+        async_service = AsyncTransactionService(
+            AsyncDatabaseConnection(cfg["postgresql"], pool_params)
+        )
+        results["async"] = asyncio.run(
+            run_async_clients(
+                async_service, new_accounts(db_conn, clients), args.operations, amount
+            )
+        )
+        results["threads"] = run_threaded_clients(
+            service, new_accounts(db_conn, clients), args.operations, amount
+        )
+
+        for name, (ops_per_second, p50, p99, errors) in results.items():
+            print(
+                f"{clients:>5} clients {name:<8} {ops_per_second:8.0f} ops/s"
+                f"  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  {errors} failed"
+            )
+
+
+if __name__ == "__main__":
+    main()
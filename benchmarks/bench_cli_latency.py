@@ -0,0 +1,83 @@
+"""
+Wall-clock latency of CLI commands run as separate processes, through cli/main.py
+versus cli/client.py forwarding them to a running ledger server (cli/server.py).
+
+    python -m benchmarks.bench_cli_latency --account-id 1 --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def command_lines(account_id):
+    return {
+        "get-balance": ["get-balance", "--account-id", str(account_id)],
+        "deposit": [
+            "deposit",
+            "--account-id",
+            str(account_id),
+            "--currency",
+            "USD",
+            "--amount",
+            "0.01",
+        ],
+        "--help": ["--help"],
+    }
+
+
+def measure(module, argv, runs, env):
+    """Median milliseconds of <runs> `python -m <module> <argv>` processes."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", module, *argv],
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def wait_for_socket(path, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"The ledger server did not start on {path}")
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--account-id", type=int, required=True)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "ledger.sock")
+    env = dict(os.environ, LEDGER_SOCKET=path)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "cli.server", "--socket", path],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_socket(path)
+        for name, argv in command_lines(args.account_id).items():
+            direct = measure("cli.main", argv, args.runs, env)
+            client = measure("cli.client", argv, args.runs, env)
+            print(
+                f"{name:<12} cli.main {direct:7.1f} ms  cli.client {client:7.1f} ms"
+                f"  ({direct / client:.1f}x)"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cold-start cost of cli/main.py: total import time (from -X importtime) and median
+wall-clock per command, next to a bare interpreter. Exits with status 1 when a command
+that never needs the database takes more than --max-ms.
+
+    python -m benchmarks.bench_cli_startup --account-id 1 --runs 10 --max-ms 250
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Commands answered without building a service.
+OFFLINE_COMMANDS = ["--help", "deposit --help", "usage error"]
+
+
+def command_lines(account_id):
+    return {
+        "--help": ["--help"],
+        "deposit --help": ["deposit", "--help"],
+        "usage error": ["deposit", "--account-id", str(account_id), "--amount", "x"],
+        "get-balance": ["get-balance", "--account-id", str(account_id)],
+        "get-transactions": ["get-transactions", "--account-id", str(account_id)],
+    }
+
+
+def import_time_ms(argv):
+    """Sum of the self import times -X importtime reports for one run."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_us = line.split(":", 1)[1].split("|")[0].strip()
+            if self_us.isdigit():
+                total += int(self_us)
+    return total / 1000
+
+
+def wall_clock_ms(argv, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *argv],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--account-id", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    baseline = wall_clock_ms(["-c", "pass"], args.runs)
+    print(f"{'python -c pass':<18} {'':>14} {baseline:8.1f} ms")
+
+    regressions = []
+    for name, command in command_lines(args.account_id).items():
+        argv = ["-m", "cli.main", *command]
+        imports = import_time_ms(argv)
+        elapsed = wall_clock_ms(argv, args.runs)
+        print(f"{name:<18} imports {imports:6.1f} ms {elapsed:8.1f} ms")
+        if name in OFFLINE_COMMANDS and elapsed > args.max_ms:
+            regressions.append(name)
+
+    if regressions:
+        print(f"Slower than {args.max_ms:.0f} ms: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Ops/sec of withdrawals and opposite transfers hammering two accounts from many threads,
+with the previous read-then-update debits versus the conditional debit and ordered
+locks of TransactionService. Also counts deadlocks and overdrawn accounts.
+
+    python -m benchmarks.bench_contended_debits --threads 16 --operations 200
+"""
+
+import argparse
+import random
+import threading
+import time
+import psycopg2
+from database.connection import DatabaseConnection
+from database.connection_parameters import POOL_DEFAULTS, get_database_parameters
+from database.queries.account import create_account, get_account, update_balance
+from database.queries.transaction import create_transaction
+from models.money import Money
+from services.transaction_service import TransactionService
+
+
+def legacy_withdraw(db_conn, account_id, currency, amount):
+    with db_conn.transaction() as conn:
+        account = get_account(conn, account_id)
+        if account.balance(currency) < amount:
+            return -2
+        update_balance(conn, account_id, currency, -amount)
+        return create_transaction(
+            conn, "WithdrawalMade", account_id, account_id, currency, currency, amount
+        )
+
+
+def legacy_transfer(db_conn, from_account_id, to_account_id, currency, amount):
+    with db_conn.transaction() as conn:
+        from_account = get_account(conn, from_account_id)
+        get_account(conn, to_account_id)
+        if from_account.balance(currency) < amount:
+            return -3
+        update_balance(conn, from_account_id, currency, -amount)
+        update_balance(conn, to_account_id, currency, amount)
+        return create_transaction(
+            conn,
+            "MoneyTransferred",
+            from_account_id,
+            to_account_id,
+            currency,
+            currency,
+            amount,
+        )
+
+
+def run(withdraw, transfer, accounts, threads, operations):
+    """(ops/s, deadlocks) of <threads> clients running <operations> each."""
+    deadlocks = []
+
+    def client(seed):
+        rng = random.Random(seed)
+        for _ in range(operations):
+            amount = Money(rng.randint(1, 3000))
+            from_account, to_account = rng.sample(accounts, 2)
+            try:
+                if rng.random() < 0.3:
+                    withdraw(from_account, "USD", amount)
+                else:
+                    transfer(from_account, to_account, "USD", amount)
+            except psycopg2.errors.DeadlockDetected:
+                deadlocks.append(seed)
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * operations / (time.perf_counter() - start), len(deadlocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--operations", type=int, default=200, help="per thread")
+    args = parser.parse_args()
+
+    cfg = get_database_parameters("database/database.ini")
+    # The first DatabaseConnection fixes the pool of the singleton the services share.
+    db_conn = DatabaseConnection(
+        cfg["postgresql"], dict(POOL_DEFAULTS, max_size=args.threads)
+    )
+    service = TransactionService()
+
+    variants = {
+        "read-then-update": (
+            lambda *a: legacy_withdraw(db_conn, *a),
+            lambda f, t, c, amount: legacy_transfer(db_conn, f, t, c, amount),
+        ),
+        "conditional debit": (
+            service.withdraw,
+            lambda f, t, c, amount: service.transfer(f, t, c, c, amount),
+        ),
+    }
+    for name, (withdraw, transfer) in variants.items():
+        with db_conn.transaction() as conn:
+            accounts = [
+                create_account(conn, {"USD": Money.parse(100)}) for _ in range(2)
+            ]
+        ops_per_second, deadlocks = run(
+            withdraw, transfer, accounts, args.threads, args.operations
+        )
+        with db_conn.transaction() as conn:
+            balances = [
+                get_account(conn, account).balance("USD") for account in accounts
+            ]
+        overdrawn = sum(balance < Money(0) for balance in balances)
+        print(
+            f"{name:<18} {ops_per_second:8.0f} ops/s  {deadlocks} deadlocks"
+            f"  {overdrawn} overdrawn accounts  balances {balances}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Ops/sec of parallel writers that each update a different currency of the same account,
+with one (account, currency) balance row per currency versus the single wide account row
+balances were stored in before, emulated on a scratch table.
+
+    python -m benchmarks.bench_currency_contention --writers-per-currency 2 --operations 300
+"""
+
+import argparse
+import threading
+import time
+from database.connection import DatabaseConnection
+from database.connection_parameters import POOL_DEFAULTS, get_database_parameters
+from database.queries.account import (
+    create_account,
+    get_account,
+    record_transaction,
+    update_balance,
+)
+from models.money import Money
+
+SCRATCH_TABLE = "bench_wide_account"
+
+
+def create_wide_account(conn, currencies):
+    """The scratch wide row: one balance column per currency and one counter."""
+    columns = ", ".join(
+        f"{currency.lower()}_balance NUMERIC NOT NULL DEFAULT 0"
+        for currency in currencies
+    )
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE};")
+    cursor.execute(
+        f"""
+        CREATE TABLE {SCRATCH_TABLE} (
+            account_id INTEGER PRIMARY KEY,
+            {columns},
+            transaction_count BIGINT NOT NULL DEFAULT 0
+        );
+        """
+    )
+    cursor.execute(f"INSERT INTO {SCRATCH_TABLE} (account_id) VALUES (1);")
+    return 1
+
+
+def wide_row_deposit(conn, account_id, currency, amount, think):
+    """The statements of a deposit before, both on the account's only row."""
+    cursor = conn.cursor()
+    column = f"{currency.lower()}_balance"
+    cursor.execute(
+        f"UPDATE {SCRATCH_TABLE} SET {column} = {column} + %s WHERE account_id = %s;",
+        (amount, account_id),
+    )
+    time.sleep(think)
+    # Read back like record_transaction() did, the whole row and the time
+    cursor.execute(
+        f"UPDATE {SCRATCH_TABLE} SET transaction_count = transaction_count + 1 WHERE account_id = %s RETURNING *, NOW();",
+        (account_id,),
+    )
+    cursor.fetchone()
+
+
+def balance_row_deposit(conn, account_id, currency, amount, think):
+    """The same statements now, both on the account's row of <currency>."""
+    update_balance(conn, account_id, currency, amount)
+    time.sleep(think)
+    record_transaction(conn, account_id, currency)
+
+
+def run(db_conn, deposit, account_id, currencies, writers, operations, think):
+    """Ops/s of <writers> threads per currency, each running <operations> deposits."""
+    amount = Money(1)
+
+    def writer(currency):
+        for _ in range(operations):
+            with db_conn.transaction() as conn:
+                deposit(conn, account_id, currency, amount, think)
+
+    threads = [
+        threading.Thread(target=writer, args=(currency,))
+        for currency in currencies
+        for _ in range(writers)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(threads) * operations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--currencies",
+        default="USD,EUR,GBP",
+        help="Comma-separated currencies of the account, each gets its own writers.",
+    )
+    parser.add_argument("--writers-per-currency", type=int, default=1)
+    parser.add_argument("--operations", type=int, default=300, help="per writer")
+    parser.add_argument(
+        "--think-ms",
+        type=float,
+        default=1.0,
+        help="Time between the balance update and the counter update, the work a "
+        "deposit does while it holds the row lock.",
+    )
+    args = parser.parse_args()
+
+    currencies = args.currencies.upper().split(",")
+    writers = args.writers_per_currency * len(currencies)
+    cfg = get_database_parameters("database/database.ini")
+    db_conn = DatabaseConnection(
+        cfg["postgresql"], dict(POOL_DEFAULTS, max_size=writers)
+    )
+    think = args.think_ms / 1000
+
+    with db_conn.transaction() as conn:
+        wide_account = create_wide_account(conn, currencies)
+        account_id = create_account(conn)
+    try:
+        for name, deposit, account in (
+            ("wide account row", wide_row_deposit, wide_account),
+            ("per-currency rows", balance_row_deposit, account_id),
+        ):
+            ops_per_second = run(
+                db_conn,
+                deposit,
+                account,
+                currencies,
+                args.writers_per_currency,
+                args.operations,
+                think,
+            )
+            print(f"{name:<18} {ops_per_second:8.0f} ops/s  ({writers} writers)")
+    finally:
+        with db_conn.transaction() as conn:
+            conn.cursor().execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE};")
+
+    with db_conn.transaction() as conn:
+        account = get_account(conn, account_id)
+    expected = Money(args.writers_per_currency * args.operations)
+    assert all(account.balance(currency) == expected for currency in currencies)
+
+
+if __name__ == "__main__":
+    main()
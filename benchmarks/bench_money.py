@@ -0,0 +1,185 @@
+"""
+Replay and transfer throughput with Money (int64 minor units) versus the Decimal
+amounts the ledger used before.
+
+    python -m benchmarks.bench_money --transactions 200000
+"""
+
+import argparse
+import random
+import time
+from copy import copy
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models.money import Money
+from models.snapshot import Snapshot
+from models.transaction import Transaction, TransactionBatch
+from services.reconstruction_service import replay_transactions
+
+CURRENCIES = ["USD", "EUR", "GBP"]
+TYPES = ["DepositMade", "WithdrawalMade", "MoneyTransferred", "CurrencyConverted"]
+
+
+def decimal_update_snapshot(snapshot, currency, amount):
+    snapshot.balances[currency] += amount
+
+
+def decimal_replay_transactions(snapshot, account_id, transactions):
+    """The Decimal replay loop reconstruct_state used before Money."""
+    for transaction in transactions:
+        if transaction.type == "DepositMade":
+            decimal_update_snapshot(
+                snapshot, transaction.from_currency, transaction.amount
+            )
+        elif transaction.type == "WithdrawalMade":
+            decimal_update_snapshot(
+                snapshot, transaction.from_currency, -transaction.amount
+            )
+        elif transaction.type == "MoneyTransferred":
+            if transaction.from_account == account_id:
+                decimal_update_snapshot(
+                    snapshot, transaction.from_currency, -transaction.amount
+                )
+            elif transaction.from_currency == transaction.to_currency:
+                decimal_update_snapshot(
+                    snapshot, transaction.to_currency, transaction.amount
+                )
+            else:
+                decimal_update_snapshot(
+                    snapshot,
+                    transaction.to_currency,
+                    round(Decimal(transaction.amount * transaction.rate), 2),
+                )
+        else:
+            decimal_update_snapshot(
+                snapshot, transaction.from_currency, -transaction.amount
+            )
+            decimal_update_snapshot(
+                snapshot,
+                transaction.to_currency,
+                round(Decimal(transaction.amount * transaction.rate), 2),
+            )
+    return snapshot
+
+
+def decimal_transfer(balances, from_currency, to_currency, amount, rate):
+    """Balance check, conversion and both balance updates of a Decimal transfer."""
+    if balances[from_currency] < amount:
+        return False
+    to_amount = round(amount * rate, 2)
+    balances[from_currency] -= amount
+    balances[to_currency] += to_amount
+    return True
+
+
+def money_transfer(balances, from_currency, to_currency, amount, rate):
+    if balances[from_currency] < amount:
+        return False
+    to_amount = amount.convert(rate)
+    balances[from_currency] -= amount
+    balances[to_currency] += to_amount
+    return True
+
+
+def random_transactions(rng, count, account_id=1):
+    """(Decimal amount, rate, Transaction with Money amount) for <count> transactions."""
+    start = datetime(2024, 1, 1)
+    transactions = []
+    for i in range(count):
+        type = rng.choice(TYPES)
+        from_currency = rng.choice(CURRENCIES)
+        to_currency = rng.choice(CURRENCIES)
+        amount = Decimal(rng.randint(1, 100_000)) / 100
+        rate = Decimal(rng.randint(50, 200)) / 100
+        from_account = rng.choice([account_id, account_id + 1])
+        transactions.append(
+            (
+                amount,
+                rate,
+                Transaction(
+                    id=i,
+                    type=type,
+                    from_account=from_account,
+                    to_account=account_id,
+                    timestamp=start + timedelta(seconds=i),
+                    from_currency=from_currency,
+                    to_currency=to_currency,
+                    amount=Money.parse(amount),
+                    rate=rate,
+                ),
+            )
+        )
+    return transactions
+
+
+def measure(operation, count):
+    start = time.perf_counter()
+    operation()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rows = random_transactions(random.Random(args.seed), args.transactions)
+    money_transactions = TransactionBatch.from_transactions(
+        [transaction for _, _, transaction in rows]
+    )
+    decimal_transactions = []
+    for amount, _, transaction in rows:
+        transaction = copy(transaction)
+        transaction.amount = amount
+        decimal_transactions.append(transaction)
+
+    decimal_start = Snapshot(
+        None, 1, None, {currency: Decimal(0) for currency in CURRENCIES}
+    )
+    money_start = Snapshot(
+        None, 1, None, {currency: Money(0) for currency in CURRENCIES}
+    )
+
+    results = {
+        "replay (Decimal)": measure(
+            lambda: decimal_replay_transactions(decimal_start, 1, decimal_transactions),
+            args.transactions,
+        ),
+        "replay (Money)": measure(
+            lambda: replay_transactions(money_start, 1, money_transactions),
+            args.transactions,
+        ),
+    }
+    assert [
+        Money.parse(decimal_start.balance(currency)) for currency in CURRENCIES
+    ] == [money_start.balance(currency) for currency in CURRENCIES]
+
+    funds = 10**12
+    decimal_balances = {currency: Decimal(funds) for currency in CURRENCIES}
+    money_balances = {currency: Money.parse(funds) for currency in CURRENCIES}
+    transfers = [
+        (t.from_currency, t.to_currency, amount, t.amount, rate)
+        for amount, rate, t in rows
+    ]
+
+    def run_decimal_transfers():
+        for from_currency, to_currency, amount, _, rate in transfers:
+            decimal_transfer(decimal_balances, from_currency, to_currency, amount, rate)
+
+    def run_money_transfers():
+        for from_currency, to_currency, _, amount, rate in transfers:
+            money_transfer(money_balances, from_currency, to_currency, amount, rate)
+
+    results["transfer (Decimal)"] = measure(run_decimal_transfers, args.transactions)
+    results["transfer (Money)"] = measure(run_money_transfers, args.transactions)
+    assert {
+        currency: Money.parse(balance) for currency, balance in decimal_balances.items()
+    } == money_balances
+
+    for name, ops_per_second in results.items():
+        print(f"{name:<20} {ops_per_second:12.0f} transactions/s")
+
+
+if __name__ == "__main__":
+    main()
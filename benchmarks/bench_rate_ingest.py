@@ -0,0 +1,83 @@
+"""
+Ticks/sec of a rate feed published one tick at a time with update_exchange_rate() versus
+as a single rate board with ImportService.ingest_rates(). The rates in force before the
+run are published again at the end.
+
+    python -m benchmarks.bench_rate_ingest --ticks 2000
+"""
+
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from services.currency_exchange_service import CurrencyExchangeService
+from services.import_service import ImportService
+
+# Ticks of the board are dated before any real rate, so they never become current
+FEED_START = datetime(2000, 1, 1)
+
+
+def rate_feed(rng, currencies, count):
+    """<count> (timestamp, from_currency, to_currency, rate) ticks, a random walk per pair."""
+    rates = {}
+    ticks = []
+    for tick in range(count):
+        pair = tuple(rng.sample(currencies, 2))
+        rate = rates.get(pair, Decimal("1"))
+        rate = max(rate + Decimal(rng.randint(-5, 5)) / 1000, Decimal("0.5"))
+        rates[pair] = rate
+        ticks.append((FEED_START + timedelta(milliseconds=tick), *pair, rate))
+    return ticks
+
+
+def feed_file(ticks):
+    file = io.StringIO()
+    writer = csv.writer(file)
+    writer.writerow(["timestamp", "from_currency", "to_currency", "rate"])
+    writer.writerows(ticks)
+    file.seek(0)
+    return file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    exchange_service = CurrencyExchangeService()
+    import_service = ImportService()
+    currencies = exchange_service.get_currencies()
+    ticks = rate_feed(random.Random(args.seed), currencies, args.ticks)
+
+    with exchange_service.repository.transaction() as session:
+        current_rates = session.get_all_latest_rates()
+    try:
+        start = time.perf_counter()
+        for _, from_currency, to_currency, rate in ticks:
+            exchange_service.update_exchange_rate(from_currency, to_currency, rate)
+        one_at_a_time = args.ticks / (time.perf_counter() - start)
+        print(f"update_exchange_rate {one_at_a_time:10.0f} ticks/s")
+
+        start = time.perf_counter()
+        board = import_service.ingest_rates(feed_file(ticks))
+        ingested = args.ticks / (time.perf_counter() - start)
+        print(
+            f"ingest_rates         {ingested:10.0f} ticks/s  "
+            f"(board {board.id}, {board.published} rates)"
+        )
+    finally:
+        with exchange_service.repository.transaction() as session:
+            session.publish_rates(
+                [
+                    (exchange.from_currency, exchange.to_currency, exchange.rate)
+                    for exchange in current_rates.values()
+                ]
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Ops/sec and median latency of deposits, transfers and history pages on each storage
+backend: PostgreSQL (the [postgresql] database), an SQLite file and in-memory.
+
+    python -m benchmarks.bench_storage_backends --operations 2000
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from database.connection import DatabaseConnection
+from database.connection_parameters import (
+    get_database_parameters,
+    get_pool_parameters,
+)
+from database.repositories.memory import MemoryRepository
+from database.repositories.postgres import PostgresRepository
+from database.repositories.sqlite import SqliteRepository
+from models.money import Money
+from services.transaction_service import TransactionService
+
+
+def measure(operation, count):
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - start)
+    return count / sum(latencies), statistics.median(latencies) * 1000
+
+
+def run(repository, operations):
+    service = TransactionService(repository=repository)
+    amount = Money.parse("1.00")
+    with repository.transaction() as session:
+        accounts = [
+            session.create_account({"USD": Money.parse(1_000_000)}) for _ in range(2)
+        ]
+    return {
+        "deposit": measure(
+            lambda i: service.deposit(accounts[0], "USD", amount), operations
+        ),
+        "transfer": measure(
+            lambda i: service.transfer(
+                accounts[i % 2], accounts[1 - i % 2], "USD", "USD", amount
+            ),
+            operations,
+        ),
+        "history page": measure(
+            lambda i: service.get_transaction_history_for_account(accounts[0], 50),
+            operations,
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--operations", type=int, default=2000)
+    args = parser.parse_args()
+
+    cfg = get_database_parameters("database/database.ini")
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {
+            "postgresql": PostgresRepository(
+                DatabaseConnection(cfg["postgresql"], get_pool_parameters(cfg))
+            ),
+            "sqlite": SqliteRepository(os.path.join(directory, "ledger.sqlite3")),
+            "memory": MemoryRepository(),
+        }
+        for backend, repository in backends.items():
+            for name, (ops, median_ms) in run(repository, args.operations).items():
+                print(
+                    f"{backend:<11} {name:<13} {ops:10.0f} ops/s  median {median_ms:6.3f} ms"
+                )
+            repository.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Ops/sec of ledger operations when every query commits on its own (the previous
+behaviour of database/queries) versus one commit per service operation.
+
+    python -m benchmarks.bench_unit_of_work --operations 2000
+"""
+
+import argparse
+import time
+from models.money import Money
+from database.queries.account import (
+    create_account,
+    get_account,
+    record_transaction,
+    reset_snapshot_counters,
+    update_balance,
+)
+from database.queries.snapshots import create_snapshot
+from database.queries.transaction import create_transaction
+from services.snapshot_policy import EveryNTransactions
+from services.transaction_service import TransactionService
+
+
+def legacy_handle_snapshots(conn, account_id):
+    account, now = record_transaction(conn, account_id, "USD")
+    conn.commit()
+    if EveryNTransactions().should_snapshot(account, now):
+        create_snapshot(conn, account_id, account.balances)
+        conn.commit()
+        reset_snapshot_counters(conn, [(account_id, None)])
+        conn.commit()
+
+
+def legacy_deposit(conn, account_id, amount):
+    get_account(conn, account_id)
+    update_balance(conn, account_id, "USD", amount)
+    conn.commit()
+    create_transaction(
+        conn, "DepositMade", account_id, account_id, "USD", "USD", amount
+    )
+    conn.commit()
+    legacy_handle_snapshots(conn, account_id)
+
+
+def legacy_transfer(conn, from_account_id, to_account_id, amount):
+    get_account(conn, from_account_id)
+    get_account(conn, to_account_id)
+    update_balance(conn, from_account_id, "USD", -amount)
+    conn.commit()
+    update_balance(conn, to_account_id, "USD", amount)
+    conn.commit()
+    create_transaction(
+        conn,
+        "MoneyTransferred",
+        from_account_id,
+        to_account_id,
+        "USD",
+        "USD",
+        amount,
+    )
+    conn.commit()
+    legacy_handle_snapshots(conn, from_account_id)
+    legacy_handle_snapshots(conn, to_account_id)
+
+
+def new_accounts(conn):
+    """Two funded accounts, as (from, to) pairs in both directions."""
+    first = create_account(conn, {"USD": Money.parse(1_000_000)})
+    second = create_account(conn, {"USD": Money.parse(1_000_000)})
+    return [(first, second), (second, first)]
+
+
+def measure(operation, count):
+    start = time.perf_counter()
+    for i in range(count):
+        operation(i)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--operations", type=int, default=1000)
+    args = parser.parse_args()
+
+    service = TransactionService()
+    amount = Money.parse("1.00")
+
+    with service.repository.db_conn.transaction() as conn:
+        legacy = new_accounts(conn)
+        results = {
+            "deposit (commit per query)": measure(
+                lambda i: legacy_deposit(conn, legacy[0][0], amount),
+                args.operations,
+            ),
+            "transfer (commit per query)": measure(
+                lambda i: legacy_transfer(conn, *legacy[i % 2], amount),
+                args.operations,
+            ),
+        }
+
+    with service.repository.db_conn.transaction() as conn:
+        unit_of_work = new_accounts(conn)
+    results["deposit (unit of work)"] = measure(
+        lambda i: service.deposit(unit_of_work[0][0], "USD", amount),
+        args.operations,
+    )
+    results["transfer (unit of work)"] = measure(
+        lambda i: service.transfer(*unit_of_work[i % 2], "USD", "USD", amount),
+        args.operations,
+    )
+
+    for name, ops_per_second in results.items():
+        print(f"{name:<30} {ops_per_second:10.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
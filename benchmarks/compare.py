@@ -0,0 +1,69 @@
+"""
+Compare two result files of benchmarks/suite.py: every timing of the new run next to
+the old one, with the relative change. Exits with status 1 when a timing got slower by
+more than --threshold percent.
+
+    python -m benchmarks.compare old-results.json new-results.json --threshold 20
+"""
+
+import argparse
+import json
+import sys
+
+# Sections of the results that describe the run rather than measure it
+METADATA = {"environment", "spec"}
+
+
+def timings(results, prefix=""):
+    """{path: milliseconds} of every *_ms and seconds value in <results>."""
+    flat = {}
+    if isinstance(results, list):
+        results = {str(index): value for index, value in enumerate(results)}
+    for key, value in results.items():
+        if not prefix and key in METADATA:
+            continue
+        path = f"{prefix}{key}"
+        if isinstance(value, (dict, list)):
+            flat.update(timings(value, f"{path}."))
+        elif key.endswith("_ms") and isinstance(value, (int, float)):
+            flat[path] = value
+        elif key == "seconds":
+            flat[path] = value * 1000
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with open(args.old) as file:
+        old = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+
+    if old["spec"] != new["spec"]:
+        print("Warning: the runs loaded different ledgers, compare with care")
+    print(f"old {old['environment']['commit']}  new {new['environment']['commit']}")
+
+    old_timings = timings(old)
+    regressions = []
+    for path, new_ms in timings(new).items():
+        old_ms = old_timings.get(path)
+        if old_ms is None:
+            print(f"{path:<60} {'':>10} {new_ms:10.2f} ms  (new)")
+            continue
+        change = (new_ms - old_ms) / old_ms * 100 if old_ms else 0.0
+        print(f"{path:<60} {old_ms:10.2f} {new_ms:10.2f} ms  {change:+6.1f}%")
+        if change > args.threshold:
+            regressions.append(path)
+
+    if regressions:
+        print(f"Slower by more than {args.threshold:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
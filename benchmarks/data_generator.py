@@ -0,0 +1,231 @@
+"""
+Reproducible synthetic ledgers for the benchmark suite.
+
+Accounts are picked with a Zipf distribution, so a few hot accounts carry most of the
+transactions. Types and currencies follow configurable mixes. Every account starts with
+one snapshot at <start>, and the generated history is loaded in bulk through the
+import staging table without further snapshots. An account's distance from its last
+snapshot is then the number of its transactions before a point in time.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+import numpy as np
+from database.queries.account import create_account
+from database.queries.currency_exchange import insert_exchange_rate
+from database.queries.snapshots import create_snapshots
+from database.queries.transaction_import import (
+    create_staging_table,
+    copy_into_staging,
+    insert_staged_transactions,
+    apply_staged_balances,
+)
+from models.money import Money
+from models.transaction import CURRENCIES
+from services.import_service import chunked
+
+DEFAULT_TYPE_MIX = {
+    "DepositMade": 0.35,
+    "WithdrawalMade": 0.2,
+    "MoneyTransferred": 0.35,
+    "CurrencyConverted": 0.1,
+}
+DEFAULT_CURRENCY_MIX = {"USD": 0.5, "EUR": 0.3, "GBP": 0.2}
+# Rates of the generated history, inverse pairs are derived from them.
+RATES = {
+    ("USD", "EUR"): Decimal("0.92"),
+    ("USD", "GBP"): Decimal("0.79"),
+    ("EUR", "GBP"): Decimal("0.86"),
+}
+LOAD_CHUNK_SIZE = 50_000
+
+
+@dataclass
+class LedgerSpec:
+    accounts: int = 1000
+    transactions: int = 100_000
+    zipf_exponent: float = 1.1
+    type_mix: dict = field(default_factory=lambda: dict(DEFAULT_TYPE_MIX))
+    currency_mix: dict = field(default_factory=lambda: dict(DEFAULT_CURRENCY_MIX))
+    initial_balance: Money = Money.parse(10_000)
+    start: datetime = datetime(2024, 1, 1)
+    seconds_between_transactions: float = 30.0
+    seed: int = 1
+
+    def to_dict(self):
+        return {
+            "accounts": self.accounts,
+            "transactions": self.transactions,
+            "zipf_exponent": self.zipf_exponent,
+            "type_mix": self.type_mix,
+            "currency_mix": self.currency_mix,
+            "initial_balance": str(self.initial_balance),
+            "start": self.start.isoformat(),
+            "seconds_between_transactions": self.seconds_between_transactions,
+            "seed": self.seed,
+        }
+
+
+@dataclass
+class GeneratedLedger:
+    """Ids of the loaded accounts, hottest first, and each account's transaction times."""
+
+    account_ids: list
+    timestamps: dict
+
+    def distance(self, account_id, timestamp):
+        """Transactions replayed by reconstruct_state(account_id, timestamp)."""
+        return bisect_right(self.timestamps.get(account_id, []), timestamp)
+
+
+def parse_mix(value, choices):
+    """
+    {choice: probability} from "A=0.5,B=0.5". Weights are normalized, so they do not
+    have to add up to 1.
+    """
+    mix = {}
+    for pair in value.split(","):
+        name, _, weight = pair.partition("=")
+        if name not in choices:
+            raise ValueError(f"Invalid choice '{name}', expected one of {choices}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid weight '{weight}' for {name}")
+        if mix[name] < 0:
+            raise ValueError(f"Invalid weight '{weight}' for {name}")
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("At least one weight must be positive")
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def zipf_weights(count, exponent):
+    """Probability of picking the account of each rank, 1/rank^exponent normalized."""
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def rate(from_currency, to_currency):
+    if (from_currency, to_currency) in RATES:
+        return RATES[(from_currency, to_currency)]
+    return round(1 / RATES[(to_currency, from_currency)], 4)
+
+
+def generate_transactions(spec, account_ids):
+    """
+    Yield the staging rows (see parse_transaction_record) of spec.transactions
+    transactions between <account_ids>, oldest first. Balances are tracked as rows are
+    generated: an operation the account cannot afford becomes a deposit instead.
+    """
+    rng = np.random.default_rng(spec.seed)
+    count = spec.transactions
+    weights = zipf_weights(len(account_ids), spec.zipf_exponent)
+    types = list(spec.type_mix)
+    currencies = list(spec.currency_mix)
+
+    from_ranks = rng.choice(len(account_ids), size=count, p=weights).tolist()
+    to_ranks = rng.choice(len(account_ids), size=count, p=weights).tolist()
+    type_picks = rng.choice(
+        len(types), size=count, p=list(spec.type_mix.values())
+    ).tolist()
+    from_picks = rng.choice(
+        len(currencies), size=count, p=list(spec.currency_mix.values())
+    ).tolist()
+    to_picks = rng.choice(
+        len(currencies), size=count, p=list(spec.currency_mix.values())
+    ).tolist()
+    # Log-normal amounts between a few cents and a few hundred units, in minor units
+    amounts = np.clip(rng.lognormal(7.0, 1.5, size=count), 1, 10_000_000)
+    amounts = amounts.astype(np.int64).tolist()
+    offsets = np.cumsum(
+        rng.exponential(spec.seconds_between_transactions, size=count)
+    ).tolist()
+
+    balances = {
+        account_id: dict.fromkeys(CURRENCIES, spec.initial_balance)
+        for account_id in account_ids
+    }
+    for i in range(count):
+        type = types[type_picks[i]]
+        from_account = account_ids[from_ranks[i]]
+        to_account = from_account
+        from_currency = to_currency = currencies[from_picks[i]]
+        amount = Money(amounts[i])
+        timestamp = spec.start + timedelta(seconds=offsets[i])
+
+        if type == "MoneyTransferred":
+            to_account = account_ids[to_ranks[i]]
+            to_currency = currencies[to_picks[i]]
+        elif type == "CurrencyConverted":
+            to_currency = currencies[to_picks[i]]
+
+        if type != "DepositMade" and balances[from_account][from_currency] < amount:
+            type = "DepositMade"
+            to_account = from_account
+            to_currency = from_currency
+
+        exchange_rate = Decimal(1)
+        credit_amount = Money(0)
+        if type == "DepositMade":
+            balances[from_account][from_currency] += amount
+        else:
+            balances[from_account][from_currency] -= amount
+        if type in ("MoneyTransferred", "CurrencyConverted"):
+            credit_amount = amount
+            if from_currency != to_currency:
+                exchange_rate = rate(from_currency, to_currency)
+                credit_amount = amount.convert(exchange_rate)
+            balances[to_account][to_currency] += credit_amount
+
+        yield (
+            type,
+            from_account,
+            to_account,
+            timestamp,
+            from_currency,
+            to_currency,
+            amount,
+            exchange_rate,
+            credit_amount,
+        )
+
+
+def load_ledger(db_conn, spec):
+    """
+    Create spec.accounts funded accounts and the exchange rates, then load the
+    generated history into them, committing every LOAD_CHUNK_SIZE transactions.
+    """
+    with db_conn.transaction() as conn:
+        balances = {currency: spec.initial_balance for currency in CURRENCIES}
+        account_ids = [create_account(conn, balances) for _ in range(spec.accounts)]
+        create_snapshots(
+            conn,
+            [(account_id, spec.start, balances) for account_id in account_ids],
+        )
+        for from_currency in CURRENCIES:
+            for to_currency in CURRENCIES:
+                if from_currency != to_currency:
+                    insert_exchange_rate(
+                        conn,
+                        from_currency,
+                        to_currency,
+                        rate(from_currency, to_currency),
+                    )
+
+    timestamps = {}
+    rows = generate_transactions(spec, account_ids)
+    for chunk in chunked(rows, LOAD_CHUNK_SIZE):
+        for row in chunk:
+            timestamps.setdefault(row[1], []).append(row[3])
+            if row[2] != row[1]:
+                timestamps.setdefault(row[2], []).append(row[3])
+        with db_conn.transaction() as conn:
+            create_staging_table(conn)
+            copy_into_staging(conn, chunk)
+            insert_staged_transactions(conn)
+            apply_staged_balances(conn)
+
+    return GeneratedLedger(account_ids, timestamps)
@@ -0,0 +1,268 @@
+"""
+Ledger benchmark suite: loads a synthetic ledger (see benchmarks/data_generator.py) and
+measures operation latency percentiles, reconstruct_state time against the distance
+from the last snapshot and history query time. Results are written as JSON, compare
+two runs with benchmarks/compare.py.
+
+    python -m benchmarks.suite --accounts 1000 --transactions 100000 --output results.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from database.connection import DatabaseConnection
+from database.connection_parameters import (
+    get_database_parameters,
+    get_pool_parameters,
+)
+from models.money import Money
+from models.transaction import CURRENCIES
+from services.reconstruction_service import REPLAY_MODES, ReconstructionService
+from services.rollup_service import RollupService
+from services.transaction_service import TransactionService
+from .data_generator import (
+    DEFAULT_CURRENCY_MIX,
+    DEFAULT_TYPE_MIX,
+    LedgerSpec,
+    load_ledger,
+    parse_mix,
+    zipf_weights,
+)
+
+PERCENTILES = [50, 90, 99]
+# Points of each account's history where reconstruct_state is measured.
+HISTORY_FRACTIONS = [0.0, 0.1, 0.25, 0.5, 0.75, 1.0]
+HISTORY_LIMITS = [5, 50, 500]
+
+
+def latency_summary(latencies):
+    """Milliseconds: mean, max and PERCENTILES of <latencies> (seconds)."""
+    latencies = sorted(latencies)
+    summary = {
+        "count": len(latencies),
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+    for percentile in PERCENTILES:
+        index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        summary[f"p{percentile}_ms"] = latencies[index] * 1000
+    return summary
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def measure_operations(service, account_ids, weights, count, rng):
+    """Latency of <count> calls of each TransactionService operation on Zipf-picked accounts."""
+    amount = Money.parse("1.00")
+
+    def pick():
+        return rng.choices(account_ids, weights)[0]
+
+    operations = {
+        "deposit": lambda: service.deposit(pick(), rng.choice(CURRENCIES), amount),
+        "withdraw": lambda: service.withdraw(pick(), rng.choice(CURRENCIES), amount),
+        "transfer": lambda: service.transfer(
+            pick(), pick(), rng.choice(CURRENCIES), rng.choice(CURRENCIES), amount
+        ),
+        "convert_currency": lambda: service.convert_currency(
+            pick(), *rng.sample(CURRENCIES, 2), amount
+        ),
+    }
+    return {
+        name: latency_summary([timed(operation) for _ in range(count)])
+        for name, operation in operations.items()
+    }
+
+
+def measure_reconstruction(service, ledger, repeats):
+    """
+    reconstruct_state time for the hottest accounts and a median-rank account at
+    HISTORY_FRACTIONS of their history, with the number of transactions replayed.
+    """
+    middle = len(ledger.account_ids) // 2
+    accounts = ledger.account_ids[:3] + ledger.account_ids[middle : middle + 1]
+    results = []
+    for account_id in accounts:
+        timestamps = ledger.timestamps.get(account_id)
+        if not timestamps:
+            continue
+        for fraction in HISTORY_FRACTIONS:
+            timestamp = timestamps[
+                min(len(timestamps) - 1, int(len(timestamps) * fraction))
+            ]
+            result = {
+                "account_rank": ledger.account_ids.index(account_id) + 1,
+                "distance": ledger.distance(account_id, timestamp),
+            }
+            for replay in REPLAY_MODES:
+                result[f"{replay}_ms"] = 1000 * statistics.median(
+                    timed(service.reconstruct_state, account_id, timestamp, replay)
+                    for _ in range(repeats)
+                )
+            results.append(result)
+    return sorted(results, key=lambda result: result["distance"])
+
+
+def measure_history(service, ledger, repeats):
+    """History page time for the hottest and a median-rank account, first and tenth page."""
+    middle = len(ledger.account_ids) // 2
+    results = {}
+    for label, account_id in (
+        ("hottest", ledger.account_ids[0]),
+        ("median", ledger.account_ids[middle]),
+    ):
+        for limit in HISTORY_LIMITS:
+            first_page = []
+            tenth_page = []
+            for _ in range(repeats):
+                page_token = None
+                for page in range(10):
+                    start = time.perf_counter()
+                    _, page_token = service.get_transaction_history_for_account(
+                        account_id, limit, page_token=page_token
+                    )
+                    elapsed = time.perf_counter() - start
+                    if page == 0:
+                        first_page.append(elapsed)
+                    if page_token is None:
+                        break
+                else:
+                    tenth_page.append(elapsed)
+            results[f"{label} limit={limit}"] = {
+                "first_page": latency_summary(first_page),
+                "tenth_page": latency_summary(tenth_page) if tenth_page else None,
+            }
+    return results
+
+
+def environment(db_conn):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    with db_conn.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SHOW server_version;")
+        server_version = cursor.fetchone()[0]
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "postgresql": server_version,
+        "platform": platform.platform(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--zipf-exponent", type=float, default=1.1)
+    parser.add_argument(
+        "--types",
+        default=",".join(f"{k}={v}" for k, v in DEFAULT_TYPE_MIX.items()),
+        help="Mix of transaction types, e.g. DepositMade=0.5,MoneyTransferred=0.5",
+    )
+    parser.add_argument(
+        "--currencies",
+        default=",".join(f"{k}={v}" for k, v in DEFAULT_CURRENCY_MIX.items()),
+        help="Mix of currencies, e.g. USD=0.8,EUR=0.2",
+    )
+    parser.add_argument("--operations", type=int, default=200, help="per operation")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--database-section",
+        default="postgresql",
+        help="database.ini section of the database to fill, e.g. postgresql_test",
+    )
+    parser.add_argument(
+        "--rollup",
+        action="store_true",
+        help="Roll up daily balances after loading, reconstruct_state starts from them.",
+    )
+    parser.add_argument("--output", default="benchmark-results.json")
+    args = parser.parse_args()
+
+    spec = LedgerSpec(
+        accounts=args.accounts,
+        transactions=args.transactions,
+        zipf_exponent=args.zipf_exponent,
+        type_mix=parse_mix(args.types, list(DEFAULT_TYPE_MIX)),
+        currency_mix=parse_mix(args.currencies, CURRENCIES),
+        seed=args.seed,
+    )
+
+    cfg = get_database_parameters("database/database.ini")
+    # The first DatabaseConnection fixes the database of the singleton the services share.
+    db_conn = DatabaseConnection(cfg[args.database_section], get_pool_parameters(cfg))
+    transaction_service = TransactionService()
+    reconstruction_service = ReconstructionService()
+
+    start = time.perf_counter()
+    ledger = load_ledger(db_conn, spec)
+    load_seconds = time.perf_counter() - start
+    print(f"Loaded {spec.transactions} transactions in {load_seconds:.1f}s")
+
+    rollup_seconds = None
+    if args.rollup:
+        start = time.perf_counter()
+        for _ in RollupService().roll_up():
+            pass
+        rollup_seconds = time.perf_counter() - start
+        print(f"Rolled up daily balances in {rollup_seconds:.1f}s")
+
+    rng = random.Random(args.seed)
+    results = {
+        "environment": environment(db_conn),
+        "spec": spec.to_dict(),
+        "load": {
+            "seconds": load_seconds,
+            "transactions_per_second": spec.transactions / load_seconds,
+        },
+        "rollup": {"seconds": rollup_seconds},
+        "reconstruct_state": measure_reconstruction(
+            reconstruction_service, ledger, args.repeats
+        ),
+        "history": measure_history(transaction_service, ledger, args.repeats),
+        # Last, the operations add transactions after the generated history
+        "operations": measure_operations(
+            transaction_service,
+            ledger.account_ids,
+            zipf_weights(len(ledger.account_ids), spec.zipf_exponent).tolist(),
+            args.operations,
+            rng,
+        ),
+    }
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    for name, summary in results["operations"].items():
+        print(
+            f"{name:<18} p50 {summary['p50_ms']:7.2f} ms  p99 {summary['p99_ms']:7.2f} ms"
+        )
+    for result in results["reconstruct_state"]:
+        print(
+            f"reconstruct_state  distance {result['distance']:>7}"
+            f"  sql {result['sql_ms']:7.2f} ms  python {result['python_ms']:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Thin client of the ledger server (cli/server.py). It sends the command line to the
+server and prints the answer, so a command costs one round trip instead of importing
+the services and connecting a new pool.
+
+    python -m cli.client deposit --account-id 123 --currency USD --amount 10
+
+Takes the same commands as cli/main.py. File imports, exports and rate feeds run
+locally, and so does every command when no server is listening. Only the standard
+library is imported until then.
+"""
+
+import json
+import os
+import socket
+import sys
+
+SOCKET_ENV = "LEDGER_SOCKET"
+PROG_NAME = "cli.py"
+# Commands reading or writing the caller's files run in the caller's process.
+LOCAL_COMMANDS = {"import-transactions", "export-transactions", "ingest-rates"}
+
+
+def socket_path():
+    """$LEDGER_SOCKET, or ledger-<uid>.sock in the temporary directory."""
+    return os.environ.get(SOCKET_ENV) or os.path.join(
+        os.environ.get("TMPDIR", "/tmp"), f"ledger-{os.getuid()}.sock"
+    )
+
+
+def encode_message(message):
+    return json.dumps(message).encode() + b"\n"
+
+
+def forward(argv, path):
+    """
+    Run <argv> on the server listening on <path>.
+    Returns its {"exit_code", "stdout", "stderr"} answer, None when no server listens.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            sock.sendall(encode_message({"argv": argv}))
+            with sock.makefile("rb") as answer:
+                line = answer.readline()
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+
+    if not line:
+        raise ConnectionError(f"The ledger server at {path} closed the connection")
+    return json.loads(line)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    response = None
+    if not LOCAL_COMMANDS.intersection(argv[:1]):
+        response = forward(argv, socket_path())
+
+    if response is None:
+        from cli.main import cli
+
+        cli(argv, prog_name=PROG_NAME)
+        return
+
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    sys.exit(response["exit_code"])
+
+
+if __name__ == "__main__":
+    main()
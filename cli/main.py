@@ -1,21 +1,117 @@
 import click
-from services.account_service import AccountService
-from services.transaction_service import TransactionService
-from services.currency_exchange_service import CurrencyExchangeService
-from services.reconstruction_service import ReconstructionService
-from database.connection import DatabaseConnection
-from database.connection_parameters import *
-from decimal import Decimal
+from dataclasses import dataclass
+from functools import cache
+from services.file_formats import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS
+import time
 from .validation import *
 
+# Services are built on first use and then shared, so a command only imports and
+# connects what it needs and --help or a usage error never touches the database.
 
-account_service = AccountService()
-transaction_service = TransactionService()
-currency_service = CurrencyExchangeService()
-reconstruction_service = ReconstructionService()
+
+@cache
+def snapshot_service():
+    from services.snapshot_service import SnapshotService
+
+    return SnapshotService()
+
+
+@cache
+def currency_service():
+    from services.currency_exchange_service import CurrencyExchangeService
+
+    return CurrencyExchangeService()
+
+
+@cache
+def account_service():
+    from services.account_service import AccountService
+
+    return AccountService(snapshot_service())
+
+
+@cache
+def transaction_service():
+    from services.transaction_service import TransactionService
+
+    return TransactionService(snapshot_service(), currency_service())
+
+
+@cache
+def reconstruction_service():
+    from services.reconstruction_service import ReconstructionService
+
+    return ReconstructionService()
+
+
+@cache
+def import_service():
+    from services.import_service import ImportService
+
+    return ImportService()
+
+
+@cache
+def rollup_service():
+    from services.rollup_service import RollupService
+
+    return RollupService()
+
+
+@cache
+def export_service():
+    from services.export_service import ExportService
+
+    return ExportService()
+
+
+@dataclass
+class CommandOutput:
+    """Where a command writes, passed as the click context object by cli/server.py."""
+
+    stdout: object
+    stderr: object
+
+
+def echo(message="", err=False):
+    """
+    click.echo to the running command's CommandOutput, or to stdout/stderr when it has
+    none. The ledger server runs commands concurrently, each with its own output.
+    """
+    output = click.get_current_context().find_object(CommandOutput)
+    if output is None:
+        click.echo(message, err=err)
+    else:
+        click.echo(message, file=output.stderr if err else output.stdout)
+
+
+def show_help(ctx, param, value):
+    """--help writing to the command's output, see echo()."""
+    if value and not ctx.resilient_parsing:
+        echo(ctx.get_help())
+        ctx.exit()
+
+
+class EchoHelp:
+    """Prints --help with show_help() instead of straight to stdout."""
+
+    def get_help_option(self, ctx):
+        option = super().get_help_option(ctx)
+        if option is not None:
+            option.callback = show_help
+        return option
+
+
+class LedgerCommand(EchoHelp, click.Command):
+    pass
+
+
+class LedgerGroup(EchoHelp, click.Group):
+    command_class = LedgerCommand
 
 
 @click.group(
+    cls=LedgerGroup,
     help="""
 Multi-Currency Financial Ledger CLI Tool
 
@@ -33,26 +129,61 @@ Examples:
     cli.py convert-currency --account-id 123 --from-currency EUR --amount 10 --to-currency GBP
   
     cli.py update_rate --from-currency USD --to-currency EUR --rate 1.10
+
+    cli.py get-rate --from-currency GBP --to-currency EUR
+
+    cli.py ingest-rates --file ticks.csv
+
+    cli.py rollup
   
     cli.py get-transactions --account-id 123 --limit 10 --type MoneyTransferred
+
+    cli.py get-transactions --account-id 123 --limit 10 --cursor <token printed by the previous page>
   
     cli.py get-balance --account-id acc123 --timestamp "2023-10-27 10:00:00"
-"""
+
+    cli.py import-transactions --file ledger.csv --chunk-size 50000
+
+    cli.py export-transactions --file - --format jsonl --account-id 123 --from "2023-01-01"
+
+    cli.py balances-at --timestamp "2023-10-27 23:59:59" --accounts 123,321
+
+    cli.py balance-history --account-id 123 --from "2023-10-01" --to "2023-10-02" --interval 1h
+
+    cli.py add-currency --code JPY
+
+Scripts running many commands can start `python -m cli.server` once and run the same
+commands with `python -m cli.client` instead, which forwards them to the server.
+""",
 )
 def cli():
     pass
 
 
-@cli.command(help="Create a new account with initial balances in USD, EUR, and GBP.")
+def require_currencies(*currencies):
+    """Rejects currencies missing from the currency table, see check_currencies()."""
+    check_currencies(
+        [currency for currency in currencies if currency is not None],
+        currency_service().get_currencies(),
+    )
+
+
+def format_balances(balances):
+    """'10.00 USD, 0.00 EUR, ...' for balances, Money by currency code."""
+    return ", ".join(f"{amount} {currency}" for currency, amount in balances.items())
+
+
+@cli.command(help="Create a new account, every currency starts at 0 unless given.")
 @click.option(
     "--initial-balance",
     callback=parse_currency_list,
     help="Comma-separated list of CUR=AMT (e.g. USD=100,EUR=50).",
 )
 def create_account(initial_balance):
-    click.echo(f"[CREATE ACCOUNT], Balances: {initial_balance}")
-    account_id = account_service.create_account(initial_balance)
-    click.echo(f"Created account with ID: {account_id}.")
+    require_currencies(*initial_balance)
+    echo(f"[CREATE ACCOUNT], Balances: {initial_balance}")
+    account_id = account_service().create_account(initial_balance)
+    echo(f"Created account with ID: {account_id}.")
 
 
 @cli.command(help="Deposit currency into an account.")
@@ -62,21 +193,24 @@ def create_account(initial_balance):
 @click.option(
     "--currency",
     required=True,
-    type=click.Choice(["USD", "EUR", "GBP"], case_sensitive=False),
+    callback=parse_currency,
     help="Currency",
 )
 @click.option(
-    "--amount", required=True, type=click.FLOAT, help="Amount to be deposited"
+    "--amount",
+    required=True,
+    type=click.STRING,
+    help="Amount to be deposited",
+    callback=validate_amount,
 )
 def deposit(account_id, currency, amount):
-    click.echo(
-        f"[DEPOSIT] Account: {account_id}, Currency: {currency}, Amount: {amount}"
-    )
-    transaction_id = transaction_service.deposit(account_id, currency, Decimal(amount))
+    require_currencies(currency)
+    echo(f"[DEPOSIT] Account: {account_id}, Currency: {currency}, Amount: {amount}")
+    transaction_id = transaction_service().deposit(account_id, currency, amount)
     if transaction_id < 0:
-        click.echo("Invalid Account ID.")
+        echo("Invalid Account ID.")
     else:
-        click.echo(
+        echo(
             f"Deposited money into Account: {account_id}, Currency: {currency}, Amount: {amount}"
         )
 
@@ -88,19 +222,20 @@ def deposit(account_id, currency, amount):
 @click.option(
     "--currency",
     required=True,
-    type=click.Choice(["USD", "EUR", "GBP"], case_sensitive=False),
+    callback=parse_currency,
     help="Currency",
 )
 @click.option(
     "--amount",
     required=True,
-    type=click.FLOAT,
+    type=click.STRING,
     help="Amount to be withdrawn.",
     callback=validate_amount,
 )
 def withdraw(account_id, currency, amount):
-    click.echo(f"[WITHDRAW] Account: {account_id}, Currency: {currency}")
-    transaction_id = transaction_service.withdraw(account_id, currency, Decimal(amount))
+    require_currencies(currency)
+    echo(f"[WITHDRAW] Account: {account_id}, Currency: {currency}")
+    transaction_id = transaction_service().withdraw(account_id, currency, amount)
     message = f"Withdrawn money from Account: {account_id}, Currency: {currency}, Amount: {amount}"
 
     if transaction_id == -1:
@@ -108,7 +243,7 @@ def withdraw(account_id, currency, amount):
     elif transaction_id == -2:
         message = f"Insufficient balance in {currency}"
 
-    click.echo(message)
+    echo(message)
 
 
 @cli.command(help="Transfer money between accounts (same or different currencies).")
@@ -121,23 +256,30 @@ def withdraw(account_id, currency, amount):
 @click.option(
     "--from-currency",
     required=True,
-    type=click.Choice(["USD", "EUR", "GBP"], case_sensitive=False),
+    callback=parse_currency,
     help="Currency to transfer from.",
 )
-@click.option("--amount", required=True, type=click.FLOAT, help="Amount to transfer.")
+@click.option(
+    "--amount",
+    required=True,
+    type=click.STRING,
+    help="Amount to transfer.",
+    callback=validate_amount,
+)
 @click.option(
     "--to-currency",
     required=False,
-    type=click.Choice(["USD", "EUR", "GBP"], case_sensitive=False),
+    callback=parse_currency,
     help="Target currency (for conversion). Omit for same-currency transfer.",
 )
 def transfer(from_account, to_account, from_currency, amount, to_currency):
-    click.echo(
-        f"[TRANSFER] {amount:.2f} {from_currency} from {from_account} to {to_account}"
+    require_currencies(from_currency, to_currency)
+    echo(
+        f"[TRANSFER] {amount} {from_currency} from {from_account} to {to_account}"
         + (f" as {to_currency}" if to_currency else "")
     )
-    transaction_id = transaction_service.transfer(
-        from_account, to_account, from_currency, to_currency, Decimal(amount)
+    transaction_id = transaction_service().transfer(
+        from_account, to_account, from_currency, to_currency, amount
     )
 
     message = (
@@ -150,15 +292,13 @@ def transfer(from_account, to_account, from_currency, amount, to_currency):
     elif transaction_id == -3:
         message = f"Insufficient balance in {from_currency}"
 
-    click.echo(message)
+    echo(message)
 
     if transaction_id >= 0:
         if to_currency != from_currency and to_currency is not None:
-            click.echo(
-                f"Converted Amount: {amount} in {from_currency} To {to_currency}"
-            )
+            echo(f"Converted Amount: {amount} in {from_currency} To {to_currency}")
         else:
-            click.echo(f"Currency: {from_currency}, Amount: {amount}")
+            echo(f"Currency: {from_currency}, Amount: {amount}")
 
 
 @cli.command(help="Convert currency within a single account.")
@@ -166,51 +306,54 @@ def transfer(from_account, to_account, from_currency, amount, to_currency):
 @click.option(
     "--from-currency",
     required=True,
-    type=click.Choice(["USD", "EUR", "GBP"], case_sensitive=False),
+    callback=parse_currency,
     help="Currency to convert from.",
 )
 @click.option(
     "--amount",
     required=True,
-    type=click.FLOAT,
+    type=click.STRING,
     help="Amount to convert.",
     callback=validate_amount,
 )
 @click.option(
     "--to-currency",
     required=True,
-    type=click.Choice(["USD", "EUR", "GBP"], case_sensitive=False),
+    callback=parse_currency,
     help="Currency to convert to.",
 )
 def convert_currency(account_id, from_currency, amount, to_currency):
-    click.echo(
-        f"[CONVERT CURRENCY] Account: {account_id}, {amount:.2f} {from_currency} to {to_currency or '[DEFAULT]'}"
+    require_currencies(from_currency, to_currency)
+    echo(
+        f"[CONVERT CURRENCY] Account: {account_id}, {amount} {from_currency} to {to_currency or '[DEFAULT]'}"
     )
-    transaction_id = transaction_service.convert_currency(
-        account_id, from_currency, to_currency, Decimal(amount)
+    transaction_id = transaction_service().convert_currency(
+        account_id, from_currency, to_currency, amount
     )
 
     message = f"Converted {amount} in {from_currency} to {to_currency}"
 
     if transaction_id == -1:
-        message = "Invalid account ID"
+        message = "Amount to convert must be positive"
     elif transaction_id == -2:
+        message = "Invalid account ID"
+    elif transaction_id == -3:
         message = f"Insufficient balance in {from_currency}"
 
-    click.echo(message)
+    echo(message)
 
 
 @cli.command(help="Update currency conversion rate.")
 @click.option(
     "--from-currency",
     required=True,
-    type=click.Choice(["USD", "EUR", "GBP"], case_sensitive=False),
+    callback=parse_currency,
     help="Source currency.",
 )
 @click.option(
     "--to-currency",
     required=True,
-    type=click.Choice(["USD", "EUR", "GBP"], case_sensitive=False),
+    callback=parse_currency,
     help="Target currency.",
 )
 @click.option(
@@ -221,9 +364,41 @@ def convert_currency(account_id, from_currency, amount, to_currency):
     callback=validate_rate,
 )
 def update_rate(from_currency, to_currency, rate):
-    click.echo(f"[UPDATE RATE] {from_currency} → {to_currency} = {rate:.2f}")
-    currency_service.update_exchange_rate(from_currency, to_currency, rate)
-    click.echo(f"Exchange rate updated between {from_currency} and {to_currency}")
+    require_currencies(from_currency, to_currency)
+    echo(f"[UPDATE RATE] {from_currency} → {to_currency} = {rate:.2f}")
+    try:
+        currency_service().update_exchange_rate(from_currency, to_currency, rate)
+    except ValueError as e:
+        echo(str(e))
+        return
+    echo(f"Exchange rate updated between {from_currency} and {to_currency}")
+
+
+@cli.command(help="Show the current rate between two currencies and how it is derived.")
+@click.option(
+    "--from-currency",
+    required=True,
+    callback=parse_currency,
+    help="Source currency.",
+)
+@click.option(
+    "--to-currency",
+    required=True,
+    callback=parse_currency,
+    help="Target currency.",
+)
+def get_rate(from_currency, to_currency):
+    require_currencies(from_currency, to_currency)
+    exchange = currency_service().get_latest_rate(from_currency, to_currency)
+    if exchange is None:
+        echo(f"No exchange rate available between {from_currency} and {to_currency}")
+        return
+
+    echo(f"{from_currency} → {to_currency} = {exchange.rate}")
+    for leg in exchange.legs:
+        echo(
+            f"  via {leg.from_currency} → {leg.to_currency} = {leg.rate} (updated {leg.timestamp})"
+        )
 
 
 @cli.command(
@@ -232,8 +407,9 @@ def update_rate(from_currency, to_currency, rate):
 @click.option("--account-id", required=True, type=click.INT, help="Account ID.")
 @click.option(
     "--limit",
-    type=click.INT,
-    required=False,
+    type=click.IntRange(min=1),
+    default=5,
+    show_default=True,
     help="Limit the number of transactions returned.",
 )
 @click.option(
@@ -244,23 +420,38 @@ def update_rate(from_currency, to_currency, rate):
     ),
     help="Type of the transactions returned.",
 )
-def get_transactions(account_id, limit, type):
-    click.echo(
+@click.option(
+    "--cursor",
+    "page_token",
+    required=False,
+    help="Continue after a previous page, with the token it printed.",
+)
+def get_transactions(account_id, limit, type, page_token):
+    echo(
         f"[TRANSACTION HISTORY] Account ID: {account_id}"
         + (f", Limit: {limit}" if limit else "")
     )
 
-    message = transaction_service.get_transaction_history_for_account(
-        account_id, limit, type
-    )
+    try:
+        (
+            message,
+            next_page_token,
+        ) = transaction_service().get_transaction_history_for_account(
+            account_id, limit, type, page_token
+        )
+    except ValueError as e:
+        echo(str(e))
+        return
 
     if not message:
-        click.echo(
+        echo(
             f"No transactions {f'of type {type}' if type else ''} found for this account."
         )
         return
 
-    click.echo(message)
+    echo(message)
+    if next_page_token:
+        echo(f"Next page: --cursor {next_page_token}")
 
 
 @cli.command(help="Get Account balance, optionally at a specific timestamp.")
@@ -273,33 +464,288 @@ def get_transactions(account_id, limit, type):
 )
 def get_balance(account_id, timestamp):
     if timestamp:
-        click.echo(f"[ACCOUNT BALANCE @ {timestamp}] ID: {account_id}")
+        echo(f"[ACCOUNT BALANCE @ {timestamp}] ID: {account_id}")
         # Use reconstruction service
-        snapshot = reconstruction_service.reconstruct_state(account_id, timestamp)
+        snapshot = reconstruction_service().reconstruct_state(account_id, timestamp)
         if snapshot:
-            usd_balance = snapshot.usd_balance
-            eur_balance = snapshot.eur_balance
-            gbp_balance = snapshot.gbp_balance
             # Check if the account existed at that time (balances might be 0)
             # Assuming reconstruction returns None or raises error for non-existent accounts at that time
             # or returns a snapshot with potentially zero balances if created later.
             # We'll rely on the snapshot object being valid if returned.
-            message = f"ID: {account_id} @ {timestamp} | Balance: {usd_balance} USD, {eur_balance} EUR, {gbp_balance} GBP"
+            message = f"ID: {account_id} @ {timestamp} | Balance: {format_balances(snapshot.balances)}"
         else:
             # Handle cases where reconstruction failed (e.g., account didn't exist yet, no snapshots found)
             message = f"Could not reconstruct balance for Account ID: {account_id} at {timestamp}. Account might not have existed or no history available."
-            # Set a sentinel value to indicate failure like the original logic, if needed downstream
-            usd_balance = -1
     else:
-        click.echo(f"[CURRENT ACCOUNT BALANCE] ID: {account_id}")
+        echo(f"[CURRENT ACCOUNT BALANCE] ID: {account_id}")
         # Use account service for current balance (existing logic)
-        usd_balance, eur_balance, gbp_balance = account_service.get_balance(account_id)
-        if usd_balance < 0:  # Existing check for invalid account ID
+        balances = account_service().get_balance(account_id)
+        if balances == -1:  # Existing check for invalid account ID
             message = "Invalid account ID"
         else:
-            message = f"ID: {account_id} | Balance: {usd_balance} USD, {eur_balance} EUR, {gbp_balance} GBP"
+            message = f"ID: {account_id} | Balance: {format_balances(balances)}"
+
+    echo(message)
+
+
+@cli.command(help="Bulk import historical transactions from a CSV or JSON Lines file.")
+@click.option(
+    "--file",
+    required=True,
+    type=click.File("r"),
+    help="File to import, '-' reads from stdin.",
+)
+@click.option(
+    "--format",
+    required=False,
+    type=click.Choice(["csv", "jsonl"], case_sensitive=False),
+    help="File format. Inferred from the file extension when omitted.",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_CHUNK_SIZE,
+    show_default=True,
+    help="Number of transactions loaded and committed together.",
+)
+def import_transactions(file, format, chunk_size):
+    if format is None:
+        format = "jsonl" if file.name.endswith((".jsonl", ".json")) else "csv"
+    echo(f"[IMPORT TRANSACTIONS] File: {file.name}, Format: {format}")
+
+    imported = 0
+    start = time.perf_counter()
+    try:
+        for imported in import_service().import_transactions(
+            file, format.lower(), chunk_size
+        ):
+            echo(f"Imported {imported} transactions...")
+    except ValueError as e:
+        echo(f"Import stopped after {imported} transactions: {e}")
+        return
+
+    elapsed = time.perf_counter() - start
+    echo(
+        f"Imported {imported} transactions in {elapsed:.2f}s"
+        + (f" ({imported / elapsed:.0f} rows/s)" if elapsed > 0 else "")
+    )
+
+
+@cli.command(
+    help="Publish the rate ticks of a CSV or JSON Lines file as one rate board."
+)
+@click.option(
+    "--file",
+    required=True,
+    type=click.File("r"),
+    help="Ticks with timestamp, from_currency, to_currency and rate, '-' reads from stdin.",
+)
+@click.option(
+    "--format",
+    required=False,
+    type=click.Choice(["csv", "jsonl"], case_sensitive=False),
+    help="File format. Inferred from the file extension when omitted.",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_CHUNK_SIZE,
+    show_default=True,
+    help="Number of ticks COPYed together.",
+)
+def ingest_rates(file, format, chunk_size):
+    if format is None:
+        format = "jsonl" if file.name.endswith((".jsonl", ".json")) else "csv"
+    echo(f"[INGEST RATES] File: {file.name}, Format: {format}")
+
+    start = time.perf_counter()
+    try:
+        board = import_service().ingest_rates(file, format.lower(), chunk_size)
+    except ValueError as e:
+        echo(f"No rates published: {e}")
+        return
+
+    elapsed = time.perf_counter() - start
+    echo(
+        f"Published rate board {board.id} with {board.published} rates in {elapsed:.2f}s"
+        + (f" ({board.ticks / elapsed:.0f} ticks/s)" if elapsed > 0 else "")
+    )
+    echo(
+        f"{board.ticks} ticks read, {board.duplicates} duplicates dropped, "
+        f"{board.inverses} inverses added"
+    )
+
+
+@cli.command(help="Update the daily closing balances historical balances start from.")
+@click.option(
+    "--through",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Last day to roll up (YYYY-MM-DD). Defaults to the last day that ended.",
+)
+def rollup(through):
+    echo("[ROLLUP]" + (f" Through: {through.date()}" if through else ""))
+
+    accounts = 0
+    start = time.perf_counter()
+    for accounts in rollup_service().roll_up(through.date() if through else None):
+        echo(f"Rolled up {accounts} accounts...")
+
+    elapsed = time.perf_counter() - start
+    echo(f"Rolled up {accounts} accounts in {elapsed:.2f}s")
+
+
+@cli.command(help="Stream transactions to a CSV or JSON Lines file, oldest first.")
+@click.option(
+    "--file",
+    required=True,
+    type=click.File("w"),
+    help="File to write, '-' writes to stdout.",
+)
+@click.option(
+    "--format",
+    required=False,
+    type=click.Choice(EXPORT_FORMATS, case_sensitive=False),
+    help="File format. Inferred from the file extension when omitted.",
+)
+@click.option("--account-id", type=click.INT, help="Only this account's transactions.")
+@click.option(
+    "--type",
+    type=click.Choice(
+        ["DepositMade", "WithdrawalMade", "MoneyTransferred", "CurrencyConverted"]
+    ),
+    help="Only transactions of this type.",
+)
+@click.option(
+    "--from",
+    "start",
+    type=click.DateTime(),
+    help="Only transactions at or after this time (e.g., 'YYYY-MM-DD HH:MM:SS').",
+)
+@click.option(
+    "--to",
+    "end",
+    type=click.DateTime(),
+    help="Only transactions at or before this time (e.g., 'YYYY-MM-DD HH:MM:SS').",
+)
+def export_transactions(file, format, account_id, type, start, end):
+    if format is None:
+        format = "jsonl" if file.name.endswith((".jsonl", ".json")) else "csv"
+    # Progress goes to stderr, stdout may be the export itself
+    echo(f"[EXPORT TRANSACTIONS] File: {file.name}, Format: {format}", err=True)
+
+    start_time = time.perf_counter()
+    try:
+        exported = export_service().export_transactions(
+            file, format.lower(), account_id, type, start, end
+        )
+    except ValueError as e:
+        echo(str(e), err=True)
+        return
+
+    elapsed = time.perf_counter() - start_time
+    echo(
+        f"Exported {exported} transactions in {elapsed:.2f}s"
+        + (f" ({exported / elapsed:.0f} rows/s)" if elapsed > 0 else ""),
+        err=True,
+    )
+
+
+@cli.command(help="Get the balances of all (or some) accounts at a point in time.")
+@click.option(
+    "--timestamp",
+    required=True,
+    type=click.DateTime(),
+    help="Point in time (e.g., 'YYYY-MM-DD HH:MM:SS').",
+)
+@click.option(
+    "--accounts",
+    required=False,
+    callback=parse_account_ids,
+    help="Comma-separated account IDs. Omit for every account.",
+)
+def balances_at(timestamp, accounts):
+    echo(
+        f"[BALANCES @ {timestamp}]"
+        + (f" Accounts: {', '.join(map(str, accounts))}" if accounts else "")
+    )
+    snapshots = reconstruction_service().reconstruct_balances(timestamp, accounts)
+
+    if not snapshots:
+        echo("No accounts existed at that time.")
+        return
+
+    for snapshot in snapshots:
+        echo(
+            f"ID: {snapshot.account_id} | Balance: {format_balances(snapshot.balances)}"
+        )
+
+
+@cli.command(help="Get an account's balances at regular intervals over a time range.")
+@click.option("--account-id", required=True, type=click.INT, help="Account ID")
+@click.option(
+    "--from",
+    "start",
+    required=True,
+    type=click.DateTime(),
+    help="Start of the history (e.g., 'YYYY-MM-DD HH:MM:SS').",
+)
+@click.option(
+    "--to",
+    "end",
+    required=True,
+    type=click.DateTime(),
+    help="End of the history (e.g., 'YYYY-MM-DD HH:MM:SS').",
+)
+@click.option(
+    "--interval",
+    default="1h",
+    show_default=True,
+    callback=parse_interval,
+    help="Time between two points, e.g. 30s, 15m, 1h or 1d.",
+)
+def balance_history(account_id, start, end, interval):
+    echo(
+        f"[BALANCE HISTORY] ID: {account_id}, From: {start}, To: {end}, Every: {interval}"
+    )
+    try:
+        history = reconstruction_service().balance_history(
+            account_id, start, end, interval
+        )
+    except ValueError as e:
+        echo(str(e))
+        return
+
+    if history is None:
+        echo(
+            f"Could not reconstruct balance for Account ID: {account_id} at {start}. Account might not have existed or no history available."
+        )
+        return
+
+    currencies = list(history.balances)
+    for timestamp, *balances in zip(history.timestamps, *history.balances.values()):
+        echo(
+            f"{timestamp} | Balance: {format_balances(dict(zip(currencies, balances)))}"
+        )
+
+
+@cli.command(help="Add a currency, every account gets a zero balance in it.")
+@click.option(
+    "--code",
+    required=True,
+    callback=parse_currency,
+    help="3-letter currency code (e.g. JPY).",
+)
+def add_currency(code):
+    echo(f"[ADD CURRENCY] {code}")
+    if currency_service().add_currency(code):
+        echo(f"Added currency {code}")
+    else:
+        echo(f"Currency {code} already exists")
+
 
-    click.echo(message)
+@cli.command(help="List the currencies accounts hold balances in.")
+def list_currencies():
+    echo(", ".join(currency_service().get_currencies()))
 
 
 if __name__ == "__main__":
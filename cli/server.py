@@ -0,0 +1,132 @@
+"""
+Long-running ledger server. One process keeps the services and their warm connection
+pool, and runs the cli/main.py commands that cli/client.py sends it over a Unix socket.
+
+    python -m cli.server --socket /tmp/ledger.sock
+
+Without --socket it listens on $LEDGER_SOCKET, or ledger-<uid>.sock in the temporary
+directory, which is where the client looks by default.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import traceback
+import click
+from .client import PROG_NAME, encode_message, socket_path
+from . import main as commands
+from .main import CommandOutput, cli
+
+
+def run_command(argv):
+    """
+    Run one cli/main.py command line in this process, as the shell would, writing to
+    output streams of its own so several commands can run at once.
+    Returns (exit code, stdout, stderr).
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    try:
+        exit_code = cli.main(
+            argv,
+            prog_name=PROG_NAME,
+            standalone_mode=False,
+            obj=CommandOutput(stdout, stderr),
+        )
+        exit_code = exit_code if isinstance(exit_code, int) else 0
+    except click.ClickException as e:
+        e.show(file=stderr)
+        exit_code = e.exit_code
+    except click.Abort:
+        click.echo("Aborted!", file=stderr)
+        exit_code = 1
+    except Exception:
+        traceback.print_exc(file=stderr)
+        exit_code = 1
+    return exit_code, stdout.getvalue(), stderr.getvalue()
+
+
+def build_services():
+    """
+    Build the services the commands share, connecting the pool before the first request.
+    The exchange rates are reloaded as soon as another process publishes new ones.
+    """
+    commands.account_service()
+    commands.transaction_service()
+    commands.currency_service().start_listening()
+    commands.reconstruction_service()
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    """Answers each {"argv": [...]} line of a connection with one result line."""
+
+    def handle(self):
+        for line in self.rfile:
+            request = json.loads(line)
+            exit_code, stdout, stderr = run_command(request["argv"])
+            self.wfile.write(
+                encode_message(
+                    {"exit_code": exit_code, "stdout": stdout, "stderr": stderr}
+                )
+            )
+            self.wfile.flush()
+
+
+class LedgerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        remove_stale_socket(path)
+        super().__init__(path, CommandHandler)
+        # Same access as the user's own database.ini
+        os.chmod(path, 0o600)
+        self.path = path
+
+    def server_close(self):
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+
+def remove_stale_socket(path):
+    """Remove the socket file a dead server left behind, refuse to replace a live one."""
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise ValueError(f"A ledger server is already listening on {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--socket", default=socket_path())
+    args = parser.parse_args()
+
+    build_services()
+    server = LedgerServer(args.socket)
+    # serve_forever() returns on SIGTERM as it does on Ctrl+C
+    signal.signal(
+        signal.SIGTERM,
+        lambda *_: threading.Thread(target=server.shutdown).start(),
+    )
+    print(f"Ledger server listening on {args.socket}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        commands.currency_service().stop_listening()
+
+
+if __name__ == "__main__":
+    main()
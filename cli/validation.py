@@ -1,35 +1,89 @@
 from collections import defaultdict
+from datetime import timedelta
 from decimal import Decimal, getcontext
+from models.money import Money
 import click
 
-VALID_CURRENCIES = ["USD", "EUR", "GBP"]
+INTERVAL_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+
+def currency_code(value):
+    """
+    Upper-cased 3-letter currency code. Which currencies exist is data, see
+    check_currencies().
+    """
+    code = value.strip().upper()
+    if len(code) != 3 or not code.isalpha():
+        raise click.BadParameter(
+            f"Invalid currency '{value}', expected a 3-letter code such as USD"
+        )
+    return code
+
+
+def parse_currency(ctx, param, value):
+    """Parses an optional currency code."""
+    return currency_code(value) if value is not None else None
+
+
+def check_currencies(currencies, valid_currencies):
+    """
+    Rejects the first of <currencies> missing from <valid_currencies>, the codes of the
+    currency table. Commands check once every option parsed, so that other usage
+    errors are reported without a database round trip.
+    """
+    for currency in currencies:
+        if currency not in valid_currencies:
+            raise click.BadParameter(
+                f"Invalid currency '{currency}'. Must be one of {', '.join(valid_currencies)}"
+            )
 
 
 def parse_currency_list(ctx, param, value):
-    """Parses comma-separated CUR=AMT entries into a dict with currency validation."""
+    """Parses comma-separated CUR=AMT entries into a dict, see check_currencies()."""
     if not value:
-        return defaultdict(Decimal)
-    currencies = defaultdict(Decimal)
+        return defaultdict(Money)
+    currencies = defaultdict(Money)
     for pair in value.split(","):
         if "=" not in pair:
             raise click.BadParameter(f"Invalid format: '{pair}', expected CUR=AMT")
         cur, amt = pair.strip().split("=")
-        cur = cur.upper()
-        if cur not in VALID_CURRENCIES:
-            raise click.BadParameter(
-                f"Invalid currency '{cur}'. Must be one of {', '.join(VALID_CURRENCIES)}"
-            )
+        cur = currency_code(cur)
         try:
-            currencies[cur] = round(Decimal(amt), 2)
-        except Exception:
+            currencies[cur] = Money.parse(amt)
+        except ValueError:
             raise click.BadParameter(f"Invalid amount for {cur}: {amt}")
     return currencies
 
 
+def parse_account_ids(ctx, param, value):
+    """Parses a comma-separated list of account IDs."""
+    if not value:
+        return None
+    try:
+        return [int(account_id) for account_id in value.split(",")]
+    except ValueError:
+        raise click.BadParameter(f"Invalid account IDs: '{value}', expected e.g. 1,2,3")
+
+
+def parse_interval(ctx, param, value):
+    """Parses intervals like 30s, 15m, 1h or 7d into a timedelta."""
+    unit = value[-1:].lower()
+    if unit not in INTERVAL_UNITS or not value[:-1].isdigit() or int(value[:-1]) <= 0:
+        raise click.BadParameter(
+            f"Invalid interval '{value}', expected a positive number followed by s, m, h or d (e.g. 1h)"
+        )
+    return timedelta(**{INTERVAL_UNITS[unit]: int(value[:-1])})
+
+
 def validate_amount(ctx, param, value):
-    if Decimal(value) <= 0:
+    """Parses the amount into Money, rounded half to even to the cent."""
+    try:
+        amount = Money.parse(value)
+    except ValueError:
+        raise click.BadParameter(f"Invalid amount: {value}")
+    if amount <= Money(0):
         raise click.BadParameter(f"The amount must be positive. You provided: {value}")
-    return round(Decimal(value), 2)
+    return amount
 
 
 def validate_rate(ctx, param, value):
@@ -0,0 +1,80 @@
+import asyncio
+from contextlib import asynccontextmanager
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+from .connection_parameters import POOL_DEFAULTS
+
+
+def make_async_conninfo(connection_params):
+    """
+    libpq connection string from a database.ini section. psycopg2 accepts
+    database= as an alias of dbname=, psycopg 3 does not.
+    """
+    params = dict(connection_params)
+    if "database" in params:
+        params["dbname"] = params.pop("database")
+    return make_conninfo(**params)
+
+
+class AsyncDatabaseConnection:
+    """
+    asyncio counterpart of DatabaseConnection, backed by a psycopg 3 AsyncConnectionPool.
+
+    Unlike DatabaseConnection it is not a singleton: an asyncio pool belongs to the
+    event loop it was opened in. It opens on first use, call close() before the loop ends.
+    """
+
+    def __init__(self, connection_params=None, pool_params=None):
+        self.connection_params = connection_params or {}
+        self.pool_params = pool_params or POOL_DEFAULTS
+        max_lifetime = self.pool_params["max_lifetime"]
+        self._connection_pool = AsyncConnectionPool(
+            make_async_conninfo(self.connection_params),
+            min_size=self.pool_params["min_size"],
+            max_size=self.pool_params["max_size"],
+            timeout=self.pool_params["checkout_timeout"],
+            max_lifetime=max_lifetime if max_lifetime is not None else float("inf"),
+            open=False,
+        )
+        self._open_lock = None
+
+    async def open(self):
+        if not self._connection_pool.closed:
+            return
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if self._connection_pool.closed:
+                await self._connection_pool.open()
+
+    async def close(self):
+        await self._connection_pool.close()
+        self._open_lock = None
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Check a connection out of the pool, it is handed back when the block exits.
+        Waits up to the pool's checkout_timeout when every connection is busy.
+        """
+        await self.open()
+        async with self._connection_pool.connection() as conn:
+            yield conn
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Unit of work: yields a pooled connection, commits once when the block succeeds,
+        rolls back when it raises and always hands the connection back to the pool.
+        """
+        async with self.connection() as conn:
+            try:
+                yield conn
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+
+    def pool_metrics(self):
+        """psycopg_pool statistics: pool size, waiting requests, wait times..."""
+        return self._connection_pool.get_stats()
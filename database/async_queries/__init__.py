@@ -0,0 +1,20 @@
+"""
+asyncio (psycopg 3) versions of the database/queries functions the async services need.
+They run the same SQL, shared as module constants, and return the same models.
+"""
+
+from psycopg import adapters
+from psycopg.adapt import Dumper
+from models.money import Money
+
+
+class MoneyDumper(Dumper):
+    """Money is sent as an exact NUMERIC, like adapt_money() does for psycopg2."""
+
+    oid = adapters.types["numeric"].oid
+
+    def dump(self, money):
+        return str(money).encode()
+
+
+adapters.register_dumper(Money, MoneyDumper)
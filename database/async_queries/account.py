@@ -0,0 +1,73 @@
+from database.queries.account import (
+    CREATE_ACCOUNT_SQL,
+    DEBIT_BALANCE_SQL,
+    GET_ACCOUNT_SQL,
+    LOCK_BALANCES_SQL,
+    RECORD_TRANSACTION_SQL,
+    RESET_SNAPSHOT_COUNTERS_SQL,
+    RESET_SNAPSHOT_COUNTERS_TEMPLATE,
+    UPDATE_BALANCE_SQL,
+    accounts_from_rows,
+)
+from models.money import Money
+
+
+async def create_account(conn, balances=None):
+    balances = balances or {}
+    cursor = conn.cursor()
+    await cursor.execute(CREATE_ACCOUNT_SQL, (list(balances), list(balances.values())))
+    return (await cursor.fetchone())[0]
+
+
+async def get_account(conn, account_id):
+    cursor = conn.cursor()
+    await cursor.execute(GET_ACCOUNT_SQL, (account_id,))
+    accounts = accounts_from_rows(await cursor.fetchall())
+    return accounts[0] if accounts else None
+
+
+async def update_balance(conn, account_id, currency, amount):
+    cursor = conn.cursor()
+    await cursor.execute(UPDATE_BALANCE_SQL, (amount, account_id, currency))
+
+
+async def debit_balance(conn, account_id, currency, amount):
+    cursor = conn.cursor()
+    await cursor.execute(DEBIT_BALANCE_SQL, (amount, account_id, currency, amount))
+    row = await cursor.fetchone()
+    if row:
+        return Money.parse(row[0])
+    return None
+
+
+async def lock_balances(conn, keys):
+    keys = sorted(set(keys))
+    cursor = conn.cursor()
+    await cursor.execute(
+        LOCK_BALANCES_SQL,
+        ([account_id for account_id, _ in keys], [currency for _, currency in keys]),
+    )
+    return {tuple(row) for row in await cursor.fetchall()}
+
+
+async def record_transaction(conn, account_id, currency, legs=1):
+    cursor = conn.cursor()
+    await cursor.execute(
+        RECORD_TRANSACTION_SQL,
+        {"account_id": account_id, "currency": currency, "legs": legs},
+    )
+    rows = await cursor.fetchall()
+    return accounts_from_rows(row[:-1] for row in rows)[0], rows[0][-1]
+
+
+async def reset_snapshot_counters(conn, snapshots):
+    """
+    Same statement as the psycopg2 version, psycopg 3 has no execute_values so the
+    VALUES list is spelled out with one template per snapshot.
+    """
+    values = ", ".join([RESET_SNAPSHOT_COUNTERS_TEMPLATE] * len(snapshots))
+    cursor = conn.cursor()
+    await cursor.execute(
+        RESET_SNAPSHOT_COUNTERS_SQL.replace("VALUES %s", f"VALUES {values}"),
+        [value for snapshot in snapshots for value in snapshot],
+    )
@@ -0,0 +1,43 @@
+from database.queries.currency_exchange import (
+    CREATE_RATE_BOARD_SQL,
+    EXCHANGE_RATE_CHANNEL,
+    GET_ALL_LATEST_RATES_SQL,
+    GET_LATEST_RATES_SQL,
+    INSERT_BOARD_RATES_SQL,
+    NOTIFY_RATE_BOARD_SQL,
+    RATE_BOARD_LOCK_KEY,
+    UPDATE_CURRENT_RATES_SQL,
+    board_rates_parameters,
+    exchanges_by_pair,
+)
+
+
+async def publish_rates(conn, rates):
+    """
+    Insert (from_currency, to_currency, rate) triples as one rate board and publish it.
+    Returns the ids of the new exchange rates, in order.
+    """
+    cursor = conn.cursor()
+    await cursor.execute(CREATE_RATE_BOARD_SQL, (RATE_BOARD_LOCK_KEY,))
+    board_id = (await cursor.fetchone())[0]
+    await cursor.execute(
+        INSERT_BOARD_RATES_SQL, board_rates_parameters(board_id, rates)
+    )
+    exchange_ids = [row[0] for row in await cursor.fetchall()]
+    await cursor.execute(UPDATE_CURRENT_RATES_SQL, (board_id,))
+    await cursor.execute(NOTIFY_RATE_BOARD_SQL, (EXCHANGE_RATE_CHANNEL, board_id))
+    return exchange_ids
+
+
+async def get_latest_rates(conn, pairs):
+    cursor = conn.cursor()
+    await cursor.execute(
+        GET_LATEST_RATES_SQL, ([pair[0] for pair in pairs], [pair[1] for pair in pairs])
+    )
+    return exchanges_by_pair(await cursor.fetchall())
+
+
+async def get_all_latest_rates(conn, since_board_id=0):
+    cursor = conn.cursor()
+    await cursor.execute(GET_ALL_LATEST_RATES_SQL, (since_board_id,))
+    return exchanges_by_pair(await cursor.fetchall())
@@ -0,0 +1,9 @@
+from database.queries.snapshots import CREATE_SNAPSHOT_SQL
+
+
+async def create_snapshot(conn, account_id, balances):
+    cursor = conn.cursor()
+    await cursor.execute(
+        CREATE_SNAPSHOT_SQL, (account_id, list(balances), list(balances.values()))
+    )
+    return account_id
@@ -0,0 +1,21 @@
+from decimal import Decimal
+from database.queries.transaction import CREATE_TRANSACTION_SQL
+from models.money import Money
+
+
+async def create_transaction(
+    conn,
+    type: str,
+    from_account: int,
+    to_account: int,
+    from_currency: str,
+    to_currency: str,
+    amount: Money,
+    rate: Decimal = 1,
+):
+    cursor = conn.cursor()
+    await cursor.execute(
+        CREATE_TRANSACTION_SQL,
+        (type, from_account, to_account, from_currency, to_currency, amount, rate),
+    )
+    return (await cursor.fetchone())[0]
@@ -1,7 +1,6 @@
-import psycopg2
 from contextlib import contextmanager
-from psycopg2 import pool
-import os
+from .connection_parameters import POOL_DEFAULTS
+from .pool import ConnectionPool
 
 
 class DatabaseConnection:
@@ -9,40 +8,54 @@ class DatabaseConnection:
 
     _instance = None  # Singleton instance
 
-    def __new__(cls, connection_params=None):
+    def __new__(cls, connection_params=None, pool_params=None):
         if cls._instance is None:
             cls._instance = super(DatabaseConnection, cls).__new__(cls)
             cls._instance.connection_params = connection_params or {}
-            cls._instance._connection_pool = psycopg2.pool.SimpleConnectionPool(
-                1, 10, **cls._instance.connection_params
+            cls._instance.pool_params = pool_params or POOL_DEFAULTS
+            cls._instance._connection_pool = ConnectionPool(
+                **cls._instance.pool_params, **cls._instance.connection_params
             )
         return cls._instance
 
-    def __init__(self, connection_params=None):
+    def __init__(self, connection_params=None, pool_params=None):
         # Prevent re-initialization of the pool if the singleton already exists
         if hasattr(self, "_connection_pool"):
             return
 
         self.connection_params = connection_params or {}
-        self._connection_pool = psycopg2.pool.SimpleConnectionPool(
-            1, 10, **self.connection_params
+        self.pool_params = pool_params or POOL_DEFAULTS
+        self._connection_pool = ConnectionPool(
+            **self.pool_params, **self.connection_params
         )
 
-    # @contextmanager
-    def get_connection(self):
-        """Context manager to get a connection"""
-        return self._connection_pool.getconn()
+    @contextmanager
+    def connection(self):
+        """
+        Check a connection out of the pool, it is handed back when the block exits.
+        Waits up to the pool's checkout_timeout when every connection is busy.
+        """
+        with self._connection_pool.connection() as conn:
+            yield conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work: yields a pooled connection, commits once when the block succeeds,
+        rolls back when it raises and always hands the connection back to the pool.
+        Query functions never commit themselves, so everything inside the block is atomic.
+        """
+        with self.connection() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def pool_metrics(self):
+        """Checkout wait times, in-use count and checkouts/sec of the pool."""
+        return self._connection_pool.metrics()
 
     def close_all(self):
         self._connection_pool.closeall()
-
-    # @contextmanager
-    # def transaction(self):
-    #     """Context manager for database transactions"""
-    #     with self.get_connection() as conn:
-    #         try:
-    #             yield conn
-    #             conn.commit()
-    #         except Exception:
-    #             conn.rollback()
-    #             raise
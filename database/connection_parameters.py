@@ -1,8 +1,38 @@
 import configparser
 
+POOL_DEFAULTS = {
+    "min_size": 1,
+    "max_size": 10,
+    "checkout_timeout": 30.0,
+    "max_lifetime": None,
+}
+
 
 def get_database_parameters(file_name):
     config = configparser.ConfigParser()
     config.read(file_name)
 
     return config
+
+
+def get_pool_parameters(config, section_name="pool"):
+    """
+    Read the optional [pool] section (or <section_name>), falling back to POOL_DEFAULTS.
+    max_lifetime is in seconds; leave it out to keep connections forever.
+    """
+    params = dict(POOL_DEFAULTS)
+    if not config.has_section(section_name):
+        return params
+
+    section = config[section_name]
+    params["min_size"] = section.getint("min_size", params["min_size"])
+    params["max_size"] = section.getint("max_size", params["max_size"])
+    params["checkout_timeout"] = section.getfloat(
+        "checkout_timeout", params["checkout_timeout"]
+    )
+    params["max_lifetime"] = section.getfloat("max_lifetime", params["max_lifetime"])
+
+    if not 0 <= params["min_size"] <= params["max_size"]:
+        raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size.")
+
+    return params
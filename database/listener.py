@@ -0,0 +1,60 @@
+import select
+import threading
+import psycopg2
+
+
+class NotificationListener(threading.Thread):
+    """
+    Background thread running LISTEN <channel> on a dedicated connection and calling
+    <on_notify>(payload) for every NOTIFY.
+
+    Notifications sent while the connection is down are lost, so <on_reconnect>() is
+    called after every (re)connection to let the caller drop whatever it cached.
+    """
+
+    def __init__(
+        self,
+        connection_params,
+        channel,
+        on_notify,
+        on_reconnect=None,
+        poll_interval=1.0,
+        retry_interval=5.0,
+    ):
+        super().__init__(name=f"listen-{channel}", daemon=True)
+        self.connection_params = connection_params
+        self.channel = channel
+        self.on_notify = on_notify
+        self.on_reconnect = on_reconnect
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self.listening = threading.Event()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except psycopg2.Error:
+                self.listening.clear()
+                self._stopped.wait(self.retry_interval)
+
+    def stop(self):
+        self._stopped.set()
+
+    def _listen(self):
+        conn = psycopg2.connect(**self.connection_params)
+        try:
+            conn.autocommit = True
+            conn.cursor().execute(f'LISTEN "{self.channel}";')
+            if self.on_reconnect is not None:
+                self.on_reconnect()
+            self.listening.set()
+
+            while not self._stopped.is_set():
+                if select.select([conn], [], [], self.poll_interval)[0]:
+                    conn.poll()
+                    while conn.notifies:
+                        self.on_notify(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
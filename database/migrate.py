@@ -0,0 +1,112 @@
+import os
+import re
+from .connection import DatabaseConnection
+from .connection_parameters import get_database_parameters, get_pool_parameters
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Arbitrary key for pg_advisory_lock, so concurrent runners apply migrations one at a time.
+MIGRATION_LOCK_KEY = 72_631_001
+
+
+def list_migrations(directory=MIGRATIONS_DIR):
+    """
+    Return (version, name, path) for every migration file in <directory>, ordered by version.
+    Migration files are named <version>_<name>.sql, e.g. 0002_hot_query_indexes.sql.
+    """
+    migrations = {}
+    for file_name in os.listdir(directory):
+        match = MIGRATION_FILE_PATTERN.match(file_name)
+        if not match:
+            continue
+
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(
+                f"Duplicate migration version {version}: {file_name} and {os.path.basename(migrations[version][2])}"
+            )
+        migrations[version] = (
+            version,
+            match.group(2),
+            os.path.join(directory, file_name),
+        )
+
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def create_version_table(conn):
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        );
+        """
+    )
+    conn.commit()
+
+
+def get_current_version(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version;")
+    return cursor.fetchone()[0]
+
+
+def apply_migrations(conn, target_version=None, directory=MIGRATIONS_DIR):
+    """
+    Apply every migration newer than the recorded schema version, up to <target_version>.
+    Each migration runs and is recorded in its own transaction.
+    Returns the list of applied versions.
+    """
+    create_version_table(conn)
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_KEY,))
+
+    try:
+        current_version = get_current_version(conn)
+        applied = []
+
+        for version, name, path in list_migrations(directory):
+            if version <= current_version:
+                continue
+            if target_version is not None and version > target_version:
+                break
+
+            with open(path) as f:
+                sql = f.read()
+
+            try:
+                cursor.execute(sql)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (%s, %s);",
+                    (version, name),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            applied.append(version)
+
+        return applied
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_KEY,))
+        conn.commit()
+
+
+def main():
+    config = get_database_parameters("database/database.ini")
+    db_conn = DatabaseConnection(config["postgresql"], get_pool_parameters(config))
+
+    with db_conn.connection() as conn:
+        applied = apply_migrations(conn)
+        if applied:
+            print(f"Applied migrations: {', '.join(map(str, applied))}")
+        print(f"Database schema is at version {get_current_version(conn)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+-- get_transactions_in_interval, get_transaction_history_for_account and
+-- count_transactions_for_account filter on either side of a transaction.
+CREATE INDEX IF NOT EXISTS transaction_from_account_timestamp_idx
+    ON Transaction (from_account, timestamp);
+CREATE INDEX IF NOT EXISTS transaction_to_account_timestamp_idx
+    ON Transaction (to_account, timestamp);
+
+-- get_latest_snapshot, get_snapshot_at_time
+CREATE INDEX IF NOT EXISTS snapshot_account_id_timestamp_idx
+    ON Snapshot (account_id, timestamp);
+
+-- get_latest_rate, get_rate_at_time
+CREATE INDEX IF NOT EXISTS currency_exchange_pair_timestamp_idx
+    ON CurrencyExchange (from_currency, to_currency, timestamp);
@@ -0,0 +1,36 @@
+-- Per-account counters maintained by every write, so the snapshot policy no longer
+-- needs a COUNT(*) over the account's whole history.
+ALTER TABLE Account
+    ADD COLUMN IF NOT EXISTS transaction_count BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS transactions_since_snapshot BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS last_snapshot_at TIMESTAMP;
+
+UPDATE Account
+SET last_snapshot_at = snapshots.last_snapshot_at
+FROM (
+    SELECT account_id, MAX(timestamp) AS last_snapshot_at
+    FROM Snapshot
+    GROUP BY account_id
+) AS snapshots
+WHERE Account.account_id = snapshots.account_id;
+
+UPDATE Account
+SET transaction_count = counts.transaction_count,
+    transactions_since_snapshot = counts.transactions_since_snapshot
+FROM (
+    SELECT account_transactions.account_id,
+           COUNT(*) AS transaction_count,
+           COUNT(*) FILTER (
+               WHERE Account.last_snapshot_at IS NULL
+                  OR account_transactions.timestamp > Account.last_snapshot_at
+           ) AS transactions_since_snapshot
+    FROM (
+        SELECT transaction_id, from_account AS account_id, timestamp FROM Transaction
+        UNION
+        SELECT transaction_id, to_account, timestamp FROM Transaction
+        WHERE to_account IS NOT NULL
+    ) AS account_transactions
+    JOIN Account ON Account.account_id = account_transactions.account_id
+    GROUP BY account_transactions.account_id
+) AS counts
+WHERE Account.account_id = counts.account_id;
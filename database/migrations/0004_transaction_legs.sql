@@ -0,0 +1,37 @@
+-- Python rounds Decimals half to even, NUMERIC round() rounds half away from zero.
+-- Balances computed in SQL must round conversions exactly like the services do.
+CREATE OR REPLACE FUNCTION round_half_even(value NUMERIC, places INTEGER)
+RETURNS NUMERIC
+LANGUAGE SQL IMMUTABLE STRICT AS $$
+    SELECT CASE
+        WHEN abs(value * power(10::NUMERIC, places)) % 1 = 0.5
+             AND trunc(value * power(10::NUMERIC, places)) % 2 = 0
+        THEN trunc(value, places)
+        ELSE round(value, places)
+    END
+$$;
+
+-- Every transaction as the signed per-account, per-currency amounts it contributes,
+-- following the replay rules of ReconstructionService.
+CREATE OR REPLACE VIEW transaction_legs AS
+SELECT transaction_id,
+       from_account AS account_id,
+       timestamp,
+       from_currency AS currency,
+       CASE WHEN type = 'DepositMade' THEN amount ELSE -amount END AS delta
+FROM Transaction
+UNION ALL
+SELECT transaction_id,
+       to_account,
+       timestamp,
+       to_currency,
+       CASE
+           WHEN type = 'MoneyTransferred' AND from_currency = to_currency THEN amount
+           ELSE round_half_even(amount * rate, 2)
+       END
+FROM Transaction
+WHERE type = 'CurrencyConverted'
+   OR (type = 'MoneyTransferred' AND to_account <> from_account);
+
+-- balances-at filters every account's transactions on a time range.
+CREATE INDEX IF NOT EXISTS transaction_timestamp_idx ON Transaction (timestamp);
@@ -0,0 +1,16 @@
+-- get_transaction_history_for_account pages through an account's transactions newest
+-- first, keyed on (timestamp, transaction_id) so rows with equal timestamps keep a
+-- stable order. These replace the (account, timestamp) indexes of 0002, whose
+-- queries they serve as well.
+CREATE INDEX IF NOT EXISTS transaction_from_account_timestamp_id_idx
+    ON Transaction (from_account, timestamp, transaction_id);
+CREATE INDEX IF NOT EXISTS transaction_to_account_timestamp_id_idx
+    ON Transaction (to_account, timestamp, transaction_id);
+DROP INDEX IF EXISTS transaction_from_account_timestamp_idx;
+DROP INDEX IF EXISTS transaction_to_account_timestamp_idx;
+
+-- export-transactions reads the whole ledger ordered by (timestamp, transaction_id),
+-- replaces the timestamp index of 0004.
+CREATE INDEX IF NOT EXISTS transaction_timestamp_id_idx
+    ON Transaction (timestamp, transaction_id);
+DROP INDEX IF EXISTS transaction_timestamp_idx;
@@ -0,0 +1,59 @@
+-- Currencies are rows instead of columns: adding one is an INSERT, not a schema change.
+CREATE TABLE IF NOT EXISTS Currency (
+    code VARCHAR(3) PRIMARY KEY,
+    position SMALLSERIAL NOT NULL UNIQUE
+);
+
+INSERT INTO Currency (code) VALUES ('USD'), ('EUR'), ('GBP')
+ON CONFLICT (code) DO NOTHING;
+
+-- One row per account and currency, so writers of different currencies of the same
+-- account lock different rows. Transaction counters live next to the balance they
+-- change for the same reason, the account's count is the sum over its currencies.
+CREATE TABLE IF NOT EXISTS Account_Balance (
+    account_id INTEGER NOT NULL REFERENCES Account(account_id),
+    currency VARCHAR(3) NOT NULL REFERENCES Currency(code),
+    balance NUMERIC NOT NULL DEFAULT 0,
+    transaction_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (account_id, currency)
+);
+
+INSERT INTO Account_Balance (account_id, currency, balance, transaction_count)
+SELECT account_id, 'USD', usd_balance, transaction_count FROM Account
+UNION ALL
+SELECT account_id, 'EUR', eur_balance, 0 FROM Account
+UNION ALL
+SELECT account_id, 'GBP', gbp_balance, 0 FROM Account;
+
+-- Snapshots record the account's summed count instead of resetting every counter
+ALTER TABLE Account
+    ADD COLUMN transactions_at_snapshot BIGINT NOT NULL DEFAULT 0;
+
+UPDATE Account
+SET transactions_at_snapshot = transaction_count - transactions_since_snapshot;
+
+ALTER TABLE Account
+    DROP COLUMN usd_balance,
+    DROP COLUMN eur_balance,
+    DROP COLUMN gbp_balance,
+    DROP COLUMN transaction_count,
+    DROP COLUMN transactions_since_snapshot;
+
+CREATE TABLE IF NOT EXISTS Snapshot_Balance (
+    snapshot_id INTEGER NOT NULL REFERENCES Snapshot(snapshot_id),
+    currency VARCHAR(3) NOT NULL REFERENCES Currency(code),
+    balance NUMERIC NOT NULL,
+    PRIMARY KEY (snapshot_id, currency)
+);
+
+INSERT INTO Snapshot_Balance (snapshot_id, currency, balance)
+SELECT snapshot_id, 'USD', usd_balance FROM Snapshot
+UNION ALL
+SELECT snapshot_id, 'EUR', eur_balance FROM Snapshot
+UNION ALL
+SELECT snapshot_id, 'GBP', gbp_balance FROM Snapshot;
+
+ALTER TABLE Snapshot
+    DROP COLUMN usd_balance,
+    DROP COLUMN eur_balance,
+    DROP COLUMN gbp_balance;
@@ -0,0 +1,49 @@
+-- A rate board is a set of rates published together under one version: every rate of a
+-- board becomes visible in the same commit, and boards commit in board_id order.
+CREATE TABLE IF NOT EXISTS Rate_Board (
+    board_id SERIAL PRIMARY KEY,
+    published_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE CurrencyExchange
+    ADD COLUMN IF NOT EXISTS board_id INTEGER REFERENCES Rate_Board(board_id);
+
+-- Rates inserted before boards existed make up the first board
+WITH board AS (
+    INSERT INTO Rate_Board DEFAULT VALUES
+    RETURNING board_id
+)
+UPDATE CurrencyExchange
+SET board_id = board.board_id
+FROM board
+WHERE CurrencyExchange.board_id IS NULL;
+
+ALTER TABLE CurrencyExchange
+    ALTER COLUMN board_id SET NOT NULL;
+
+-- publish_rate_board
+CREATE INDEX IF NOT EXISTS currency_exchange_board_id_idx
+    ON CurrencyExchange (board_id);
+
+-- The latest rate of every pair, so reading the current rates of the board is a
+-- primary key lookup instead of a search through the pair's history.
+CREATE TABLE IF NOT EXISTS Current_Rate (
+    from_currency VARCHAR(3) NOT NULL,
+    to_currency VARCHAR(3) NOT NULL,
+    exchange_id INTEGER NOT NULL REFERENCES CurrencyExchange(exchange_id),
+    timestamp TIMESTAMP NOT NULL,
+    rate NUMERIC NOT NULL,
+    board_id INTEGER NOT NULL REFERENCES Rate_Board(board_id),
+    PRIMARY KEY (from_currency, to_currency)
+);
+
+INSERT INTO Current_Rate (from_currency, to_currency, exchange_id, timestamp, rate, board_id)
+SELECT DISTINCT ON (from_currency, to_currency)
+       from_currency, to_currency, exchange_id, timestamp, rate, board_id
+FROM CurrencyExchange
+ORDER BY from_currency, to_currency, timestamp DESC, exchange_id DESC
+ON CONFLICT (from_currency, to_currency) DO NOTHING;
+
+-- get_all_latest_rates since a board
+CREATE INDEX IF NOT EXISTS current_rate_board_id_idx
+    ON Current_Rate (board_id);
@@ -0,0 +1,21 @@
+-- Closing balances of every account at the end of each day it had transactions on,
+-- maintained by the rollup job. Reconstruction starts from the last one before the
+-- requested time when it is closer than the last snapshot.
+CREATE TABLE IF NOT EXISTS Daily_Balance (
+    account_id INTEGER NOT NULL REFERENCES Account(account_id),
+    day DATE NOT NULL,
+    currency VARCHAR(3) NOT NULL REFERENCES Currency(code),
+    balance NUMERIC NOT NULL,
+    PRIMARY KEY (account_id, day, currency)
+);
+
+-- How far the rollup job got: the last transaction it processed and the last day it
+-- rolled up. A single row.
+CREATE TABLE IF NOT EXISTS Rollup_State (
+    singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+    transaction_id INTEGER NOT NULL DEFAULT 0,
+    closed_through DATE
+);
+
+INSERT INTO Rollup_State DEFAULT VALUES
+ON CONFLICT (singleton) DO NOTHING;
@@ -0,0 +1,27 @@
+-- Reconstruction replays rows of transaction_legs, and a conversion is two of them on
+-- its account. Balances count the legs they record next to their transactions, the
+-- replay cost snapshot policy reads the account's legs since its last snapshot.
+ALTER TABLE Account_Balance
+    ADD COLUMN IF NOT EXISTS leg_count BIGINT NOT NULL DEFAULT 0;
+
+ALTER TABLE Account
+    ADD COLUMN IF NOT EXISTS legs_at_snapshot BIGINT NOT NULL DEFAULT 0;
+
+-- Conversions are counted on the balance they are converted from
+UPDATE Account_Balance
+SET leg_count = transaction_count + (
+    SELECT COUNT(*)
+    FROM Transaction
+    WHERE type = 'CurrencyConverted'
+      AND from_account = Account_Balance.account_id
+      AND from_currency = Account_Balance.currency
+);
+
+UPDATE Account
+SET legs_at_snapshot = transactions_at_snapshot + (
+    SELECT COUNT(*)
+    FROM Transaction
+    WHERE type = 'CurrencyConverted'
+      AND from_account = Account.account_id
+      AND timestamp <= Account.last_snapshot_at
+);
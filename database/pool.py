@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+from psycopg2.pool import PoolError
+
+# Checkouts/sec is averaged over this many most recent seconds.
+RATE_WINDOW_SECONDS = 60
+
+
+@dataclass
+class PoolMetrics:
+    min_size: int
+    max_size: int
+    in_use: int
+    checkouts: int
+    timeouts: int
+    checkouts_per_second: float
+    average_wait: float
+    max_wait: float
+
+
+class ConnectionPool:
+    """
+    Thread-safe connection pool.
+
+    Checkouts block for up to <checkout_timeout> seconds when all <max_size> connections
+    are in use, instead of failing immediately like the psycopg2 pools do. Returned
+    connections stay open for the next checkout, up to <max_size> of them, where the
+    psycopg2 pools close every one beyond <min_size>. Connections older than
+    <max_lifetime> seconds are closed when they are handed back or checked out.
+    """
+
+    def __init__(
+        self,
+        min_size=1,
+        max_size=10,
+        checkout_timeout=30.0,
+        max_lifetime=None,
+        **connection_params,
+    ):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.max_lifetime = max_lifetime
+
+        self._connection_params = connection_params
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        # Every open connection, checked out or idle, and when it was opened
+        self._opened_at = {}
+        # Most recently returned last
+        self._idle = []
+        self._created_at = time.monotonic()
+
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._checkouts_per_second = deque(maxlen=RATE_WINDOW_SECONDS)
+
+        for _ in range(min_size):
+            self._idle.append(self._connect())
+
+    def getconn(self):
+        """Check a connection out. Prefer connection(), which always returns it."""
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise PoolError(
+                f"Timed out after {self.checkout_timeout}s waiting for one of {self.max_size} connections"
+            )
+
+        try:
+            conn = self._pop_idle()
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+        now = time.monotonic()
+        with self._lock:
+            self._record_checkout(now, now - start)
+        return conn
+
+    def putconn(self, conn):
+        with self._lock:
+            self._in_use -= 1
+            expired = self._expired(conn)
+
+        try:
+            if not conn.closed and not expired:
+                status = conn.info.transaction_status
+                if status == TRANSACTION_STATUS_UNKNOWN:
+                    expired = True
+                elif status != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            if conn.closed or expired:
+                self._close(conn)
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+        except Exception:
+            self._close(conn)
+            raise
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        with self._lock:
+            connections = list(self._opened_at)
+            self._opened_at.clear()
+            self._idle.clear()
+        for conn in connections:
+            conn.close()
+
+    def metrics(self):
+        with self._lock:
+            now = time.monotonic()
+            window = min(RATE_WINDOW_SECONDS, max(now - self._created_at, 1.0))
+            recent = [
+                count
+                for second, count in self._checkouts_per_second
+                if now - second < window
+            ]
+            return PoolMetrics(
+                min_size=self.min_size,
+                max_size=self.max_size,
+                in_use=self._in_use,
+                checkouts=self._checkouts,
+                timeouts=self._timeouts,
+                checkouts_per_second=sum(recent) / window,
+                average_wait=self._total_wait / self._checkouts
+                if self._checkouts
+                else 0.0,
+                max_wait=self._max_wait,
+            )
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connection_params)
+        with self._lock:
+            self._opened_at[conn] = time.monotonic()
+        return conn
+
+    def _pop_idle(self):
+        """The most recently returned idle connection still usable, None if there is none."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn = self._idle.pop()
+                if not conn.closed and not self._expired(conn):
+                    return conn
+            self._close(conn)
+
+    def _close(self, conn):
+        with self._lock:
+            self._opened_at.pop(conn, None)
+        conn.close()
+
+    def _expired(self, conn):
+        opened_at = self._opened_at.get(conn, time.monotonic())
+        return (
+            self.max_lifetime is not None
+            and time.monotonic() - opened_at >= self.max_lifetime
+        )
+
+    def _record_checkout(self, now, waited):
+        self._in_use += 1
+        self._checkouts += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+        second = int(now)
+        if self._checkouts_per_second and self._checkouts_per_second[-1][0] == second:
+            self._checkouts_per_second[-1][1] += 1
+        else:
+            self._checkouts_per_second.append([second, 1])
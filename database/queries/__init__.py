@@ -0,0 +1,10 @@
+from psycopg2.extensions import AsIs, register_adapter
+from models.money import Money
+
+
+def adapt_money(money):
+    """Money is sent as an exact NUMERIC literal, e.g. '-12.34'::numeric."""
+    return AsIs(f"'{money}'::numeric")
+
+
+register_adapter(Money, adapt_money)
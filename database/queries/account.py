@@ -1,62 +1,269 @@
 from models.account import Account
-from decimal import Decimal
+from models.money import Money
+from psycopg2.extras import execute_values
+
+# Statements shared with database/async_queries/account.py
+CREATE_ACCOUNT_SQL = """
+    WITH new_account AS (
+        INSERT INTO account DEFAULT VALUES
+        RETURNING account_id
+    )
+    INSERT INTO account_balance (account_id, currency, balance)
+    SELECT new_account.account_id, currency.code, COALESCE(initial.balance, 0)
+    FROM new_account
+    CROSS JOIN currency
+    LEFT JOIN unnest(%s::varchar[], %s::numeric[]) AS initial (currency, balance)
+           ON initial.currency = currency.code
+    RETURNING account_id;
+"""
+# One row per currency of the account, see accounts_from_rows()
+ACCOUNT_COLUMNS = """
+    account.account_id, account.transactions_at_snapshot, account.legs_at_snapshot,
+    account.last_snapshot_at, balance.currency, balance.balance,
+    balance.transaction_count, balance.leg_count
+"""
+GET_ACCOUNT_SQL = f"""
+    SELECT {ACCOUNT_COLUMNS}
+    FROM account
+    JOIN account_balance AS balance ON balance.account_id = account.account_id
+    JOIN currency ON currency.code = balance.currency
+    WHERE account.account_id = %s
+    ORDER BY currency.position;
+"""
+UPDATE_BALANCE_SQL = """
+    UPDATE account_balance
+    SET balance = balance + %s
+    WHERE account_id = %s AND currency = %s;
+"""
+DEBIT_BALANCE_SQL = """
+    UPDATE account_balance
+    SET balance = balance - %s
+    WHERE account_id = %s AND currency = %s AND balance >= %s
+    RETURNING balance;
+"""
+LOCK_BALANCES_SQL = """
+    SELECT account_id, currency
+    FROM account_balance
+    WHERE (account_id, currency) IN (
+        SELECT * FROM unnest(%s::integer[], %s::varchar[])
+    )
+    ORDER BY account_id, currency
+    FOR UPDATE;
+"""
+# The counted row is read from the UPDATE, the statement's snapshot of the table
+# predates it.
+RECORD_TRANSACTION_SQL = """
+    WITH counted AS (
+        UPDATE account_balance
+        SET transaction_count = transaction_count + 1,
+            leg_count = leg_count + %(legs)s
+        WHERE account_id = %(account_id)s AND currency = %(currency)s
+        RETURNING account_id, currency, transaction_count, leg_count
+    )
+    SELECT account.account_id, account.transactions_at_snapshot, account.legs_at_snapshot,
+           account.last_snapshot_at, balance.currency, balance.balance,
+           COALESCE(counted.transaction_count, balance.transaction_count),
+           COALESCE(counted.leg_count, balance.leg_count), NOW()
+    FROM account
+    JOIN account_balance AS balance ON balance.account_id = account.account_id
+    JOIN currency ON currency.code = balance.currency
+    LEFT JOIN counted ON counted.account_id = balance.account_id
+                     AND counted.currency = balance.currency
+    WHERE account.account_id = %(account_id)s
+    ORDER BY currency.position;
+"""
+RESET_SNAPSHOT_COUNTERS_SQL = """
+    UPDATE account
+    SET transactions_at_snapshot = (
+            SELECT SUM(transaction_count)
+            FROM account_balance
+            WHERE account_balance.account_id = account.account_id
+        ),
+        legs_at_snapshot = (
+            SELECT SUM(leg_count)
+            FROM account_balance
+            WHERE account_balance.account_id = account.account_id
+        ),
+        last_snapshot_at = COALESCE(snapshots.timestamp, NOW())
+    FROM (VALUES %s) AS snapshots (account_id, timestamp)
+    WHERE account.account_id = snapshots.account_id;
+"""
+RESET_SNAPSHOT_COUNTERS_TEMPLATE = "(%s, %s::timestamp)"
 
 
-def create_account(
-    conn,
-    usd_balance: Decimal = Decimal(0),
-    eur_balance: Decimal = Decimal(0),
-    gbp_balance: Decimal = Decimal(0),
-):
+def create_account(conn, balances=None):
     """
-    Create an account entry in the database. Data should be validated through the previous layer.
+    Create an account entry in the database, with a balance row for every currency.
+    <balances> maps currency codes to initial Money balances, the others start at 0.
+    Data should be validated through the previous layer.
     """
+    balances = balances or {}
     cursor = conn.cursor()
 
-    cursor.execute(
-        """
-        INSERT INTO account (usd_balance, eur_balance, gbp_balance) 
-        VALUES (%s, %s, %s)
-        RETURNING account_id;
-        """,
-        (usd_balance, eur_balance, gbp_balance),
-    )
-
-    conn.commit()
+    cursor.execute(CREATE_ACCOUNT_SQL, (list(balances), list(balances.values())))
 
     return cursor.fetchone()[0]
 
 
 def get_account(conn, account_id):
+    cursor = conn.cursor()
+    cursor.execute(GET_ACCOUNT_SQL, (account_id,))
+    accounts = accounts_from_rows(cursor.fetchall())
+    return accounts[0] if accounts else None
+
+
+def get_accounts(conn, account_ids):
+    """The accounts of <account_ids> that exist, by id."""
     cursor = conn.cursor()
     cursor.execute(
-        """
-    SELECT * 
-    FROM account 
-    WHERE account_id = %s
-    """,
-        (account_id,),
+        f"""
+        SELECT {ACCOUNT_COLUMNS}
+        FROM account
+        JOIN account_balance AS balance ON balance.account_id = account.account_id
+        JOIN currency ON currency.code = balance.currency
+        WHERE account.account_id = ANY(%s)
+        ORDER BY account.account_id, currency.position;
+        """,
+        (sorted(set(account_ids)),),
     )
+    return {account.id: account for account in accounts_from_rows(cursor.fetchall())}
+
+
+def accounts_from_rows(rows):
+    """
+    Accounts of rows of ACCOUNT_COLUMNS, grouped by account. An account's transaction
+    and leg counts are the sums of its currencies' counts.
+    """
+    accounts = []
+    for (
+        account_id,
+        transactions_at_snapshot,
+        legs_at_snapshot,
+        last_snapshot_at,
+        currency,
+        balance,
+        transaction_count,
+        leg_count,
+    ) in rows:
+        if not accounts or accounts[-1].id != account_id:
+            accounts.append(
+                Account(
+                    id=account_id,
+                    transactions_since_snapshot=-transactions_at_snapshot,
+                    legs_since_snapshot=-legs_at_snapshot,
+                    last_snapshot_at=last_snapshot_at,
+                )
+            )
+        account = accounts[-1]
+        account.balances[currency] = Money.parse(balance)
+        account.transaction_count += transaction_count
+        account.transactions_since_snapshot += transaction_count
+        account.legs_since_snapshot += leg_count
+    return accounts
+
+
+def update_balance(conn, account_id, currency, amount):
+    """
+    Add <amount> to <currency> in Account with <account_id>.
+    Only locks the account's row of that currency.
+    """
+    cursor = conn.cursor()
+    cursor.execute(UPDATE_BALANCE_SQL, (amount, account_id, currency))
+
+
+def debit_balance(conn, account_id, currency, amount):
+    """
+    Subtract <amount> from <currency> in one statement, only if the balance covers it.
+    Returns the new balance, or None when the account does not exist or lacks the funds.
+    A concurrent debit of the same balance waits for the row lock and then re-checks
+    it, so two debits can never overdraw it together. Debits of other currencies of
+    the account lock other rows and do not wait.
+    """
+    cursor = conn.cursor()
+    cursor.execute(DEBIT_BALANCE_SQL, (amount, account_id, currency, amount))
     row = cursor.fetchone()
     if row:
-        return Account(
-            id=row[0],
-            usd_balance=row[1],
-            eur_balance=row[2],
-            gbp_balance=row[3],
-        )
+        return Money.parse(row[0])
     return None
 
 
-def update_balance(conn, account_id, currency, amount):
+def lock_balances(conn, keys):
     """
-    Add <amount> to <currency> in Account with <account_id>
+    Lock the (account_id, currency) balance rows of <keys> until the end of the
+    transaction, in ascending key order so that transactions locking the same
+    balances cannot deadlock.
+    Returns the set of keys that exist.
     """
-    field_map = {"USD": "usd_balance", "EUR": "eur_balance", "GBP": "gbp_balance"}
-    field = field_map[currency]
+    keys = sorted(set(keys))
     cursor = conn.cursor()
+    cursor.execute(
+        LOCK_BALANCES_SQL,
+        ([account_id for account_id, _ in keys], [currency for _, currency in keys]),
+    )
+    return {tuple(row) for row in cursor.fetchall()}
+
+
+def apply_balance_changes(conn, changes):
+    """
+    Add net balance changes to many balances with a single UPDATE.
+    <changes> holds (account_id, currency, amount, transactions, legs) tuples,
+    <transactions> and <legs> being added to the counters of that balance.
+    Returns the updated Accounts and the database's current timestamp.
+    """
+    cursor = conn.cursor()
+    rows = execute_values(
+        cursor,
+        """
+        UPDATE account_balance
+        SET balance = account_balance.balance + changes.amount,
+            transaction_count = account_balance.transaction_count + changes.transactions,
+            leg_count = account_balance.leg_count + changes.legs
+        FROM (VALUES %s) AS changes (account_id, currency, amount, transactions, legs)
+        WHERE account_balance.account_id = changes.account_id
+          AND account_balance.currency = changes.currency
+        RETURNING account_balance.account_id, NOW();
+        """,
+        changes,
+        template="(%s, %s, %s::numeric, %s, %s)",
+        page_size=max(len(changes), 1),
+        fetch=True,
+    )
+    if not rows:
+        return [], None
+    accounts = get_accounts(conn, [row[0] for row in rows])
+    return list(accounts.values()), rows[0][-1]
 
+
+def record_transaction(conn, account_id, currency, legs=1):
+    """
+    Count one more transaction for the account, and its <legs> on the account, on its
+    <currency> balance row which the transaction already locked.
+    Returns the updated Account and the database's current timestamp.
+    """
+    cursor = conn.cursor()
     cursor.execute(
-        f"UPDATE account SET {field} = {field} + {amount} WHERE account_id = {account_id}"
+        RECORD_TRANSACTION_SQL,
+        {"account_id": account_id, "currency": currency, "legs": legs},
     )
-    conn.commit()
+    rows = cursor.fetchall()
+    return accounts_from_rows(row[:-1] for row in rows)[0], rows[0][-1]
+
+
+def reset_snapshot_counters(conn, snapshots):
+    """
+    Mark accounts as just snapshotted.
+    <snapshots> holds (account_id, snapshot timestamp) tuples, a None timestamp means now.
+    """
+    cursor = conn.cursor()
+    execute_values(
+        cursor,
+        RESET_SNAPSHOT_COUNTERS_SQL,
+        snapshots,
+        template=RESET_SNAPSHOT_COUNTERS_TEMPLATE,
+    )
+
+
+def get_account_ids(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT account_id FROM account ORDER BY account_id;")
+    return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,73 @@
+from models.snapshot import Snapshot
+from models.money import Money
+
+
+def get_balances_at_time(conn, timestamp, account_ids=None):
+    """
+    Balances of every account (or of <account_ids>) at <timestamp>, in one query:
+    each account's latest snapshot not after <timestamp> plus the per-currency sum of
+    its transaction legs since that snapshot.
+    Accounts without a snapshot by then did not exist yet and are left out.
+    """
+    account_filter = "AND account_id = ANY(%(account_ids)s)" if account_ids else ""
+
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        WITH snapshots AS (
+            SELECT DISTINCT ON (account_id) snapshot_id, account_id, timestamp
+            FROM snapshot
+            WHERE timestamp <= %(timestamp)s {account_filter}
+            ORDER BY account_id, timestamp DESC
+        ), deltas AS (
+            SELECT legs.account_id, legs.currency, SUM(legs.delta) AS delta
+            FROM transaction_legs AS legs
+            JOIN snapshots ON snapshots.account_id = legs.account_id
+            WHERE legs.timestamp > snapshots.timestamp
+              AND legs.timestamp <= %(timestamp)s
+              AND legs.timestamp > (SELECT MIN(timestamp) FROM snapshots)
+            GROUP BY legs.account_id, legs.currency
+        ), balances AS (
+            SELECT snapshots.account_id, balance.currency, balance.balance
+            FROM snapshots
+            JOIN snapshot_balance AS balance ON balance.snapshot_id = snapshots.snapshot_id
+        ), totals AS (
+            SELECT account_id, currency,
+                   COALESCE(balances.balance, 0) + COALESCE(deltas.delta, 0) AS balance
+            FROM balances
+            FULL JOIN deltas USING (account_id, currency)
+        )
+        SELECT totals.account_id, totals.currency, totals.balance
+        FROM totals
+        JOIN currency ON currency.code = totals.currency
+        ORDER BY totals.account_id, currency.position;
+        """,
+        {"timestamp": timestamp, "account_ids": account_ids},
+    )
+    snapshots = []
+    for account_id, currency, balance in cursor.fetchall():
+        if not snapshots or snapshots[-1].account_id != account_id:
+            snapshots.append(
+                Snapshot(snapshot_id=None, account_id=account_id, timestamp=timestamp)
+            )
+        snapshots[-1].balances[currency] = Money.parse(balance)
+    return snapshots
+
+
+def get_balance_deltas(conn, account_id, timestamp1, timestamp2):
+    """
+    Net Money change of the account by currency from its transactions in
+    (timestamp1, timestamp2], summed on the server with the replay rules of
+    the transaction_legs view. Currencies it did not move are left out.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT currency, SUM(delta)
+        FROM transaction_legs
+        WHERE account_id = %s AND timestamp > %s AND timestamp <= %s
+        GROUP BY currency;
+        """,
+        (account_id, timestamp1, timestamp2),
+    )
+    return {currency: Money.parse(delta) for currency, delta in cursor.fetchall()}
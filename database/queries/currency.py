@@ -0,0 +1,29 @@
+def get_currencies(conn):
+    """Codes of every currency, in the order they were added."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT code FROM currency ORDER BY position;")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def create_currency(conn, code):
+    """
+    Add the currency <code> with a zero balance row for every account.
+    Returns False when it already exists.
+
+    The SHARE lock waits for accounts being created to commit and keeps new ones out
+    until this transaction ends, so no account is left without a row for <code>.
+    """
+    cursor = conn.cursor()
+    cursor.execute("LOCK TABLE account IN SHARE MODE;")
+    cursor.execute(
+        "INSERT INTO currency (code) VALUES (%s) ON CONFLICT (code) DO NOTHING RETURNING code;",
+        (code,),
+    )
+    if cursor.fetchone() is None:
+        return False
+
+    cursor.execute(
+        "INSERT INTO account_balance (account_id, currency) SELECT account_id, %s FROM account;",
+        (code,),
+    )
+    return True
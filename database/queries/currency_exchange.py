@@ -2,39 +2,203 @@ from datetime import datetime
 from models.currency_exchange import CurrencyExchange
 from decimal import Decimal
 
+EXCHANGE_RATE_CHANNEL = "exchange_rate_changed"
+
+# Arbitrary key for pg_advisory_xact_lock, so rate boards are published one at a time
+# and commit in board_id order: readers loading the boards after the last one they saw
+# cannot skip a board that commits late.
+RATE_BOARD_LOCK_KEY = 72_631_002
+
+# Statements shared with database/async_queries/currency_exchange.py
+CREATE_RATE_BOARD_SQL = """
+    WITH lock AS (
+        SELECT pg_advisory_xact_lock(%s)
+    )
+    INSERT INTO Rate_Board (published_at)
+    SELECT NOW() FROM lock
+    RETURNING board_id;
+"""
+INSERT_BOARD_RATES_SQL = """
+    INSERT INTO CurrencyExchange (from_currency, to_currency, rate, board_id)
+    SELECT rates.from_currency, rates.to_currency, rates.rate, %s
+    FROM unnest(%s::varchar[], %s::varchar[], %s::numeric[])
+        WITH ORDINALITY AS rates (from_currency, to_currency, rate, line)
+    ORDER BY rates.line
+    RETURNING exchange_id;
+"""
+UPDATE_CURRENT_RATES_SQL = """
+    INSERT INTO Current_Rate (from_currency, to_currency, exchange_id, timestamp, rate, board_id)
+    SELECT DISTINCT ON (from_currency, to_currency)
+           from_currency, to_currency, exchange_id, timestamp, rate, board_id
+    FROM CurrencyExchange
+    WHERE board_id = %s
+    ORDER BY from_currency, to_currency, timestamp DESC, exchange_id DESC
+    ON CONFLICT (from_currency, to_currency) DO UPDATE
+    SET exchange_id = EXCLUDED.exchange_id,
+        timestamp = EXCLUDED.timestamp,
+        rate = EXCLUDED.rate,
+        board_id = EXCLUDED.board_id
+    WHERE (Current_Rate.timestamp, Current_Rate.exchange_id)
+        < (EXCLUDED.timestamp, EXCLUDED.exchange_id);
+"""
+NOTIFY_RATE_BOARD_SQL = """
+    SELECT pg_notify(%s, from_currency || ':' || to_currency)
+    FROM (
+        SELECT DISTINCT from_currency, to_currency
+        FROM CurrencyExchange
+        WHERE board_id = %s
+    ) AS pairs;
+"""
+NOTIFY_EXCHANGE_RATE_CHANGED_SQL = "SELECT pg_notify(%s, %s);"
+CURRENT_RATE_COLUMNS = (
+    "exchange_id, timestamp, from_currency, to_currency, rate, board_id"
+)
+GET_LATEST_RATE_SQL = f"""
+    SELECT {CURRENT_RATE_COLUMNS}
+    FROM Current_Rate
+    WHERE from_currency = %s AND to_currency = %s;
+"""
+GET_LATEST_RATES_SQL = f"""
+    SELECT {CURRENT_RATE_COLUMNS}
+    FROM Current_Rate
+    WHERE (from_currency, to_currency) IN (
+        SELECT * FROM unnest(%s::varchar[], %s::varchar[])
+    );
+"""
+GET_ALL_LATEST_RATES_SQL = f"""
+    SELECT {CURRENT_RATE_COLUMNS}
+    FROM Current_Rate
+    WHERE board_id > %s;
+"""
+
+
+def board_rates_parameters(board_id, rates):
+    """INSERT_BOARD_RATES_SQL parameters of (from_currency, to_currency, rate) triples."""
+    return (
+        board_id,
+        [from_currency for from_currency, _, _ in rates],
+        [to_currency for _, to_currency, _ in rates],
+        [rate for _, _, rate in rates],
+    )
+
+
+def exchanges_by_pair(rows):
+    exchanges = [exchange_from_row(row) for row in rows]
+    return {
+        (exchange.from_currency, exchange.to_currency): exchange
+        for exchange in exchanges
+    }
+
+
+def exchange_from_row(row):
+    return CurrencyExchange(
+        id=row[0],
+        timestamp=row[1],
+        from_currency=row[2],
+        to_currency=row[3],
+        rate=row[4],
+        board_id=row[5],
+    )
+
+
+def create_rate_board(conn):
+    """
+    Start a rate board, waiting for the board being published by another transaction to
+    commit. Returns its board_id, the rates inserted with it are published together.
+    """
+    cursor = conn.cursor()
+    cursor.execute(CREATE_RATE_BOARD_SQL, (RATE_BOARD_LOCK_KEY,))
+    return cursor.fetchone()[0]
+
+
+def publish_rate_board(conn, board_id):
+    """
+    Make the rates of the board the current rate of their pair, unless a newer rate is
+    already current, and tell listeners of EXCHANGE_RATE_CHANNEL about every pair.
+    Everything becomes visible when the surrounding transaction commits.
+    """
+    cursor = conn.cursor()
+    cursor.execute(UPDATE_CURRENT_RATES_SQL, (board_id,))
+    cursor.execute(NOTIFY_RATE_BOARD_SQL, (EXCHANGE_RATE_CHANNEL, board_id))
+
+
+def publish_rates(conn, rates):
+    """
+    Insert (from_currency, to_currency, rate) triples as one rate board and publish it.
+    Returns the ids of the new exchange rates, in order.
+    """
+    board_id = create_rate_board(conn)
+    cursor = conn.cursor()
+    cursor.execute(INSERT_BOARD_RATES_SQL, board_rates_parameters(board_id, rates))
+    exchange_ids = [row[0] for row in cursor.fetchall()]
+    publish_rate_board(conn, board_id)
+    return exchange_ids
+
 
 def insert_exchange_rate(conn, from_currency: str, to_currency: str, rate: Decimal):
     """
-    Insert an exchange rate entry. Data should be validated through the previous layer.
+    Insert an exchange rate entry, a board of its own. Data should be validated through
+    the previous layer.
+    """
+    return publish_rates(conn, [(from_currency, to_currency, rate)])[0]
+
+
+def notify_exchange_rate_changed(conn, from_currency, to_currency):
+    """
+    Tell listeners of EXCHANGE_RATE_CHANNEL that the pair changed.
+    The notification is delivered when the surrounding transaction commits.
     """
     cursor = conn.cursor()
+    cursor.execute(
+        NOTIFY_EXCHANGE_RATE_CHANGED_SQL,
+        (EXCHANGE_RATE_CHANNEL, f"{from_currency}:{to_currency}"),
+    )
 
+
+def get_latest_rate(conn, from_currency, to_currency):
+    cursor = conn.cursor()
+    cursor.execute(GET_LATEST_RATE_SQL, (from_currency, to_currency))
+    row = cursor.fetchone()
+    if row:
+        return exchange_from_row(row)
+    return None
+
+
+def get_latest_rates(conn, pairs):
+    """
+    Latest CurrencyExchange of every (from_currency, to_currency) pair of <pairs> in one
+    query, by pair. Pairs without any rate are missing from the result.
+    """
+    cursor = conn.cursor()
     cursor.execute(
-        """
-        INSERT INTO CurrencyExchange (from_currency, to_currency, rate)
-        VALUES (%s, %s, %s)
-        RETURNING exchange_id;
-        """,
-        (from_currency, to_currency, rate),
+        GET_LATEST_RATES_SQL, ([pair[0] for pair in pairs], [pair[1] for pair in pairs])
     )
+    return exchanges_by_pair(cursor.fetchall())
 
-    conn.commit()
 
-    return cursor.fetchone()[0]
+def get_all_latest_rates(conn, since_board_id=0):
+    """
+    Latest CurrencyExchange of every pair whose current rate was published after board
+    <since_board_id>, by pair, in one query. Every pair with a rate by default.
+    """
+    cursor = conn.cursor()
+    cursor.execute(GET_ALL_LATEST_RATES_SQL, (since_board_id,))
+    return exchanges_by_pair(cursor.fetchall())
 
 
-def get_latest_rate(conn, from_currency, to_currency):
+def get_rate_at_time(conn, from_currency, to_currency, timestamp):
     cursor = conn.cursor()
     cursor.execute(
         """
         SELECT * 
         FROM CurrencyExchange 
-        WHERE from_currency = %s AND to_currency = %s 
-        ORDER BY timestamp DESC 
+        WHERE from_currency = %s AND to_currency = %s AND timestamp <= %s
+        ORDER BY timestamp DESC
         LIMIT 1;
         """,
-        (from_currency, to_currency),
+        (from_currency, to_currency, timestamp),
     )
+
     row = cursor.fetchone()
     if row:
         return CurrencyExchange(
@@ -47,26 +211,27 @@ def get_latest_rate(conn, from_currency, to_currency):
     return None
 
 
-def get_rate_at_time(conn, from_currency, to_currency, timestamp):
+def get_exchange_rates_since(conn, exchange_id):
+    """
+    Every exchange rate inserted after <exchange_id>, oldest first, for bulk loading.
+    """
     cursor = conn.cursor()
     cursor.execute(
         """
-        SELECT * 
-        FROM CurrencyExchange 
-        WHERE from_currency = %s AND to_currency = %s AND timestamp <= %s
-        ORDER BY timestamp DESC
-        LIMIT 1;
+        SELECT *
+        FROM CurrencyExchange
+        WHERE exchange_id > %s
+        ORDER BY exchange_id;
         """,
-        (from_currency, to_currency, timestamp),
+        (exchange_id,),
     )
-
-    row = cursor.fetchone()
-    if row:
-        return CurrencyExchange(
+    return [
+        CurrencyExchange(
             id=row[0],
             timestamp=row[1],
             from_currency=row[2],
             to_currency=row[3],
             rate=row[4],
         )
-    return None
+        for row in cursor.fetchall()
+    ]
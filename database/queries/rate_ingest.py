@@ -0,0 +1,125 @@
+import csv
+import io
+
+STAGING_COLUMNS = ("timestamp", "from_currency", "to_currency", "rate")
+
+
+def create_rate_staging_table(conn):
+    """
+    Create the staging table ticks are COPYed into before they are published.
+    It only lives until the end of the transaction, which publishes the whole board.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS rate_import (
+            line SERIAL,
+            timestamp TIMESTAMP NOT NULL,
+            from_currency VARCHAR(3) NOT NULL,
+            to_currency VARCHAR(3) NOT NULL,
+            rate NUMERIC NOT NULL
+        ) ON COMMIT DROP;
+        """
+    )
+
+
+def copy_rates_into_staging(conn, rows):
+    """
+    Stream <rows> (tuples ordered as STAGING_COLUMNS) into the staging table with COPY.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+    buffer.seek(0)
+
+    cursor = conn.cursor()
+    cursor.copy_expert(
+        f"COPY rate_import ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def insert_staged_ticks(conn, board_id):
+    """
+    Insert the staged ticks into the board, dropping duplicates: ticks of a pair at the
+    same timestamp as an earlier staged tick or as a rate already stored.
+    Returns the number of ticks inserted.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        INSERT INTO CurrencyExchange (timestamp, from_currency, to_currency, rate, board_id)
+        SELECT timestamp, from_currency, to_currency, rate, %s
+        FROM (
+            SELECT DISTINCT ON (from_currency, to_currency, timestamp) *
+            FROM rate_import
+            ORDER BY from_currency, to_currency, timestamp, line
+        ) AS ticks
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM CurrencyExchange AS stored
+            WHERE stored.from_currency = ticks.from_currency
+              AND stored.to_currency = ticks.to_currency
+              AND stored.timestamp = ticks.timestamp
+        )
+        ORDER BY timestamp, line;
+        """,
+        (board_id,),
+    )
+    return cursor.rowcount
+
+
+def get_zero_inverse_pairs(conn):
+    """
+    (from_currency, to_currency) pairs with a staged tick whose inverse rounds to 0 and
+    whose reverse pair was not staged, insert_board_inverses() cannot publish them.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT DISTINCT tick.from_currency, tick.to_currency
+        FROM rate_import AS tick
+        WHERE round_half_even(1 / tick.rate, 2) = 0
+          AND NOT EXISTS (
+            SELECT 1
+            FROM rate_import AS staged
+            WHERE staged.from_currency = tick.to_currency
+              AND staged.to_currency = tick.from_currency
+          )
+        ORDER BY tick.from_currency, tick.to_currency;
+        """
+    )
+    return cursor.fetchall()
+
+
+def insert_board_inverses(conn, board_id):
+    """
+    Add to the board the inverse of every tick of a pair whose reverse pair was not
+    staged, rounded half to even to 2 places like rate_board() in
+    services/currency_exchange_service.py. Returns the number of inverses inserted.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        INSERT INTO CurrencyExchange (timestamp, from_currency, to_currency, rate, board_id)
+        SELECT tick.timestamp, tick.to_currency, tick.from_currency, round_half_even(1 / tick.rate, 2), %s
+        FROM CurrencyExchange AS tick
+        WHERE tick.board_id = %s
+          AND NOT EXISTS (
+            SELECT 1
+            FROM rate_import AS staged
+            WHERE staged.from_currency = tick.to_currency
+              AND staged.to_currency = tick.from_currency
+          )
+          AND NOT EXISTS (
+            SELECT 1
+            FROM CurrencyExchange AS stored
+            WHERE stored.from_currency = tick.to_currency
+              AND stored.to_currency = tick.from_currency
+              AND stored.timestamp = tick.timestamp
+          )
+        ORDER BY tick.exchange_id;
+        """,
+        (board_id, board_id),
+    )
+    return cursor.rowcount
@@ -0,0 +1,231 @@
+from datetime import datetime, time, timedelta
+from models.snapshot import Snapshot
+from models.money import Money
+
+# Arbitrary key for pg_advisory_xact_lock. The rollup job holds it exclusively while it
+# rolls up accounts, imports hold it shared, so an import never commits transactions
+# between the job reading an account's history and writing its closing balances.
+ROLLUP_LOCK_KEY = 72_631_003
+
+# Days are only rolled up once they ended this long ago, so transactions started just
+# before midnight have been inserted.
+ROLLUP_GRACE_PERIOD = "5 minutes"
+
+
+def closing_time(day):
+    """The last instant of <day>, the time a daily balance is a snapshot at."""
+    return datetime.combine(day, time.max)
+
+
+def last_closed_day(timestamp):
+    """The last day whose closing time is not after <timestamp>."""
+    return (timestamp + timedelta(microseconds=1)).date() - timedelta(days=1)
+
+
+def lock_rollups(conn, shared=False):
+    """Hold ROLLUP_LOCK_KEY until the end of the transaction, see ROLLUP_LOCK_KEY."""
+    cursor = conn.cursor()
+    if shared:
+        cursor.execute("SELECT pg_advisory_xact_lock_shared(%s);", (ROLLUP_LOCK_KEY,))
+    else:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s);", (ROLLUP_LOCK_KEY,))
+
+
+def get_rollup_state(conn):
+    """(last processed transaction_id, last rolled up day or None)"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT transaction_id, closed_through FROM rollup_state;")
+    return cursor.fetchone()
+
+
+def set_rollup_state(conn, transaction_id, closed_through):
+    """Record how far a rollup got, never moving the state backwards."""
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        UPDATE rollup_state
+        SET transaction_id = GREATEST(transaction_id, %s),
+            closed_through = GREATEST(closed_through, %s);
+        """,
+        (transaction_id, closed_through),
+    )
+
+
+def get_last_closed_day(conn):
+    """The last day that ended more than ROLLUP_GRACE_PERIOD ago, by the server's clock."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT (NOW() - %s::interval)::date - 1;", (ROLLUP_GRACE_PERIOD,))
+    return cursor.fetchone()[0]
+
+
+def get_settled_transaction_id(conn):
+    """
+    The highest transaction_id once every transaction inserted so far has committed or
+    rolled back. Transactions commit out of id order, the SHARE lock waits for those in
+    flight and keeps new ones out until the end of the (short) surrounding transaction.
+    """
+    cursor = conn.cursor()
+    cursor.execute("LOCK TABLE transaction IN SHARE MODE;")
+    cursor.execute("SELECT COALESCE(MAX(transaction_id), 0) FROM transaction;")
+    return cursor.fetchone()[0]
+
+
+def get_rollup_work(conn, after_id, up_to_id, closed_through, through):
+    """
+    (account_id, first day to roll up) of every account with days up to <through> that
+    are not rolled up yet: days with transactions in (after_id, up_to_id], and days
+    after <closed_through> that had transactions. Ordered by account ID.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT account_id, MIN(timestamp)::date
+        FROM transaction_legs
+        WHERE (transaction_id > %(after_id)s AND transaction_id <= %(up_to_id)s)
+           OR (timestamp > %(closed_end)s AND timestamp <= %(through_end)s)
+        GROUP BY account_id
+        HAVING MIN(timestamp) <= %(through_end)s
+        ORDER BY account_id;
+        """,
+        {
+            "after_id": after_id,
+            "up_to_id": up_to_id,
+            "closed_end": (
+                closing_time(closed_through) if closed_through else datetime.min
+            ),
+            "through_end": closing_time(through),
+        },
+    )
+    return cursor.fetchall()
+
+
+def roll_up_accounts(conn, work, through):
+    """
+    Write the closing balances of every day from the first day of each (account_id,
+    first day) of <work> up to <through> on which the account had transactions, with
+    one statement.
+
+    Each account starts from its last daily balance before the first day or its last
+    snapshot up to the end of that day, whichever is later, then adds the cumulative
+    sum of its per-day transaction deltas. Daily balances of later days are replaced.
+    Returns the number of (account, day) closing balances written.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        WITH work AS (
+            SELECT *
+            FROM unnest(%(account_ids)s::integer[], %(days)s::date[])
+                AS work (account_id, from_day)
+        ), bases AS (
+            SELECT work.account_id, work.from_day, rollup.day AS rollup_day,
+                   snapshot.snapshot_id,
+                   rollup.day IS NOT NULL
+                       AND (snapshot.timestamp IS NULL OR snapshot.timestamp < rollup.day + 1)
+                       AS from_rollup,
+                   COALESCE(
+                       GREATEST(
+                           rollup.day + INTERVAL '1 day' - INTERVAL '1 microsecond',
+                           snapshot.timestamp
+                       ),
+                       '-infinity'
+                   ) AS timestamp
+            FROM work
+            LEFT JOIN LATERAL (
+                SELECT day
+                FROM daily_balance
+                WHERE account_id = work.account_id AND day < work.from_day
+                ORDER BY day DESC
+                LIMIT 1
+            ) AS rollup ON TRUE
+            LEFT JOIN LATERAL (
+                SELECT snapshot_id, timestamp
+                FROM snapshot
+                WHERE account_id = work.account_id AND timestamp < work.from_day + 1
+                ORDER BY timestamp DESC
+                LIMIT 1
+            ) AS snapshot ON TRUE
+        ), base_balances AS (
+            SELECT bases.account_id, rollup.currency, rollup.balance
+            FROM bases
+            JOIN daily_balance AS rollup
+                ON rollup.account_id = bases.account_id AND rollup.day = bases.rollup_day
+            WHERE bases.from_rollup
+            UNION ALL
+            SELECT bases.account_id, balance.currency, balance.balance
+            FROM bases
+            JOIN snapshot_balance AS balance ON balance.snapshot_id = bases.snapshot_id
+            WHERE NOT bases.from_rollup
+        ), deltas AS (
+            SELECT legs.account_id, legs.timestamp::date AS day, legs.currency,
+                   SUM(legs.delta) AS delta
+            FROM bases
+            JOIN transaction_legs AS legs ON legs.account_id = bases.account_id
+            WHERE legs.timestamp > bases.timestamp
+              AND legs.timestamp <= %(through_end)s
+            GROUP BY legs.account_id, legs.timestamp::date, legs.currency
+        ), days AS (
+            SELECT DISTINCT account_id, day FROM deltas
+        ), currencies AS (
+            SELECT account_id, currency FROM base_balances
+            UNION
+            SELECT account_id, currency FROM deltas
+        ), closing AS (
+            SELECT days.account_id, days.day, currencies.currency,
+                   COALESCE(base_balances.balance, 0) + SUM(COALESCE(deltas.delta, 0)) OVER (
+                       PARTITION BY days.account_id, currencies.currency
+                       ORDER BY days.day
+                   ) AS balance
+            FROM days
+            JOIN currencies USING (account_id)
+            LEFT JOIN base_balances USING (account_id, currency)
+            LEFT JOIN deltas USING (account_id, day, currency)
+        )
+        INSERT INTO daily_balance (account_id, day, currency, balance)
+        SELECT closing.account_id, closing.day, closing.currency, closing.balance
+        FROM closing
+        JOIN work USING (account_id)
+        WHERE closing.day >= work.from_day
+        ON CONFLICT (account_id, day, currency) DO UPDATE
+        SET balance = EXCLUDED.balance
+        RETURNING account_id, day;
+        """,
+        {
+            "account_ids": [account_id for account_id, _ in work],
+            "days": [day for _, day in work],
+            "through_end": closing_time(through),
+        },
+    )
+    return len(set(cursor.fetchall()))
+
+
+def get_daily_balance_at_time(conn, account_id, timestamp):
+    """
+    The account's last closing balances not after <timestamp> as a Snapshot at the
+    closing time of their day, None if it has no daily balance by then.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT rollup.day, rollup.currency, rollup.balance
+        FROM daily_balance AS rollup
+        JOIN currency ON currency.code = rollup.currency
+        WHERE rollup.account_id = %(account_id)s
+          AND rollup.day = (
+            SELECT MAX(day)
+            FROM daily_balance
+            WHERE account_id = %(account_id)s AND day <= %(day)s
+          )
+        ORDER BY currency.position;
+        """,
+        {"account_id": account_id, "day": last_closed_day(timestamp)},
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return None
+    return Snapshot(
+        snapshot_id=None,
+        account_id=account_id,
+        timestamp=closing_time(rows[0][0]),
+        balances={currency: Money.parse(balance) for _, currency, balance in rows},
+    )
@@ -1,69 +1,93 @@
 from models.snapshot import Snapshot
+from models.money import Money
+from psycopg2.extras import execute_values
 
+# Shared with database/async_queries/snapshots.py
+CREATE_SNAPSHOT_SQL = """
+    WITH new_snapshot AS (
+        INSERT INTO snapshot (account_id)
+        VALUES (%s)
+        RETURNING snapshot_id
+    )
+    INSERT INTO snapshot_balance (snapshot_id, currency, balance)
+    SELECT new_snapshot.snapshot_id, balances.currency, balances.balance
+    FROM new_snapshot
+    CROSS JOIN unnest(%s::varchar[], %s::numeric[]) AS balances (currency, balance);
+"""
+GET_SNAPSHOT_AT_TIME_SQL = """
+    SELECT snapshot.snapshot_id, snapshot.account_id, snapshot.timestamp,
+           balance.currency, balance.balance
+    FROM (
+        SELECT snapshot_id, account_id, timestamp
+        FROM snapshot
+        WHERE account_id = %s AND timestamp <= %s
+        ORDER BY timestamp DESC
+        LIMIT 1
+    ) AS snapshot
+    JOIN snapshot_balance AS balance ON balance.snapshot_id = snapshot.snapshot_id
+    JOIN currency ON currency.code = balance.currency
+    ORDER BY currency.position;
+"""
 
-def create_snapshot(conn, account_id, usd_balance, eur_balance, gbp_balance):
+
+def create_snapshot(conn, account_id, balances):
+    """Snapshot <balances>, Money by currency code, now. Returns <account_id>."""
     cursor = conn.cursor()
 
     cursor.execute(
-        """
-        INSERT INTO snapshot (account_id, usd_balance, eur_balance, gbp_balance) 
-        VALUES (%s, %s, %s, %s)
-        RETURNING account_id;
-        """,
-        (account_id, usd_balance, eur_balance, gbp_balance),
+        CREATE_SNAPSHOT_SQL, (account_id, list(balances), list(balances.values()))
     )
 
-    conn.commit()
+    return account_id
 
-    return cursor.fetchone()[0]
 
-
-def get_latest_snapshot(conn, account_id):
+def create_snapshots(conn, snapshots):
+    """
+    Insert many snapshots at explicit timestamps.
+    <snapshots> holds (account_id, timestamp, balances) tuples, <balances> mapping
+    currency codes to Money.
+    """
     cursor = conn.cursor()
-
-    cursor.execute(
+    snapshot_ids = execute_values(
+        cursor,
         """
-        SELECT * 
-        FROM snapshot
-        WHERE account_id = %s
-        ORDER BY timestamp DESC
-        LIMIT 1;
+        INSERT INTO snapshot (account_id, timestamp)
+        VALUES %s
+        RETURNING snapshot_id;
         """,
-        (account_id),
+        [(account_id, timestamp) for account_id, timestamp, _ in snapshots],
+        page_size=max(len(snapshots), 1),
+        fetch=True,
+    )
+    execute_values(
+        cursor,
+        "INSERT INTO snapshot_balance (snapshot_id, currency, balance) VALUES %s",
+        [
+            (snapshot_id, currency, balance)
+            for (snapshot_id,), (_, _, balances) in zip(snapshot_ids, snapshots)
+            for currency, balance in balances.items()
+        ],
     )
-    row = cursor.fetchone()
-    if row:
-        return Snapshot(
-            snapshot_id=row[0],
-            account_id=row[1],
-            timestamp=row[2],
-            usd_balance=row[3],
-            eur_balance=row[4],
-            gbp_balance=row[5],
-        )
-    return None
+
+
+def snapshot_from_rows(rows):
+    """The Snapshot of (snapshot_id, account_id, timestamp, currency, balance) rows."""
+    if not rows:
+        return None
+    snapshot_id, account_id, timestamp, _, _ = rows[0]
+    return Snapshot(
+        snapshot_id=snapshot_id,
+        account_id=account_id,
+        timestamp=timestamp,
+        balances={currency: Money.parse(balance) for *_, currency, balance in rows},
+    )
+
+
+def get_latest_snapshot(conn, account_id):
+    return get_snapshot_at_time(conn, account_id, "infinity")
 
 
 def get_snapshot_at_time(conn, account_id, timestamp):
     cursor = conn.cursor()
-    cursor.execute(
-        """
-        SELECT * 
-        FROM snapshot
-        WHERE account_id = %s AND timestamp <= %s
-        ORDER BY timestamp DESC
-        LIMIT 1;
-        """,
-        (account_id, timestamp),
-    )
-    row = cursor.fetchone()
-    if row:
-        return Snapshot(
-            snapshot_id=row[0],
-            account_id=row[1],
-            timestamp=row[2],
-            usd_balance=row[3],
-            eur_balance=row[4],
-            gbp_balance=row[5],
-        )
-    return None
+    cursor.execute(GET_SNAPSHOT_AT_TIME_SQL, (account_id, timestamp))
+    return snapshot_from_rows(cursor.fetchall())
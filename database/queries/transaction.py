@@ -1,6 +1,54 @@
-from models.transaction import Transaction
+from models.transaction import (
+    TransactionBatch,
+    TYPE_CODES,
+    CURRENCY_CODES,
+    register_currencies,
+)
+from models.money import Money
 from datetime import datetime
 from decimal import Decimal
+import numpy as np
+from psycopg2.extras import execute_values
+
+# Rows are decoded into a TransactionBatch this many at a time.
+FETCH_CHUNK_SIZE = 10_000
+
+# Columns of a TransactionBatch: timestamps as epoch microseconds and amounts in minor units.
+TRANSACTION_BATCH_COLUMNS = """
+    transaction_id, type, from_account, to_account,
+    (EXTRACT(EPOCH FROM timestamp) * 1000000)::BIGINT,
+    from_currency, to_currency,
+    (round_half_even(amount, 2) * 100)::BIGINT,
+    rate
+"""
+
+# Shared with database/async_queries/transaction.py
+CREATE_TRANSACTION_SQL = """
+    INSERT INTO transaction (type, from_account, to_account, from_currency, to_currency, amount, rate)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    RETURNING transaction_id;
+"""
+
+
+def create_transactions(conn, transactions):
+    """
+    Insert many transactions with one multi-row INSERT.
+    <transactions> holds (type, from_account, to_account, from_currency, to_currency,
+    amount, rate) tuples. Returns their ids, in the same order.
+    """
+    cursor = conn.cursor()
+    rows = execute_values(
+        cursor,
+        """
+        INSERT INTO transaction (type, from_account, to_account, from_currency, to_currency, amount, rate)
+        VALUES %s
+        RETURNING transaction_id;
+        """,
+        transactions,
+        page_size=max(len(transactions), 1),
+        fetch=True,
+    )
+    return [row[0] for row in rows]
 
 
 def create_transaction(
@@ -10,95 +58,128 @@ def create_transaction(
     to_account: int,
     from_currency: str,
     to_currency: str,
-    amount: Decimal,
+    amount: Money,
     rate: Decimal = 1,
 ):
     cursor = conn.cursor()
     cursor.execute(
-        """
-        INSERT INTO transaction (type, from_account, to_account, from_currency, to_currency, amount, rate)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        RETURNING transaction_id;
-        """,
+        CREATE_TRANSACTION_SQL,
         (type, from_account, to_account, from_currency, to_currency, amount, rate),
     )
-    conn.commit()
     return cursor.fetchone()[0]
 
 
 def get_transactions_in_interval(conn, account_id, timestamp1, timestamp2):
     cursor = conn.cursor()
     cursor.execute(
-        """
-        SELECT * 
+        f"""
+        SELECT {TRANSACTION_BATCH_COLUMNS}
         FROM transaction 
-        WHERE (from_account = %s OR to_account = %s) AND timestamp BETWEEN %s AND %s
+        WHERE (from_account = %s OR to_account = %s) AND timestamp > %s AND timestamp <= %s
         ORDER BY timestamp;
         """,
         (account_id, account_id, timestamp1, timestamp2),
     )
-    return [
-        Transaction(
-            id=row[0],
-            type=row[1],
-            from_account=row[2],
-            to_account=row[3],
-            timestamp=row[4],
-            from_currency=row[5],
-            to_currency=row[6],
-            amount=row[7],
-            rate=row[8],
-        )
-        for row in cursor.fetchall()
-    ]
+    return fetch_transaction_batch(cursor)
 
 
-def count_transactions_for_account(conn, account_id):
+def get_transaction_history_for_account(
+    conn, account_id, limit=None, type=None, before=None
+):
+    """
+    The account's transactions, newest first by (timestamp, transaction_id).
+
+    <before> is the (timestamp, transaction_id) key of the last row of the previous
+    page, only older transactions are returned. Each side of the transaction is read
+    backwards from its (account, timestamp, transaction_id) index and stops after
+    <limit> rows, so a page costs the same however deep into the history it is.
+    """
+    conditions = ""
+    if type is not None:
+        conditions += " AND type = %(type)s"
+    if before is not None:
+        conditions += (
+            " AND (timestamp, transaction_id) < (%(timestamp)s, %(transaction_id)s)"
+        )
+    limit_clause = "LIMIT %(limit)s" if limit is not None else ""
+
     cursor = conn.cursor()
     cursor.execute(
-        """
-        SELECT COUNT(*) 
-        FROM transaction 
-        WHERE from_account = %s OR to_account = %s;
+        f"""
+        SELECT {TRANSACTION_BATCH_COLUMNS}
+        FROM (
+            (
+                SELECT * FROM transaction
+                WHERE from_account = %(account_id)s {conditions}
+                ORDER BY timestamp DESC, transaction_id DESC
+                {limit_clause}
+            )
+            UNION ALL
+            (
+                SELECT * FROM transaction
+                WHERE to_account = %(account_id)s AND from_account <> %(account_id)s {conditions}
+                ORDER BY timestamp DESC, transaction_id DESC
+                {limit_clause}
+            )
+        ) AS history
+        ORDER BY timestamp DESC, transaction_id DESC
+        {limit_clause};
         """,
-        (account_id, account_id),
+        {
+            "account_id": account_id,
+            "type": type,
+            "timestamp": before[0] if before else None,
+            "transaction_id": before[1] if before else None,
+            "limit": limit,
+        },
     )
-    row = cursor.fetchone()
-    return row[0]
+    return fetch_transaction_batch(cursor)
 
 
-def get_transaction_history_for_account(conn, account_id, limit=None, type=None):
-    cursor = conn.cursor()
-    query = """
-        SELECT * 
-        FROM transaction 
-        WHERE (from_account = %s OR to_account = %s)
+def fetch_transaction_batch(cursor):
+    """
+    Decode the result of a SELECT of TRANSACTION_BATCH_COLUMNS into a TransactionBatch.
+    Rows are fetched in chunks and copied straight into the batch's arrays, so only
+    one chunk of row tuples is alive at a time.
     """
-    params = (account_id, account_id)
+    batch = TransactionBatch.allocate(cursor.rowcount)
+    timestamps = batch.timestamps.view(np.int64)
+    rate_codes = {}
 
-    if type is not None:
-        query += " AND type = %s "
-        params += (type,)
-
-    query += " ORDER BY timestamp DESC"
-
-    if limit is not None:
-        query += " LIMIT %s"
-        params += (limit,)
-
-    cursor.execute(query, params)
-
-    return [
-        Transaction(
-            id=row[0],
-            type=row[1],
-            from_account=row[2],
-            to_account=row[3],
-            timestamp=row[4],
-            from_currency=row[5],
-            to_currency=row[6],
-            amount=row[7],
-            rate=row[8],
-        )
-        for row in cursor.fetchall()
-    ]
+    start = 0
+    while True:
+        rows = cursor.fetchmany(FETCH_CHUNK_SIZE)
+        if not rows:
+            break
+        end = start + len(rows)
+        (
+            ids,
+            types,
+            from_accounts,
+            to_accounts,
+            epoch_microseconds,
+            from_currencies,
+            to_currencies,
+            amounts,
+            rates,
+        ) = zip(*rows)
+
+        batch.ids[start:end] = ids
+        batch.types[start:end] = [TYPE_CODES[type] for type in types]
+        batch.from_accounts[start:end] = from_accounts
+        batch.to_accounts[start:end] = to_accounts
+        timestamps[start:end] = epoch_microseconds
+        register_currencies(set(from_currencies).union(to_currencies))
+        batch.from_currencies[start:end] = [
+            CURRENCY_CODES[currency] for currency in from_currencies
+        ]
+        batch.to_currencies[start:end] = [
+            CURRENCY_CODES[currency] for currency in to_currencies
+        ]
+        batch.amounts[start:end] = amounts
+        batch.rate_codes[start:end] = [
+            batch.rate_code(rate, rate_codes) for rate in rates
+        ]
+        start = end
+
+    return batch
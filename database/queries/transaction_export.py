@@ -0,0 +1,66 @@
+EXPORT_COLUMNS = (
+    "transaction_id",
+    "type",
+    "from_account",
+    "to_account",
+    "timestamp",
+    "from_currency",
+    "to_currency",
+    "amount",
+    "rate",
+)
+
+# Rows fetched from the server-side cursor per round trip.
+DEFAULT_ITERSIZE = 10_000
+
+
+def stream_transactions(
+    conn,
+    account_id=None,
+    type=None,
+    start=None,
+    end=None,
+    itersize=DEFAULT_ITERSIZE,
+):
+    """
+    Yield transactions as EXPORT_COLUMNS tuples, oldest first, optionally restricted to
+    an account (as sender or receiver), a type and a [start, end] time range.
+
+    Rows come from a named (server-side) cursor <itersize> at a time, so memory stays
+    flat however many rows match. <conn> must stay in its transaction until the
+    generator is exhausted or closed.
+    """
+    conditions = []
+    params = {}
+    if account_id is not None:
+        conditions.append(
+            "(from_account = %(account_id)s OR to_account = %(account_id)s)"
+        )
+        params["account_id"] = account_id
+    if type is not None:
+        conditions.append("type = %(type)s")
+        params["type"] = type
+    if start is not None:
+        conditions.append("timestamp >= %(start)s")
+        params["start"] = start
+    if end is not None:
+        conditions.append("timestamp <= %(end)s")
+        params["end"] = end
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cursor = conn.cursor(name="transaction_export")
+    cursor.itersize = itersize
+    try:
+        cursor.execute(
+            f"""
+            SELECT {', '.join(EXPORT_COLUMNS)}
+            FROM transaction
+            {where}
+            ORDER BY timestamp, transaction_id;
+            """,
+            params,
+        )
+        yield from cursor
+    finally:
+        cursor.close()
@@ -0,0 +1,264 @@
+import csv
+import io
+from .account import get_accounts
+
+STAGING_COLUMNS = (
+    "type",
+    "from_account",
+    "to_account",
+    "timestamp",
+    "from_currency",
+    "to_currency",
+    "amount",
+    "rate",
+    "credit_amount",
+)
+# (account_id, timestamp) of every staged transaction, for each account it moves
+STAGED_ACCOUNT_TIMESTAMPS_SQL = """
+    SELECT from_account AS account_id, timestamp FROM transaction_import
+    UNION ALL
+    SELECT to_account, timestamp FROM transaction_import
+"""
+# Signed amount each staged transaction adds to each balance it moves, and whether it
+# counts as a transaction of that balance, like TransactionService does
+STAGED_LEGS_SQL = """
+    SELECT from_account AS account_id, from_currency AS currency, timestamp,
+           CASE WHEN type = 'DepositMade' THEN amount ELSE -amount END AS delta,
+           1 AS transactions, 1 AS legs
+    FROM transaction_import
+    UNION ALL
+    SELECT to_account, to_currency, timestamp, credit_amount,
+           CASE WHEN to_account <> from_account THEN 1 ELSE 0 END,
+           CASE WHEN type = 'CurrencyConverted' OR to_account <> from_account
+                THEN 1 ELSE 0 END
+    FROM transaction_import
+    WHERE type IN ('MoneyTransferred', 'CurrencyConverted')
+"""
+
+
+def create_staging_table(conn):
+    """
+    Create the session-local staging table used by bulk imports.
+    Rows are discarded on every commit, so each chunk starts from an empty table.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS transaction_import (
+            line SERIAL,
+            type transaction_type NOT NULL,
+            from_account INTEGER NOT NULL,
+            to_account INTEGER NOT NULL,
+            timestamp TIMESTAMP NOT NULL,
+            from_currency VARCHAR(3) NOT NULL,
+            to_currency VARCHAR(3) NOT NULL,
+            amount NUMERIC NOT NULL,
+            rate NUMERIC NOT NULL,
+            credit_amount NUMERIC NOT NULL
+        ) ON COMMIT DELETE ROWS;
+        """
+    )
+
+
+def copy_into_staging(conn, rows):
+    """
+    Stream <rows> (tuples ordered as STAGING_COLUMNS) into the staging table with COPY.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+    buffer.seek(0)
+
+    cursor = conn.cursor()
+    cursor.copy_expert(
+        f"COPY transaction_import ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def get_unknown_staged_accounts(conn):
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT from_account FROM transaction_import
+        UNION
+        SELECT to_account FROM transaction_import
+        EXCEPT
+        SELECT account_id FROM account
+        ORDER BY 1;
+        """
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def rebuild_staged_snapshots(conn):
+    """
+    Make the snapshots of the staged accounts include the staged transactions, before
+    they are inserted, so transactions older than an account's snapshots can be
+    imported.
+
+    An account's first snapshot holds its opening balances when no transaction precedes
+    it, like the one every account is created with: it is moved back to the account's
+    first staged transaction. Every snapshot then gets the staged transactions up to its
+    timestamp added to its balances, with a single statement.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        UPDATE snapshot
+        SET timestamp = staged.timestamp
+        FROM (
+            SELECT account_id, MIN(timestamp) AS timestamp
+            FROM ({STAGED_ACCOUNT_TIMESTAMPS_SQL}) AS account_transactions
+            GROUP BY account_id
+        ) AS staged
+        WHERE snapshot.account_id = staged.account_id
+          AND snapshot.timestamp > staged.timestamp
+          AND snapshot.snapshot_id = (
+            SELECT snapshot_id
+            FROM snapshot AS first
+            WHERE first.account_id = staged.account_id
+            ORDER BY first.timestamp, first.snapshot_id
+            LIMIT 1
+          )
+          AND NOT EXISTS (
+            SELECT 1 FROM transaction
+            WHERE from_account = staged.account_id AND timestamp <= snapshot.timestamp
+          )
+          AND NOT EXISTS (
+            SELECT 1 FROM transaction
+            WHERE to_account = staged.account_id AND timestamp <= snapshot.timestamp
+          );
+        """
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO snapshot_balance (snapshot_id, currency, balance)
+        SELECT snapshot.snapshot_id, legs.currency, SUM(legs.delta)
+        FROM ({STAGED_LEGS_SQL}) AS legs
+        JOIN snapshot ON snapshot.account_id = legs.account_id
+                     AND snapshot.timestamp >= legs.timestamp
+        GROUP BY snapshot.snapshot_id, legs.currency
+        ON CONFLICT (snapshot_id, currency) DO UPDATE
+        SET balance = snapshot_balance.balance + EXCLUDED.balance;
+        """
+    )
+    cursor.execute(
+        f"""
+        UPDATE account
+        SET last_snapshot_at = latest.timestamp
+        FROM (
+            SELECT account_id, MAX(timestamp) AS timestamp
+            FROM snapshot
+            WHERE account_id IN (
+                SELECT account_id FROM ({STAGED_ACCOUNT_TIMESTAMPS_SQL}) AS staged
+            )
+            GROUP BY account_id
+        ) AS latest
+        WHERE account.account_id = latest.account_id
+          AND account.last_snapshot_at IS DISTINCT FROM latest.timestamp;
+        """
+    )
+
+
+def get_backfilled_staged_accounts(conn):
+    """
+    Accounts with a transaction or snapshot after their last staged transaction. Their
+    balances after the import are not their balances at that time.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT staged.account_id
+        FROM (
+            SELECT account_id, MAX(timestamp) AS timestamp
+            FROM ({STAGED_ACCOUNT_TIMESTAMPS_SQL}) AS account_transactions
+            GROUP BY account_id
+        ) AS staged
+        WHERE EXISTS (
+            SELECT 1 FROM transaction
+            WHERE from_account = staged.account_id AND timestamp > staged.timestamp
+        ) OR EXISTS (
+            SELECT 1 FROM transaction
+            WHERE to_account = staged.account_id AND timestamp > staged.timestamp
+        ) OR EXISTS (
+            SELECT 1 FROM snapshot
+            WHERE account_id = staged.account_id AND timestamp > staged.timestamp
+        )
+        ORDER BY staged.account_id;
+        """
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def insert_staged_transactions(conn):
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        INSERT INTO transaction (type, from_account, to_account, timestamp, from_currency, to_currency, amount, rate)
+        SELECT type, from_account, to_account, timestamp, from_currency, to_currency, amount, rate
+        FROM transaction_import
+        ORDER BY line;
+        """
+    )
+    return cursor.rowcount
+
+
+def delete_staged_daily_balances(conn):
+    """
+    Delete the daily balances the staged transactions make stale: those of each account
+    from the day of its first staged transaction on. The rollup job writes them again.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        DELETE FROM daily_balance
+        USING (
+            SELECT account_id, MIN(timestamp)::date AS day
+            FROM ({STAGED_ACCOUNT_TIMESTAMPS_SQL}) AS account_transactions
+            GROUP BY account_id
+        ) AS stale
+        WHERE daily_balance.account_id = stale.account_id
+          AND daily_balance.day >= stale.day;
+        """
+    )
+
+
+def apply_staged_balances(conn):
+    """
+    Apply the net effect of every staged row with a single UPDATE of the balance rows,
+    counting each staged transaction on the balance of each account it moves, like
+    TransactionService does.
+    Returns (Account after the update, timestamp of its last staged transaction) pairs.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        WITH legs AS ({STAGED_LEGS_SQL}), totals AS (
+            SELECT account_id, currency, SUM(delta) AS delta,
+                   SUM(transactions) AS transactions, SUM(legs.legs) AS legs
+            FROM legs
+            GROUP BY account_id, currency
+        )
+        UPDATE account_balance
+        SET balance = account_balance.balance + totals.delta,
+            transaction_count = account_balance.transaction_count + totals.transactions,
+            leg_count = account_balance.leg_count + totals.legs
+        FROM totals
+        WHERE account_balance.account_id = totals.account_id
+          AND account_balance.currency = totals.currency;
+        """
+    )
+    cursor.execute(
+        f"""
+        SELECT account_id, MAX(timestamp)
+        FROM ({STAGED_ACCOUNT_TIMESTAMPS_SQL}) AS account_transactions
+        GROUP BY account_id;
+        """
+    )
+    last_timestamps = dict(cursor.fetchall())
+    accounts = get_accounts(conn, last_timestamps)
+    return [
+        (accounts[account_id], last_timestamps[account_id])
+        for account_id in sorted(accounts)
+    ]
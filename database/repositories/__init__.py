@@ -0,0 +1,64 @@
+"""
+Storage backends of the services, chosen by the optional [storage] section of
+database/database.ini:
+
+    backend=postgresql                    (default, the [postgresql] database)
+    backend=sqlite, path=ledger.sqlite3   (an embedded database file)
+    backend=memory                        (this process only, nothing is persisted)
+"""
+
+import threading
+
+STORAGE_BACKENDS = ["postgresql", "sqlite", "memory"]
+DEFAULT_SQLITE_PATH = "ledger.sqlite3"
+
+# SQLite and in-memory repositories of this process, shared by every service like
+# the DatabaseConnection singleton is.
+_repositories = {}
+_repositories_lock = threading.Lock()
+
+
+def get_storage_backend(config):
+    backend = config.get("storage", "backend", fallback="postgresql")
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(
+            f"Unknown storage backend '{backend}'. Must be one of {', '.join(STORAGE_BACKENDS)}"
+        )
+    return backend
+
+
+def require_postgresql(config, feature):
+    """Raise ValueError unless the PostgreSQL backend is configured, for <feature> needing it."""
+    backend = get_storage_backend(config)
+    if backend != "postgresql":
+        raise ValueError(
+            f"{feature} need the postgresql storage backend, [storage] selects {backend}"
+        )
+
+
+def get_repository(config):
+    """The Repository of the configured backend, imported and opened on first use."""
+    backend = get_storage_backend(config)
+
+    if backend == "postgresql":
+        from database.connection import DatabaseConnection
+        from database.connection_parameters import get_pool_parameters
+        from .postgres import PostgresRepository
+
+        return PostgresRepository(
+            DatabaseConnection(config["postgresql"], get_pool_parameters(config))
+        )
+
+    path = config.get("storage", "path", fallback=DEFAULT_SQLITE_PATH)
+    key = (backend, path if backend == "sqlite" else None)
+    with _repositories_lock:
+        if key not in _repositories:
+            if backend == "sqlite":
+                from .sqlite import SqliteRepository
+
+                _repositories[key] = SqliteRepository(path)
+            else:
+                from .memory import MemoryRepository
+
+                _repositories[key] = MemoryRepository()
+        return _repositories[key]
@@ -0,0 +1,294 @@
+from contextlib import contextmanager
+from decimal import Decimal
+from models.money import Money
+from models.snapshot import Snapshot
+
+# Seeded like migration 0006, further currencies are added with create_currency()
+DEFAULT_CURRENCIES = ["USD", "EUR", "GBP"]
+
+
+class Repository:
+    """
+    Storage of currencies, accounts, transactions, snapshots and exchange rates.
+
+    Services only talk to a repository through transaction(), which yields a Session
+    whose queries commit together when the block succeeds and roll back when it raises.
+    """
+
+    # Connection parameters for LISTEN/NOTIFY, None when other processes cannot be notified.
+    connection_params = None
+
+    @contextmanager
+    def transaction(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class Session:
+    """
+    Queries of one unit of work, see Repository.transaction().
+
+    Every account has one balance per currency, keyed (account_id, currency). Balances
+    are locked by lock_balances() and the balance updates until the end of the unit of
+    work, writers of different currencies of an account do not wait for each other.
+    Timestamps of everything it writes are the same "now", returned by
+    record_transaction() and apply_balance_changes().
+    Balances are Money by currency code and rates Decimal.
+    """
+
+    # Currencies
+
+    def get_currencies(self):
+        """Codes of every currency, in the order they were added."""
+        raise NotImplementedError
+
+    def create_currency(self, code):
+        """
+        Add a currency with a zero balance for every account.
+        Returns False when it already exists.
+        """
+        raise NotImplementedError
+
+    # Accounts
+
+    def create_account(self, balances):
+        """
+        Returns the id of the new account, with the Money of <balances> by currency code
+        and 0 in every other currency.
+        """
+        raise NotImplementedError
+
+    def get_account(self, account_id):
+        """The Account, None when it does not exist."""
+        raise NotImplementedError
+
+    def get_account_ids(self):
+        """Ids of every account, ascending."""
+        raise NotImplementedError
+
+    def update_balance(self, account_id, currency, amount):
+        """Add <amount> to the <currency> balance."""
+        raise NotImplementedError
+
+    def debit_balance(self, account_id, currency, amount):
+        """
+        Subtract <amount> from <currency> only if the balance covers it.
+        Returns the new balance, None when the account does not exist or lacks the funds.
+        """
+        raise NotImplementedError
+
+    def lock_balances(self, keys):
+        """
+        Lock the (account_id, currency) balances of <keys> in ascending key order.
+        Returns the set of keys that exist.
+        """
+        raise NotImplementedError
+
+    def get_accounts(self, account_ids):
+        """The existing accounts of <account_ids> by id, ascending."""
+        raise NotImplementedError
+
+    def apply_balance_changes(self, changes):
+        """
+        Add (account_id, currency, amount, transactions, legs) net changes to balances
+        and their transaction and leg counters. Returns the updated Accounts, ordered by id, and
+        the current timestamp.
+        """
+        raise NotImplementedError
+
+    def record_transaction(self, account_id, currency, legs=1):
+        """
+        Count one more transaction, and its <legs> on the account (see
+        transaction_legs()), on the account's <currency> balance.
+        Returns the updated Account and the current timestamp.
+        """
+        raise NotImplementedError
+
+    def reset_snapshot_counters(self, snapshots):
+        """
+        Mark accounts as just snapshotted.
+        <snapshots> holds (account_id, snapshot timestamp) tuples, a None timestamp means now.
+        """
+        raise NotImplementedError
+
+    # Transactions
+
+    def create_transaction(
+        self,
+        type,
+        from_account,
+        to_account,
+        from_currency,
+        to_currency,
+        amount,
+        rate=1,
+    ):
+        """Returns the id of the new transaction."""
+        raise NotImplementedError
+
+    def create_transactions(self, transactions):
+        """
+        Insert (type, from_account, to_account, from_currency, to_currency, amount, rate)
+        tuples. Returns their ids, in the same order.
+        """
+        return [self.create_transaction(*transaction) for transaction in transactions]
+
+    def get_transactions_in_interval(self, account_id, timestamp1, timestamp2):
+        """TransactionBatch of the account's transactions in (timestamp1, timestamp2], oldest first."""
+        raise NotImplementedError
+
+    def get_transaction_history_for_account(
+        self, account_id, limit=None, type=None, before=None
+    ):
+        """
+        TransactionBatch of the account's transactions, newest first by
+        (timestamp, transaction_id), only those older than the <before> key if given.
+        """
+        raise NotImplementedError
+
+    def get_balance_deltas(self, account_id, timestamp1, timestamp2):
+        """
+        Net Money change of the account by currency in (timestamp1, timestamp2],
+        currencies it did not move are left out.
+        """
+        transactions = self.get_transactions_in_interval(
+            account_id, timestamp1, timestamp2
+        )
+        deltas = {}
+        for transaction in transactions:
+            for leg_account, currency, delta in transaction_legs(transaction):
+                if leg_account == account_id:
+                    deltas[currency] = deltas.get(currency, Money(0)) + delta
+        return deltas
+
+    def get_balances_at_time(self, timestamp, account_ids=None):
+        """
+        Snapshot of the balances of every account (or of <account_ids>) at <timestamp>,
+        ordered by id. Accounts without a snapshot by then are left out.
+        """
+        if account_ids is None:
+            account_ids = self.get_account_ids()
+
+        balances = []
+        for account_id in sorted(set(account_ids)):
+            snapshot = self.get_snapshot_at_time(account_id, timestamp)
+            if snapshot is None:
+                continue
+            deltas = self.get_balance_deltas(account_id, snapshot.timestamp, timestamp)
+            balances.append(
+                Snapshot(
+                    snapshot_id=None,
+                    account_id=account_id,
+                    timestamp=timestamp,
+                    balances={
+                        currency: snapshot.balance(currency)
+                        + deltas.get(currency, Money(0))
+                        for currency in {**snapshot.balances, **deltas}
+                    },
+                )
+            )
+        return balances
+
+    # Snapshots
+
+    def create_snapshot(self, account_id, balances):
+        """Snapshot <balances>, Money by currency code, now. Returns <account_id>."""
+        raise NotImplementedError
+
+    def create_snapshots(self, snapshots):
+        """Insert (account_id, timestamp, balances) tuples."""
+        raise NotImplementedError
+
+    def get_snapshot_at_time(self, account_id, timestamp):
+        """The account's latest Snapshot not after <timestamp>, None if there is none."""
+        raise NotImplementedError
+
+    def get_daily_balance_at_time(self, account_id, timestamp):
+        """
+        The account's latest closing balances of a day not after <timestamp>, as a
+        Snapshot at the end of the day. None if there are none or the backend keeps no
+        daily balances.
+        """
+        return None
+
+    # Exchange rates
+
+    def insert_exchange_rate(self, from_currency, to_currency, rate):
+        """Returns the id of the new exchange rate."""
+        raise NotImplementedError
+
+    def notify_exchange_rate_changed(self, from_currency, to_currency):
+        """Tell other processes the pair changed, once the unit of work commits."""
+
+    def publish_rates(self, rates):
+        """
+        Insert (from_currency, to_currency, rate) triples as one rate board and tell
+        other processes about every pair. Returns the ids of the new exchange rates.
+        """
+        exchange_ids = [self.insert_exchange_rate(*rate) for rate in rates]
+        for from_currency, to_currency, _ in rates:
+            self.notify_exchange_rate_changed(from_currency, to_currency)
+        return exchange_ids
+
+    def get_latest_rate(self, from_currency, to_currency):
+        """The pair's latest CurrencyExchange, None if it has no rate."""
+        raise NotImplementedError
+
+    def get_latest_rates(self, pairs):
+        """Latest CurrencyExchange of each (from_currency, to_currency) of <pairs>, by pair."""
+        exchanges = {}
+        for pair in pairs:
+            exchange = self.get_latest_rate(*pair)
+            if exchange is not None:
+                exchanges[pair] = exchange
+        return exchanges
+
+    def get_all_latest_rates(self, since_board_id=0):
+        """
+        Latest CurrencyExchange of every pair whose current rate was published after
+        board <since_board_id>, by pair. Backends without rate boards return every pair.
+        """
+        raise NotImplementedError
+
+    def get_rate_at_time(self, from_currency, to_currency, timestamp):
+        """The pair's CurrencyExchange in effect at <timestamp>, None if there was none."""
+        raise NotImplementedError
+
+    def get_exchange_rates_since(self, exchange_id):
+        """Every CurrencyExchange inserted after <exchange_id>, oldest first."""
+        raise NotImplementedError
+
+
+def transaction_legs(transaction):
+    """
+    (account_id, currency, Money delta) of every balance change of <transaction>,
+    with the replay rules of the transaction_legs view (migration 0004).
+    """
+    sign = 1 if transaction.type == "DepositMade" else -1
+    yield (
+        transaction.from_account,
+        transaction.from_currency,
+        Money(sign * transaction.amount.minor_units),
+    )
+
+    if transaction.type == "CurrencyConverted" or (
+        transaction.type == "MoneyTransferred"
+        and transaction.to_account != transaction.from_account
+    ):
+        if (
+            transaction.type == "MoneyTransferred"
+            and transaction.from_currency == transaction.to_currency
+        ):
+            credit = transaction.amount
+        else:
+            credit = transaction.amount.convert(transaction.rate)
+        yield transaction.to_account, transaction.to_currency, credit
+
+
+def to_decimal(rate):
+    """Decimal of a rate, floats from their shortest repr like PostgreSQL NUMERIC."""
+    if isinstance(rate, float):
+        return Decimal(repr(rate))
+    return Decimal(rate)
@@ -0,0 +1,311 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from dataclasses import replace
+from datetime import datetime, timedelta
+from models.account import Account
+from models.currency_exchange import CurrencyExchange
+from models.snapshot import Snapshot
+from models.transaction import Transaction, TransactionBatch
+from models.money import Money
+from .base import DEFAULT_CURRENCIES, Repository, Session, to_decimal
+
+
+class MemoryRepository(Repository):
+    """
+    Everything in dicts and lists of this process, for tests, benchmarks and single-node
+    installs that can rebuild their state. Units of work run one at a time.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.currencies = list(DEFAULT_CURRENCIES)
+        self.accounts = {}
+        # Per account, in timestamp order
+        self.transactions = {}
+        self.snapshots = {}
+        # Per (from_currency, to_currency), in timestamp order
+        self.rates = {}
+        self.exchanges = []
+        self.next_account_id = 1
+        self.next_transaction_id = 1
+        self.next_snapshot_id = 1
+        self.last_now = datetime.min
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            # Strictly increasing, so later units of work always sort after earlier ones
+            now = max(datetime.now(), self.last_now + timedelta(microseconds=1))
+            self.last_now = now
+            session = MemorySession(self, now)
+            try:
+                yield session
+            except Exception:
+                session.rollback()
+                raise
+
+
+class MemorySession(Session):
+    """Changes are applied in place and undone in reverse order on rollback."""
+
+    def __init__(self, repository, now):
+        self.repository = repository
+        self.now = now
+        self.undo = []
+
+    def rollback(self):
+        for undo in reversed(self.undo):
+            undo()
+        self.undo.clear()
+
+    def _account(self, account_id):
+        """The stored Account, saved for rollback before the caller changes it."""
+        account = self.repository.accounts.get(account_id)
+        if account is not None:
+            saved = copy_account(account)
+            self.undo.append(
+                lambda: self.repository.accounts.__setitem__(account_id, saved)
+            )
+            self.repository.accounts[account_id] = account = copy_account(account)
+        return account
+
+    def _append(self, items, item, key=None):
+        if key is None:
+            items.append(item)
+        else:
+            insort(items, item, key=key)
+        self.undo.append(lambda: items.remove(item))
+
+    # Currencies
+
+    def get_currencies(self):
+        return list(self.repository.currencies)
+
+    def create_currency(self, code):
+        if code in self.repository.currencies:
+            return False
+        self._append(self.repository.currencies, code)
+        for account_id in self.repository.accounts:
+            self._account(account_id).balances[code] = Money(0)
+        return True
+
+    # Accounts
+
+    def create_account(self, balances):
+        repository = self.repository
+        account_id = repository.next_account_id
+        repository.next_account_id += 1
+        repository.accounts[account_id] = Account(
+            account_id,
+            {
+                currency: balances.get(currency, Money(0))
+                for currency in repository.currencies
+            },
+        )
+        self.undo.append(lambda: repository.accounts.pop(account_id))
+        return account_id
+
+    def get_account(self, account_id):
+        account = self.repository.accounts.get(account_id)
+        return copy_account(account) if account is not None else None
+
+    def get_account_ids(self):
+        return sorted(self.repository.accounts)
+
+    def _has_balance(self, account_id, currency):
+        account = self.repository.accounts.get(account_id)
+        return account is not None and currency in account.balances
+
+    def update_balance(self, account_id, currency, amount):
+        if self._has_balance(account_id, currency):
+            account = self._account(account_id)
+            account.balances[currency] += amount
+
+    def debit_balance(self, account_id, currency, amount):
+        if not self._has_balance(account_id, currency):
+            return None
+        if self.repository.accounts[account_id].balances[currency] < amount:
+            return None
+        account = self._account(account_id)
+        account.balances[currency] -= amount
+        return account.balances[currency]
+
+    def lock_balances(self, keys):
+        # Units of work already run one at a time
+        return {key for key in keys if self._has_balance(*key)}
+
+    def get_accounts(self, account_ids):
+        return {
+            account_id: self.get_account(account_id)
+            for account_id in sorted(set(account_ids))
+            if account_id in self.repository.accounts
+        }
+
+    def apply_balance_changes(self, changes):
+        updated = set()
+        for account_id, currency, amount, transactions, legs in changes:
+            if not self._has_balance(account_id, currency):
+                continue
+            account = self._account(account_id)
+            account.balances[currency] += amount
+            account.transaction_count += transactions
+            account.transactions_since_snapshot += transactions
+            account.legs_since_snapshot += legs
+            updated.add(account_id)
+        return list(self.get_accounts(updated).values()), self.now
+
+    def record_transaction(self, account_id, currency, legs=1):
+        account = self._account(account_id)
+        account.transaction_count += 1
+        account.transactions_since_snapshot += 1
+        account.legs_since_snapshot += legs
+        return copy_account(account), self.now
+
+    def reset_snapshot_counters(self, snapshots):
+        for account_id, timestamp in snapshots:
+            account = self._account(account_id)
+            if account is not None:
+                account.transactions_since_snapshot = 0
+                account.legs_since_snapshot = 0
+                account.last_snapshot_at = timestamp or self.now
+
+    # Transactions
+
+    def create_transaction(
+        self,
+        type,
+        from_account,
+        to_account,
+        from_currency,
+        to_currency,
+        amount,
+        rate=1,
+    ):
+        repository = self.repository
+        transaction = Transaction(
+            id=repository.next_transaction_id,
+            type=type,
+            from_account=from_account,
+            to_account=to_account,
+            timestamp=self.now,
+            from_currency=from_currency,
+            to_currency=to_currency,
+            amount=amount,
+            rate=to_decimal(rate),
+        )
+        repository.next_transaction_id += 1
+        for account_id in {from_account, to_account}:
+            self._append(
+                repository.transactions.setdefault(account_id, []), transaction
+            )
+        return transaction.id
+
+    def get_transactions_in_interval(self, account_id, timestamp1, timestamp2):
+        transactions = self.repository.transactions.get(account_id, [])
+        start = bisect_right(transactions, timestamp1, key=transaction_timestamp)
+        end = bisect_right(transactions, timestamp2, key=transaction_timestamp)
+        return TransactionBatch.from_transactions(transactions[start:end])
+
+    def get_transaction_history_for_account(
+        self, account_id, limit=None, type=None, before=None
+    ):
+        transactions = self.repository.transactions.get(account_id, [])
+        end = len(transactions)
+        if before is not None:
+            end = bisect_left(transactions, tuple(before), key=history_key)
+
+        history = []
+        for index in range(end - 1, -1, -1):
+            transaction = transactions[index]
+            if limit is not None and len(history) >= limit:
+                break
+            if type is None or transaction.type == type:
+                history.append(transaction)
+        return TransactionBatch.from_transactions(history)
+
+    # Snapshots
+
+    def create_snapshot(self, account_id, balances):
+        self.create_snapshots([(account_id, self.now, balances)])
+        return account_id
+
+    def create_snapshots(self, snapshots):
+        repository = self.repository
+        for account_id, timestamp, balances in snapshots:
+            snapshot = Snapshot(
+                snapshot_id=repository.next_snapshot_id,
+                account_id=account_id,
+                timestamp=timestamp,
+                balances=dict(balances),
+            )
+            repository.next_snapshot_id += 1
+            self._append(
+                repository.snapshots.setdefault(account_id, []),
+                snapshot,
+                key=snapshot_timestamp,
+            )
+
+    def get_snapshot_at_time(self, account_id, timestamp):
+        snapshots = self.repository.snapshots.get(account_id, [])
+        index = bisect_right(snapshots, timestamp, key=snapshot_timestamp)
+        if not index:
+            return None
+        snapshot = snapshots[index - 1]
+        return replace(snapshot, balances=dict(snapshot.balances))
+
+    # Exchange rates
+
+    def insert_exchange_rate(self, from_currency, to_currency, rate):
+        repository = self.repository
+        exchange = CurrencyExchange(
+            id=len(repository.exchanges) + 1,
+            timestamp=self.now,
+            from_currency=from_currency,
+            to_currency=to_currency,
+            rate=to_decimal(rate),
+        )
+        self._append(repository.exchanges, exchange)
+        self._append(
+            repository.rates.setdefault((from_currency, to_currency), []), exchange
+        )
+        return exchange.id
+
+    def get_latest_rate(self, from_currency, to_currency):
+        exchanges = self.repository.rates.get((from_currency, to_currency))
+        return exchanges[-1] if exchanges else None
+
+    def get_all_latest_rates(self, since_board_id=0):
+        return {
+            pair: exchanges[-1]
+            for pair, exchanges in self.repository.rates.items()
+            if exchanges
+        }
+
+    def get_rate_at_time(self, from_currency, to_currency, timestamp):
+        exchanges = self.repository.rates.get((from_currency, to_currency), [])
+        index = bisect_right(exchanges, timestamp, key=exchange_timestamp)
+        return exchanges[index - 1] if index else None
+
+    def get_exchange_rates_since(self, exchange_id):
+        return self.repository.exchanges[max(exchange_id, 0) :]
+
+
+def copy_account(account):
+    return replace(account, balances=dict(account.balances))
+
+
+def transaction_timestamp(transaction):
+    return transaction.timestamp
+
+
+def history_key(transaction):
+    return transaction.timestamp, transaction.id
+
+
+def snapshot_timestamp(snapshot):
+    return snapshot.timestamp
+
+
+def exchange_timestamp(exchange):
+    return exchange.timestamp
@@ -0,0 +1,151 @@
+from contextlib import contextmanager
+from database.queries import account, balances, currency, currency_exchange, snapshots
+from database.queries import rollups
+from database.queries import transaction as transaction_queries
+from .base import Repository, Session
+
+
+class PostgresRepository(Repository):
+    """The database/queries functions on connections of the shared DatabaseConnection pool."""
+
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+
+    @property
+    def connection_params(self):
+        return self.db_conn.connection_params
+
+    @contextmanager
+    def transaction(self):
+        with self.db_conn.transaction() as conn:
+            yield PostgresSession(conn)
+
+    def close(self):
+        self.db_conn.close_all()
+
+
+class PostgresSession(Session):
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get_currencies(self):
+        return currency.get_currencies(self.conn)
+
+    def create_currency(self, code):
+        return currency.create_currency(self.conn, code)
+
+    def create_account(self, balances):
+        return account.create_account(self.conn, balances)
+
+    def get_account(self, account_id):
+        return account.get_account(self.conn, account_id)
+
+    def get_account_ids(self):
+        return account.get_account_ids(self.conn)
+
+    def update_balance(self, account_id, currency, amount):
+        account.update_balance(self.conn, account_id, currency, amount)
+
+    def debit_balance(self, account_id, currency, amount):
+        return account.debit_balance(self.conn, account_id, currency, amount)
+
+    def lock_balances(self, keys):
+        return account.lock_balances(self.conn, keys)
+
+    def get_accounts(self, account_ids):
+        return account.get_accounts(self.conn, account_ids)
+
+    def apply_balance_changes(self, changes):
+        return account.apply_balance_changes(self.conn, changes)
+
+    def record_transaction(self, account_id, currency, legs=1):
+        return account.record_transaction(self.conn, account_id, currency, legs)
+
+    def reset_snapshot_counters(self, snapshots):
+        account.reset_snapshot_counters(self.conn, snapshots)
+
+    def create_transaction(
+        self,
+        type,
+        from_account,
+        to_account,
+        from_currency,
+        to_currency,
+        amount,
+        rate=1,
+    ):
+        return transaction_queries.create_transaction(
+            self.conn,
+            type,
+            from_account,
+            to_account,
+            from_currency,
+            to_currency,
+            amount,
+            rate,
+        )
+
+    def create_transactions(self, transactions):
+        return transaction_queries.create_transactions(self.conn, transactions)
+
+    def get_transactions_in_interval(self, account_id, timestamp1, timestamp2):
+        return transaction_queries.get_transactions_in_interval(
+            self.conn, account_id, timestamp1, timestamp2
+        )
+
+    def get_transaction_history_for_account(
+        self, account_id, limit=None, type=None, before=None
+    ):
+        return transaction_queries.get_transaction_history_for_account(
+            self.conn, account_id, limit, type, before
+        )
+
+    def get_balance_deltas(self, account_id, timestamp1, timestamp2):
+        return balances.get_balance_deltas(
+            self.conn, account_id, timestamp1, timestamp2
+        )
+
+    def get_balances_at_time(self, timestamp, account_ids=None):
+        return balances.get_balances_at_time(self.conn, timestamp, account_ids)
+
+    def create_snapshot(self, account_id, balances):
+        return snapshots.create_snapshot(self.conn, account_id, balances)
+
+    def create_snapshots(self, rows):
+        snapshots.create_snapshots(self.conn, rows)
+
+    def get_snapshot_at_time(self, account_id, timestamp):
+        return snapshots.get_snapshot_at_time(self.conn, account_id, timestamp)
+
+    def get_daily_balance_at_time(self, account_id, timestamp):
+        return rollups.get_daily_balance_at_time(self.conn, account_id, timestamp)
+
+    def insert_exchange_rate(self, from_currency, to_currency, rate):
+        return currency_exchange.insert_exchange_rate(
+            self.conn, from_currency, to_currency, rate
+        )
+
+    def notify_exchange_rate_changed(self, from_currency, to_currency):
+        currency_exchange.notify_exchange_rate_changed(
+            self.conn, from_currency, to_currency
+        )
+
+    def publish_rates(self, rates):
+        return currency_exchange.publish_rates(self.conn, rates)
+
+    def get_latest_rate(self, from_currency, to_currency):
+        return currency_exchange.get_latest_rate(self.conn, from_currency, to_currency)
+
+    def get_latest_rates(self, pairs):
+        return currency_exchange.get_latest_rates(self.conn, pairs)
+
+    def get_all_latest_rates(self, since_board_id=0):
+        return currency_exchange.get_all_latest_rates(self.conn, since_board_id)
+
+    def get_rate_at_time(self, from_currency, to_currency, timestamp):
+        return currency_exchange.get_rate_at_time(
+            self.conn, from_currency, to_currency, timestamp
+        )
+
+    def get_exchange_rates_since(self, exchange_id):
+        return currency_exchange.get_exchange_rates_since(self.conn, exchange_id)
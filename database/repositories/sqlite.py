@@ -0,0 +1,551 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models.account import Account
+from models.currency_exchange import CurrencyExchange
+from models.money import Money
+from models.snapshot import Snapshot
+from models.transaction import Transaction, TransactionBatch
+from .base import DEFAULT_CURRENCIES, Repository, Session, to_decimal
+
+# Amounts are INTEGER minor units, rates TEXT decimals and timestamps TEXT in
+# TIMESTAMP_FORMAT, which sorts like the datetimes. Balances are keyed by
+# (account_id, currency) like the PostgreSQL schema of migration 0006.
+SCHEMA_SQL = f"""
+    CREATE TABLE IF NOT EXISTS currency (
+        position INTEGER PRIMARY KEY,
+        code TEXT NOT NULL UNIQUE
+    );
+    INSERT OR IGNORE INTO currency (code)
+    VALUES {", ".join(f"('{currency}')" for currency in DEFAULT_CURRENCIES)};
+    CREATE TABLE IF NOT EXISTS account (
+        account_id INTEGER PRIMARY KEY,
+        transactions_at_snapshot INTEGER NOT NULL DEFAULT 0,
+        legs_at_snapshot INTEGER NOT NULL DEFAULT 0,
+        last_snapshot_at TEXT
+    );
+    CREATE TABLE IF NOT EXISTS account_balance (
+        account_id INTEGER NOT NULL REFERENCES account (account_id),
+        currency TEXT NOT NULL REFERENCES currency (code),
+        balance INTEGER NOT NULL DEFAULT 0,
+        transaction_count INTEGER NOT NULL DEFAULT 0,
+        leg_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (account_id, currency)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS currency_exchange (
+        exchange_id INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        from_currency TEXT NOT NULL,
+        to_currency TEXT NOT NULL,
+        rate TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS currency_exchange_pair_timestamp_idx
+        ON currency_exchange (from_currency, to_currency, timestamp);
+    CREATE TABLE IF NOT EXISTS "transaction" (
+        transaction_id INTEGER PRIMARY KEY,
+        type TEXT NOT NULL,
+        from_account INTEGER NOT NULL REFERENCES account (account_id),
+        to_account INTEGER REFERENCES account (account_id),
+        timestamp TEXT NOT NULL,
+        from_currency TEXT NOT NULL,
+        to_currency TEXT,
+        amount INTEGER NOT NULL,
+        rate TEXT NOT NULL DEFAULT '1'
+    );
+    CREATE INDEX IF NOT EXISTS transaction_from_account_keyset_idx
+        ON "transaction" (from_account, timestamp, transaction_id);
+    CREATE INDEX IF NOT EXISTS transaction_to_account_keyset_idx
+        ON "transaction" (to_account, timestamp, transaction_id);
+    CREATE TABLE IF NOT EXISTS snapshot (
+        snapshot_id INTEGER PRIMARY KEY,
+        account_id INTEGER NOT NULL REFERENCES account (account_id),
+        timestamp TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS snapshot_account_timestamp_idx
+        ON snapshot (account_id, timestamp);
+    CREATE TABLE IF NOT EXISTS snapshot_balance (
+        snapshot_id INTEGER NOT NULL REFERENCES snapshot (snapshot_id),
+        currency TEXT NOT NULL REFERENCES currency (code),
+        balance INTEGER NOT NULL,
+        PRIMARY KEY (snapshot_id, currency)
+    ) WITHOUT ROWID;
+"""
+ACCOUNT_COLUMNS = """
+    account.account_id, account.transactions_at_snapshot, account.legs_at_snapshot,
+    account.last_snapshot_at, balance.currency, balance.balance,
+    balance.transaction_count, balance.leg_count
+"""
+ACCOUNT_JOINS = """
+    JOIN account_balance AS balance ON balance.account_id = account.account_id
+    JOIN currency ON currency.code = balance.currency
+"""
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+TRANSACTION_COLUMNS = """
+    transaction_id, type, from_account, to_account, timestamp,
+    from_currency, to_currency, amount, rate
+"""
+
+
+def format_timestamp(timestamp):
+    return timestamp.strftime(TIMESTAMP_FORMAT)
+
+
+def parse_timestamp(value):
+    return datetime.strptime(value, TIMESTAMP_FORMAT) if value else None
+
+
+class SqliteRepository(Repository):
+    """
+    An embedded SQLite database file, or ":memory:". The schema is created on open.
+    Units of work take SQLite's write lock up front (BEGIN IMMEDIATE), so they run one
+    at a time, across processes too.
+    """
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.lock = threading.Lock()
+        self.last_now = datetime.min
+        # Transactions are begun and committed explicitly
+        self.conn = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA foreign_keys = ON;")
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL;")
+        self.conn.executescript(SCHEMA_SQL)
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE;")
+            now = max(datetime.now(), self.last_now + timedelta(microseconds=1))
+            self.last_now = now
+            try:
+                yield SqliteSession(self.conn, now)
+                self.conn.execute("COMMIT;")
+            except BaseException:
+                self.conn.execute("ROLLBACK;")
+                raise
+
+    def close(self):
+        self.conn.close()
+
+
+def accounts_from_rows(rows):
+    """Accounts of rows of ACCOUNT_COLUMNS ordered by account, like the PostgreSQL version."""
+    accounts = []
+    for (
+        account_id,
+        transactions_at_snapshot,
+        legs_at_snapshot,
+        last_snapshot_at,
+        currency,
+        balance,
+        transaction_count,
+        leg_count,
+    ) in rows:
+        if not accounts or accounts[-1].id != account_id:
+            accounts.append(
+                Account(
+                    id=account_id,
+                    transactions_since_snapshot=-transactions_at_snapshot,
+                    legs_since_snapshot=-legs_at_snapshot,
+                    last_snapshot_at=parse_timestamp(last_snapshot_at),
+                )
+            )
+        account = accounts[-1]
+        account.balances[currency] = Money(balance)
+        account.transaction_count += transaction_count
+        account.transactions_since_snapshot += transaction_count
+        account.legs_since_snapshot += leg_count
+    return accounts
+
+
+def transaction_from_row(row):
+    return Transaction(
+        id=row[0],
+        type=row[1],
+        from_account=row[2],
+        to_account=row[3],
+        timestamp=parse_timestamp(row[4]),
+        from_currency=row[5],
+        to_currency=row[6],
+        amount=Money(row[7]),
+        rate=Decimal(row[8]),
+    )
+
+
+def snapshot_from_rows(rows):
+    if not rows:
+        return None
+    snapshot_id, account_id, timestamp, _, _ = rows[0]
+    return Snapshot(
+        snapshot_id=snapshot_id,
+        account_id=account_id,
+        timestamp=parse_timestamp(timestamp),
+        balances={currency: Money(balance) for *_, currency, balance in rows},
+    )
+
+
+def exchange_from_row(row):
+    return CurrencyExchange(
+        id=row[0],
+        timestamp=parse_timestamp(row[1]),
+        from_currency=row[2],
+        to_currency=row[3],
+        rate=Decimal(row[4]),
+    )
+
+
+class SqliteSession(Session):
+    def __init__(self, conn, now):
+        self.conn = conn
+        self.now = now
+
+    # Currencies
+
+    def get_currencies(self):
+        rows = self.conn.execute("SELECT code FROM currency ORDER BY position;")
+        return [row[0] for row in rows]
+
+    def create_currency(self, code):
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO currency (code) VALUES (?);", (code,)
+        )
+        if not cursor.rowcount:
+            return False
+        self.conn.execute(
+            "INSERT INTO account_balance (account_id, currency) SELECT account_id, ? FROM account;",
+            (code,),
+        )
+        return True
+
+    # Accounts
+
+    def create_account(self, balances):
+        account_id = self.conn.execute("INSERT INTO account DEFAULT VALUES;").lastrowid
+        self.conn.executemany(
+            "INSERT INTO account_balance (account_id, currency, balance) VALUES (?, ?, ?);",
+            [
+                (account_id, currency, balances.get(currency, Money(0)).minor_units)
+                for currency in self.get_currencies()
+            ],
+        )
+        return account_id
+
+    def get_account(self, account_id):
+        return self.get_accounts([account_id]).get(account_id)
+
+    def get_account_ids(self):
+        rows = self.conn.execute("SELECT account_id FROM account ORDER BY account_id;")
+        return [row[0] for row in rows]
+
+    def update_balance(self, account_id, currency, amount):
+        self.conn.execute(
+            """
+            UPDATE account_balance
+            SET balance = balance + ?
+            WHERE account_id = ? AND currency = ?;
+            """,
+            (amount.minor_units, account_id, currency),
+        )
+
+    def debit_balance(self, account_id, currency, amount):
+        row = self.conn.execute(
+            """
+            UPDATE account_balance
+            SET balance = balance - :amount
+            WHERE account_id = :account_id AND currency = :currency
+              AND balance >= :amount
+            RETURNING balance;
+            """,
+            {
+                "amount": amount.minor_units,
+                "account_id": account_id,
+                "currency": currency,
+            },
+        ).fetchone()
+        return Money(row[0]) if row else None
+
+    def lock_balances(self, keys):
+        # BEGIN IMMEDIATE already holds the database's only write lock
+        keys = sorted(set(keys))
+        if not keys:
+            return set()
+        rows = self.conn.execute(
+            f"""
+            SELECT account_id, currency FROM account_balance
+            WHERE (account_id, currency) IN (VALUES {", ".join(["(?, ?)"] * len(keys))});
+            """,
+            [value for key in keys for value in key],
+        )
+        return {tuple(row) for row in rows}
+
+    def get_accounts(self, account_ids):
+        account_ids = sorted(set(account_ids))
+        rows = self.conn.execute(
+            f"""
+            SELECT {ACCOUNT_COLUMNS}
+            FROM account {ACCOUNT_JOINS}
+            WHERE account.account_id IN ({", ".join("?" * len(account_ids))})
+            ORDER BY account.account_id, currency.position;
+            """,
+            account_ids,
+        )
+        return {account.id: account for account in accounts_from_rows(rows)}
+
+    def apply_balance_changes(self, changes):
+        self.conn.executemany(
+            """
+            UPDATE account_balance
+            SET balance = balance + :amount,
+                transaction_count = transaction_count + :transactions,
+                leg_count = leg_count + :legs
+            WHERE account_id = :account_id AND currency = :currency;
+            """,
+            [
+                {
+                    "account_id": account_id,
+                    "currency": currency,
+                    "amount": amount.minor_units,
+                    "transactions": transactions,
+                    "legs": legs,
+                }
+                for account_id, currency, amount, transactions, legs in changes
+            ],
+        )
+        accounts = self.get_accounts(change[0] for change in changes)
+        return list(accounts.values()), self.now
+
+    def record_transaction(self, account_id, currency, legs=1):
+        self.conn.execute(
+            """
+            UPDATE account_balance
+            SET transaction_count = transaction_count + 1,
+                leg_count = leg_count + ?
+            WHERE account_id = ? AND currency = ?;
+            """,
+            (legs, account_id, currency),
+        )
+        return self.get_account(account_id), self.now
+
+    def reset_snapshot_counters(self, snapshots):
+        self.conn.executemany(
+            """
+            UPDATE account
+            SET transactions_at_snapshot = (
+                    SELECT SUM(transaction_count) FROM account_balance
+                    WHERE account_balance.account_id = account.account_id
+                ),
+                legs_at_snapshot = (
+                    SELECT SUM(leg_count) FROM account_balance
+                    WHERE account_balance.account_id = account.account_id
+                ),
+                last_snapshot_at = ?
+            WHERE account_id = ?;
+            """,
+            [
+                (format_timestamp(timestamp or self.now), account_id)
+                for account_id, timestamp in snapshots
+            ],
+        )
+
+    # Transactions
+
+    def create_transaction(
+        self,
+        type,
+        from_account,
+        to_account,
+        from_currency,
+        to_currency,
+        amount,
+        rate=1,
+    ):
+        cursor = self.conn.execute(
+            """
+            INSERT INTO "transaction" (type, from_account, to_account, timestamp,
+                                       from_currency, to_currency, amount, rate)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+            """,
+            (
+                type,
+                from_account,
+                to_account,
+                format_timestamp(self.now),
+                from_currency,
+                to_currency,
+                amount.minor_units,
+                str(to_decimal(rate)),
+            ),
+        )
+        return cursor.lastrowid
+
+    def get_transactions_in_interval(self, account_id, timestamp1, timestamp2):
+        rows = self.conn.execute(
+            f"""
+            SELECT {TRANSACTION_COLUMNS}
+            FROM "transaction"
+            WHERE (from_account = :account_id OR to_account = :account_id)
+              AND timestamp > :timestamp1 AND timestamp <= :timestamp2
+            ORDER BY timestamp, transaction_id;
+            """,
+            {
+                "account_id": account_id,
+                "timestamp1": format_timestamp(timestamp1),
+                "timestamp2": format_timestamp(timestamp2),
+            },
+        )
+        return TransactionBatch.from_transactions(
+            [transaction_from_row(row) for row in rows]
+        )
+
+    def get_transaction_history_for_account(
+        self, account_id, limit=None, type=None, before=None
+    ):
+        conditions = ""
+        if type is not None:
+            conditions += " AND type = :type"
+        if before is not None:
+            conditions += (
+                " AND (timestamp, transaction_id) < (:timestamp, :transaction_id)"
+            )
+        limit_clause = "LIMIT :limit" if limit is not None else ""
+
+        # Each side reads its keyset index backwards, like the PostgreSQL query
+        rows = self.conn.execute(
+            f"""
+            SELECT * FROM (
+                SELECT * FROM (
+                    SELECT {TRANSACTION_COLUMNS} FROM "transaction"
+                    WHERE from_account = :account_id {conditions}
+                    ORDER BY timestamp DESC, transaction_id DESC
+                    {limit_clause}
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT {TRANSACTION_COLUMNS} FROM "transaction"
+                    WHERE to_account = :account_id AND from_account <> :account_id
+                          {conditions}
+                    ORDER BY timestamp DESC, transaction_id DESC
+                    {limit_clause}
+                )
+            )
+            ORDER BY timestamp DESC, transaction_id DESC
+            {limit_clause};
+            """,
+            {
+                "account_id": account_id,
+                "type": type,
+                "timestamp": format_timestamp(before[0]) if before else None,
+                "transaction_id": before[1] if before else None,
+                "limit": limit,
+            },
+        )
+        return TransactionBatch.from_transactions(
+            [transaction_from_row(row) for row in rows]
+        )
+
+    # Snapshots
+
+    def create_snapshot(self, account_id, balances):
+        self.create_snapshots([(account_id, self.now, balances)])
+        return account_id
+
+    def create_snapshots(self, snapshots):
+        for account_id, timestamp, balances in snapshots:
+            snapshot_id = self.conn.execute(
+                "INSERT INTO snapshot (account_id, timestamp) VALUES (?, ?);",
+                (account_id, format_timestamp(timestamp)),
+            ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO snapshot_balance (snapshot_id, currency, balance) VALUES (?, ?, ?);",
+                [
+                    (snapshot_id, currency, balance.minor_units)
+                    for currency, balance in balances.items()
+                ],
+            )
+
+    def get_snapshot_at_time(self, account_id, timestamp):
+        rows = self.conn.execute(
+            """
+            SELECT snapshot.snapshot_id, snapshot.account_id, snapshot.timestamp,
+                   balance.currency, balance.balance
+            FROM (
+                SELECT * FROM snapshot
+                WHERE account_id = ? AND timestamp <= ?
+                ORDER BY timestamp DESC, snapshot_id DESC
+                LIMIT 1
+            ) AS snapshot
+            JOIN snapshot_balance AS balance ON balance.snapshot_id = snapshot.snapshot_id
+            JOIN currency ON currency.code = balance.currency
+            ORDER BY currency.position;
+            """,
+            (account_id, format_timestamp(timestamp)),
+        ).fetchall()
+        return snapshot_from_rows(rows)
+
+    # Exchange rates
+
+    def insert_exchange_rate(self, from_currency, to_currency, rate):
+        cursor = self.conn.execute(
+            """
+            INSERT INTO currency_exchange (timestamp, from_currency, to_currency, rate)
+            VALUES (?, ?, ?, ?);
+            """,
+            (
+                format_timestamp(self.now),
+                from_currency,
+                to_currency,
+                str(to_decimal(rate)),
+            ),
+        )
+        return cursor.lastrowid
+
+    def get_latest_rate(self, from_currency, to_currency):
+        return self.get_rate_at_time(from_currency, to_currency, datetime.max)
+
+    def get_all_latest_rates(self, since_board_id=0):
+        rows = self.conn.execute(
+            """
+            SELECT exchange_id, timestamp, from_currency, to_currency, rate
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY from_currency, to_currency
+                    ORDER BY timestamp DESC, exchange_id DESC
+                ) AS recency
+                FROM currency_exchange
+            )
+            WHERE recency = 1;
+            """
+        )
+        exchanges = [exchange_from_row(row) for row in rows]
+        return {
+            (exchange.from_currency, exchange.to_currency): exchange
+            for exchange in exchanges
+        }
+
+    def get_rate_at_time(self, from_currency, to_currency, timestamp):
+        row = self.conn.execute(
+            """
+            SELECT * FROM currency_exchange
+            WHERE from_currency = ? AND to_currency = ? AND timestamp <= ?
+            ORDER BY timestamp DESC, exchange_id DESC
+            LIMIT 1;
+            """,
+            (from_currency, to_currency, format_timestamp(timestamp)),
+        ).fetchone()
+        return exchange_from_row(row) if row else None
+
+    def get_exchange_rates_since(self, exchange_id):
+        rows = self.conn.execute(
+            """
+            SELECT * FROM currency_exchange
+            WHERE exchange_id > ?
+            ORDER BY exchange_id;
+            """,
+            (exchange_id,),
+        )
+        return [exchange_from_row(row) for row in rows]
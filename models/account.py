@@ -1,11 +1,19 @@
-from decimal import Decimal
-from typing import DefaultDict
-from dataclasses import dataclass
+from models.money import Money
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
 
 
 @dataclass
 class Account:
     id: int
-    usd_balance: Decimal
-    eur_balance: Decimal
-    gbp_balance: Decimal
+    # Money by currency code, one entry per row of the account_balance table
+    balances: Dict[str, Money] = field(default_factory=dict)
+    transaction_count: int = 0
+    transactions_since_snapshot: int = 0
+    # Rows of the transaction_legs view on the account since its last snapshot
+    legs_since_snapshot: int = 0
+    last_snapshot_at: Optional[datetime] = None
+
+    def balance(self, currency):
+        return self.balances.get(currency, Money(0))
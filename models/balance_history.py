@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+from datetime import datetime
+from models.money import Money
+from typing import Dict, List
+
+
+@dataclass
+class BalanceHistory:
+    account_id: int
+    timestamps: List[datetime]
+    # One Money per timestamp, by currency code
+    balances: Dict[str, List[Money]]
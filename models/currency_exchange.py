@@ -1,6 +1,7 @@
 from decimal import Decimal
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional, Tuple
 
 
 @dataclass
@@ -10,3 +11,8 @@ class CurrencyExchange:
     from_currency: str
     to_currency: str
     rate: Decimal
+    # The rate board the rate was published with, on backends that version rates
+    board_id: Optional[int] = None
+    # The direct rates a derived rate was multiplied from, in order; empty for a rate
+    # of its own. A derived rate has no id and the timestamp of its oldest leg.
+    legs: Tuple["CurrencyExchange", ...] = ()
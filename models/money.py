@@ -0,0 +1,118 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from functools import lru_cache
+
+MINOR_UNITS_PER_UNIT = 100
+INT64_MIN = -0x8000000000000000
+INT64_MAX = 0x7FFFFFFFFFFFFFFF
+
+
+@lru_cache(maxsize=1024)
+def rate_ratio(rate):
+    """<rate> as an exact (numerator, denominator) pair of integers."""
+    return Decimal(rate).as_integer_ratio()
+
+
+def convert_minor_units(minor_units, rate):
+    """round(amount * rate, 2) on minor units: exact integer division, ties to even."""
+    numerator, denominator = rate_ratio(rate)
+    quotient, remainder = divmod(minor_units * numerator, denominator)
+    if 2 * remainder > denominator or (2 * remainder == denominator and quotient & 1):
+        quotient += 1
+    return quotient
+
+
+class Money:
+    """
+    Amount of money as a signed int64 count of minor units (cents).
+
+    Arithmetic between amounts is exact integer arithmetic. The only rounding happens
+    when an amount is parsed (to the nearest cent) and when it is converted at an
+    exchange rate, both rounding half to even like round(amount * rate, 2).
+    """
+
+    __slots__ = ("minor_units",)
+
+    def __init__(self, minor_units=0):
+        if minor_units.__class__ is not int:
+            minor_units = int(minor_units)
+        if not INT64_MIN <= minor_units <= INT64_MAX:
+            raise ValueError(f"{minor_units} minor units do not fit in an int64")
+        self.minor_units = minor_units
+
+    @classmethod
+    def parse(cls, value):
+        """
+        Money from a str, int, float or Decimal amount, rounded half to even to the cent.
+        Floats are parsed from their shortest repr, so 0.1 is ten cents.
+        """
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, float):
+            value = repr(value)
+        try:
+            minor_units = (Decimal(value) * MINOR_UNITS_PER_UNIT).to_integral_value(
+                rounding=ROUND_HALF_EVEN
+            )
+            return cls(minor_units)
+        except (InvalidOperation, TypeError, OverflowError):
+            raise ValueError(f"Invalid amount: {value}")
+
+    def to_decimal(self):
+        return Decimal(self.minor_units).scaleb(-2)
+
+    def convert(self, rate):
+        """The amount in another currency at <rate>, see convert_minor_units()."""
+        return Money(convert_minor_units(self.minor_units, rate))
+
+    def __add__(self, other):
+        if other.__class__ is not Money:
+            return NotImplemented
+        return Money(self.minor_units + other.minor_units)
+
+    def __sub__(self, other):
+        if other.__class__ is not Money:
+            return NotImplemented
+        return Money(self.minor_units - other.minor_units)
+
+    def __neg__(self):
+        return Money(-self.minor_units)
+
+    def __abs__(self):
+        return Money(abs(self.minor_units))
+
+    def __bool__(self):
+        return self.minor_units != 0
+
+    def __eq__(self, other):
+        if other.__class__ is not Money:
+            return NotImplemented
+        return self.minor_units == other.minor_units
+
+    def __lt__(self, other):
+        if other.__class__ is not Money:
+            return NotImplemented
+        return self.minor_units < other.minor_units
+
+    def __le__(self, other):
+        if other.__class__ is not Money:
+            return NotImplemented
+        return self.minor_units <= other.minor_units
+
+    def __gt__(self, other):
+        if other.__class__ is not Money:
+            return NotImplemented
+        return self.minor_units > other.minor_units
+
+    def __ge__(self, other):
+        if other.__class__ is not Money:
+            return NotImplemented
+        return self.minor_units >= other.minor_units
+
+    def __hash__(self):
+        return hash(self.minor_units)
+
+    def __str__(self):
+        return str(self.to_decimal())
+
+    def __repr__(self):
+        return f"Money('{self}')"
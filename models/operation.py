@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+from typing import Optional
+from models.money import Money
+
+OPERATION_TYPES = ["deposit", "withdraw", "transfer", "convert_currency"]
+
+
+@dataclass
+class Operation:
+    """
+    One entry of TransactionService.apply_batch(), <type> names the service method it
+    stands for. Transfers credit <to_account_id>, transfers and conversions credit
+    <to_currency> (a same-currency transfer when omitted).
+    """
+
+    type: str
+    account_id: int
+    currency: str
+    amount: Money
+    to_account_id: Optional[int] = None
+    to_currency: Optional[str] = None
@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class RateBoard:
+    """
+    Summary of a rate board published by ImportService.ingest_rates(): <ticks> read from
+    the feed, of which <duplicates> were dropped, and the <inverses> added for pairs the
+    feed only quoted one way.
+    """
+
+    id: int
+    ticks: int
+    duplicates: int
+    inverses: int
+
+    @property
+    def published(self):
+        """Number of rates the board holds."""
+        return self.ticks - self.duplicates + self.inverses
@@ -1,6 +1,7 @@
-from dataclasses import dataclass
-from decimal import Decimal
+from dataclasses import dataclass, field
+from models.money import Money
 from datetime import datetime
+from typing import Dict
 
 
 @dataclass
@@ -8,6 +9,8 @@ class Snapshot:
     snapshot_id: int
     account_id: int
     timestamp: datetime
-    usd_balance: Decimal
-    eur_balance: Decimal
-    gbp_balance: Decimal
+    # Money by currency code, one entry per row of the snapshot_balance table
+    balances: Dict[str, Money] = field(default_factory=dict)
+
+    def balance(self, currency):
+        return self.balances.get(currency, Money(0))
@@ -1,9 +1,45 @@
 from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
+from models.money import Money
+import threading
+import numpy as np
 
+# Codes of the type and currency columns of a TransactionBatch are indexes into these.
+TRANSACTION_TYPES = [
+    "DepositMade",
+    "WithdrawalMade",
+    "MoneyTransferred",
+    "CurrencyConverted",
+]
+# The currencies seeded by migration 0006, others are appended as they are met
+CURRENCIES = ["USD", "EUR", "GBP"]
+TYPE_CODES = {type: code for code, type in enumerate(TRANSACTION_TYPES)}
+CURRENCY_CODES = {currency: code for code, currency in enumerate(CURRENCIES)}
+MAX_CURRENCY_CODE = np.iinfo(np.int8).max
 
-@dataclass
+_currencies_lock = threading.Lock()
+
+
+def register_currencies(currencies):
+    """
+    Give a code to every currency of <currencies> this process has not met yet, such as
+    currencies added to the currency table after it started. Codes never change once
+    handed out, they only live as long as the process.
+    """
+    with _currencies_lock:
+        for currency in currencies:
+            if currency in CURRENCY_CODES:
+                continue
+            if len(CURRENCIES) > MAX_CURRENCY_CODE:
+                raise ValueError(
+                    f"Cannot add currency '{currency}', a TransactionBatch holds at most {MAX_CURRENCY_CODE + 1} currencies"
+                )
+            CURRENCY_CODES[currency] = len(CURRENCIES)
+            CURRENCIES.append(currency)
+
+
+@dataclass(slots=True)
 class Transaction:
     id: int
     type: str
@@ -12,5 +48,118 @@ class Transaction:
     timestamp: datetime
     from_currency: str
     to_currency: str
-    amount: Decimal
+    amount: Money
     rate: Decimal
+
+
+class TransactionBatch:
+    """
+    Transactions stored column by column in typed NumPy arrays.
+
+    Ids and accounts are int64, timestamps datetime64[us] and amounts int64 minor units.
+    Types and currencies are int8 codes (see TRANSACTION_TYPES and CURRENCIES), and
+    rates are int32 codes into <rates>, the distinct Decimal rates of the batch.
+    Iterating yields Transaction records one at a time, bulk consumers should read
+    the columns instead.
+    """
+
+    __slots__ = (
+        "ids",
+        "types",
+        "from_accounts",
+        "to_accounts",
+        "timestamps",
+        "from_currencies",
+        "to_currencies",
+        "amounts",
+        "rate_codes",
+        "rates",
+    )
+
+    def __init__(
+        self,
+        ids,
+        types,
+        from_accounts,
+        to_accounts,
+        timestamps,
+        from_currencies,
+        to_currencies,
+        amounts,
+        rate_codes,
+        rates,
+    ):
+        self.ids = ids
+        self.types = types
+        self.from_accounts = from_accounts
+        self.to_accounts = to_accounts
+        self.timestamps = timestamps
+        self.from_currencies = from_currencies
+        self.to_currencies = to_currencies
+        self.amounts = amounts
+        self.rate_codes = rate_codes
+        self.rates = rates
+
+    @classmethod
+    def allocate(cls, size):
+        """A batch of <size> uninitialized rows, to be filled in place."""
+        return cls(
+            ids=np.empty(size, dtype=np.int64),
+            types=np.empty(size, dtype=np.int8),
+            from_accounts=np.empty(size, dtype=np.int64),
+            to_accounts=np.empty(size, dtype=np.int64),
+            timestamps=np.empty(size, dtype="datetime64[us]"),
+            from_currencies=np.empty(size, dtype=np.int8),
+            to_currencies=np.empty(size, dtype=np.int8),
+            amounts=np.empty(size, dtype=np.int64),
+            rate_codes=np.empty(size, dtype=np.int32),
+            rates=[],
+        )
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        batch = cls.allocate(len(transactions))
+        rate_codes = {}
+        register_currencies(
+            {transaction.from_currency for transaction in transactions}
+            | {transaction.to_currency for transaction in transactions}
+        )
+        for row, transaction in enumerate(transactions):
+            batch.ids[row] = transaction.id if transaction.id is not None else -1
+            batch.types[row] = TYPE_CODES[transaction.type]
+            batch.from_accounts[row] = transaction.from_account
+            batch.to_accounts[row] = transaction.to_account
+            batch.timestamps[row] = transaction.timestamp
+            batch.from_currencies[row] = CURRENCY_CODES[transaction.from_currency]
+            batch.to_currencies[row] = CURRENCY_CODES[transaction.to_currency]
+            batch.amounts[row] = transaction.amount.minor_units
+            batch.rate_codes[row] = batch.rate_code(transaction.rate, rate_codes)
+        return batch
+
+    def rate_code(self, rate, codes):
+        """Code of <rate>, adding it to <rates>. <codes> maps the rates seen so far to their codes."""
+        code = codes.get(rate)
+        if code is None:
+            code = codes[rate] = len(self.rates)
+            self.rates.append(Decimal(rate))
+        return code
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        return Transaction(
+            id=int(self.ids[row]),
+            type=TRANSACTION_TYPES[self.types[row]],
+            from_account=int(self.from_accounts[row]),
+            to_account=int(self.to_accounts[row]),
+            timestamp=self.timestamps[row].item(),
+            from_currency=CURRENCIES[self.from_currencies[row]],
+            to_currency=CURRENCIES[self.to_currencies[row]],
+            amount=Money(self.amounts[row]),
+            rate=self.rates[self.rate_codes[row]],
+        )
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
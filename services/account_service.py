@@ -1,39 +1,45 @@
-from database.queries.account import create_account, get_account
+from models.money import Money
 from .snapshot_service import SnapshotService
-from database.connection import DatabaseConnection
 from database.connection_parameters import get_database_parameters
+from database.repositories import get_repository
+
+
+def check_currencies(currency_dict, account):
+    """Raise ValueError if <currency_dict> has a currency the new <account> has no balance in."""
+    for currency in currency_dict:
+        if currency not in account.balances:
+            raise ValueError(f"Invalid currency '{currency}'")
 
 
 class AccountService:
-    def __init__(self):
+    def __init__(self, snapshot_service=None, repository=None):
         cfg = get_database_parameters("database/database.ini")
-        self.db_conn = DatabaseConnection(cfg["postgresql"])
-        self.snapshot_service = SnapshotService()
+        self.repository = repository or get_repository(cfg)
+        self.snapshot_service = snapshot_service or SnapshotService(self.repository)
 
     def create_account(self, currency_dict):
-
-        usd_balance = currency_dict["USD"]
-        eur_balance = currency_dict["EUR"]
-        gbp_balance = currency_dict["GBP"]
-
-        for balance in [usd_balance, eur_balance, gbp_balance]:
-            if balance < 0:
+        """
+        Create an account with the initial balances of <currency_dict>, Money by
+        currency code. Every other currency starts at 0.
+        """
+        for balance in currency_dict.values():
+            if balance < Money(0):
                 raise ValueError("Balance cannot hold a negative value.")
 
-        usd_balance = round(usd_balance, 2)
-        eur_balance = round(eur_balance, 2)
-        gbp_balance = round(gbp_balance, 2)
-
-        with self.db_conn.get_connection() as conn:
-            account_id = create_account(conn, usd_balance, eur_balance, gbp_balance)
-            self.snapshot_service.handle_snapshots(account_id)
+        with self.repository.transaction() as session:
+            account_id = session.create_account(currency_dict)
+            account = session.get_account(account_id)
+            check_currencies(currency_dict, account)
+            # Every account starts with a snapshot, reconstruction replays from it.
+            self.snapshot_service.take_snapshot(session, account)
             return account_id
 
     def get_balance(self, account_id):
-        with self.db_conn.get_connection() as conn:
-            account = get_account(conn, account_id)
+        """The account's balances, Money by currency code, or -1 if it does not exist."""
+        with self.repository.transaction() as session:
+            account = session.get_account(account_id)
 
             if account is None:
-                return -1, -1, -1
+                return -1
 
-            return account.usd_balance, account.eur_balance, account.gbp_balance
+            return account.balances
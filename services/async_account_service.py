@@ -0,0 +1,42 @@
+from database.async_queries.account import create_account, get_account
+from models.money import Money
+from .account_service import check_currencies
+from .async_snapshot_service import AsyncSnapshotService
+from database.async_connection import AsyncDatabaseConnection
+from database.connection_parameters import (
+    get_database_parameters,
+    get_pool_parameters,
+)
+
+
+class AsyncAccountService:
+    """asyncio counterpart of AccountService, same arguments and return values."""
+
+    def __init__(self, db_conn=None):
+        cfg = get_database_parameters("database/database.ini")
+        self.db_conn = db_conn or AsyncDatabaseConnection(
+            cfg["postgresql"], get_pool_parameters(cfg, "async_pool")
+        )
+        self.snapshot_service = AsyncSnapshotService(self.db_conn)
+
+    async def create_account(self, currency_dict):
+
+        for balance in currency_dict.values():
+            if balance < Money(0):
+                raise ValueError("Balance cannot hold a negative value.")
+
+        async with self.db_conn.transaction() as conn:
+            account_id = await create_account(conn, currency_dict)
+            account = await get_account(conn, account_id)
+            check_currencies(currency_dict, account)
+            await self.snapshot_service.take_snapshot(conn, account)
+            return account_id
+
+    async def get_balance(self, account_id):
+        async with self.db_conn.transaction() as conn:
+            account = await get_account(conn, account_id)
+
+            if account is None:
+                return -1
+
+            return account.balances
@@ -0,0 +1,61 @@
+from database.async_queries.currency_exchange import (
+    get_all_latest_rates,
+    get_latest_rates,
+    publish_rates,
+)
+from database.async_connection import AsyncDatabaseConnection
+from database.connection_parameters import (
+    get_database_parameters,
+    get_pool_parameters,
+)
+from .currency_exchange_service import rate_matrix_from_config, rate_board
+
+
+class AsyncCurrencyExchangeService:
+    """
+    asyncio counterpart of CurrencyExchangeService for the latest rates.
+    Rates are kept in a RateMatrix the same way; it never awaits while holding its lock.
+    """
+
+    def __init__(self, db_conn=None):
+        cfg = get_database_parameters("database/database.ini")
+        self.db_conn = db_conn or AsyncDatabaseConnection(
+            cfg["postgresql"], get_pool_parameters(cfg, "async_pool")
+        )
+        self.rate_matrix = rate_matrix_from_config(cfg)
+
+    async def refresh_rates(self, conn):
+        if self.rate_matrix.expired():
+            exchanges = await get_all_latest_rates(conn, self.rate_matrix.board_id)
+            self.rate_matrix.add(exchanges.values(), complete=True)
+            return
+
+        pairs = self.rate_matrix.take_invalidated()
+        if not pairs:
+            return
+        try:
+            exchanges = await get_latest_rates(conn, pairs)
+        except Exception:
+            for pair in pairs:
+                self.rate_matrix.invalidate(*pair)
+            raise
+        self.rate_matrix.add(exchanges.values())
+
+    async def get_latest_rate(self, from_currency, to_currency, conn=None):
+        if self.rate_matrix.needs_refresh():
+            if conn is None:
+                async with self.db_conn.transaction() as conn:
+                    await self.refresh_rates(conn)
+            else:
+                await self.refresh_rates(conn)
+        return self.rate_matrix.get(from_currency, to_currency)
+
+    async def update_exchange_rate(self, from_currency, to_currency, rate):
+        if from_currency == to_currency:
+            return
+
+        async with self.db_conn.transaction() as conn:
+            await publish_rates(conn, rate_board(from_currency, to_currency, rate))
+
+        self.rate_matrix.invalidate(from_currency, to_currency)
+        self.rate_matrix.invalidate(to_currency, from_currency)
@@ -0,0 +1,37 @@
+from database.async_queries.snapshots import create_snapshot
+from database.async_queries.account import (
+    record_transaction,
+    reset_snapshot_counters,
+)
+from database.async_connection import AsyncDatabaseConnection
+from database.connection_parameters import (
+    get_database_parameters,
+    get_pool_parameters,
+)
+from .snapshot_policy import get_snapshot_policy
+from .snapshot_service import transfer_balances
+
+
+class AsyncSnapshotService:
+    """asyncio counterpart of SnapshotService, same snapshot policy."""
+
+    def __init__(self, db_conn=None):
+        cfg = get_database_parameters("database/database.ini")
+        self.db_conn = db_conn or AsyncDatabaseConnection(
+            cfg["postgresql"], get_pool_parameters(cfg, "async_pool")
+        )
+        self.policy = get_snapshot_policy(cfg)
+
+    async def handle_snapshots(self, conn, account_id, currency, legs=1):
+        account, now = await record_transaction(conn, account_id, currency, legs)
+
+        if self.policy.should_snapshot(account, now):
+            await self.take_snapshot(conn, account)
+
+    async def handle_transfer_snapshots(self, conn, from_balance, to_balance):
+        for account_id, currency in transfer_balances(from_balance, to_balance):
+            await self.handle_snapshots(conn, account_id, currency)
+
+    async def take_snapshot(self, conn, account):
+        await create_snapshot(conn, account.id, account.balances)
+        await reset_snapshot_counters(conn, [(account.id, None)])
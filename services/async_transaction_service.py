@@ -0,0 +1,172 @@
+from database.async_queries.account import (
+    debit_balance,
+    get_account,
+    lock_balances,
+    update_balance,
+)
+from database.async_queries.transaction import create_transaction
+from models.money import Money
+from .async_snapshot_service import AsyncSnapshotService
+from .async_currency_exchange_service import AsyncCurrencyExchangeService
+from database.async_connection import AsyncDatabaseConnection
+from database.connection_parameters import (
+    get_database_parameters,
+    get_pool_parameters,
+)
+
+
+class AsyncTransactionService:
+    """
+    asyncio counterpart of TransactionService for high-concurrency ingestion.
+    Same arguments, return codes and SQL; each operation awaits its own pooled
+    connection, so thousands of callers share a handful of database connections.
+    """
+
+    def __init__(self, db_conn=None):
+        cfg = get_database_parameters("database/database.ini")
+        self.db_conn = db_conn or AsyncDatabaseConnection(
+            cfg["postgresql"], get_pool_parameters(cfg, "async_pool")
+        )
+        self.snapshot_service = AsyncSnapshotService(self.db_conn)
+        self.currency_exchange_service = AsyncCurrencyExchangeService(self.db_conn)
+
+    async def deposit(self, account_id, currency, amount):
+        if amount <= Money(0):
+            raise ValueError("Deposit amount can only hold a positive value.")
+
+        async with self.db_conn.transaction() as conn:
+            account = await get_account(conn, account_id)
+
+            if not account:
+                return -1
+            if currency not in account.balances:
+                raise ValueError(f"Invalid currency '{currency}'")
+
+            await update_balance(conn, account_id, currency, amount)
+            transaction_id = await create_transaction(
+                conn, "DepositMade", account_id, account_id, currency, currency, amount
+            )
+
+            await self.snapshot_service.handle_snapshots(conn, account_id, currency)
+            return transaction_id
+
+    async def withdraw(self, account_id, currency, amount):
+
+        async with self.db_conn.transaction() as conn:
+            # Checks the balance and debits it in one statement, no lost updates
+            if await debit_balance(conn, account_id, currency, amount) is None:
+                return -1 if await get_account(conn, account_id) is None else -2
+
+            transaction_id = await create_transaction(
+                conn,
+                "WithdrawalMade",
+                account_id,
+                account_id,
+                currency,
+                currency,
+                amount,
+            )
+            await self.snapshot_service.handle_snapshots(conn, account_id, currency)
+            return transaction_id
+
+    async def transfer(
+        self, from_account_id, to_account_id, from_currency, to_currency, amount
+    ):
+
+        async with self.db_conn.transaction() as conn:
+            # Lock both balances in key order, parallel transfers between the same
+            # two balances then queue up instead of deadlocking.
+            to_currency = to_currency or from_currency
+            from_balance = (from_account_id, from_currency)
+            to_balance = (to_account_id, to_currency)
+            balances = await lock_balances(conn, [from_balance, to_balance])
+
+            if from_balance not in balances:
+                return -1
+
+            if to_balance not in balances:
+                return -2
+
+            if (
+                await debit_balance(conn, from_account_id, from_currency, amount)
+                is None
+            ):
+                return -3
+
+            rate = 1
+            if from_currency != to_currency:
+                exchange = await self.currency_exchange_service.get_latest_rate(
+                    from_currency, to_currency, conn
+                )
+                if not exchange:
+                    raise ValueError(
+                        f"No exchange rate available between {from_currency} and {to_currency}"
+                    )
+                rate = exchange.rate
+                to_amount = amount.convert(rate)
+            else:
+                to_amount = amount
+
+            await update_balance(conn, to_account_id, to_currency, to_amount)
+
+            transaction_id = await create_transaction(
+                conn,
+                "MoneyTransferred",
+                from_account_id,
+                to_account_id,
+                from_currency,
+                to_currency,
+                amount,
+                rate,
+            )
+            await self.snapshot_service.handle_transfer_snapshots(
+                conn, from_balance, to_balance
+            )
+            return transaction_id
+
+    async def convert_currency(self, account_id, from_currency, to_currency, amount):
+
+        if amount <= Money(0):
+            return -1
+
+        async with self.db_conn.transaction() as conn:
+            # Both balances of the account in key order, like transfer()
+            balances = await lock_balances(
+                conn, [(account_id, from_currency), (account_id, to_currency)]
+            )
+            if await debit_balance(conn, account_id, from_currency, amount) is None:
+                return -2 if await get_account(conn, account_id) is None else -3
+            if (account_id, to_currency) not in balances:
+                raise ValueError(f"Invalid currency '{to_currency}'")
+
+            rate = 1
+            if from_currency != to_currency:
+                exchange = await self.currency_exchange_service.get_latest_rate(
+                    from_currency, to_currency, conn
+                )
+                if not exchange:
+                    raise ValueError(
+                        f"No exchange rate available between {from_currency} and {to_currency}"
+                    )
+                rate = exchange.rate
+                to_amount = amount.convert(rate)
+            else:
+                to_amount = amount
+
+            await update_balance(conn, account_id, to_currency, to_amount)
+
+            transaction_id = await create_transaction(
+                conn,
+                "CurrencyConverted",
+                account_id,
+                account_id,
+                from_currency,
+                to_currency,
+                amount,
+                rate,
+            )
+            # Converted from and to the account's balances, two legs on it
+            await self.snapshot_service.handle_snapshots(
+                conn, account_id, from_currency, legs=2
+            )
+            return transaction_id
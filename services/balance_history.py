@@ -0,0 +1,89 @@
+from datetime import timedelta
+import numpy as np
+from models.money import INT64_MAX, rate_ratio
+from models.transaction import CURRENCIES, TYPE_CODES
+
+# Guards against a tiny interval over a long range.
+MAX_HISTORY_POINTS = 100_000
+
+
+def sample_times(start, end, interval):
+    """start, start + interval, ... up to and including end."""
+    if interval <= timedelta(0):
+        raise ValueError("The interval must be positive.")
+    if end < start:
+        raise ValueError("The end of the history must not be before its start.")
+
+    points = (end - start) // interval + 1
+    if points > MAX_HISTORY_POINTS:
+        raise ValueError(
+            f"{points} points requested, at most {MAX_HISTORY_POINTS} are allowed. Use a larger interval."
+        )
+    return [start + interval * i for i in range(points)]
+
+
+def converted_amounts(batch):
+    """
+    Every amount of <batch> converted at its rate, in minor units: round(amount * rate, 2)
+    with ties to even, computed once per distinct rate.
+    """
+    converted = np.empty(len(batch), dtype=np.int64)
+    for code, rate in enumerate(batch.rates):
+        rows = batch.rate_codes == code
+        numerator, denominator = rate_ratio(rate)
+        amounts = batch.amounts[rows]
+        if amounts.size and np.abs(amounts).max() > INT64_MAX // max(abs(numerator), 1):
+            # amount * numerator would overflow int64, use Python integers instead
+            amounts = amounts.astype(object)
+        quotient, remainder = np.divmod(amounts * numerator, denominator)
+        round_up = (2 * remainder > denominator) | (
+            (2 * remainder == denominator) & (quotient % 2 == 1)
+        )
+        converted[rows] = quotient + round_up
+    return converted
+
+
+def transaction_deltas(account_id, batch, currency_count=None):
+    """
+    Timestamps of the TransactionBatch <batch> and an (n, currency_count) int64 array of
+    the signed minor-unit changes they make to the account's balance in every currency
+    (columns follow CURRENCIES), following the replay rules of reconstruct_state.
+    """
+    rows = np.arange(len(batch))
+    deltas = np.zeros((len(batch), currency_count or len(CURRENCIES)), dtype=np.int64)
+
+    deposits = batch.types == TYPE_CODES["DepositMade"]
+    transfers = batch.types == TYPE_CODES["MoneyTransferred"]
+    incoming = transfers & (batch.from_accounts != account_id)
+
+    # Every transaction but an incoming transfer moves money out of the from currency
+    debits = np.where(deposits, batch.amounts, -batch.amounts)
+    debits[incoming] = 0
+    deltas[rows, batch.from_currencies] = debits
+
+    # Conversions and incoming transfers move money into the to currency
+    credited = (batch.types == TYPE_CODES["CurrencyConverted"]) | incoming
+    credits = np.where(
+        transfers & (batch.from_currencies == batch.to_currencies),
+        batch.amounts,
+        converted_amounts(batch),
+    )
+    deltas[rows[credited], batch.to_currencies[credited]] += credits[credited]
+
+    return batch.timestamps, deltas
+
+
+def balance_series(start_balances, timestamps, deltas, samples):
+    """
+    Balances at every sample time, as an (m, currencies) int64 array of minor units.
+
+    <timestamps> must be sorted; a transaction counts towards every sample at or after
+    its timestamp. Cumulative sums make the whole series a single pass over the data.
+    """
+    running = np.vstack(
+        [np.zeros((1, deltas.shape[1]), dtype=np.int64), np.cumsum(deltas, axis=0)]
+    )
+    positions = np.searchsorted(
+        timestamps, np.array(samples, dtype="datetime64[us]"), side="right"
+    )
+    return np.asarray(start_balances, dtype=np.int64) + running[positions]
@@ -1,30 +1,178 @@
-from database.queries.currency_exchange import insert_exchange_rate, get_rate_at_time
 from decimal import Decimal
-from database.connection import DatabaseConnection
 from database.connection_parameters import get_database_parameters
+from database.repositories import get_repository
+from .rate_history import RateHistoryIndex
+from .rate_matrix import RateMatrix
+
+DEFAULT_RATE_TTL = 5.0
+
+
+def rate_matrix_from_config(cfg):
+    """
+    RateMatrix configured by the optional [exchange_rates] section: <ttl> in seconds and
+    <base_currency>, the currency missing pairs are triangulated through first.
+    """
+    return RateMatrix(
+        base_currency=cfg.get("exchange_rates", "base_currency", fallback=None),
+        ttl=cfg.getfloat("exchange_rates", "ttl", fallback=DEFAULT_RATE_TTL),
+    )
+
+
+def rate_board(from_currency, to_currency, rate):
+    """
+    The (from_currency, to_currency, rate) triples of a rate and its inverse, rounded
+    half to even to 2 places. Rates whose inverse rounds to 0 are rejected.
+    """
+    inverse = round(Decimal(1 / rate), 2)
+    if inverse == 0:
+        raise ValueError(
+            f"The rate {rate} is too high, its inverse would round to 0.00"
+        )
+    return [
+        (from_currency, to_currency, rate),
+        (to_currency, from_currency, inverse),
+    ]
 
 
 class CurrencyExchangeService:
-    def __init__(self):
+    def __init__(self, repository=None):
         cfg = get_database_parameters("database/database.ini")
-        self.db_conn = DatabaseConnection(cfg["postgresql"])
+        self.repository = repository or get_repository(cfg)
+        self.rate_matrix = rate_matrix_from_config(cfg)
+        self.rate_history = RateHistoryIndex()
+        self._listener = None
+
+    def start_listening(self):
+        """
+        Reload rates as soon as any process updates them, through LISTEN/NOTIFY.
+        Worth it for long-running processes; without it rates live up to the TTL.
+        Returns None on storage backends other processes cannot notify through.
+        """
+        if self.repository.connection_params is None:
+            return None
+        if self._listener is None:
+            from database.listener import NotificationListener
+            from database.queries.currency_exchange import EXCHANGE_RATE_CHANNEL
+
+            self._listener = NotificationListener(
+                self.repository.connection_params,
+                EXCHANGE_RATE_CHANNEL,
+                self._on_rate_changed,
+                on_reconnect=self.rate_matrix.clear,
+            )
+            self._listener.start()
+        return self._listener
+
+    def stop_listening(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def _on_rate_changed(self, payload):
+        from_currency, _, to_currency = payload.partition(":")
+        self.rate_matrix.invalidate(from_currency, to_currency)
+
+    def get_currencies(self):
+        """Codes of every currency, in the order they were added."""
+        with self.repository.transaction() as session:
+            return session.get_currencies()
+
+    def add_currency(self, code):
+        """
+        Add a currency, every account gets a zero balance in it.
+        Returns False when it already exists.
+        """
+        with self.repository.transaction() as session:
+            return session.create_currency(code)
+
+    def refresh_rates(self, session):
+        """
+        Load what the rate matrix is due in <session>: once the TTL expired, the latest
+        rate of every pair published since the last rate board it loaded (every pair on
+        first use), otherwise the pairs invalidated since.
+        """
+        if self.rate_matrix.expired():
+            exchanges = session.get_all_latest_rates(self.rate_matrix.board_id)
+            self.rate_matrix.add(exchanges.values(), complete=True)
+            return
+
+        pairs = self.rate_matrix.take_invalidated()
+        if not pairs:
+            return
+        try:
+            self.rate_matrix.add(session.get_latest_rates(pairs).values())
+        except Exception:
+            for pair in pairs:
+                self.rate_matrix.invalidate(*pair)
+            raise
+
+    def get_latest_rate(self, from_currency, to_currency, session=None):
+        """
+        Latest CurrencyExchange for the pair from the rate matrix, derived through other
+        currencies when the pair has no rate of its own, see RateMatrix.
+        Rates due for loading are read in <session>, or in a unit of work of its own.
+        """
+        if self.rate_matrix.needs_refresh():
+            if session is None:
+                with self.repository.transaction() as session:
+                    self.refresh_rates(session)
+            else:
+                self.refresh_rates(session)
+        return self.rate_matrix.get(from_currency, to_currency)
+
+    def get_latest_rates(self, pairs, session):
+        """
+        Latest CurrencyExchange of each (from_currency, to_currency) pair of <pairs>, by
+        pair, like get_latest_rate(). Pairs without any rate are missing.
+        """
+        if self.rate_matrix.needs_refresh():
+            self.refresh_rates(session)
+        exchanges = {}
+        for pair in pairs:
+            exchange = self.rate_matrix.get(*pair)
+            if exchange is not None:
+                exchanges[pair] = exchange
+        return exchanges
 
     def get_rate_at_time(self, from_currency, to_currency, timestamp):
         if from_currency == to_currency:
             return 1
 
-        with self.db_conn.get_connection() as conn:
-            currency_exchange = get_rate_at_time(
-                conn, from_currency, to_currency, timestamp
+        with self.repository.transaction() as session:
+            currency_exchange = session.get_rate_at_time(
+                from_currency, to_currency, timestamp
             )
             return currency_exchange.rate
 
+    def refresh_rate_history(self):
+        """Load the exchange rates inserted since the last refresh into the rate history."""
+        with self.repository.transaction() as session:
+            exchanges = session.get_exchange_rates_since(
+                self.rate_history.last_exchange_id
+            )
+        self.rate_history.add(exchanges)
+        return len(exchanges)
+
+    def get_rates_at_times(self, from_currency, to_currency, timestamps, refresh=True):
+        """
+        Rates in effect at each of <timestamps>, resolved in memory from the rate history.
+        Entries are None where the pair had no rate yet. With <refresh>, rates inserted
+        since the last call are loaded first (a single incremental query).
+        """
+        if from_currency == to_currency:
+            return [1] * len(timestamps)
+
+        if refresh:
+            self.refresh_rate_history()
+        return self.rate_history.rates_at(from_currency, to_currency, timestamps)
+
     def update_exchange_rate(self, from_currency, to_currency, rate):
         if from_currency == to_currency:
             return
 
-        with self.db_conn.get_connection() as conn:
-            insert_exchange_rate(conn, from_currency, to_currency, rate)
-            insert_exchange_rate(
-                conn, to_currency, from_currency, round(Decimal(1 / rate), 2)
-            )
+        # Both directions are one rate board, readers never see half of the pair.
+        with self.repository.transaction() as session:
+            session.publish_rates(rate_board(from_currency, to_currency, rate))
+
+        self.rate_matrix.invalidate(from_currency, to_currency)
+        self.rate_matrix.invalidate(to_currency, from_currency)
@@ -0,0 +1,7 @@
+"""
+Formats and defaults of the import and export services. Kept free of database imports
+so the CLI can build its options without loading the services.
+"""
+
+EXPORT_FORMATS = ["csv", "jsonl"]
+DEFAULT_CHUNK_SIZE = 50000
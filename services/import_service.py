@@ -0,0 +1,311 @@
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from models.money import Money
+from models.rate_board import RateBoard
+from models.transaction import CURRENCIES
+from database.queries.currency import get_currencies
+from database.queries.transaction_import import (
+    create_staging_table,
+    copy_into_staging,
+    get_unknown_staged_accounts,
+    get_backfilled_staged_accounts,
+    rebuild_staged_snapshots,
+    insert_staged_transactions,
+    apply_staged_balances,
+    delete_staged_daily_balances,
+)
+from database.queries.rollups import lock_rollups
+from database.queries.rate_ingest import (
+    create_rate_staging_table,
+    copy_rates_into_staging,
+    insert_staged_ticks,
+    insert_board_inverses,
+    get_zero_inverse_pairs,
+)
+from database.queries.currency_exchange import create_rate_board, publish_rate_board
+from database.queries.snapshots import create_snapshots
+from database.queries.account import reset_snapshot_counters
+from database.connection import DatabaseConnection
+from database.connection_parameters import (
+    get_database_parameters,
+    get_pool_parameters,
+)
+from .snapshot_policy import get_snapshot_policy
+from database.repositories import require_postgresql
+from .file_formats import DEFAULT_CHUNK_SIZE
+
+TRANSACTION_TYPES = [
+    "DepositMade",
+    "WithdrawalMade",
+    "MoneyTransferred",
+    "CurrencyConverted",
+]
+
+
+def read_csv_records(file):
+    """Yield (line number, record) pairs from a CSV file with a header row."""
+    reader = csv.DictReader(file)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def read_jsonl_records(file):
+    """Yield (line number, record) pairs from a JSON Lines file."""
+    for line_number, line in enumerate(file, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number}: invalid JSON ({e.msg})")
+
+
+def parse_transaction_record(record, currencies=CURRENCIES):
+    """
+    Validate one imported record and return it as a staging row, <currencies> being
+    the valid currency codes.
+    Deposits and withdrawals may omit to_account/to_currency/rate.
+    The credited amount of conversions is rounded exactly like TransactionService does.
+    """
+    type = record.get("type")
+    if type not in TRANSACTION_TYPES:
+        raise ValueError(f"Invalid transaction type '{type}'")
+
+    try:
+        from_account = int(record["from_account"])
+        to_account = int(record.get("to_account") or from_account)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Invalid account ID")
+
+    from_currency = str(record.get("from_currency") or "").upper()
+    to_currency = str(record.get("to_currency") or from_currency).upper()
+    for currency in (from_currency, to_currency):
+        if currency not in currencies:
+            raise ValueError(f"Invalid currency '{currency}'")
+
+    try:
+        timestamp = record["timestamp"]
+        if not isinstance(timestamp, datetime):
+            timestamp = datetime.fromisoformat(timestamp)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Invalid timestamp '{record.get('timestamp')}'")
+
+    try:
+        amount = Money.parse(record["amount"])
+        rate = Decimal(str(record.get("rate") or 1))
+    except (KeyError, ValueError, InvalidOperation):
+        raise ValueError("Invalid amount or rate")
+    if amount <= Money(0):
+        raise ValueError(f"The amount must be positive. You provided: {amount}")
+    if rate <= 0:
+        raise ValueError(f"The rate must be positive. You provided: {rate}")
+
+    if type in ["DepositMade", "WithdrawalMade"]:
+        if to_account != from_account or to_currency != from_currency:
+            raise ValueError(f"{type} must use a single account and currency")
+    if type == "CurrencyConverted" and to_account != from_account:
+        raise ValueError("CurrencyConverted must use a single account")
+
+    if type in ["MoneyTransferred", "CurrencyConverted"]:
+        if from_currency == to_currency:
+            credit_amount = amount
+        else:
+            credit_amount = amount.convert(rate)
+    else:
+        credit_amount = Money(0)
+
+    return (
+        type,
+        from_account,
+        to_account,
+        timestamp,
+        from_currency,
+        to_currency,
+        amount,
+        rate,
+        credit_amount,
+    )
+
+
+def parse_transaction_records(records, currencies=CURRENCIES):
+    """
+    Parse (line number, record) pairs, checking that timestamps never go backwards.
+    Snapshots written during the import rely on rows arriving in timestamp order.
+    """
+    last_timestamp = None
+    for line_number, record in records:
+        try:
+            row = parse_transaction_record(record, currencies)
+        except ValueError as e:
+            raise ValueError(f"Line {line_number}: {e}")
+
+        if last_timestamp is not None and row[3] < last_timestamp:
+            raise ValueError(
+                f"Line {line_number}: transactions must be sorted by timestamp"
+            )
+        last_timestamp = row[3]
+        yield row
+
+
+def parse_rate_record(record, currencies=CURRENCIES):
+    """Validate one rate tick and return it as a staging row, <currencies> being the valid codes."""
+    from_currency = str(record.get("from_currency") or "").upper()
+    to_currency = str(record.get("to_currency") or "").upper()
+    for currency in (from_currency, to_currency):
+        if currency not in currencies:
+            raise ValueError(f"Invalid currency '{currency}'")
+    if from_currency == to_currency:
+        raise ValueError("A rate must be between two different currencies")
+
+    try:
+        timestamp = record["timestamp"]
+        if not isinstance(timestamp, datetime):
+            timestamp = datetime.fromisoformat(timestamp)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Invalid timestamp '{record.get('timestamp')}'")
+
+    try:
+        rate = Decimal(str(record["rate"]))
+    except (KeyError, InvalidOperation):
+        raise ValueError(f"Invalid rate '{record.get('rate')}'")
+    if not rate.is_finite() or rate <= 0:
+        raise ValueError(f"The rate must be positive. You provided: {rate}")
+
+    return timestamp, from_currency, to_currency, rate
+
+
+def parse_rate_records(records, currencies=CURRENCIES):
+    """Parse (line number, record) pairs of rate ticks, in any order."""
+    for line_number, record in records:
+        try:
+            yield parse_rate_record(record, currencies)
+        except ValueError as e:
+            raise ValueError(f"Line {line_number}: {e}")
+
+
+def chunked(rows, chunk_size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+class ImportService:
+    def __init__(self):
+        cfg = get_database_parameters("database/database.ini")
+        require_postgresql(cfg, "Imports")
+        self.db_conn = DatabaseConnection(cfg["postgresql"], get_pool_parameters(cfg))
+        self.snapshot_policy = get_snapshot_policy(cfg)
+
+    def import_transactions(self, file, format="csv", chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Load historical transactions from a CSV/JSONL file.
+
+        Each chunk is COPYed into a staging table, inserted into Transaction, applied
+        to Account balances with one aggregated UPDATE and committed on its own.
+        The snapshot policy is then checked once per account touched by the chunk,
+        snapshots being timestamped at the account's last imported transaction.
+        Transactions older than an account's history are added to its snapshots since,
+        and its opening snapshot moves back to its first imported transaction; accounts
+        with history after the chunk are not snapshotted by it.
+
+        Yields the running number of imported transactions after every chunk.
+        """
+        records = (
+            read_csv_records(file) if format == "csv" else read_jsonl_records(file)
+        )
+        with self.db_conn.transaction() as conn:
+            currencies = set(get_currencies(conn))
+        rows = parse_transaction_records(records, currencies)
+
+        imported = 0
+
+        for chunk in chunked(rows, chunk_size):
+            with self.db_conn.transaction() as conn:
+                imported += self._import_chunk(conn, chunk)
+            yield imported
+
+    def _import_chunk(self, conn, chunk):
+        lock_rollups(conn, shared=True)
+        create_staging_table(conn)
+        copy_into_staging(conn, chunk)
+
+        unknown_accounts = get_unknown_staged_accounts(conn)
+        if unknown_accounts:
+            raise ValueError(
+                f"Unknown account IDs: {', '.join(map(str, unknown_accounts))}"
+            )
+
+        rebuild_staged_snapshots(conn)
+        backfilled_accounts = set(get_backfilled_staged_accounts(conn))
+        inserted = insert_staged_transactions(conn)
+        accounts = apply_staged_balances(conn)
+        delete_staged_daily_balances(conn)
+
+        snapshots = []
+        for account, last_timestamp in accounts:
+            if any(balance < Money(0) for balance in account.balances.values()):
+                raise ValueError(
+                    f"Import would leave account {account.id} with a negative balance"
+                )
+            if account.id in backfilled_accounts:
+                continue
+            if self.snapshot_policy.should_snapshot(account, last_timestamp):
+                snapshots.append((account.id, last_timestamp, account.balances))
+
+        if snapshots:
+            create_snapshots(conn, snapshots)
+            reset_snapshot_counters(
+                conn,
+                [(account_id, timestamp) for account_id, timestamp, _ in snapshots],
+            )
+
+        return inserted
+
+    def ingest_rates(self, file, format="csv", chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Publish the rate ticks of a CSV/JSONL file, or a feed piped to stdin, as one
+        rate board.
+
+        Ticks are COPYed into a staging table a chunk at a time, then inserted with
+        their board id in a single statement that drops duplicate ticks (same pair and
+        timestamp), followed by the inverse of every pair whose reverse was not in the
+        feed. Ticks whose inverse rounds to 0 need their reverse pair in the feed. The
+        board becomes current in the same transaction: readers see all of it or none
+        of it, and an invalid tick publishes nothing.
+
+        Returns a RateBoard summary.
+        """
+        records = (
+            read_csv_records(file) if format == "csv" else read_jsonl_records(file)
+        )
+        with self.db_conn.transaction() as conn:
+            currencies = set(get_currencies(conn))
+        rows = parse_rate_records(records, currencies)
+
+        with self.db_conn.transaction() as conn:
+            create_rate_staging_table(conn)
+            ticks = 0
+            for chunk in chunked(rows, chunk_size):
+                copy_rates_into_staging(conn, chunk)
+                ticks += len(chunk)
+
+            zero_inverses = get_zero_inverse_pairs(conn)
+            if zero_inverses:
+                raise ValueError(
+                    "Rates too high for an inverse, the feed must include the reverse "
+                    "of: " + ", ".join(f"{pair[0]}/{pair[1]}" for pair in zero_inverses)
+                )
+
+            board_id = create_rate_board(conn)
+            inserted = insert_staged_ticks(conn, board_id)
+            inverses = insert_board_inverses(conn, board_id)
+            publish_rate_board(conn, board_id)
+
+        return RateBoard(
+            id=board_id,
+            ticks=ticks,
+            duplicates=ticks - inserted,
+            inverses=inverses,
+        )
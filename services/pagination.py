@@ -0,0 +1,21 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_page_token(timestamp, transaction_id):
+    """Opaque continuation token for the page after the row keyed (timestamp, transaction_id)."""
+    key = json.dumps([timestamp.isoformat(), transaction_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_page_token(token):
+    """The (timestamp, transaction_id) key of a token from encode_page_token()."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        timestamp, transaction_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(transaction_id, int):
+            raise ValueError
+        return datetime.fromisoformat(timestamp), transaction_id
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid page token '{token}'")
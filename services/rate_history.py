@@ -0,0 +1,57 @@
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+
+
+class RateHistoryIndex:
+    """
+    Every CurrencyExchange row kept in memory as per-pair arrays of timestamps and
+    rates sorted by timestamp, so point-in-time lookups are a binary search.
+    """
+
+    def __init__(self):
+        self.last_exchange_id = 0
+        self._lock = threading.Lock()
+        self._timestamps = defaultdict(list)
+        self._rates = defaultdict(list)
+
+    def add(self, exchanges):
+        """
+        Add CurrencyExchange rows, typically those with an id above last_exchange_id.
+        Rows sharing a timestamp resolve to the one added last, like the newest insert.
+        """
+        with self._lock:
+            for exchange in exchanges:
+                pair = (exchange.from_currency, exchange.to_currency)
+                timestamps = self._timestamps[pair]
+                rates = self._rates[pair]
+
+                if not timestamps or exchange.timestamp >= timestamps[-1]:
+                    timestamps.append(exchange.timestamp)
+                    rates.append(exchange.rate)
+                else:
+                    position = bisect_right(timestamps, exchange.timestamp)
+                    timestamps.insert(position, exchange.timestamp)
+                    rates.insert(position, exchange.rate)
+
+                self.last_exchange_id = max(self.last_exchange_id, exchange.id)
+
+    def rate_at(self, from_currency, to_currency, timestamp):
+        """The rate in effect at <timestamp>, None when the pair had no rate yet."""
+        return self.rates_at(from_currency, to_currency, [timestamp])[0]
+
+    def rates_at(self, from_currency, to_currency, timestamps):
+        """Resolve many timestamps of one pair at once, in the order given."""
+        with self._lock:
+            pair_timestamps = self._timestamps.get((from_currency, to_currency), [])
+            pair_rates = self._rates.get((from_currency, to_currency), [])
+
+            rates = []
+            for timestamp in timestamps:
+                position = bisect_right(pair_timestamps, timestamp)
+                rates.append(pair_rates[position - 1] if position else None)
+            return rates
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(timestamps) for timestamps in self._timestamps.values())
@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import defaultdict, deque
+from models.currency_exchange import CurrencyExchange
+
+
+class RateMatrix:
+    """
+    Latest rate of every ordered currency pair, kept as a dense matrix indexed by the
+    position of each currency, so a lookup is two dict reads and a list index.
+
+    Pairs without a rate of their own are derived from the direct rates: through
+    <base_currency> when both legs to and from it exist, otherwise along the path of
+    fewest direct legs, ties going to currencies seen first. A derived CurrencyExchange
+    is the exact product of the rates of its legs, which it lists in .legs.
+
+    Like a cache, rates go stale: invalidate() marks a pair for reloading and the whole
+    matrix expires <ttl> seconds after it was last loaded, as a fallback for missed
+    notifications. Callers load what is due before a lookup, see needs_refresh().
+    On storage that versions rates, .board_id is the last rate board fully loaded, only
+    pairs published after it have to be loaded again.
+    """
+
+    def __init__(self, base_currency=None, ttl=5.0, clock=time.monotonic):
+        self.base_currency = base_currency
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._currencies = []
+        self._rates = []
+        # Direct CurrencyExchange by (from, to) positions, and for each of them the
+        # derived pairs it is a leg of.
+        self._direct = {}
+        self._routes = {}
+        self._dependents = defaultdict(set)
+        self._loaded_at = None
+        self._invalidated = set()
+        self.board_id = 0
+
+    def get(self, from_currency, to_currency):
+        """The pair's CurrencyExchange, direct or derived, None if it cannot be derived."""
+        with self._lock:
+            i = self._positions.get(from_currency)
+            j = self._positions.get(to_currency)
+            if i is None or j is None:
+                return None
+            return self._rates[i][j]
+
+    def add(self, exchanges, complete=False):
+        """
+        Add direct rates, keeping the newest of each pair by (timestamp, id).
+        A new rate of a known pair only reprices the derived rates it is a leg of; a
+        new pair can shorten any path, so every route is searched again.
+        <complete> when <exchanges> are the latest rates of every pair published after
+        .board_id, which restarts the ttl.
+        """
+        with self._lock:
+            repriced = set()
+            rerouted = False
+            board_id = self.board_id
+            for exchange in exchanges:
+                board_id = max(board_id, exchange.board_id or 0)
+                pair = (
+                    self._position(exchange.from_currency),
+                    self._position(exchange.to_currency),
+                )
+                if pair[0] == pair[1]:
+                    continue
+                current = self._direct.get(pair)
+                if current is not None and (current.timestamp, current.id) >= (
+                    exchange.timestamp,
+                    exchange.id,
+                ):
+                    continue
+                self._direct[pair] = exchange
+                if current is None:
+                    rerouted = True
+                else:
+                    repriced.add(pair)
+
+            if rerouted:
+                self._route_all()
+            else:
+                for pair in repriced:
+                    self._reprice(pair)
+            if complete:
+                self._loaded_at = self._clock()
+                self.board_id = board_id
+
+    def invalidate(self, from_currency, to_currency):
+        """The pair changed elsewhere, reload it before the next lookup."""
+        with self._lock:
+            self._invalidated.add((from_currency, to_currency))
+
+    def clear(self):
+        """Reload every rate before the next lookup, e.g. after missed notifications."""
+        with self._lock:
+            self._loaded_at = None
+            self.board_id = 0
+
+    def expired(self):
+        """True until every rate was loaded once, then again every <ttl> seconds."""
+        with self._lock:
+            return self._expired()
+
+    def needs_refresh(self):
+        with self._lock:
+            return self._expired() or bool(self._invalidated)
+
+    def take_invalidated(self):
+        """The pairs invalidated since the last call, sorted. Invalidate them again if loading fails."""
+        with self._lock:
+            pairs = sorted(self._invalidated)
+            self._invalidated.clear()
+            return pairs
+
+    def _expired(self):
+        return self._loaded_at is None or self._clock() - self._loaded_at >= self.ttl
+
+    def _position(self, currency):
+        position = self._positions.get(currency)
+        if position is None:
+            position = self._positions[currency] = len(self._currencies)
+            self._currencies.append(currency)
+            for row in self._rates:
+                row.append(None)
+            self._rates.append([None] * len(self._currencies))
+        return position
+
+    def _derive(self, i, j, route):
+        legs = tuple(self._direct[leg] for leg in route)
+        rate = legs[0].rate
+        for leg in legs[1:]:
+            rate *= leg.rate
+        return CurrencyExchange(
+            id=None,
+            timestamp=min(leg.timestamp for leg in legs),
+            from_currency=self._currencies[i],
+            to_currency=self._currencies[j],
+            rate=rate,
+            legs=legs,
+        )
+
+    def _reprice(self, pair):
+        i, j = pair
+        self._rates[i][j] = self._direct[pair]
+        for k, l in self._dependents.get(pair, ()):
+            self._rates[k][l] = self._derive(k, l, self._routes[k, l])
+
+    def _route_all(self):
+        """Route and price every pair, O(n * (n + direct pairs)) for n currencies."""
+        count = len(self._currencies)
+        neighbours = [[] for _ in range(count)]
+        for i, j in sorted(self._direct):
+            neighbours[i].append(j)
+        base = self._positions.get(self.base_currency)
+
+        self._routes = {}
+        self._dependents = defaultdict(set)
+        for i in range(count):
+            parents = shortest_path_parents(neighbours, i)
+            for j in range(count):
+                if i == j:
+                    continue
+                if (i, j) in self._direct:
+                    self._rates[i][j] = self._direct[i, j]
+                    continue
+
+                if (
+                    base is not None
+                    and base not in (i, j)
+                    and (i, base) in self._direct
+                    and (base, j) in self._direct
+                ):
+                    route = [(i, base), (base, j)]
+                else:
+                    route = path_to(parents, j)
+                if route is None:
+                    self._rates[i][j] = None
+                    continue
+
+                self._routes[i, j] = route
+                for leg in route:
+                    self._dependents[leg].add((i, j))
+                self._rates[i][j] = self._derive(i, j, route)
+
+
+def shortest_path_parents(neighbours, source):
+    """Breadth-first search from <source>: the previous node on a fewest-legs path to each node."""
+    parents = [None] * len(neighbours)
+    parents[source] = source
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        for neighbour in neighbours[node]:
+            if parents[neighbour] is None:
+                parents[neighbour] = node
+                queue.append(neighbour)
+    return parents
+
+
+def path_to(parents, target):
+    """The (from, to) legs of the path to <target>, None if it is unreachable."""
+    if parents[target] is None:
+        return None
+    route = []
+    while parents[target] != target:
+        route.append((parents[target], target))
+        target = parents[target]
+    return route[::-1]
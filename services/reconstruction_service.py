@@ -1,78 +1,168 @@
-from database.queries.snapshots import get_snapshot_at_time
-from database.queries.transaction import get_transactions_in_interval
-from decimal import Decimal
-from database.connection import DatabaseConnection
+from models.balance_history import BalanceHistory
+from models.money import Money, convert_minor_units
+from models.transaction import CURRENCIES, TYPE_CODES, register_currencies
 from database.connection_parameters import get_database_parameters
+from database.repositories import get_repository
+from .balance_history import (
+    sample_times,
+    transaction_deltas,
+    balance_series,
+)
 
+# "sql" sums the transaction deltas on the server, "python" folds every row locally.
+REPLAY_MODES = ["sql", "python"]
 
-class ReconstructionService:
-    def __init__(self):
-        cfg = get_database_parameters("database/database.ini")
-        self.db_conn = DatabaseConnection(cfg["postgresql"])
+DEPOSIT = TYPE_CODES["DepositMade"]
+WITHDRAWAL = TYPE_CODES["WithdrawalMade"]
+TRANSFER = TYPE_CODES["MoneyTransferred"]
+
+
+def add_deltas(snapshot, deltas):
+    """Add (currency, Money) <deltas> to the balances of <snapshot>, in place."""
+    for currency, delta in deltas:
+        if delta:
+            snapshot.balances[currency] = snapshot.balance(currency) + delta
+
+
+def replay_transactions(snapshot, account_id, transactions):
+    """
+    Fold the TransactionBatch <transactions> of <account_id> into <snapshot>, in place.
+    Reads the batch column by column and sums the changes as integer minor units,
+    which are added to the balances once.
+    """
+    deltas = [0] * len(CURRENCIES)
+    columns = zip(
+        transactions.types.tolist(),
+        transactions.from_accounts.tolist(),
+        transactions.from_currencies.tolist(),
+        transactions.to_currencies.tolist(),
+        transactions.amounts.tolist(),
+        transactions.rate_codes.tolist(),
+    )
+    for type, from_account, from_currency, to_currency, amount, rate_code in columns:
+        if type == DEPOSIT:
+            deltas[from_currency] += amount
+
+        elif type == WITHDRAWAL:
+            deltas[from_currency] -= amount
+
+        elif type == TRANSFER:
+            if from_account == account_id:
+                deltas[from_currency] -= amount
+            else:
+                if from_currency == to_currency:
+                    deltas[to_currency] += amount
+                else:
+                    deltas[to_currency] += convert_minor_units(
+                        amount, transactions.rates[rate_code]
+                    )
 
-    def update_snapshot(self, snapshot, currency, amount):
-        if currency == "USD":
-            snapshot.usd_balance += amount
-        elif currency == "EUR":
-            snapshot.eur_balance += amount
         else:
-            snapshot.gbp_balance += amount
+            deltas[from_currency] -= amount
+            deltas[to_currency] += convert_minor_units(
+                amount, transactions.rates[rate_code]
+            )
+
+    add_deltas(snapshot, zip(CURRENCIES, map(Money, deltas)))
+    return snapshot
 
-    def reconstruct_state(self, account_id, timestamp):
-        """Reconstruct Account state at the given timestamp"""
 
-        with self.db_conn.get_connection() as conn:
-            latest_snapshot = get_snapshot_at_time(conn, account_id, timestamp)
-            if latest_snapshot is None:
+def starting_point(session, account_id, timestamp):
+    """
+    The closest known state of the account not after <timestamp> to replay from: its
+    latest snapshot, or its latest daily closing balances when they are more recent.
+    None if the account did not exist by then.
+    """
+    snapshot = session.get_snapshot_at_time(account_id, timestamp)
+    if snapshot is None:
+        return None
+    daily_balance = session.get_daily_balance_at_time(account_id, timestamp)
+    if daily_balance is not None and daily_balance.timestamp > snapshot.timestamp:
+        return daily_balance
+    return snapshot
+
+
+class ReconstructionService:
+    def __init__(self, repository=None):
+        cfg = get_database_parameters("database/database.ini")
+        self.repository = repository or get_repository(cfg)
+
+    def reconstruct_state(self, account_id, timestamp, replay="sql"):
+        """
+        Reconstruct Account state at the given timestamp.
+        Replays from the starting point closest to <timestamp>, with the daily rollups
+        up to date that is at most one day of transactions.
+        Both replay modes give identical results; "sql" only transfers one sum per
+        currency instead of every transaction since the snapshot.
+        """
+        if replay not in REPLAY_MODES:
+            raise ValueError(
+                f"Invalid replay mode '{replay}'. Must be one of {', '.join(REPLAY_MODES)}"
+            )
+
+        with self.repository.transaction() as session:
+            snapshot = starting_point(session, account_id, timestamp)
+            if snapshot is None:
                 return None
-            transactions_after_snapshot = get_transactions_in_interval(
-                conn, account_id, latest_snapshot.timestamp, timestamp
+
+            if replay == "sql":
+                deltas = session.get_balance_deltas(
+                    account_id, snapshot.timestamp, timestamp
+                )
+                add_deltas(snapshot, deltas.items())
+                return snapshot
+
+            transactions_after_snapshot = session.get_transactions_in_interval(
+                account_id, snapshot.timestamp, timestamp
+            )
+            return replay_transactions(
+                snapshot, account_id, transactions_after_snapshot
             )
 
-            for transaction in transactions_after_snapshot:
-                if transaction.type == "DepositMade":
-                    self.update_snapshot(
-                        latest_snapshot, transaction.from_currency, transaction.amount
-                    )
+    def balance_history(self, account_id, start, end, interval):
+        """
+        Balances of the account every <interval> from <start> to <end>.
 
-                elif transaction.type == "WithdrawalMade":
-                    self.update_snapshot(
-                        latest_snapshot, transaction.from_currency, -transaction.amount
-                    )
+        The starting point before <start> and the transactions up to <end> are loaded once,
+        then every point of the series comes from one cumulative sum of the
+        transactions' minor-unit deltas. Returns None if the account did not exist at <start>.
+        """
+        samples = sample_times(start, end, interval)
 
-                elif transaction.type == "MoneyTransferred":
-                    if transaction.from_account == account_id:
-                        self.update_snapshot(
-                            latest_snapshot,
-                            transaction.from_currency,
-                            -transaction.amount,
-                        )
-                    else:
-                        if transaction.from_currency == transaction.to_currency:
-                            self.update_snapshot(
-                                latest_snapshot,
-                                transaction.to_currency,
-                                transaction.amount,
-                            )
-                        else:
-                            converted_amount = round(
-                                Decimal(transaction.amount * transaction.rate), 2
-                            )
-                            self.update_snapshot(
-                                latest_snapshot,
-                                transaction.to_currency,
-                                converted_amount,
-                            )
+        with self.repository.transaction() as session:
+            snapshot = starting_point(session, account_id, start)
+            if snapshot is None:
+                return None
+            transactions = session.get_transactions_in_interval(
+                account_id, snapshot.timestamp, end
+            )
 
-                else:
-                    self.update_snapshot(
-                        latest_snapshot, transaction.from_currency, -transaction.amount
-                    )
-                    converted_amount = round(
-                        Decimal(transaction.amount * transaction.rate), 2
-                    )
-                    self.update_snapshot(
-                        latest_snapshot, transaction.to_currency, converted_amount
-                    )
+        # One column per currency this process knows, after those of the snapshot
+        register_currencies(snapshot.balances)
+        currencies = list(CURRENCIES)
+        timestamps, deltas = transaction_deltas(
+            account_id, transactions, len(currencies)
+        )
+        start_balances = [
+            snapshot.balance(currency).minor_units for currency in currencies
+        ]
+        series = balance_series(start_balances, timestamps, deltas, samples)
+
+        return BalanceHistory(
+            account_id=account_id,
+            timestamps=samples,
+            balances={
+                currency: [Money(balance) for balance in series[:, code]]
+                for code, currency in enumerate(currencies)
+                if currency in snapshot.balances or deltas[:, code].any()
+            },
+        )
 
-            return latest_snapshot
+    def reconstruct_balances(self, timestamp, account_ids=None):
+        """
+        Reconstruct the state of every account (or of <account_ids>) at the given
+        timestamp with a single set-based query. Returns one Snapshot per account that
+        existed by then, ordered by account ID.
+        """
+        with self.repository.transaction() as session:
+            return session.get_balances_at_time(timestamp, account_ids)
@@ -0,0 +1,60 @@
+from database.queries.rollups import (
+    get_last_closed_day,
+    get_rollup_state,
+    get_rollup_work,
+    get_settled_transaction_id,
+    lock_rollups,
+    roll_up_accounts,
+    set_rollup_state,
+)
+from database.connection import DatabaseConnection
+from database.connection_parameters import (
+    get_database_parameters,
+    get_pool_parameters,
+)
+from database.repositories import require_postgresql
+from .import_service import chunked
+
+DEFAULT_ROLLUP_CHUNK_SIZE = 500
+
+
+class RollupService:
+    def __init__(self):
+        cfg = get_database_parameters("database/database.ini")
+        require_postgresql(cfg, "Rollups")
+        self.db_conn = DatabaseConnection(cfg["postgresql"], get_pool_parameters(cfg))
+
+    def roll_up(self, through=None, chunk_size=DEFAULT_ROLLUP_CHUNK_SIZE):
+        """
+        Bring the daily closing balances up to date through the day <through>, by
+        default the last day that ended.
+
+        Only accounts with days not rolled up yet are processed, from the first such
+        day: days of transactions inserted since the last run, backdated ones included,
+        and days that ended since. Each chunk of accounts is written with one statement
+        and committed on its own; how far the job got is recorded at the end, so an
+        interrupted run is simply done again. Rolling up through a day before the last
+        rolled up one records nothing, later days may still lack new transactions.
+
+        Yields the running number of accounts rolled up after every chunk.
+        """
+        with self.db_conn.transaction() as conn:
+            after_id, closed_through = get_rollup_state(conn)
+            if through is None:
+                through = get_last_closed_day(conn)
+        with self.db_conn.transaction() as conn:
+            up_to_id = get_settled_transaction_id(conn)
+        with self.db_conn.transaction() as conn:
+            work = get_rollup_work(conn, after_id, up_to_id, closed_through, through)
+
+        accounts = 0
+        for chunk in chunked(work, chunk_size):
+            with self.db_conn.transaction() as conn:
+                lock_rollups(conn)
+                roll_up_accounts(conn, chunk, through)
+            accounts += len(chunk)
+            yield accounts
+
+        if closed_through is None or through >= closed_through:
+            with self.db_conn.transaction() as conn:
+                set_rollup_state(conn, up_to_id, through)
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+DEFAULT_SNAPSHOT_INTERVAL = 50
+
+
+class SnapshotPolicy:
+    """Decides, after each write, whether an account should be snapshotted."""
+
+    def should_snapshot(self, account, now):
+        raise NotImplementedError
+
+
+class EveryNTransactions(SnapshotPolicy):
+    def __init__(self, transactions=DEFAULT_SNAPSHOT_INTERVAL):
+        if transactions < 1:
+            raise ValueError("The snapshot interval must be at least 1 transaction.")
+        self.transactions = transactions
+
+    def should_snapshot(self, account, now):
+        return account.transactions_since_snapshot >= self.transactions
+
+
+class EveryTSeconds(SnapshotPolicy):
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError("The snapshot interval must be positive.")
+        self.interval = timedelta(seconds=seconds)
+
+    def should_snapshot(self, account, now):
+        return (
+            account.last_snapshot_at is None
+            or now - account.last_snapshot_at >= self.interval
+        )
+
+
+class ReplayCostThreshold(SnapshotPolicy):
+    """
+    Snapshot once reconstructing the account would replay more than <max_cost> worth
+    of transaction legs, each estimated at <leg_cost> (e.g. in milliseconds).
+    Replay reads the account's rows of transaction_legs, so a conversion costs twice
+    a deposit, withdrawal or transfer.
+    """
+
+    def __init__(self, max_cost, leg_cost=1.0):
+        if max_cost <= 0 or leg_cost <= 0:
+            raise ValueError("Replay costs must be positive.")
+        self.max_cost = max_cost
+        self.leg_cost = leg_cost
+
+    def estimated_replay_cost(self, account):
+        return account.legs_since_snapshot * self.leg_cost
+
+    def should_snapshot(self, account, now):
+        return self.estimated_replay_cost(account) >= self.max_cost
+
+
+def get_snapshot_policy(config):
+    """
+    Build the policy configured in the optional [snapshot] section:
+
+        policy=transactions, transactions=50      (default)
+        policy=interval, seconds=3600
+        policy=replay_cost, max_cost=200, leg_cost=1.0 (default)
+    """
+    if not config.has_section("snapshot"):
+        return EveryNTransactions()
+
+    section = config["snapshot"]
+    policy = section.get("policy", "transactions")
+
+    if policy == "transactions":
+        return EveryNTransactions(
+            section.getint("transactions", DEFAULT_SNAPSHOT_INTERVAL)
+        )
+    if policy == "interval":
+        return EveryTSeconds(_required_float(section, "seconds"))
+    if policy == "replay_cost":
+        return ReplayCostThreshold(
+            _required_float(section, "max_cost"), section.getfloat("leg_cost", 1.0)
+        )
+    raise ValueError(
+        f"Unknown snapshot policy '{policy}'. "
+        "Must be one of transactions, interval, replay_cost"
+    )
+
+
+def _required_float(section, key):
+    value = section.getfloat(key)
+    if value is None:
+        raise ValueError(
+            f"Snapshot policy '{section['policy']}' requires '{key}' in [snapshot]"
+        )
+    return value
@@ -1,25 +1,56 @@
-from database.queries.snapshots import create_snapshot
-from database.queries.account import get_account
-from database.queries.transaction import count_transactions_for_account
-from database.connection import DatabaseConnection
 from database.connection_parameters import get_database_parameters
+from database.repositories import get_repository
+from .snapshot_policy import get_snapshot_policy
+
+
+def transfer_balances(from_balance, to_balance):
+    """
+    The (account_id, currency) balances a transfer counts a transaction on: one per
+    account, in account id order so that two transfers snapshotting the same accounts
+    lock their rows in the same order.
+    """
+    if from_balance[0] == to_balance[0]:
+        return [from_balance]
+    return sorted([from_balance, to_balance])
 
 
 class SnapshotService:
-    def __init__(self):
+    def __init__(self, repository=None):
         cfg = get_database_parameters("database/database.ini")
-        self.db_conn = DatabaseConnection(cfg["postgresql"])
+        self.repository = repository or get_repository(cfg)
+        self.policy = get_snapshot_policy(cfg)
+
+    def handle_snapshots(self, session, account_id, currency, legs=1):
+        """
+        Count one more transaction for the account, and its <legs> on the account, on
+        its <currency> balance, and snapshot it when the policy says so.
+        Runs in the caller's session so the snapshot commits with the operation.
+        """
+        account, now = session.record_transaction(account_id, currency, legs)
+
+        if self.policy.should_snapshot(account, now):
+            self.take_snapshot(session, account)
 
-    def handle_snapshots(self, account_id):
+    def handle_transfer_snapshots(self, session, from_balance, to_balance):
+        for account_id, currency in transfer_balances(from_balance, to_balance):
+            self.handle_snapshots(session, account_id, currency)
 
-        with self.db_conn.get_connection() as conn:
-            account = get_account(conn, account_id)
+    def handle_batch_snapshots(self, session, accounts, now):
+        """
+        handle_snapshots() for <accounts> whose counters were already updated in bulk,
+        snapshotting every account the policy selects with one INSERT.
+        """
+        snapshots = [
+            (account.id, now, account.balances)
+            for account in accounts
+            if self.policy.should_snapshot(account, now)
+        ]
+        if snapshots:
+            session.create_snapshots(snapshots)
+            session.reset_snapshot_counters(
+                [(account_id, now) for account_id, now, _ in snapshots]
+            )
 
-            if count_transactions_for_account(conn, account_id) % 50 == 0:
-                create_snapshot(
-                    conn,
-                    account_id,
-                    account.usd_balance,
-                    account.eur_balance,
-                    account.gbp_balance,
-                )
+    def take_snapshot(self, session, account):
+        session.create_snapshot(account.id, account.balances)
+        session.reset_snapshot_counters([(account.id, None)])
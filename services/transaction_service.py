@@ -1,55 +1,93 @@
-from database.queries.account import get_account, update_balance
-from database.queries.currency_exchange import get_latest_rate
-from database.queries.transaction import (
-    create_transaction,
-    get_transaction_history_for_account,
-)
+from collections import Counter
+from itertools import islice
+from models.money import Money
+from models.operation import OPERATION_TYPES
 from .snapshot_service import SnapshotService
+from .pagination import encode_page_token, decode_page_token
 from .currency_exchange_service import CurrencyExchangeService
-from database.connection import DatabaseConnection
 from database.connection_parameters import get_database_parameters
+from database.repositories import get_repository
+
+
+def validate_operation(operation):
+    """
+    Raise ValueError for an Operation apply_batch() cannot run at all.
+    Currencies are checked against the balances it locks.
+    """
+    if operation.type not in OPERATION_TYPES:
+        raise ValueError(f"Invalid operation type '{operation.type}'")
+    if operation.type == "deposit" and operation.amount <= Money(0):
+        raise ValueError("Deposit amount can only hold a positive value.")
+    if operation.type == "transfer" and operation.to_account_id is None:
+        raise ValueError("A transfer needs a to_account_id")
+    if operation.type == "convert_currency" and operation.to_currency is None:
+        raise ValueError("A currency conversion needs a to_currency")
+
+
+def operation_balances(operations):
+    """The (account_id, currency) balances <operations> may change."""
+    balances = set()
+    for operation in operations:
+        balances.add((operation.account_id, operation.currency))
+        if operation.type == "transfer":
+            balances.add(
+                (operation.to_account_id, operation.to_currency or operation.currency)
+            )
+        elif operation.type == "convert_currency":
+            balances.add((operation.account_id, operation.to_currency))
+    return balances
+
+
+def exchange_pairs(operations):
+    """The (from_currency, to_currency) pairs whose rate <operations> need."""
+    return {
+        (operation.currency, operation.to_currency)
+        for operation in operations
+        if operation.type in ("transfer", "convert_currency")
+        and operation.to_currency not in (None, operation.currency)
+    }
 
 
 class TransactionService:
-    def __init__(self):
+    def __init__(
+        self, snapshot_service=None, currency_exchange_service=None, repository=None
+    ):
+        """Pass the services a caller already has to share them instead of building new ones."""
         cfg = get_database_parameters("database/database.ini")
-        self.db_conn = DatabaseConnection(cfg["postgresql"])
-        self.snapshot_service = SnapshotService()
-        self.currency_exchange_service = CurrencyExchangeService()
+        self.repository = repository or get_repository(cfg)
+        self.snapshot_service = snapshot_service or SnapshotService(self.repository)
+        self.currency_exchange_service = (
+            currency_exchange_service or CurrencyExchangeService(self.repository)
+        )
 
     def deposit(self, account_id, currency, amount):
-        if amount <= 0:
+        if amount <= Money(0):
             raise ValueError("Deposit amount can only hold a positive value.")
 
-        with self.db_conn.get_connection() as conn:
-            account = get_account(conn, account_id)
+        with self.repository.transaction() as session:
+            account = session.get_account(account_id)
 
             if not account:
                 return -1
+            if currency not in account.balances:
+                raise ValueError(f"Invalid currency '{currency}'")
 
-            update_balance(conn, account_id, currency, amount)
-            transaction_id = create_transaction(
-                conn, "DepositMade", account_id, account_id, currency, currency, amount
+            session.update_balance(account_id, currency, amount)
+            transaction_id = session.create_transaction(
+                "DepositMade", account_id, account_id, currency, currency, amount
             )
 
-            self.snapshot_service.handle_snapshots(account_id)
+            self.snapshot_service.handle_snapshots(session, account_id, currency)
             return transaction_id
 
     def withdraw(self, account_id, currency, amount):
 
-        with self.db_conn.get_connection() as conn:
-            account = get_account(conn, account_id)
-
-            if not account:
-                return -1
-
-            balance_field = f"{currency.lower()}_balance"
-            if getattr(account, balance_field) < amount:
-                return -2
+        with self.repository.transaction() as session:
+            # Checks the balance and debits it in one statement, no lost updates
+            if session.debit_balance(account_id, currency, amount) is None:
+                return -1 if session.get_account(account_id) is None else -2
 
-            update_balance(conn, account_id, currency, -amount)
-            transaction_id = create_transaction(
-                conn,
+            transaction_id = session.create_transaction(
                 "WithdrawalMade",
                 account_id,
                 account_id,
@@ -57,116 +95,301 @@ class TransactionService:
                 currency,
                 amount,
             )
-            self.snapshot_service.handle_snapshots(account_id)
+            self.snapshot_service.handle_snapshots(session, account_id, currency)
             return transaction_id
 
     def transfer(
         self, from_account_id, to_account_id, from_currency, to_currency, amount
     ):
 
-        with self.db_conn.get_connection() as conn:
-            # Verify accounts exist
-            from_account = get_account(conn, from_account_id)
-            to_account = get_account(conn, to_account_id)
+        with self.repository.transaction() as session:
+            # Lock both balances in key order, parallel transfers between the same
+            # two balances then queue up instead of deadlocking. Transfers in other
+            # currencies of the same accounts lock other rows and go ahead.
+            to_currency = to_currency or from_currency
+            from_balance = (from_account_id, from_currency)
+            to_balance = (to_account_id, to_currency)
+            balances = session.lock_balances([from_balance, to_balance])
 
-            if not from_account:
+            if from_balance not in balances:
                 return -1
 
-            if not to_account:
+            if to_balance not in balances:
                 return -2
 
-            # Check sufficient balance
-            balance_field = f"{from_currency.lower()}_balance"
-            if getattr(from_account, balance_field) < amount:
+            if session.debit_balance(from_account_id, from_currency, amount) is None:
                 return -3
 
             # Get exchange rate if currencies differ
-            if from_currency != to_currency and to_currency is not None:
-                exchange = get_latest_rate(conn, from_currency, to_currency)
+            rate = 1
+            if from_currency != to_currency:
+                exchange = self.currency_exchange_service.get_latest_rate(
+                    from_currency, to_currency, session
+                )
                 if not exchange:
                     raise ValueError(
                         f"No exchange rate available between {from_currency} and {to_currency}"
                     )
-                to_amount = amount * exchange.rate
+                rate = exchange.rate
+                to_amount = amount.convert(rate)
             else:
                 to_amount = amount
-                to_currency = from_currency
-
-            to_amount = round(to_amount, 2)
 
-            # Update balances
-            update_balance(conn, from_account_id, from_currency, -amount)
-            update_balance(conn, to_account_id, to_currency, to_amount)
+            session.update_balance(to_account_id, to_currency, to_amount)
 
             # Record transaction
-            transaction_id = create_transaction(
-                conn,
+            transaction_id = session.create_transaction(
                 "MoneyTransferred",
                 from_account_id,
                 to_account_id,
                 from_currency,
                 to_currency,
                 amount,
-                exchange.rate,
+                rate,
+            )
+            self.snapshot_service.handle_transfer_snapshots(
+                session, from_balance, to_balance
             )
-            self.snapshot_service.handle_snapshots(from_account_id)
-            self.snapshot_service.handle_snapshots(to_account_id)
             return transaction_id
 
     def convert_currency(self, account_id, from_currency, to_currency, amount):
 
-        if amount <= 0:
+        if amount <= Money(0):
             return -1
 
-        with self.db_conn.get_connection() as conn:
-            account = get_account(conn, account_id)
-
-            if not account:
-                return -2
+        with self.repository.transaction() as session:
+            # Both balances of the account in key order, like transfer()
+            balances = session.lock_balances(
+                [(account_id, from_currency), (account_id, to_currency)]
+            )
+            if session.debit_balance(account_id, from_currency, amount) is None:
+                return -2 if session.get_account(account_id) is None else -3
+            if (account_id, to_currency) not in balances:
+                raise ValueError(f"Invalid currency '{to_currency}'")
 
             # Get exchange rate if currencies differ
+            rate = 1
             if from_currency != to_currency:
-                exchange = get_latest_rate(conn, from_currency, to_currency)
+                exchange = self.currency_exchange_service.get_latest_rate(
+                    from_currency, to_currency, session
+                )
                 if not exchange:
                     raise ValueError(
                         f"No exchange rate available between {from_currency} and {to_currency}"
                     )
-                to_amount = amount * exchange.rate
+                rate = exchange.rate
+                to_amount = amount.convert(rate)
             else:
                 to_amount = amount
 
-            to_amount = round(to_amount, 2)
-
-            # Update balances
-            update_balance(conn, account_id, from_currency, -amount)
-            update_balance(conn, account_id, to_currency, to_amount)
+            session.update_balance(account_id, to_currency, to_amount)
 
             # Record transaction
-            transaction_id = create_transaction(
-                conn,
+            transaction_id = session.create_transaction(
                 "CurrencyConverted",
                 account_id,
                 account_id,
                 from_currency,
                 to_currency,
                 amount,
-                exchange.rate,
+                rate,
+            )
+            # Converted from and to the account's balances, two legs on it
+            self.snapshot_service.handle_snapshots(
+                session, account_id, from_currency, legs=2
             )
-            self.snapshot_service.handle_snapshots(account_id)
             return transaction_id
 
-    def get_transaction_history_for_account(self, account_id, limit=5, type=None):
-        with self.db_conn.get_connection() as conn:
-            transactions = get_transaction_history_for_account(
-                conn, account_id, limit, type
+    def apply_batch(self, operations):
+        """
+        Apply many Operations in one transaction and a fixed number of round trips.
+
+        The balances involved are locked and read once and the rates needed are read
+        once. Operations are then checked in order against the running balances in
+        memory, their transactions inserted with one multi-row INSERT and the net
+        change of every balance applied with one UPDATE.
+
+        Returns one result per operation, in order: the transaction id, or the code the
+        matching single-operation method would have returned at that point of the batch.
+        Invalid operations and missing exchange rates raise ValueError and nothing is applied.
+        """
+        for operation in operations:
+            validate_operation(operation)
+
+        keys = operation_balances(operations)
+
+        with self.repository.transaction() as session:
+            session.lock_balances(keys)
+            accounts = session.get_accounts({account_id for account_id, _ in keys})
+            for account_id, currency in sorted(keys):
+                if (
+                    account_id in accounts
+                    and currency not in accounts[account_id].balances
+                ):
+                    raise ValueError(f"Invalid currency '{currency}'")
+            exchanges = self.currency_exchange_service.get_latest_rates(
+                exchange_pairs(operations), session
             )
 
+            balances = {
+                account_id: dict(account.balances)
+                for account_id, account in accounts.items()
+            }
+            # Transactions and legs by (account_id, currency), counted like
+            # handle_snapshots()
+            counts = Counter()
+            legs = Counter()
+            results = []
+            transactions = []
+            positions = []
+
+            for position, operation in enumerate(operations):
+                outcome = self._plan_operation(operation, balances, exchanges)
+                if isinstance(outcome, int):
+                    results.append(outcome)
+                    continue
+
+                results.append(None)
+                transactions.append(outcome)
+                positions.append(position)
+                counts[outcome[1], outcome[3]] += 1
+                legs[outcome[1], outcome[3]] += (
+                    2 if outcome[0] == "CurrencyConverted" else 1
+                )
+                if outcome[2] != outcome[1]:
+                    counts[outcome[2], outcome[4]] += 1
+                    legs[outcome[2], outcome[4]] += 1
+
+            if not transactions:
+                return results
+
+            for position, transaction_id in zip(
+                positions, session.create_transactions(transactions)
+            ):
+                results[position] = transaction_id
+
+            changes = []
+            for account_id, currency in sorted(keys):
+                if account_id not in accounts:
+                    continue
+                amount = balances[account_id][currency] - accounts[account_id].balance(
+                    currency
+                )
+                count = counts[account_id, currency]
+                if amount or count:
+                    changes.append(
+                        (
+                            account_id,
+                            currency,
+                            amount,
+                            count,
+                            legs[account_id, currency],
+                        )
+                    )
+            updated, now = session.apply_balance_changes(changes)
+            self.snapshot_service.handle_batch_snapshots(session, updated, now)
+            return results
+
+    def _plan_operation(self, operation, balances, exchanges):
+        """
+        Check one operation against the running <balances> and apply it to them.
+        Returns its create_transaction() row, or the single-operation return code.
+        """
+        account_id = operation.account_id
+        currency = operation.currency
+        amount = operation.amount
+
+        if operation.type == "deposit":
+            if account_id not in balances:
+                return -1
+            balances[account_id][currency] += amount
+            return (
+                "DepositMade",
+                account_id,
+                account_id,
+                currency,
+                currency,
+                amount,
+                1,
+            )
+
+        if operation.type == "withdraw":
+            if account_id not in balances:
+                return -1
+            if balances[account_id][currency] < amount:
+                return -2
+            balances[account_id][currency] -= amount
+            return (
+                "WithdrawalMade",
+                account_id,
+                account_id,
+                currency,
+                currency,
+                amount,
+                1,
+            )
+
+        if operation.type == "transfer":
+            to_account_id = operation.to_account_id
+            if account_id not in balances:
+                return -1
+            if to_account_id not in balances:
+                return -2
+            type = "MoneyTransferred"
+        else:
+            if amount <= Money(0):
+                return -1
+            if account_id not in balances:
+                return -2
+            to_account_id = account_id
+            type = "CurrencyConverted"
+
+        if balances[account_id][currency] < amount:
+            return -3
+
+        to_currency = operation.to_currency or currency
+        rate = 1
+        to_amount = amount
+        if to_currency != currency:
+            exchange = exchanges.get((currency, to_currency))
+            if not exchange:
+                raise ValueError(
+                    f"No exchange rate available between {currency} and {to_currency}"
+                )
+            rate = exchange.rate
+            to_amount = amount.convert(rate)
+
+        balances[account_id][currency] -= amount
+        balances[to_account_id][to_currency] += to_amount
+        return (type, account_id, to_account_id, currency, to_currency, amount, rate)
+
+    def get_transaction_history_for_account(
+        self, account_id, limit=5, type=None, page_token=None
+    ):
+        """
+        The account's transactions, newest first, formatted one per line.
+        Returns the text and the token of the next page, None on the last page.
+        Pass that token back as <page_token> to continue after this page.
+        """
+        before = decode_page_token(page_token) if page_token else None
+
+        with self.repository.transaction() as session:
+            # One extra row tells whether another page follows
+            transactions = session.get_transaction_history_for_account(
+                account_id, limit + 1 if limit else None, type, before
+            )
+
+            next_page_token = None
+            if limit and len(transactions) > limit:
+                last = transactions[limit - 1]
+                next_page_token = encode_page_token(last.timestamp, last.id)
+
             if not transactions:
-                return ""
+                return "", None
 
             messages = []
 
-            for tx in transactions:
+            for tx in islice(transactions, limit):
                 details = f"Type: {tx.type}, Time: {tx.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
                 if tx.type in ["DepositMade", "WithdrawalMade"]:
                     details += f", Curr: {tx.from_currency if tx.type != 'DepositMade' else tx.to_currency}"
@@ -190,4 +413,4 @@ class TransactionService:
 
                 messages.append(details)
 
-            return "\n".join(messages)
+            return "\n".join(messages), next_page_token
@@ -0,0 +1,111 @@
+import json
+import socket
+import threading
+import pytest
+from cli import client
+
+
+@pytest.fixture
+def ledger_server(test_database_params, tmp_path, monkeypatch):
+    """A ledger server on a temporary socket that the client uses, stopped after the test."""
+    from cli.server import LedgerServer
+
+    path = str(tmp_path / "ledger.sock")
+    monkeypatch.setenv(client.SOCKET_ENV, path)
+    server = LedgerServer(path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run_client(argv):
+    with pytest.raises(SystemExit) as exit:
+        client.main(argv)
+    return exit.value.code
+
+
+def test_client_prints_the_server_output(ledger_server, capsys):
+    assert run_client(["get-balance", "--account-id", "-1"]) == 0
+    assert capsys.readouterr().out == (
+        "[CURRENT ACCOUNT BALANCE] ID: -1\nInvalid account ID\n"
+    )
+
+
+def test_client_reports_usage_errors_like_click(ledger_server, capsys):
+    assert run_client(["deposit", "--account-id", "1", "--currency", "USD"]) == 2
+    output = capsys.readouterr()
+    assert output.out == ""
+    assert "Missing option '--amount'" in output.err
+    assert output.err.startswith("Usage: cli.py deposit")
+
+
+def test_one_connection_runs_several_commands(ledger_server):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(ledger_server.path)
+        answers = sock.makefile("rb")
+        for _ in range(3):
+            sock.sendall(client.encode_message({"argv": ["--help"]}))
+            answer = json.loads(answers.readline())
+            assert answer["exit_code"] == 0
+            assert "Multi-Currency Financial Ledger" in answer["stdout"]
+
+
+def test_commands_run_concurrently(ledger_server, monkeypatch):
+    listing = threading.Event()
+    release = threading.Event()
+    listed = threading.Event()
+
+    class SlowCurrencyService:
+        def get_currencies(self):
+            listing.set()
+            release.wait(5)
+            listed.set()
+            return ["USD", "EUR"]
+
+    monkeypatch.setattr("cli.main.currency_service", SlowCurrencyService)
+    slow_answer = []
+    slow = threading.Thread(
+        target=lambda: slow_answer.append(
+            client.forward(["list-currencies"], ledger_server.path)
+        )
+    )
+    slow.start()
+    try:
+        assert listing.wait(5)
+        # Answered while list-currencies is still running, with its own output
+        answer = client.forward(["deposit", "--help"], ledger_server.path)
+        assert answer["exit_code"] == 0
+        assert answer["stdout"].startswith("Usage: cli.py deposit")
+        assert not listed.is_set()
+    finally:
+        release.set()
+        slow.join(5)
+    assert slow_answer[0]["stdout"] == "USD, EUR\n"
+
+
+def test_server_refuses_to_replace_a_live_socket(ledger_server):
+    from cli.server import LedgerServer
+
+    with pytest.raises(ValueError, match="already listening"):
+        LedgerServer(ledger_server.path)
+
+
+@pytest.mark.parametrize(
+    "command", ["import-transactions", "export-transactions", "ingest-rates"]
+)
+def test_file_commands_run_in_the_callers_process(command, monkeypatch):
+    ran = []
+
+    def forward(argv, path):
+        raise AssertionError(f"{command} was forwarded to the server")
+
+    monkeypatch.setattr(client, "forward", forward)
+    monkeypatch.setattr("cli.main.cli", lambda argv, prog_name: ran.append(argv))
+    client.main([command, "--file", "-"])
+    assert ran == [[command, "--file", "-"]]
+
+
+def test_forward_without_server_returns_none(tmp_path):
+    assert client.forward(["--help"], str(tmp_path / "missing.sock")) is None
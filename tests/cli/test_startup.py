@@ -0,0 +1,39 @@
+import json
+import subprocess
+import sys
+import pytest
+
+# Runs a command line in a fresh interpreter and lists the heavy modules it imported.
+PROBE = """
+import json, sys
+from cli.main import cli
+try:
+    cli(sys.argv[1:], prog_name="cli.py", standalone_mode=False)
+except Exception:
+    pass
+heavy = ("psycopg2", "numpy", "database", "services")
+print(json.dumps(sorted(name for name in sys.modules if name.split(".")[0] in heavy)))
+"""
+
+
+def imported_modules(*argv):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, *argv],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--help"],
+        ["deposit", "--help"],
+        ["deposit", "--account-id", "1", "--currency", "USD", "--amount", "x"],
+        ["create-account", "--initial-balance", "USD=abc"],
+    ],
+)
+def test_commands_not_reaching_a_service_import_no_database_code(argv):
+    assert imported_modules(*argv) == ["services", "services.file_formats"]
@@ -2,23 +2,32 @@ import pytest
 from click import BadParameter
 from decimal import Decimal
 from collections import defaultdict
-from cli.validation import parse_currency_list, validate_amount, validate_rate
+from models.money import Money
+from datetime import timedelta
+from cli.validation import (
+    check_currencies,
+    parse_currency,
+    parse_currency_list,
+    parse_account_ids,
+    parse_interval,
+    validate_amount,
+    validate_rate,
+)
 
 
 # parse_currency_list
 def test_parse_currency_list_valid():
     result = parse_currency_list(None, None, "USD=100.50,EUR=200")
-    expected = defaultdict(
-        Decimal, {"USD": Decimal("100.50"), "EUR": Decimal("200.00")}
-    )
+    expected = defaultdict(Money, {"USD": Money(10050), "EUR": Money(20000)})
     assert result == expected
-    assert isinstance(result["USD"], Decimal)
-    assert isinstance(result["EUR"], Decimal)
+    assert isinstance(result["USD"], Money)
+    assert isinstance(result["EUR"], Money)
+    assert result["GBP"] == Money(0)
 
 
 def test_parse_currency_list_empty():
     result = parse_currency_list(None, None, "")
-    assert result == defaultdict(Decimal)
+    assert result == defaultdict(Money)
 
 
 def test_parse_currency_list_invalid_format():
@@ -26,9 +35,25 @@ def test_parse_currency_list_invalid_format():
         parse_currency_list(None, None, "USD:100")
 
 
-def test_parse_currency_list_invalid_currency():
+def test_parse_currency_list_accepts_any_currency_code():
+    result = parse_currency_list(None, None, "usd=1,JPY=50")
+    assert list(result) == ["USD", "JPY"]
+    with pytest.raises(BadParameter, match="Invalid currency 'US'"):
+        parse_currency_list(None, None, "US=100")
+
+
+# parse_currency / check_currencies
+def test_parse_currency_normalizes_the_code():
+    assert parse_currency(None, None, " jpy") == "JPY"
+    assert parse_currency(None, None, None) is None
+    with pytest.raises(BadParameter, match="3-letter code"):
+        parse_currency(None, None, "US1")
+
+
+def test_check_currencies_rejects_unknown_currencies():
+    check_currencies(["USD", "EUR"], ["USD", "EUR", "GBP"])
     with pytest.raises(BadParameter, match="Invalid currency 'JPY'"):
-        parse_currency_list(None, None, "USD=100,JPY=50")
+        check_currencies(["USD", "JPY"], ["USD", "EUR", "GBP"])
 
 
 def test_parse_currency_list_invalid_amount():
@@ -36,12 +61,39 @@ def test_parse_currency_list_invalid_amount():
         parse_currency_list(None, None, "USD=abc")
 
 
+# parse_account_ids
+def test_parse_account_ids_valid():
+    assert parse_account_ids(None, None, "1, 2,3") == [1, 2, 3]
+
+
+def test_parse_account_ids_empty():
+    assert parse_account_ids(None, None, None) is None
+
+
+def test_parse_account_ids_invalid():
+    with pytest.raises(BadParameter, match="Invalid account IDs: '1,abc'"):
+        parse_account_ids(None, None, "1,abc")
+
+
+# parse_interval
+def test_parse_interval_valid():
+    assert parse_interval(None, None, "30s") == timedelta(seconds=30)
+    assert parse_interval(None, None, "15m") == timedelta(minutes=15)
+    assert parse_interval(None, None, "1h") == timedelta(hours=1)
+    assert parse_interval(None, None, "7D") == timedelta(days=7)
+
+
+@pytest.mark.parametrize("value", ["", "h", "0h", "-1h", "1.5h", "1w", "abc"])
+def test_parse_interval_invalid(value):
+    with pytest.raises(BadParameter, match="Invalid interval"):
+        parse_interval(None, None, value)
+
+
 # validate_amount
 def test_validate_amount_valid():
-    assert validate_amount(None, None, "123.45") == Decimal("123.45")
-    assert validate_amount(None, None, 100) == Decimal(
-        "100.00"
-    )  # Test float conversion
+    assert validate_amount(None, None, "123.45") == Money(12345)
+    assert validate_amount(None, None, 100) == Money(10000)  # Test int conversion
+    assert validate_amount(None, None, 0.1) == Money(10)  # Test float conversion
 
 
 def test_validate_amount_zero():
@@ -54,10 +106,20 @@ def test_validate_amount_negative():
         validate_amount(None, None, "-10.5")
 
 
+def test_validate_amount_invalid():
+    with pytest.raises(BadParameter, match="Invalid amount: abc"):
+        validate_amount(None, None, "abc")
+
+
 def test_validate_amount_precision():
-    assert validate_amount(None, None, "123.456") == Decimal("123.46")
-    assert validate_amount(None, None, 100.005) == Decimal("100.00")
-    assert validate_amount(None, None, 100.015) == Decimal("100.02")
+    assert validate_amount(None, None, "123.456") == Money(12346)
+    assert validate_amount(None, None, 100.005) == Money(10000)  # Half to even
+    assert validate_amount(None, None, 100.015) == Money(10002)
+
+
+def test_validate_amount_rounds_to_zero():
+    with pytest.raises(BadParameter, match="must be positive"):
+        validate_amount(None, None, "0.001")
 
 
 # validate_rate
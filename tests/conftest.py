@@ -0,0 +1,50 @@
+import psycopg2
+import pytest
+from database.connection import DatabaseConnection
+from database.connection_parameters import POOL_DEFAULTS, get_database_parameters
+from database.migrate import apply_migrations
+from services.transaction_service import TransactionService
+
+TEST_DATABASE_SECTION = "postgresql_test"
+
+
+@pytest.fixture(scope="session")
+def test_database_params():
+    """
+    Connection parameters of the [postgresql_test] section of database/database.ini.
+    Tests depending on it are skipped when the section is missing or the server is down.
+    """
+    config = get_database_parameters("database/database.ini")
+    if not config.has_section(TEST_DATABASE_SECTION):
+        pytest.skip(f"No [{TEST_DATABASE_SECTION}] section in database/database.ini")
+
+    params = dict(config[TEST_DATABASE_SECTION])
+    try:
+        conn = psycopg2.connect(**params)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Test database is not reachable: {e}")
+
+    apply_migrations(conn)
+    conn.close()
+    return params
+
+
+@pytest.fixture
+def db_conn(test_database_params):
+    """A connection to the migrated test database, rolled back after the test."""
+    conn = psycopg2.connect(**test_database_params)
+    yield conn
+    conn.rollback()
+    conn.close()
+
+
+@pytest.fixture
+def transaction_service(test_database_params, monkeypatch):
+    """
+    A TransactionService whose shared DatabaseConnection points at the test database.
+    Its operations commit, so tests work on accounts they create themselves.
+    """
+    monkeypatch.setattr(DatabaseConnection, "_instance", None)
+    db_conn = DatabaseConnection(test_database_params, dict(POOL_DEFAULTS, max_size=8))
+    yield TransactionService()
+    db_conn.close_all()
@@ -0,0 +1,165 @@
+from decimal import Decimal
+import pytest
+from database.queries.account import create_account, get_account
+from database.queries.transaction import get_transaction_history_for_account
+from models.money import Money
+from models.operation import Operation
+
+
+def new_account(db_conn, usd="0", eur="0", gbp="0"):
+    with db_conn.transaction() as conn:
+        return create_account(
+            conn,
+            {"USD": Money.parse(usd), "EUR": Money.parse(eur), "GBP": Money.parse(gbp)},
+        )
+
+
+def apply_one_by_one(service, operations):
+    results = []
+    for operation in operations:
+        if operation.type == "deposit":
+            result = service.deposit(
+                operation.account_id, operation.currency, operation.amount
+            )
+        elif operation.type == "withdraw":
+            result = service.withdraw(
+                operation.account_id, operation.currency, operation.amount
+            )
+        elif operation.type == "transfer":
+            result = service.transfer(
+                operation.account_id,
+                operation.to_account_id,
+                operation.currency,
+                operation.to_currency,
+                operation.amount,
+            )
+        else:
+            result = service.convert_currency(
+                operation.account_id,
+                operation.currency,
+                operation.to_currency,
+                operation.amount,
+            )
+        results.append(result)
+    return results
+
+
+def ledger_state(service, account_ids):
+    """Balances and transactions (without ids/timestamps) of the accounts, in order."""
+    state = []
+    with service.repository.db_conn.transaction() as conn:
+        for account_id in account_ids:
+            account = get_account(conn, account_id)
+            transactions = get_transaction_history_for_account(conn, account_id)
+            state.append(
+                (
+                    account.balances,
+                    account.transaction_count,
+                    [
+                        (
+                            transaction.type,
+                            account_ids.index(transaction.from_account),
+                            account_ids.index(transaction.to_account),
+                            transaction.from_currency,
+                            transaction.to_currency,
+                            transaction.amount,
+                            transaction.rate,
+                        )
+                        for transaction in transactions
+                    ],
+                )
+            )
+    return state
+
+
+def operations_for(first, second):
+    """Operations covering every type and return code, run on accounts <first> and <second>."""
+    return [
+        Operation("deposit", first, "USD", Money.parse("50")),
+        Operation("deposit", -1, "USD", Money.parse("1")),
+        Operation("withdraw", first, "USD", Money.parse("500")),
+        Operation("withdraw", -1, "USD", Money.parse("1")),
+        Operation("withdraw", first, "USD", Money.parse("20")),
+        Operation("transfer", first, "USD", Money.parse("30"), second),
+        Operation("transfer", second, "USD", Money.parse("1"), -1),
+        Operation("transfer", -1, "USD", Money.parse("1"), second),
+        Operation(
+            "transfer", first, "USD", Money.parse("1000"), second, to_currency="EUR"
+        ),
+        Operation(
+            "transfer", second, "USD", Money.parse("10.01"), first, to_currency="EUR"
+        ),
+        Operation("convert_currency", first, "EUR", Money(0), to_currency="GBP"),
+        Operation("convert_currency", -1, "EUR", Money.parse("1"), to_currency="GBP"),
+        Operation(
+            "convert_currency", first, "EUR", Money.parse("99"), to_currency="GBP"
+        ),
+        Operation(
+            "convert_currency", first, "EUR", Money.parse("5"), to_currency="GBP"
+        ),
+        # Only possible thanks to the deposit earlier in the same batch
+        Operation("withdraw", first, "USD", Money.parse("100")),
+    ]
+
+
+def test_apply_batch_matches_operations_one_by_one(transaction_service):
+    exchange_service = transaction_service.currency_exchange_service
+    exchange_service.update_exchange_rate("USD", "EUR", Decimal("0.85"))
+    exchange_service.update_exchange_rate("EUR", "GBP", Decimal("0.9"))
+    db_conn = transaction_service.repository.db_conn
+    batch_accounts = [new_account(db_conn, usd="100", eur="2")]
+    batch_accounts.append(new_account(db_conn, usd="5"))
+    single_accounts = [new_account(db_conn, usd="100", eur="2")]
+    single_accounts.append(new_account(db_conn, usd="5"))
+
+    batch_results = transaction_service.apply_batch(operations_for(*batch_accounts))
+    single_results = apply_one_by_one(
+        transaction_service, operations_for(*single_accounts)
+    )
+
+    assert [min(result, 0) for result in batch_results] == [
+        min(result, 0) for result in single_results
+    ]
+    assert [result for result in batch_results if result > 0] == sorted(
+        result for result in batch_results if result > 0
+    )
+    assert ledger_state(transaction_service, batch_accounts) == ledger_state(
+        transaction_service, single_accounts
+    )
+
+
+def test_apply_batch_rejects_invalid_operations_before_applying_any(
+    transaction_service,
+):
+    account_id = new_account(transaction_service.repository.db_conn, usd="10")
+    operations = [
+        Operation("deposit", account_id, "USD", Money.parse("5")),
+        Operation("deposit", account_id, "USD", Money(0)),
+    ]
+
+    with pytest.raises(ValueError, match="positive"):
+        transaction_service.apply_batch(operations)
+    with pytest.raises(ValueError, match="Invalid operation type"):
+        transaction_service.apply_batch([Operation("refund", account_id, "USD", 1)])
+    with pytest.raises(ValueError, match="to_account_id"):
+        transaction_service.apply_batch(
+            [Operation("transfer", account_id, "USD", Money(1))]
+        )
+
+    with transaction_service.repository.db_conn.transaction() as conn:
+        assert get_account(conn, account_id).balance("USD") == Money.parse("10")
+
+
+def test_apply_batch_with_an_unknown_currency_applies_nothing(transaction_service):
+    account_id = new_account(transaction_service.repository.db_conn, usd="10")
+    operations = [
+        Operation("withdraw", account_id, "USD", Money.parse("5")),
+        Operation("convert_currency", account_id, "USD", Money(1), to_currency="XYZ"),
+    ]
+
+    with pytest.raises(ValueError, match="Invalid currency"):
+        transaction_service.apply_batch(operations)
+    assert transaction_service.apply_batch([]) == []
+
+    with transaction_service.repository.db_conn.transaction() as conn:
+        assert get_account(conn, account_id).balance("USD") == Money.parse("10")
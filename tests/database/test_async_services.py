@@ -0,0 +1,95 @@
+import asyncio
+from decimal import Decimal
+import pytest
+from database.async_connection import AsyncDatabaseConnection, make_async_conninfo
+from database.connection_parameters import POOL_DEFAULTS
+from models.money import Money
+from services.async_account_service import AsyncAccountService
+from services.async_transaction_service import AsyncTransactionService
+
+
+def run_services(test_database_params, scenario, max_size=4):
+    """Run <scenario>(account_service, transaction_service) on its own event loop and pool."""
+
+    async def main():
+        db_conn = AsyncDatabaseConnection(
+            test_database_params, dict(POOL_DEFAULTS, max_size=max_size)
+        )
+        try:
+            return await scenario(
+                AsyncAccountService(db_conn), AsyncTransactionService(db_conn)
+            )
+        finally:
+            await db_conn.close()
+
+    return asyncio.run(main())
+
+
+def balances(usd="0", eur="0", gbp="0"):
+    return {"USD": Money.parse(usd), "EUR": Money.parse(eur), "GBP": Money.parse(gbp)}
+
+
+def test_make_async_conninfo_renames_database():
+    conninfo = make_async_conninfo({"host": "localhost", "database": "ledger"})
+    assert "dbname=ledger" in conninfo
+    assert "database" not in conninfo
+
+
+def test_async_services_follow_the_sync_return_codes(test_database_params):
+    async def scenario(accounts, transactions):
+        await transactions.currency_exchange_service.update_exchange_rate(
+            "USD", "EUR", Decimal("0.50")
+        )
+        first = await accounts.create_account(balances(usd="10"))
+        second = await accounts.create_account(balances())
+
+        assert await transactions.deposit(first, "USD", Money.parse("5")) > 0
+        assert await transactions.deposit(-1, "USD", Money.parse("5")) == -1
+        assert await transactions.withdraw(first, "USD", Money.parse("100")) == -2
+        assert await transactions.withdraw(first, "USD", Money.parse("1")) > 0
+        assert await transactions.transfer(first, -1, "USD", "USD", Money(1)) == -2
+        assert (
+            await transactions.transfer(first, second, "USD", "EUR", Money.parse("4"))
+            > 0
+        )
+        assert await transactions.convert_currency(first, "USD", "GBP", Money(0)) == -1
+        assert (
+            await transactions.convert_currency(first, "USD", "GBP", Money.parse("50"))
+            == -3
+        )
+        assert await accounts.get_balance(-1) == -1
+        return await accounts.get_balance(first), await accounts.get_balance(second)
+
+    first, second = run_services(test_database_params, scenario)
+
+    assert first == balances(usd="10")
+    assert second == balances(eur="2")
+
+
+def test_async_services_reject_unknown_currencies(test_database_params):
+    async def scenario(accounts, transactions):
+        account_id = await accounts.create_account(balances(usd="10"))
+        with pytest.raises(ValueError, match="Invalid currency 'XYZ'"):
+            await transactions.deposit(account_id, "XYZ", Money.parse("5"))
+        with pytest.raises(ValueError, match="Invalid currency 'XYZ'"):
+            await transactions.convert_currency(
+                account_id, "USD", "XYZ", Money.parse("5")
+            )
+        return await accounts.get_balance(account_id)
+
+    # Nothing was written, the debit of the conversion is rolled back
+    assert run_services(test_database_params, scenario) == balances(usd="10")
+
+
+def test_concurrent_deposits_share_a_small_pool(test_database_params):
+    async def scenario(accounts, transactions):
+        account_id = await accounts.create_account(balances())
+        ids = await asyncio.gather(
+            *(transactions.deposit(account_id, "USD", Money(1)) for _ in range(200))
+        )
+        return ids, await accounts.get_balance(account_id)
+
+    ids, account_balances = run_services(test_database_params, scenario, max_size=3)
+
+    assert len(set(ids)) == 200
+    assert account_balances["USD"] == Money(200)
@@ -0,0 +1,109 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from models.money import Money
+from database.queries.balances import get_balances_at_time
+
+T = [datetime(2024, 1, 1, hour) for hour in range(24)]
+
+
+def insert_account(cursor, snapshot_time, usd="0", eur="0", gbp="0"):
+    cursor.execute("INSERT INTO account DEFAULT VALUES RETURNING account_id;")
+    account_id = cursor.fetchone()[0]
+    cursor.execute(
+        "INSERT INTO account_balance (account_id, currency, balance) VALUES (%s, 'USD', %s), (%s, 'EUR', %s), (%s, 'GBP', %s);",
+        (account_id, usd, account_id, eur, account_id, gbp),
+    )
+    insert_snapshot(cursor, account_id, snapshot_time, usd, eur, gbp)
+    return account_id
+
+
+def insert_snapshot(cursor, account_id, timestamp, usd="0", eur="0", gbp="0"):
+    cursor.execute(
+        "INSERT INTO snapshot (account_id, timestamp) VALUES (%s, %s) RETURNING snapshot_id;",
+        (account_id, timestamp),
+    )
+    snapshot_id = cursor.fetchone()[0]
+    cursor.execute(
+        "INSERT INTO snapshot_balance (snapshot_id, currency, balance) VALUES (%s, 'USD', %s), (%s, 'EUR', %s), (%s, 'GBP', %s);",
+        (snapshot_id, usd, snapshot_id, eur, snapshot_id, gbp),
+    )
+
+
+def insert_transaction(
+    cursor, type, from_account, to_account, timestamp, from_cur, to_cur, amount, rate=1
+):
+    cursor.execute(
+        """
+        INSERT INTO transaction (type, from_account, to_account, timestamp, from_currency, to_currency, amount, rate)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+        """,
+        (type, from_account, to_account, timestamp, from_cur, to_cur, amount, rate),
+    )
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("0.025", "0.02"),
+        ("0.035", "0.04"),
+        ("-0.025", "-0.02"),
+        ("1.2349", "1.23"),
+        ("1.2351", "1.24"),
+        ("2.5", "2.50"),
+    ],
+)
+def test_round_half_even_matches_python(db_conn, value, expected):
+    cursor = db_conn.cursor()
+    cursor.execute("SELECT round_half_even(%s::NUMERIC, 2);", (value,))
+    result = cursor.fetchone()[0]
+    assert result == Decimal(expected) == round(Decimal(value), 2)
+
+
+def test_get_balances_at_time(db_conn):
+    cursor = db_conn.cursor()
+    first = insert_account(cursor, T[1], usd="100")
+    second = insert_account(cursor, T[1], eur="10")
+    later = insert_account(cursor, T[10], usd="5")
+
+    insert_transaction(cursor, "DepositMade", first, first, T[2], "USD", "USD", "20")
+    insert_transaction(
+        cursor, "WithdrawalMade", second, second, T[3], "EUR", "EUR", "4"
+    )
+    # 1.05 * 0.5 = 0.525 rounds half to even
+    insert_transaction(
+        cursor, "MoneyTransferred", first, second, T[4], "USD", "EUR", "1.05", "0.5"
+    )
+    insert_transaction(
+        cursor, "CurrencyConverted", first, first, T[5], "USD", "GBP", "10", "0.8"
+    )
+    insert_snapshot(cursor, second, T[6], eur="99")
+    insert_transaction(cursor, "DepositMade", second, second, T[7], "EUR", "EUR", "1")
+    insert_transaction(cursor, "DepositMade", first, first, T[20], "USD", "USD", "1")
+
+    balances = get_balances_at_time(db_conn, T[8])
+    balances = {
+        snapshot.account_id: (
+            snapshot.balance("USD"),
+            snapshot.balance("EUR"),
+            snapshot.balance("GBP"),
+        )
+        for snapshot in balances
+        if snapshot.account_id in (first, second, later)
+    }
+
+    assert balances == {
+        first: (Money(10895), Money(0), Money(800)),
+        second: (Money(0), Money(10000), Money(0)),
+    }
+
+
+def test_get_balances_at_time_for_some_accounts(db_conn):
+    cursor = db_conn.cursor()
+    first = insert_account(cursor, T[1], usd="1")
+    insert_account(cursor, T[1], usd="2")
+
+    balances = get_balances_at_time(db_conn, T[2], [first])
+
+    assert [snapshot.account_id for snapshot in balances] == [first]
+    assert balances[0].timestamp == T[2]
@@ -0,0 +1,120 @@
+import random
+import threading
+import psycopg2
+import pytest
+from database.queries.account import (
+    create_account,
+    debit_balance,
+    get_account,
+    lock_balances,
+)
+from models.money import Money
+
+THREADS = 8
+OPERATIONS_PER_THREAD = 100
+
+
+def new_accounts(db_conn, *usd_balances):
+    with db_conn.transaction() as conn:
+        return [create_account(conn, {"USD": Money.parse(usd)}) for usd in usd_balances]
+
+
+def test_debit_balance_only_debits_covered_amounts(db_conn):
+    account_id = create_account(db_conn, {"USD": Money.parse("10")})
+
+    assert debit_balance(db_conn, account_id, "USD", Money.parse("4")) == Money(600)
+    assert debit_balance(db_conn, account_id, "USD", Money.parse("6.01")) is None
+    assert debit_balance(db_conn, account_id, "USD", Money.parse("6")) == Money(0)
+    assert debit_balance(db_conn, -1, "USD", Money(1)) is None
+    assert get_account(db_conn, account_id).balance("USD") == Money(0)
+
+
+def test_lock_balances_returns_existing_keys(db_conn):
+    first = create_account(db_conn)
+    second = create_account(db_conn)
+
+    keys = [(second, "EUR"), (first, "USD"), (-1, "USD"), (first, "XYZ")]
+    assert lock_balances(db_conn, keys) == {(first, "USD"), (second, "EUR")}
+    assert lock_balances(db_conn, [(first, "GBP")] * 2) == {(first, "GBP")}
+
+
+def test_contended_withdrawals_and_transfers_never_overdraw(transaction_service):
+    """
+    Threads withdraw from and transfer back and forth between two accounts holding
+    less than they try to move in total. Every debit must be checked against the
+    committed balance, and opposite transfers must not deadlock.
+    """
+    accounts = new_accounts(transaction_service.repository.db_conn, "100", "100")
+    withdrawn = []
+    errors = []
+
+    def client(seed):
+        rng = random.Random(seed)
+        for _ in range(OPERATIONS_PER_THREAD):
+            amount = Money(rng.randint(1, 3000))
+            from_account, to_account = rng.sample(accounts, 2)
+            try:
+                if rng.random() < 0.3:
+                    result = transaction_service.withdraw(from_account, "USD", amount)
+                    if result >= 0:
+                        withdrawn.append(amount)
+                else:
+                    transaction_service.transfer(
+                        from_account, to_account, "USD", "USD", amount
+                    )
+            except psycopg2.Error as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with transaction_service.repository.db_conn.transaction() as conn:
+        balances = [get_account(conn, account).balance("USD") for account in accounts]
+    assert all(balance >= Money(0) for balance in balances)
+    assert sum(balances, Money(0)) + sum(withdrawn, Money(0)) == Money.parse("200")
+
+
+def test_withdrawals_in_different_currencies_of_one_account(transaction_service):
+    """
+    Each thread withdraws its own currency of the same account. The balances are
+    separate rows, so the withdrawals do not wait for each other, and every one must
+    still be counted once.
+    """
+    currencies = ["USD", "EUR", "GBP"]
+    with transaction_service.repository.db_conn.transaction() as conn:
+        account_id = create_account(
+            conn, {currency: Money.parse("100") for currency in currencies}
+        )
+    withdrawn = {currency: [] for currency in currencies}
+    errors = []
+
+    def client(currency):
+        rng = random.Random(currency)
+        for _ in range(OPERATIONS_PER_THREAD):
+            amount = Money(rng.randint(1, 300))
+            try:
+                if transaction_service.withdraw(account_id, currency, amount) >= 0:
+                    withdrawn[currency].append(amount)
+            except psycopg2.Error as e:
+                errors.append(e)
+
+    threads = [
+        threading.Thread(target=client, args=(currency,)) for currency in currencies
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with transaction_service.repository.db_conn.transaction() as conn:
+        account = get_account(conn, account_id)
+    for currency in currencies:
+        assert account.balance(currency) + sum(
+            withdrawn[currency], Money(0)
+        ) == Money.parse("100")
+    assert account.transaction_count == sum(map(len, withdrawn.values()))
@@ -0,0 +1,71 @@
+import queue
+import time
+from decimal import Decimal
+import psycopg2
+from database.connection import DatabaseConnection
+from database.connection_parameters import POOL_DEFAULTS
+from database.listener import NotificationListener
+from database.queries.currency_exchange import publish_rates
+from database.repositories.postgres import PostgresRepository
+from services.currency_exchange_service import CurrencyExchangeService, rate_board
+
+
+def test_listener_receives_notifications(test_database_params):
+    payloads = queue.Queue()
+    reconnects = []
+    listener = NotificationListener(
+        test_database_params,
+        "test_channel",
+        payloads.put,
+        on_reconnect=lambda: reconnects.append(True),
+        poll_interval=0.05,
+    )
+    listener.start()
+    try:
+        assert listener.listening.wait(5)
+
+        conn = psycopg2.connect(**test_database_params)
+        with conn:
+            conn.cursor().execute("SELECT pg_notify('test_channel', 'USD:EUR');")
+        conn.close()
+
+        assert payloads.get(timeout=5) == "USD:EUR"
+        assert reconnects == [True]
+    finally:
+        listener.stop()
+        listener.join(5)
+
+
+def test_exchange_service_sees_rates_published_elsewhere(
+    test_database_params, monkeypatch
+):
+    monkeypatch.setattr(DatabaseConnection, "_instance", None)
+    repository = PostgresRepository(
+        DatabaseConnection(test_database_params, POOL_DEFAULTS)
+    )
+    exchange_service = CurrencyExchangeService(repository=repository)
+    exchange_service.rate_matrix.ttl = 3600
+    listener = exchange_service.start_listening()
+    try:
+        assert listener.listening.wait(5)
+        exchange_service.get_latest_rate("QLA", "QLB")
+
+        # Another process publishing a rate
+        conn = psycopg2.connect(**test_database_params)
+        with conn:
+            publish_rates(conn, rate_board("QLA", "QLB", Decimal("3")))
+        conn.close()
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            exchange = exchange_service.get_latest_rate("QLA", "QLB")
+            if exchange is not None and exchange.rate == Decimal("3"):
+                break
+            time.sleep(0.05)
+        assert exchange.rate == Decimal("3")
+        assert exchange_service.get_latest_rate("QLB", "QLA").rate == Decimal("0.33")
+        assert not exchange_service.rate_matrix.expired()
+    finally:
+        exchange_service.stop_listening()
+        listener.join(5)
+        repository.close()
@@ -0,0 +1,30 @@
+import pytest
+from database.migrate import list_migrations, MIGRATIONS_DIR
+
+
+def test_list_migrations_orders_by_version(tmp_path):
+    for file_name in ["0010_later.sql", "0002_second.sql", "0001_initial.sql"]:
+        (tmp_path / file_name).write_text("SELECT 1;")
+    (tmp_path / "README.md").write_text("not a migration")
+
+    migrations = list_migrations(tmp_path)
+
+    assert [(version, name) for version, name, _ in migrations] == [
+        (1, "initial"),
+        (2, "second"),
+        (10, "later"),
+    ]
+    assert migrations[0][2] == str(tmp_path / "0001_initial.sql")
+
+
+def test_list_migrations_rejects_duplicate_versions(tmp_path):
+    (tmp_path / "0001_initial.sql").write_text("SELECT 1;")
+    (tmp_path / "1_other.sql").write_text("SELECT 1;")
+
+    with pytest.raises(ValueError, match="Duplicate migration version 1"):
+        list_migrations(tmp_path)
+
+
+def test_shipped_migrations_are_contiguous():
+    versions = [version for version, _, _ in list_migrations(MIGRATIONS_DIR)]
+    assert versions == list(range(1, len(versions) + 1))
@@ -0,0 +1,181 @@
+import threading
+import time
+import psycopg2
+import pytest
+from psycopg2.pool import PoolError
+from database.connection_parameters import (
+    get_database_parameters,
+    get_pool_parameters,
+    POOL_DEFAULTS,
+)
+from database.pool import ConnectionPool
+
+
+def test_get_pool_parameters_defaults(tmp_path):
+    config = get_database_parameters(tmp_path / "missing.ini")
+    assert get_pool_parameters(config) == POOL_DEFAULTS
+
+
+def test_get_pool_parameters_from_file(tmp_path):
+    path = tmp_path / "database.ini"
+    path.write_text(
+        "[pool]\nmin_size=2\nmax_size=4\ncheckout_timeout=0.5\nmax_lifetime=60\n"
+    )
+    assert get_pool_parameters(get_database_parameters(path)) == {
+        "min_size": 2,
+        "max_size": 4,
+        "checkout_timeout": 0.5,
+        "max_lifetime": 60.0,
+    }
+
+
+def test_get_pool_parameters_from_other_section(tmp_path):
+    path = tmp_path / "database.ini"
+    path.write_text("[pool]\nmax_size=4\n[async_pool]\nmax_size=40\n")
+    config = get_database_parameters(path)
+    assert get_pool_parameters(config, "async_pool")["max_size"] == 40
+
+
+def test_get_pool_parameters_invalid_sizes(tmp_path):
+    path = tmp_path / "database.ini"
+    path.write_text("[pool]\nmin_size=5\nmax_size=4\n")
+    with pytest.raises(ValueError, match="min_size <= max_size"):
+        get_pool_parameters(get_database_parameters(path))
+
+
+@pytest.fixture
+def make_pool(test_database_params):
+    pools = []
+
+    def make_pool(**pool_params):
+        pool = ConnectionPool(**pool_params, **test_database_params)
+        pools.append(pool)
+        return pool
+
+    yield make_pool
+    for pool in pools:
+        pool.closeall()
+
+
+def test_connection_is_returned_to_pool(make_pool):
+    pool = make_pool(min_size=1, max_size=1, checkout_timeout=0.1)
+
+    for _ in range(5):
+        with pool.connection() as conn:
+            assert pool.metrics().in_use == 1
+            conn.cursor().execute("SELECT 1;")
+
+    metrics = pool.metrics()
+    assert metrics.in_use == 0
+    assert metrics.checkouts == 5
+
+
+def test_connection_is_returned_when_block_raises(make_pool):
+    pool = make_pool(min_size=1, max_size=1, checkout_timeout=0.1)
+
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("boom")
+
+    with pool.connection():
+        pass
+
+
+def test_checkout_times_out_when_saturated(make_pool):
+    pool = make_pool(min_size=0, max_size=1, checkout_timeout=0.05)
+
+    with pool.connection():
+        with pytest.raises(PoolError, match="Timed out"):
+            pool.getconn()
+
+    assert pool.metrics().timeouts == 1
+
+
+def test_checkout_waits_for_a_free_connection(make_pool):
+    pool = make_pool(min_size=0, max_size=1, checkout_timeout=5)
+    conn = pool.getconn()
+    threading.Timer(0.1, pool.putconn, (conn,)).start()
+
+    with pool.connection():
+        pass
+
+    assert pool.metrics().max_wait >= 0.05
+
+
+def test_expired_connections_are_replaced(make_pool):
+    pool = make_pool(min_size=0, max_size=1, max_lifetime=0.01)
+
+    with pool.connection() as conn:
+        time.sleep(0.02)
+
+    assert conn.closed
+    with pool.connection() as new_conn:
+        assert new_conn is not conn
+
+
+def test_concurrent_checkouts_never_exceed_max_size(make_pool):
+    pool = make_pool(min_size=0, max_size=3, checkout_timeout=10)
+    peak = []
+
+    def worker():
+        for _ in range(10):
+            with pool.connection() as conn:
+                peak.append(pool.metrics().in_use)
+                conn.cursor().execute("SELECT pg_sleep(0.001);")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    metrics = pool.metrics()
+    assert max(peak) <= 3
+    assert metrics.in_use == 0
+    assert metrics.checkouts == 80
+    assert metrics.checkouts_per_second > 0
+
+
+def test_returned_connections_are_reused(make_pool, monkeypatch):
+    connects = []
+    psycopg2_connect = psycopg2.connect
+
+    def connect(**params):
+        connects.append(params)
+        return psycopg2_connect(**params)
+
+    monkeypatch.setattr("database.pool.psycopg2.connect", connect)
+    pool = make_pool(min_size=1, max_size=8, checkout_timeout=10)
+
+    def worker():
+        for _ in range(25):
+            with pool.connection() as conn:
+                conn.cursor().execute("SELECT pg_sleep(0.001);")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pool.metrics().checkouts == 200
+    assert len(connects) <= 8
+    # Only open connections are tracked
+    assert len(pool._opened_at) == len(connects)
+    assert not any(conn.closed for conn in pool._opened_at)
+
+
+def test_rolled_back_and_closed_connections(make_pool):
+    pool = make_pool(min_size=0, max_size=1)
+
+    with pool.connection() as conn:
+        conn.cursor().execute("SELECT 1;")
+    assert conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    with pool.connection() as same_conn:
+        assert same_conn is conn
+        conn.close()
+    assert pool._opened_at == {}
+
+    with pool.connection() as new_conn:
+        assert new_conn is not conn
@@ -0,0 +1,56 @@
+import psycopg2.extensions
+import pytest
+from datetime import datetime
+from database.queries.balances import get_balance_deltas
+from database.queries.currency_exchange import get_latest_rate, get_rate_at_time
+from database.queries.snapshots import get_snapshot_at_time
+from database.queries.transaction import (
+    get_transactions_in_interval,
+    get_transaction_history_for_account,
+)
+
+
+class RecordingCursor(psycopg2.extensions.cursor):
+    """Cursor remembering the last statement it sent, with its parameters bound."""
+
+    last_query = None
+
+    def execute(self, query, vars=None):
+        RecordingCursor.last_query = self.mogrify(query, vars)
+        return super().execute(query, vars)
+
+
+HOT_QUERIES = {
+    "get_transactions_in_interval": lambda conn: get_transactions_in_interval(
+        conn, 1, datetime(2024, 1, 1), datetime(2024, 2, 1)
+    ),
+    "get_transaction_history_for_account": lambda conn: get_transaction_history_for_account(
+        conn, 1, limit=10, before=(datetime(2024, 1, 1), 100)
+    ),
+    "get_balance_deltas": lambda conn: get_balance_deltas(
+        conn, 1, datetime(2024, 1, 1), datetime(2024, 2, 1)
+    ),
+    "get_snapshot_at_time": lambda conn: get_snapshot_at_time(
+        conn, 1, datetime(2024, 1, 1)
+    ),
+    "get_latest_rate": lambda conn: get_latest_rate(conn, "USD", "EUR"),
+    "get_rate_at_time": lambda conn: get_rate_at_time(
+        conn, "USD", "EUR", datetime(2024, 1, 1)
+    ),
+}
+
+
+@pytest.mark.parametrize("query", HOT_QUERIES.values(), ids=HOT_QUERIES.keys())
+def test_hot_query_uses_index(db_conn, query):
+    db_conn.cursor_factory = RecordingCursor
+    cursor = db_conn.cursor()
+    # Test tables are tiny, so only rule out plans that cannot use an index at all.
+    cursor.execute("SET enable_seqscan = off;")
+
+    query(db_conn)
+
+    cursor.execute(b"EXPLAIN " + RecordingCursor.last_query)
+    plan = "\n".join(row[0] for row in cursor.fetchall())
+
+    assert "Seq Scan" not in plan, plan
+    assert "Index" in plan, plan
@@ -0,0 +1,128 @@
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from database.queries.currency_exchange import (
+    create_rate_board,
+    get_all_latest_rates,
+    get_latest_rate,
+    publish_rate_board,
+    publish_rates,
+)
+from database.queries.rate_ingest import (
+    copy_rates_into_staging,
+    create_rate_staging_table,
+    get_zero_inverse_pairs,
+    insert_board_inverses,
+    insert_staged_ticks,
+)
+from services.currency_exchange_service import rate_board
+
+# Currency codes of their own, other tests commit rates of the real ones
+FIRST = datetime(2024, 1, 1, 10)
+SECOND = datetime(2024, 1, 1, 11)
+
+
+def rates_by_pair(exchanges):
+    return {pair: exchange.rate for pair, exchange in exchanges.items()}
+
+
+def test_publish_rates_makes_one_board_current(db_conn):
+    exchange_ids = publish_rates(
+        db_conn, [("QAA", "QBB", Decimal("2")), ("QBB", "QAA", Decimal("0.5"))]
+    )
+
+    latest = get_latest_rate(db_conn, "QAA", "QBB")
+    assert (latest.id, latest.rate) == (exchange_ids[0], Decimal("2"))
+    board_id = latest.board_id
+    assert get_latest_rate(db_conn, "QBB", "QAA").board_id == board_id
+
+    assert rates_by_pair(get_all_latest_rates(db_conn, board_id - 1)) == {
+        ("QAA", "QBB"): Decimal("2"),
+        ("QBB", "QAA"): Decimal("0.5"),
+    }
+    assert get_all_latest_rates(db_conn, board_id) == {}
+
+
+def test_ingested_board_drops_duplicates_and_adds_inverses(db_conn):
+    create_rate_staging_table(db_conn)
+    copy_rates_into_staging(
+        db_conn,
+        [
+            (FIRST, "QAA", "QBB", Decimal("2")),
+            (FIRST, "QAA", "QBB", Decimal("3")),
+            (SECOND, "QAA", "QBB", Decimal("4")),
+            (SECOND, "QCC", "QAA", Decimal("5")),
+            (SECOND, "QAA", "QCC", Decimal("0.25")),
+        ],
+    )
+    board_id = create_rate_board(db_conn)
+    assert insert_staged_ticks(db_conn, board_id) == 4
+    # QBB -> QAA at both timestamps, the feed quotes QAA and QCC both ways
+    assert insert_board_inverses(db_conn, board_id) == 2
+    publish_rate_board(db_conn, board_id)
+
+    assert rates_by_pair(get_all_latest_rates(db_conn, board_id - 1)) == {
+        ("QAA", "QBB"): Decimal("4"),
+        ("QBB", "QAA"): Decimal("0.25"),
+        ("QCC", "QAA"): Decimal("5"),
+        ("QAA", "QCC"): Decimal("0.25"),
+    }
+
+    # The same feed again only holds duplicates
+    board_id = create_rate_board(db_conn)
+    assert insert_staged_ticks(db_conn, board_id) == 0
+    assert insert_board_inverses(db_conn, board_id) == 0
+
+
+def test_older_ticks_do_not_replace_the_current_rate(db_conn):
+    publish_rates(db_conn, [("QAA", "QBB", Decimal("7"))])
+
+    create_rate_staging_table(db_conn)
+    copy_rates_into_staging(db_conn, [(FIRST, "QAA", "QBB", Decimal("2"))])
+    board_id = create_rate_board(db_conn)
+    insert_staged_ticks(db_conn, board_id)
+    publish_rate_board(db_conn, board_id)
+
+    assert get_latest_rate(db_conn, "QAA", "QBB").rate == Decimal("7")
+    assert get_all_latest_rates(db_conn, board_id - 1) == {}
+
+
+def test_ingested_inverses_round_like_rate_board(db_conn):
+    create_rate_staging_table(db_conn)
+    copy_rates_into_staging(
+        db_conn,
+        [
+            (FIRST, "QAA", "QBB", Decimal("8")),
+            (FIRST, "QAA", "QCC", Decimal("40")),
+        ],
+    )
+    board_id = create_rate_board(db_conn)
+    insert_staged_ticks(db_conn, board_id)
+    insert_board_inverses(db_conn, board_id)
+    publish_rate_board(db_conn, board_id)
+
+    # 0.125 and 0.025 are ties, rounded half to even
+    assert rate_board("QAA", "QBB", Decimal("8"))[1][2] == Decimal("0.12")
+    assert get_latest_rate(db_conn, "QBB", "QAA").rate == Decimal("0.12")
+    assert rate_board("QAA", "QCC", Decimal("40"))[1][2] == Decimal("0.02")
+    assert get_latest_rate(db_conn, "QCC", "QAA").rate == Decimal("0.02")
+
+
+def test_rates_whose_inverse_rounds_to_zero(db_conn):
+    with pytest.raises(ValueError, match="inverse would round to 0.00"):
+        rate_board("QAA", "QBB", Decimal("250"))
+    assert rate_board("QAA", "QBB", Decimal("199"))[1][2] == Decimal("0.01")
+
+    create_rate_staging_table(db_conn)
+    copy_rates_into_staging(
+        db_conn,
+        [
+            (FIRST, "QAA", "QBB", Decimal("199")),
+            (FIRST, "QAA", "QCC", Decimal("200")),
+            (SECOND, "QAA", "QCC", Decimal("250")),
+            # Quoted both ways, no inverse is needed
+            (FIRST, "QBB", "QCC", Decimal("300")),
+            (FIRST, "QCC", "QBB", Decimal("0.01")),
+        ],
+    )
+    assert get_zero_inverse_pairs(db_conn) == [("QAA", "QCC")]
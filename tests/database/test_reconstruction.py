@@ -0,0 +1,111 @@
+import random
+from copy import deepcopy
+from datetime import datetime, timedelta
+from decimal import Decimal
+from database.queries.balances import get_balance_deltas, get_balances_at_time
+from database.queries.snapshots import get_snapshot_at_time
+from database.queries.transaction import get_transactions_in_interval
+from models.money import Money
+from services.reconstruction_service import replay_transactions
+from tests.database.test_balances import insert_snapshot
+
+CURRENCIES = ["USD", "EUR", "GBP"]
+START = datetime(2024, 1, 1)
+
+
+def random_ledger(cursor, rng, accounts=6, transactions=400):
+    """Random accounts and transactions covering every type and transfer direction."""
+    account_ids = []
+    for _ in range(accounts):
+        cursor.execute("INSERT INTO account DEFAULT VALUES RETURNING account_id;")
+        account_id = cursor.fetchone()[0]
+        insert_snapshot(cursor, account_id, START, "1000", "1000", "1000")
+        account_ids.append(account_id)
+
+    timestamp = START
+    for _ in range(transactions):
+        # Repeated timestamps on purpose, replay must not depend on the order of ties
+        timestamp += timedelta(minutes=rng.choice([0, 1, 7]))
+        type = rng.choice(
+            ["DepositMade", "WithdrawalMade", "MoneyTransferred", "CurrencyConverted"]
+        )
+        from_account = rng.choice(account_ids)
+        to_account = from_account
+        from_currency = to_currency = rng.choice(CURRENCIES)
+        rate = Decimal(1)
+
+        if type == "MoneyTransferred":
+            # Includes transfers to the same account and in the same currency
+            to_account = rng.choice(account_ids)
+            to_currency = rng.choice(CURRENCIES)
+        if type == "CurrencyConverted":
+            to_currency = rng.choice(CURRENCIES)
+        if from_currency != to_currency:
+            rate = Decimal(rng.randint(1, 300)) / 100
+
+        # Amounts like x.x5 make half-way conversions common
+        amount = Decimal(rng.randint(1, 20000)) / 100
+        cursor.execute(
+            """
+            INSERT INTO transaction (type, from_account, to_account, timestamp, from_currency, to_currency, amount, rate)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+            """,
+            (
+                type,
+                from_account,
+                to_account,
+                timestamp,
+                from_currency,
+                to_currency,
+                amount,
+                rate,
+            ),
+        )
+
+        if rng.random() < 0.02:
+            insert_snapshot(
+                cursor,
+                from_account,
+                timestamp,
+                *[rng.randint(0, 500) for _ in range(3)]
+            )
+
+    return account_ids, timestamp
+
+
+def balances(snapshot):
+    return tuple(snapshot.balance(currency) for currency in CURRENCIES)
+
+
+def test_sql_replay_matches_python_replay(db_conn):
+    rng = random.Random(20240101)
+    cursor = db_conn.cursor()
+    account_ids, end = random_ledger(cursor, rng)
+
+    checkpoints = [START + (end - START) * i / 10 for i in range(1, 11)]
+    for timestamp in checkpoints:
+        batch = {
+            snapshot.account_id: balances(snapshot)
+            for snapshot in get_balances_at_time(db_conn, timestamp, account_ids)
+        }
+
+        for account_id in account_ids:
+            snapshot = get_snapshot_at_time(db_conn, account_id, timestamp)
+
+            python_replay = replay_transactions(
+                deepcopy(snapshot),
+                account_id,
+                get_transactions_in_interval(
+                    db_conn, account_id, snapshot.timestamp, timestamp
+                ),
+            )
+            deltas = get_balance_deltas(
+                db_conn, account_id, snapshot.timestamp, timestamp
+            )
+            sql_replay = tuple(
+                snapshot.balance(currency) + deltas.get(currency, Money(0))
+                for currency in CURRENCIES
+            )
+
+            assert sql_replay == balances(python_replay)
+            assert batch[account_id] == balances(python_replay)
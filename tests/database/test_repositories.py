@@ -0,0 +1,322 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from database.connection import DatabaseConnection
+from database.connection_parameters import POOL_DEFAULTS, get_database_parameters
+from database.repositories import get_repository, get_storage_backend
+from database.repositories.memory import MemoryRepository
+from database.repositories.sqlite import SqliteRepository
+from models.money import Money
+from models.operation import Operation
+from services.account_service import AccountService
+from services.currency_exchange_service import CurrencyExchangeService
+from services.reconstruction_service import ReconstructionService
+from services.transaction_service import TransactionService
+
+
+@pytest.fixture(params=["memory", "sqlite", "postgresql"])
+def repository(request, tmp_path, monkeypatch):
+    """
+    Every storage backend. PostgreSQL units of work commit to the test database, so
+    tests only look at accounts they create themselves.
+    """
+    if request.param == "memory":
+        yield MemoryRepository()
+    elif request.param == "sqlite":
+        repository = SqliteRepository(str(tmp_path / "ledger.sqlite3"))
+        yield repository
+        repository.close()
+    else:
+        from database.repositories.postgres import PostgresRepository
+
+        params = request.getfixturevalue("test_database_params")
+        monkeypatch.setattr(DatabaseConnection, "_instance", None)
+        repository = PostgresRepository(DatabaseConnection(params, POOL_DEFAULTS))
+        yield repository
+        repository.close()
+
+
+def new_account(repository, **balances):
+    with repository.transaction() as session:
+        return session.create_account(
+            {
+                currency.upper(): Money.parse(amount)
+                for currency, amount in balances.items()
+            }
+        )
+
+
+def test_balance_updates_and_debits(repository):
+    account_id = new_account(repository, usd="10")
+
+    with repository.transaction() as session:
+        assert session.debit_balance(account_id, "USD", Money.parse("4")) == Money(600)
+        assert session.debit_balance(account_id, "USD", Money.parse("6.01")) is None
+        assert session.debit_balance(-1, "USD", Money(1)) is None
+        session.update_balance(account_id, "EUR", Money.parse("2.50"))
+        keys = [
+            (account_id, "USD"),
+            (account_id, "USD"),
+            (account_id, "XYZ"),
+            (-1, "USD"),
+        ]
+        assert session.lock_balances(keys) == {(account_id, "USD")}
+
+    with repository.transaction() as session:
+        account = session.get_account(account_id)
+        assert account.balances == {
+            "USD": Money(600),
+            "EUR": Money(250),
+            "GBP": Money(0),
+        }
+        assert session.get_account(-1) is None
+
+
+def test_rollback_discards_the_unit_of_work(repository):
+    account_id = new_account(repository, usd="10")
+
+    with pytest.raises(RuntimeError):
+        with repository.transaction() as session:
+            session.debit_balance(account_id, "USD", Money.parse("10"))
+            session.record_transaction(account_id, "USD")
+            new_account_id = session.create_account({"USD": Money(1)})
+            raise RuntimeError
+
+    with repository.transaction() as session:
+        account = session.get_account(account_id)
+        assert account.balance("USD") == Money.parse("10")
+        assert account.transaction_count == 0
+        assert session.get_account(new_account_id) is None
+
+
+def test_history_pages_and_intervals(repository):
+    first = new_account(repository, usd="100")
+    second = new_account(repository)
+
+    start = datetime.now() - timedelta(seconds=1)
+    ids = []
+    for amount in ("1", "2", "3"):
+        with repository.transaction() as session:
+            ids.append(
+                session.create_transaction(
+                    "MoneyTransferred",
+                    first,
+                    second,
+                    "USD",
+                    "EUR",
+                    Money.parse(amount),
+                    Decimal("0.5"),
+                )
+            )
+    with repository.transaction() as session:
+        ids.append(
+            session.create_transaction(
+                "DepositMade", second, second, "GBP", "GBP", Money.parse("7")
+            )
+        )
+
+    with repository.transaction() as session:
+        history = session.get_transaction_history_for_account(second, limit=2)
+        assert list(history.ids) == [ids[3], ids[2]]
+
+        last = history[1]
+        older = session.get_transaction_history_for_account(
+            second, limit=2, before=(last.timestamp, last.id)
+        )
+        assert list(older.ids) == [ids[1], ids[0]]
+        assert older[0].rate == Decimal("0.5")
+
+        deposits = session.get_transaction_history_for_account(
+            second, type="DepositMade"
+        )
+        assert list(deposits.ids) == [ids[3]]
+
+        end = datetime.now() + timedelta(seconds=1)
+        assert (
+            list(session.get_transactions_in_interval(first, start, end).ids) == ids[:3]
+        )
+        assert session.get_balance_deltas(first, start, end) == {
+            "USD": Money.parse("-6")
+        }
+        assert session.get_balance_deltas(second, start, end) == {
+            "EUR": Money.parse("3"),
+            "GBP": Money.parse("7"),
+        }
+
+
+def test_snapshots_and_balances_at_time(repository):
+    account_id = new_account(repository, usd="10")
+    before = datetime.now() - timedelta(seconds=1)
+
+    with repository.transaction() as session:
+        session.create_snapshot(account_id, {"USD": Money.parse("10")})
+        session.reset_snapshot_counters([(account_id, None)])
+    with repository.transaction() as session:
+        session.update_balance(account_id, "USD", Money.parse("5"))
+        session.create_transaction(
+            "DepositMade", account_id, account_id, "USD", "USD", Money.parse("5")
+        )
+        account, _ = session.record_transaction(account_id, "USD")
+        assert account.transactions_since_snapshot == 1
+        assert account.last_snapshot_at is not None
+
+    later = datetime.now() + timedelta(seconds=1)
+    with repository.transaction() as session:
+        assert session.get_snapshot_at_time(account_id, before) is None
+        snapshot = session.get_snapshot_at_time(account_id, later)
+        assert snapshot.balances == {"USD": Money.parse("10")}
+
+        (balances,) = session.get_balances_at_time(later, [account_id])
+        assert balances.balance("USD") == Money.parse("15")
+
+
+def test_new_currencies_open_a_zero_balance_in_every_account(repository):
+    account_id = new_account(repository, usd="10")
+
+    # Rolled back, the PostgreSQL test database is shared by every test.
+    with pytest.raises(RuntimeError):
+        with repository.transaction() as session:
+            assert session.create_currency("JPY") is True
+            assert session.create_currency("JPY") is False
+            assert session.get_currencies()[-1] == "JPY"
+            assert session.get_account(account_id).balances["JPY"] == Money(0)
+
+            new_account_id = session.create_account({"JPY": Money.parse("5")})
+            assert session.get_account(new_account_id).balances["JPY"] == Money(500)
+            session.update_balance(account_id, "JPY", Money(1))
+            account, _ = session.record_transaction(account_id, "JPY")
+            assert account.balances["JPY"] == Money(1)
+            assert account.transaction_count == 1
+            raise RuntimeError
+
+    with repository.transaction() as session:
+        assert "JPY" not in session.get_currencies()
+        assert "JPY" not in session.get_account(account_id).balances
+
+
+def test_exchange_rates(repository):
+    with repository.transaction() as session:
+        first = session.insert_exchange_rate("USD", "GBP", Decimal("0.79"))
+    with repository.transaction() as session:
+        second = session.insert_exchange_rate("USD", "GBP", 0.8)
+
+    with repository.transaction() as session:
+        latest = session.get_latest_rate("USD", "GBP")
+        assert (latest.id, latest.rate) == (second, Decimal("0.8"))
+
+        since = session.get_exchange_rates_since(first - 1)
+        assert [exchange.id for exchange in since] == [first, second]
+
+        at_first = session.get_rate_at_time(
+            "USD",
+            "GBP",
+            since[0].timestamp + (since[1].timestamp - since[0].timestamp) / 2,
+        )
+        assert at_first.id == first
+
+        rates = session.get_latest_rates([("USD", "GBP"), ("XXX", "YYY")])
+        assert list(rates) == [("USD", "GBP")]
+
+
+def test_exchange_service_derives_missing_pairs(repository):
+    # Codes no other test converts between, the PostgreSQL rates are kept across runs.
+    exchange_service = CurrencyExchangeService(repository=repository)
+    exchange_service.update_exchange_rate("XAA", "XBB", Decimal("2"))
+    exchange_service.update_exchange_rate("XBB", "XCC", Decimal("0.25"))
+
+    derived = exchange_service.get_latest_rate("XAA", "XCC")
+    assert derived.rate == Decimal("0.5")
+    assert [(leg.from_currency, leg.to_currency) for leg in derived.legs] == [
+        ("XAA", "XBB"),
+        ("XBB", "XCC"),
+    ]
+    assert exchange_service.get_latest_rate("XCC", "XAA").rate == Decimal("2")
+
+    exchange_service.update_exchange_rate("XBB", "XCC", Decimal("0.5"))
+    assert exchange_service.get_latest_rate("XAA", "XCC").rate == Decimal("1")
+    assert exchange_service.get_latest_rate("XAA", "XZZ") is None
+
+
+def test_services_on_every_backend(repository):
+    accounts = AccountService(repository=repository)
+    transactions = TransactionService(repository=repository)
+    reconstruction = ReconstructionService(repository=repository)
+    transactions.currency_exchange_service.update_exchange_rate(
+        "USD", "EUR", Decimal("0.9")
+    )
+
+    zero = Money(0)
+    first = accounts.create_account({"USD": Money.parse("100")})
+    second = accounts.create_account({})
+
+    assert transactions.deposit(first, "USD", Money.parse("10")) > 0
+    assert transactions.withdraw(first, "GBP", Money(1)) == -2
+    assert transactions.transfer(first, second, "USD", "EUR", Money.parse("20")) > 0
+    assert transactions.convert_currency(first, "USD", "EUR", Money.parse("10")) > 0
+
+    assert accounts.get_balance(first) == {
+        "USD": Money.parse("80"),
+        "EUR": Money.parse("9"),
+        "GBP": zero,
+    }
+    assert accounts.get_balance(second) == {
+        "USD": zero,
+        "EUR": Money.parse("18"),
+        "GBP": zero,
+    }
+
+    for replay in ("sql", "python"):
+        state = reconstruction.reconstruct_state(first, datetime.now(), replay)
+        assert (state.balance("USD"), state.balance("EUR")) == (
+            Money.parse("80"),
+            Money.parse("9"),
+        )
+
+    history, _ = transactions.get_transaction_history_for_account(first, limit=1)
+    assert history.startswith("Type: CurrencyConverted")
+
+
+def test_services_count_the_legs_replayed(repository):
+    accounts = AccountService(repository=repository)
+    transactions = TransactionService(repository=repository)
+    transactions.currency_exchange_service.update_exchange_rate(
+        "USD", "EUR", Decimal("0.9")
+    )
+    first = accounts.create_account({"USD": Money.parse("100")})
+    second = accounts.create_account({})
+
+    transactions.deposit(first, "USD", Money.parse("10"))
+    transactions.transfer(first, second, "USD", "EUR", Money.parse("20"))
+    transactions.convert_currency(first, "USD", "EUR", Money.parse("10"))
+    transactions.apply_batch(
+        [
+            Operation(
+                "convert_currency", first, "USD", Money.parse("1"), to_currency="EUR"
+            ),
+            Operation("transfer", second, "EUR", Money.parse("1"), first),
+        ]
+    )
+
+    # A conversion is two legs of its account, see transaction_legs()
+    with repository.transaction() as session:
+        first_account = session.get_account(first)
+        second_account = session.get_account(second)
+    assert first_account.transactions_since_snapshot == 5
+    assert first_account.legs_since_snapshot == 7
+    assert second_account.transactions_since_snapshot == 2
+    assert second_account.legs_since_snapshot == 2
+
+
+def test_storage_section_selects_the_backend(tmp_path):
+    config = get_database_parameters(str(tmp_path / "missing.ini"))
+    assert get_storage_backend(config) == "postgresql"
+
+    config.read_dict({"storage": {"backend": "memory"}})
+    repository = get_repository(config)
+    assert isinstance(repository, MemoryRepository)
+    # Shared by every service of the process, like the PostgreSQL pool
+    assert get_repository(config) is repository
+
+    config.read_dict({"storage": {"backend": "oracle"}})
+    with pytest.raises(ValueError, match="Unknown storage backend 'oracle'"):
+        get_repository(config)
@@ -0,0 +1,226 @@
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from database.queries.balances import get_balances_at_time
+from database.queries.rollups import (
+    closing_time,
+    get_daily_balance_at_time,
+    get_last_closed_day,
+    get_rollup_state,
+    get_rollup_work,
+    last_closed_day,
+    roll_up_accounts,
+)
+from database.queries.transaction_import import (
+    copy_into_staging,
+    create_staging_table,
+    delete_staged_daily_balances,
+)
+from database.repositories.base import Repository
+from database.repositories.postgres import PostgresSession
+from services.reconstruction_service import ReconstructionService, starting_point
+from services.rollup_service import RollupService
+from tests.database.test_balances import (
+    insert_account,
+    insert_snapshot,
+    insert_transaction,
+)
+
+START = datetime(2024, 3, 1, 8)
+# No transactions on March 3rd
+DAYS = [date(2024, 3, day) for day in (1, 2, 4, 5)]
+SNAPSHOT_TIME = datetime(2024, 3, 4, 12)
+
+
+class ConnectionRepository(Repository):
+    """Units of work on the test's connection, rolled back with it."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextmanager
+    def transaction(self):
+        yield PostgresSession(self.conn)
+
+
+def max_transaction_id(cursor):
+    cursor.execute("SELECT COALESCE(MAX(transaction_id), 0) FROM transaction;")
+    return cursor.fetchone()[0]
+
+
+def balances_at(conn, account_id, timestamp):
+    return get_balances_at_time(conn, timestamp, [account_id])[0].balances
+
+
+def random_ledger(conn, rng):
+    """Two accounts trading with each other every day of DAYS, and a snapshot in between."""
+    cursor = conn.cursor()
+    accounts = [insert_account(cursor, START, "1000", "1000", "1000") for _ in range(2)]
+    for day in DAYS:
+        # One transfer at midnight sharp, which belongs to the day it starts
+        timestamps = [datetime.combine(day, time())] + sorted(
+            datetime.combine(day, time(9)) + timedelta(minutes=rng.randint(0, 14 * 60))
+            for _ in range(9)
+        )
+        for timestamp in timestamps:
+            from_account = rng.choice(accounts)
+            to_account = rng.choice(accounts)
+            from_currency = rng.choice(["USD", "EUR", "GBP"])
+            to_currency = rng.choice(["USD", "EUR", "GBP"])
+            type = "MoneyTransferred"
+            if from_account == to_account:
+                type = "CurrencyConverted"
+            rate = Decimal(rng.randint(50, 150)) / 100
+            if from_currency == to_currency:
+                rate = Decimal(1)
+            amount = Decimal(rng.randint(1, 5000)) / 100
+            insert_transaction(
+                cursor,
+                type,
+                from_account,
+                to_account,
+                timestamp,
+                from_currency,
+                to_currency,
+                amount,
+                rate,
+            )
+
+    balances = balances_at(conn, accounts[0], SNAPSHOT_TIME)
+    insert_snapshot(
+        cursor,
+        accounts[0],
+        SNAPSHOT_TIME,
+        balances["USD"],
+        balances["EUR"],
+        balances["GBP"],
+    )
+    return accounts
+
+
+def roll_up(conn, after_id, through):
+    cursor = conn.cursor()
+    work = get_rollup_work(conn, after_id, max_transaction_id(cursor), through, through)
+    return roll_up_accounts(conn, work, through), work
+
+
+def test_last_closed_day():
+    assert last_closed_day(datetime(2024, 3, 2, 12)) == date(2024, 3, 1)
+    assert last_closed_day(closing_time(date(2024, 3, 2))) == date(2024, 3, 2)
+    assert last_closed_day(datetime(2024, 3, 3)) == date(2024, 3, 2)
+
+
+def test_daily_balances_match_the_balances_at_each_closing_time(db_conn):
+    after_id = max_transaction_id(db_conn.cursor())
+    accounts = random_ledger(db_conn, random.Random(7))
+
+    written, work = roll_up(db_conn, after_id, DAYS[2])
+    assert work == [(account_id, DAYS[0]) for account_id in accounts]
+    assert written == 2 * 3
+
+    for account_id in accounts:
+        for day in DAYS[:3]:
+            daily_balance = get_daily_balance_at_time(
+                db_conn, account_id, closing_time(day)
+            )
+            assert daily_balance.timestamp == closing_time(day)
+            assert daily_balance.balances == balances_at(
+                db_conn, account_id, closing_time(day)
+            )
+        # Not rolled up after <through>
+        daily_balance = get_daily_balance_at_time(
+            db_conn, account_id, datetime(2024, 3, 9)
+        )
+        assert daily_balance.timestamp == closing_time(DAYS[2])
+
+
+def test_reconstruction_starts_from_the_closest_daily_balance(db_conn):
+    after_id = max_transaction_id(db_conn.cursor())
+    accounts = random_ledger(db_conn, random.Random(11))
+    roll_up(db_conn, after_id, DAYS[-1])
+
+    session = PostgresSession(db_conn)
+    assert starting_point(session, accounts[0], datetime(2024, 3, 5, 10)).timestamp == (
+        closing_time(DAYS[2])
+    )
+    # The snapshot is more recent than the last daily balance
+    assert starting_point(session, accounts[0], datetime(2024, 3, 4, 20)).timestamp == (
+        SNAPSHOT_TIME
+    )
+    assert starting_point(session, accounts[0], START - timedelta(hours=1)) is None
+
+    reconstruction = ReconstructionService(ConnectionRepository(db_conn))
+    rng = random.Random(3)
+    for _ in range(20):
+        timestamp = START + timedelta(minutes=rng.randint(0, 6 * 24 * 60))
+        for replay in ["sql", "python"]:
+            for account_id in accounts:
+                state = reconstruction.reconstruct_state(account_id, timestamp, replay)
+                assert state.balances == balances_at(db_conn, account_id, timestamp)
+
+
+def test_backdated_transactions_are_rolled_up_again(db_conn):
+    cursor = db_conn.cursor()
+    after_id = max_transaction_id(cursor)
+    accounts = random_ledger(db_conn, random.Random(5))
+    roll_up(db_conn, after_id, DAYS[-1])
+
+    # An import of a day already rolled up deletes the stale daily balances
+    create_staging_table(db_conn)
+    copy_into_staging(
+        db_conn,
+        [
+            (
+                "DepositMade",
+                accounts[1],
+                accounts[1],
+                datetime(2024, 3, 4, 10),
+                "USD",
+                "USD",
+                Decimal("5"),
+                Decimal("1"),
+                Decimal("0"),
+            )
+        ],
+    )
+    delete_staged_daily_balances(db_conn)
+    daily_balance = get_daily_balance_at_time(
+        db_conn, accounts[1], datetime(2024, 3, 9)
+    )
+    assert daily_balance.timestamp == closing_time(DAYS[1])
+
+    after_id = max_transaction_id(cursor)
+    insert_transaction(
+        cursor,
+        "DepositMade",
+        accounts[1],
+        accounts[1],
+        datetime(2024, 3, 4, 10),
+        "USD",
+        "USD",
+        Decimal("5"),
+    )
+    written, work = roll_up(db_conn, after_id, DAYS[-1])
+    assert (written, work) == (2, [(accounts[1], DAYS[2])])
+
+    for day in DAYS:
+        daily_balance = get_daily_balance_at_time(
+            db_conn, accounts[1], closing_time(day)
+        )
+        assert daily_balance.balances == balances_at(
+            db_conn, accounts[1], closing_time(day)
+        )
+
+
+def test_rollup_job_only_processes_new_work(transaction_service):
+    # Commits daily balances to the test database, like a scheduled run would
+    rollup_service = RollupService()
+    list(rollup_service.roll_up())
+    assert list(rollup_service.roll_up()) == []
+
+    with rollup_service.db_conn.transaction() as conn:
+        assert get_rollup_state(conn) == (
+            max_transaction_id(conn.cursor()),
+            get_last_closed_day(conn),
+        )
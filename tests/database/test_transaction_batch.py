@@ -0,0 +1,69 @@
+from datetime import datetime
+from decimal import Decimal
+from models.money import Money
+from database.queries import transaction as transaction_queries
+from database.queries.transaction import (
+    get_transaction_history_for_account,
+    get_transactions_in_interval,
+)
+from tests.database.test_balances import insert_account, insert_transaction
+
+START = datetime(2024, 1, 1)
+
+
+def test_fetch_in_chunks_matches_rows(db_conn, monkeypatch):
+    monkeypatch.setattr(transaction_queries, "FETCH_CHUNK_SIZE", 3)
+    cursor = db_conn.cursor()
+    account_id = insert_account(cursor, START)
+    other_id = insert_account(cursor, START)
+
+    for minute in range(1, 11):
+        insert_transaction(
+            cursor,
+            "MoneyTransferred",
+            account_id,
+            other_id,
+            datetime(2024, 1, 1, 0, minute, 0, 250),
+            "USD",
+            "EUR",
+            f"{minute}.05",
+            "0.85" if minute % 2 else "1.10",
+        )
+
+    batch = get_transactions_in_interval(
+        db_conn, account_id, START, datetime(2024, 1, 2)
+    )
+    cursor.execute(
+        "SELECT * FROM transaction WHERE from_account = %s ORDER BY timestamp;",
+        (account_id,),
+    )
+    rows = cursor.fetchall()
+
+    assert len(batch) == len(rows) == 10
+    assert batch.rates == [Decimal("0.85"), Decimal("1.10")]
+    for transaction, row in zip(batch, rows):
+        assert (
+            transaction.id,
+            transaction.type,
+            transaction.from_account,
+            transaction.to_account,
+            transaction.timestamp,
+            transaction.from_currency,
+            transaction.to_currency,
+            transaction.amount,
+            transaction.rate,
+        ) == (*row[:7], Money.parse(row[7]), row[8])
+
+
+def test_history_is_a_batch(db_conn):
+    cursor = db_conn.cursor()
+    account_id = insert_account(cursor, START)
+    insert_transaction(
+        cursor, "DepositMade", account_id, account_id, START, "GBP", "GBP", "1.5"
+    )
+
+    history = get_transaction_history_for_account(db_conn, account_id, limit=5)
+    assert len(history) == 1
+    assert history[0].amount == Money(150)
+    assert history[0].from_currency == "GBP"
+    assert len(get_transaction_history_for_account(db_conn, -1)) == 0
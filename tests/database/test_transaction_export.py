@@ -0,0 +1,52 @@
+from datetime import datetime
+from database.queries.transaction_export import stream_transactions
+from tests.database.test_balances import insert_account, insert_transaction
+
+T = [datetime(2024, 1, 1, hour) for hour in range(24)]
+
+
+def ledger(cursor):
+    first = insert_account(cursor, T[0])
+    second = insert_account(cursor, T[0])
+    insert_transaction(cursor, "DepositMade", first, first, T[1], "USD", "USD", "10")
+    insert_transaction(cursor, "DepositMade", second, second, T[2], "EUR", "EUR", "5")
+    insert_transaction(
+        cursor, "MoneyTransferred", first, second, T[3], "USD", "GBP", "2", "0.79"
+    )
+    insert_transaction(
+        cursor, "WithdrawalMade", second, second, T[4], "EUR", "EUR", "1"
+    )
+    return first, second
+
+
+def exported(conn, **filters):
+    return [
+        (row[1], row[2], row[4])
+        for row in stream_transactions(conn, itersize=2, **filters)
+    ]
+
+
+def test_stream_filters(db_conn):
+    first, second = ledger(db_conn.cursor())
+
+    assert exported(db_conn, account_id=first) == [
+        ("DepositMade", first, T[1]),
+        ("MoneyTransferred", first, T[3]),
+    ]
+    assert exported(db_conn, account_id=second, type="DepositMade") == [
+        ("DepositMade", second, T[2]),
+    ]
+    assert exported(db_conn, account_id=second, start=T[3], end=T[4]) == [
+        ("MoneyTransferred", first, T[3]),
+        ("WithdrawalMade", second, T[4]),
+    ]
+    assert exported(db_conn, account_id=second, start=T[5]) == []
+
+
+def test_stream_whole_ledger_in_order(db_conn):
+    first, second = ledger(db_conn.cursor())
+
+    rows = list(stream_transactions(db_conn, itersize=1))
+    assert [row[4] for row in rows if row[2] in (first, second)] == T[1:5]
+    keys = [(row[4], row[0]) for row in rows]
+    assert keys == sorted(keys)
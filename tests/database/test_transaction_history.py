@@ -0,0 +1,64 @@
+from datetime import datetime
+from database.queries.transaction import get_transaction_history_for_account
+from tests.database.test_balances import insert_account, insert_transaction
+
+T = [datetime(2024, 1, 1, hour) for hour in range(24)]
+
+
+def history_ids(batch):
+    return batch.ids.tolist()
+
+
+def test_keyset_pages_cover_history_once(db_conn):
+    cursor = db_conn.cursor()
+    account_id = insert_account(cursor, T[0])
+    other_id = insert_account(cursor, T[0])
+
+    # Many rows share a timestamp, pages must still split them consistently
+    for hour in (1, 1, 1, 2, 2, 2, 2, 3):
+        insert_transaction(
+            cursor, "DepositMade", account_id, account_id, T[hour], "USD", "USD", "1"
+        )
+    insert_transaction(
+        cursor, "MoneyTransferred", other_id, account_id, T[2], "EUR", "EUR", "1"
+    )
+    insert_transaction(
+        cursor, "MoneyTransferred", account_id, account_id, T[2], "EUR", "EUR", "1"
+    )
+    insert_transaction(
+        cursor, "DepositMade", other_id, other_id, T[2], "EUR", "EUR", "1"
+    )
+
+    everything = get_transaction_history_for_account(db_conn, account_id)
+    keys = list(zip(everything.timestamps.tolist(), everything.ids.tolist()))
+    assert len(everything) == 10
+    assert keys == sorted(keys, reverse=True)
+
+    pages = []
+    before = None
+    while True:
+        page = get_transaction_history_for_account(
+            db_conn, account_id, limit=3, before=before
+        )
+        if not len(page):
+            break
+        pages.append(history_ids(page))
+        before = (page.timestamps[-1].item(), int(page.ids[-1]))
+
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+    assert sum(pages, []) == history_ids(everything)
+
+
+def test_keyset_page_with_type(db_conn):
+    cursor = db_conn.cursor()
+    account_id = insert_account(cursor, T[0])
+    for hour in range(1, 6):
+        type = "DepositMade" if hour % 2 else "WithdrawalMade"
+        insert_transaction(
+            cursor, type, account_id, account_id, T[hour], "USD", "USD", "1"
+        )
+
+    page = get_transaction_history_for_account(
+        db_conn, account_id, limit=5, type="DepositMade", before=(T[5], 0)
+    )
+    assert [timestamp.item() for timestamp in page.timestamps] == [T[3], T[1]]
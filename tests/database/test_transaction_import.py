@@ -0,0 +1,111 @@
+import io
+from datetime import datetime
+from database.queries.account import get_account
+from models.money import Money
+from services.account_service import AccountService
+from services.import_service import ImportService
+from services.reconstruction_service import ReconstructionService
+from services.snapshot_policy import EveryNTransactions
+
+HEADER = (
+    "type,from_account,to_account,timestamp,from_currency,to_currency,amount,rate\n"
+)
+
+
+def deposits(account_id, *timestamps):
+    return io.StringIO(
+        HEADER
+        + "".join(
+            f"DepositMade,{account_id},,{timestamp.isoformat()},USD,,10,\n"
+            for timestamp in timestamps
+        )
+    )
+
+
+def usd_at(reconstruction, account_id, timestamp):
+    state = reconstruction.reconstruct_state(account_id, timestamp)
+    return None if state is None else state.balances["USD"]
+
+
+def test_import_history_into_a_new_account(transaction_service):
+    account_id = AccountService().create_account({"USD": Money.parse("100")})
+    import_service = ImportService()
+    list(
+        import_service.import_transactions(
+            deposits(account_id, datetime(2023, 1, 1), datetime(2023, 6, 1))
+        )
+    )
+
+    # The opening snapshot moved back to the first imported transaction
+    reconstruction = ReconstructionService()
+    assert usd_at(reconstruction, account_id, datetime(2022, 12, 31)) is None
+    assert usd_at(reconstruction, account_id, datetime(2023, 1, 1)) == Money.parse(
+        "110"
+    )
+    assert usd_at(reconstruction, account_id, datetime(2023, 3, 1)) == Money.parse(
+        "110"
+    )
+    assert usd_at(reconstruction, account_id, datetime.now()) == Money.parse("120")
+
+
+def test_import_backfills_accounts_with_later_history(transaction_service):
+    account_id = AccountService().create_account({"USD": Money.parse("100")})
+    transaction_service.deposit(account_id, "USD", Money.parse("5"))
+    now = datetime.now()
+    import_service = ImportService()
+    # Would snapshot the backfilled account at 2023-06-01 with its current balance
+    import_service.snapshot_policy = EveryNTransactions(1)
+    list(
+        import_service.import_transactions(
+            deposits(account_id, datetime(2023, 1, 1), datetime(2023, 6, 1))
+        )
+    )
+
+    reconstruction = ReconstructionService()
+    # No transaction precedes the creation snapshot, it still holds the opening balances
+    assert usd_at(reconstruction, account_id, datetime(2023, 3, 1)) == Money.parse(
+        "110"
+    )
+    assert usd_at(reconstruction, account_id, datetime(2023, 7, 1)) == Money.parse(
+        "120"
+    )
+    assert usd_at(reconstruction, account_id, now) == Money.parse("125")
+    with transaction_service.repository.db_conn.transaction() as conn:
+        assert get_account(conn, account_id).balances["USD"] == Money.parse("125")
+
+    # Imports after the history still snapshot on the policy
+    list(import_service.import_transactions(deposits(account_id, now)))
+    assert usd_at(reconstruction, account_id, now) == Money.parse("135")
+
+
+def test_backfilled_transactions_are_added_to_later_snapshots(transaction_service):
+    account_id = AccountService().create_account({"USD": Money.parse("100")})
+    import_service = ImportService()
+    import_service.snapshot_policy = EveryNTransactions(1)
+    # Snapshotted at 2023-06-01
+    list(
+        import_service.import_transactions(
+            deposits(account_id, datetime(2023, 1, 1), datetime(2023, 6, 1))
+        )
+    )
+    list(import_service.import_transactions(deposits(account_id, datetime(2023, 3, 1))))
+
+    with transaction_service.repository.db_conn.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT timestamp FROM snapshot WHERE account_id = %s ORDER BY timestamp;",
+            (account_id,),
+        )
+        assert [row[0] for row in cursor.fetchall()] == [
+            datetime(2023, 1, 1),
+            datetime(2023, 6, 1),
+        ]
+
+    reconstruction = ReconstructionService()
+    for timestamp, usd in [
+        (datetime(2023, 2, 1), "110"),
+        (datetime(2023, 3, 1), "120"),
+        (datetime(2023, 6, 1), "130"),
+        (datetime(2023, 7, 1), "130"),
+    ]:
+        assert usd_at(reconstruction, account_id, timestamp) == Money.parse(usd)
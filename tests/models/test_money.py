@@ -0,0 +1,75 @@
+import pytest
+import random
+from decimal import Decimal
+from models.money import Money
+
+
+# Money.parse
+def test_parse_rounds_half_to_even():
+    assert Money.parse("12.34") == Money(1234)
+    assert Money.parse("0.125") == Money(12)
+    assert Money.parse("0.135") == Money(14)
+    assert Money.parse("-0.125") == Money(-12)
+    assert Money.parse(Decimal("7")) == Money(700)
+
+
+def test_parse_float_uses_shortest_repr():
+    assert Money.parse(0.1) == Money(10)
+    assert Money.parse(100.005) == Money(10000)
+
+
+def test_parse_invalid():
+    with pytest.raises(ValueError, match="Invalid amount: abc"):
+        Money.parse("abc")
+    with pytest.raises(ValueError, match="Invalid amount"):
+        Money.parse(None)
+
+
+def test_int64_range():
+    assert Money(2**63 - 1).minor_units == 2**63 - 1
+    with pytest.raises(ValueError, match="int64"):
+        Money(2**63)
+    with pytest.raises(ValueError, match="int64"):
+        Money.parse("1e30")
+
+
+# Money.convert
+def test_convert_matches_decimal_rounding():
+    rng = random.Random(11)
+    for _ in range(5000):
+        amount = Decimal(rng.randint(-(10**7), 10**7)) / 100
+        rate = Decimal(rng.randint(1, 100000)) / rng.choice([100, 1000, 10000])
+        assert Money.parse(amount).convert(rate).to_decimal() == round(amount * rate, 2)
+
+
+def test_convert_ties_round_to_even():
+    assert Money.parse("10.25").convert(Decimal("0.5")) == Money(512)  # 5.125
+    assert Money.parse("10.35").convert(Decimal("0.5")) == Money(518)  # 5.175
+    assert Money.parse("-10.25").convert(Decimal("0.5")) == Money(-512)
+    assert Money.parse("3").convert(1) == Money(300)
+
+
+# Arithmetic
+def test_arithmetic_and_ordering():
+    assert Money(150) + Money(-50) == Money(100)
+    assert Money(150) - Money(200) == Money(-50)
+    assert -Money(5) == Money(-5)
+    assert abs(Money(-5)) == Money(5)
+    assert Money(1) > Money(0) >= Money(0)
+    assert not Money(0)
+    assert len({Money(1), Money(1)}) == 1
+
+
+def test_no_mixing_with_numbers():
+    with pytest.raises(TypeError):
+        Money(1) + 1
+    with pytest.raises(TypeError):
+        Money(1) < Decimal(1)
+    assert Money(100) != Decimal(1)
+
+
+def test_str():
+    assert str(Money(1234)) == "12.34"
+    assert str(Money(-5)) == "-0.05"
+    assert repr(Money(0)) == "Money('0.00')"
+    assert Money(-5).to_decimal() == Decimal("-0.05")
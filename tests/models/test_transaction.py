@@ -0,0 +1,84 @@
+import numpy as np
+from datetime import datetime
+from decimal import Decimal
+from models.money import Money
+from models.transaction import Transaction, TransactionBatch
+
+TRANSACTIONS = [
+    Transaction(
+        id=1,
+        type="DepositMade",
+        from_account=7,
+        to_account=7,
+        timestamp=datetime(2024, 1, 1, 10, 0, 0, 123456),
+        from_currency="USD",
+        to_currency="USD",
+        amount=Money(1050),
+        rate=Decimal(1),
+    ),
+    Transaction(
+        id=2,
+        type="MoneyTransferred",
+        from_account=7,
+        to_account=8,
+        timestamp=datetime(2024, 1, 1, 11),
+        from_currency="USD",
+        to_currency="GBP",
+        amount=Money(500),
+        rate=Decimal("0.79"),
+    ),
+    Transaction(
+        id=3,
+        type="CurrencyConverted",
+        from_account=8,
+        to_account=8,
+        timestamp=datetime(2024, 1, 1, 12),
+        from_currency="GBP",
+        to_currency="EUR",
+        amount=Money(100),
+        rate=Decimal("1.17"),
+    ),
+    Transaction(
+        id=4,
+        type="WithdrawalMade",
+        from_account=7,
+        to_account=7,
+        timestamp=datetime(2024, 1, 1, 13),
+        from_currency="USD",
+        to_currency="USD",
+        amount=Money(1),
+        rate=Decimal("1.00"),
+    ),
+]
+
+
+def test_transaction_has_no_instance_dict():
+    assert not hasattr(TRANSACTIONS[0], "__dict__")
+
+
+def test_batch_columns():
+    batch = TransactionBatch.from_transactions(TRANSACTIONS)
+
+    assert len(batch) == 4
+    assert batch.ids.dtype == np.int64
+    assert batch.amounts.tolist() == [1050, 500, 100, 1]
+    assert batch.types.tolist() == [0, 2, 3, 1]
+    assert batch.from_currencies.tolist() == [0, 0, 2, 0]
+    assert batch.to_currencies.tolist() == [0, 2, 1, 0]
+    assert batch.timestamps.dtype == np.dtype("datetime64[us]")
+    # Equal rates share a code
+    assert batch.rates == [Decimal(1), Decimal("0.79"), Decimal("1.17")]
+    assert batch.rate_codes.tolist() == [0, 1, 2, 0]
+
+
+def test_batch_rows_round_trip():
+    batch = TransactionBatch.from_transactions(TRANSACTIONS)
+    assert list(batch) == TRANSACTIONS
+    assert batch[1] == TRANSACTIONS[1]
+
+
+def test_empty_batch():
+    batch = TransactionBatch.from_transactions([])
+    assert len(batch) == 0
+    assert not batch
+    assert list(batch) == []
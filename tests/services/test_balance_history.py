@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models.money import Money
+from models.snapshot import Snapshot
+from models.transaction import Transaction, TransactionBatch
+from services.balance_history import (
+    MAX_HISTORY_POINTS,
+    balance_series,
+    sample_times,
+    transaction_deltas,
+)
+from services.reconstruction_service import replay_transactions
+
+START = datetime(2024, 1, 1)
+
+
+def transaction(type, minutes, amount, from_account=1, to_account=1, **kwargs):
+    return Transaction(
+        id=None,
+        type=type,
+        from_account=from_account,
+        to_account=to_account,
+        timestamp=START + timedelta(minutes=minutes),
+        from_currency=kwargs.get("from_currency", "USD"),
+        to_currency=kwargs.get("to_currency", "USD"),
+        amount=Money.parse(amount),
+        rate=Decimal(kwargs.get("rate", 1)),
+    )
+
+
+TRANSACTIONS = [
+    transaction("DepositMade", 10, "100.00"),
+    transaction("WithdrawalMade", 20, "30.25"),
+    transaction(
+        "CurrencyConverted", 20, "10.05", to_currency="EUR", rate="0.85"
+    ),  # 8.5425 -> 8.54
+    transaction("MoneyTransferred", 45, "5.00", to_account=2),
+    transaction(
+        "MoneyTransferred",
+        50,
+        "2.50",
+        from_account=2,
+        from_currency="GBP",
+        to_currency="GBP",
+    ),
+    transaction(
+        "MoneyTransferred",
+        70,
+        "1.25",
+        from_account=2,
+        from_currency="EUR",
+        to_currency="USD",
+        rate="1.10",
+    ),  # 1.375 -> 1.38
+]
+
+
+def test_sample_times_include_end():
+    samples = sample_times(START, START + timedelta(hours=1), timedelta(minutes=30))
+    assert samples == [
+        START,
+        START + timedelta(minutes=30),
+        START + timedelta(hours=1),
+    ]
+
+
+def test_sample_times_invalid():
+    with pytest.raises(ValueError, match="must be positive"):
+        sample_times(START, START, timedelta(0))
+    with pytest.raises(ValueError, match="must not be before"):
+        sample_times(START, START - timedelta(days=1), timedelta(hours=1))
+    with pytest.raises(ValueError, match=f"at most {MAX_HISTORY_POINTS}"):
+        sample_times(START, START + timedelta(days=365), timedelta(seconds=1))
+
+
+def test_transaction_deltas():
+    timestamps, deltas = transaction_deltas(
+        1, TransactionBatch.from_transactions(TRANSACTIONS)
+    )
+
+    assert timestamps.dtype == np.dtype("datetime64[us]")
+    assert timestamps[0] == np.datetime64(START + timedelta(minutes=10))
+    assert deltas.tolist() == [
+        [10000, 0, 0],
+        [-3025, 0, 0],
+        [-1005, 854, 0],
+        [-500, 0, 0],
+        [0, 0, 250],
+        [138, 0, 0],
+    ]
+
+
+def test_transaction_deltas_conversion_rounding():
+    transactions = [
+        transaction("CurrencyConverted", 1, "10.25", to_currency="EUR", rate="0.5"),
+        transaction("CurrencyConverted", 2, "10.35", to_currency="EUR", rate="0.5"),
+        transaction("CurrencyConverted", 3, "0.01", to_currency="GBP", rate="0.5"),
+    ]
+    _, deltas = transaction_deltas(1, TransactionBatch.from_transactions(transactions))
+    # 5.125, 5.175 and 0.005 round half to even
+    assert deltas.tolist() == [[-1025, 512, 0], [-1035, 518, 0], [-1, 0, 0]]
+
+
+def test_transaction_deltas_empty():
+    timestamps, deltas = transaction_deltas(1, TransactionBatch.from_transactions([]))
+    assert timestamps.shape == (0,)
+    assert deltas.shape == (0, 3)
+
+
+def test_balance_series_matches_replay():
+    samples = sample_times(START, START + timedelta(hours=2), timedelta(minutes=10))
+    timestamps, deltas = transaction_deltas(
+        1, TransactionBatch.from_transactions(TRANSACTIONS)
+    )
+    series = balance_series([100, 200, 300], timestamps, deltas, samples)
+
+    for sample, balances in zip(samples, series):
+        snapshot = replay_transactions(
+            Snapshot(
+                None,
+                1,
+                START,
+                {"USD": Money(100), "EUR": Money(200), "GBP": Money(300)},
+            ),
+            1,
+            TransactionBatch.from_transactions(
+                [t for t in TRANSACTIONS if t.timestamp <= sample]
+            ),
+        )
+        assert [Money(balance) for balance in balances] == [
+            snapshot.balance(currency) for currency in ("USD", "EUR", "GBP")
+        ]
+
+
+def test_balance_series_without_transactions():
+    timestamps, deltas = transaction_deltas(1, TransactionBatch.from_transactions([]))
+    series = balance_series([1, 2, 3], timestamps, deltas, [START, START])
+    assert series.tolist() == [[1, 2, 3], [1, 2, 3]]
@@ -0,0 +1,78 @@
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from models.money import Money
+from services.export_service import write_csv_records, write_jsonl_records
+from services.import_service import (
+    parse_transaction_records,
+    read_csv_records,
+    read_jsonl_records,
+)
+
+ROWS = [
+    (
+        1,
+        "DepositMade",
+        7,
+        7,
+        datetime(2024, 1, 1, 10, 0, 0, 250),
+        "USD",
+        "USD",
+        Decimal("10.05"),
+        Decimal(1),
+    ),
+    (
+        2,
+        "MoneyTransferred",
+        7,
+        8,
+        datetime(2024, 1, 1, 11),
+        "USD",
+        "EUR",
+        Decimal("3.33"),
+        Decimal("0.85"),
+    ),
+]
+
+
+def test_write_csv_records():
+    file = io.StringIO()
+    assert write_csv_records(file, iter(ROWS)) == 2
+    assert file.getvalue().splitlines() == [
+        "transaction_id,type,from_account,to_account,timestamp,from_currency,to_currency,amount,rate",
+        "1,DepositMade,7,7,2024-01-01T10:00:00.000250,USD,USD,10.05,1",
+        "2,MoneyTransferred,7,8,2024-01-01T11:00:00,USD,EUR,3.33,0.85",
+    ]
+
+
+def test_write_jsonl_records_keeps_amounts_exact():
+    file = io.StringIO()
+    assert write_jsonl_records(file, iter(ROWS)) == 2
+    records = [json.loads(line) for line in file.getvalue().splitlines()]
+    assert records[1]["amount"] == "3.33"
+    assert records[1]["rate"] == "0.85"
+    assert records[1]["to_account"] == 8
+
+
+def test_write_empty_export():
+    csv_file, jsonl_file = io.StringIO(), io.StringIO()
+    assert write_csv_records(csv_file, iter([])) == 0
+    assert write_jsonl_records(jsonl_file, iter([])) == 0
+    assert csv_file.getvalue().startswith("transaction_id,")
+    assert jsonl_file.getvalue() == ""
+
+
+def test_exports_can_be_imported_back():
+    for write_records, read_records in [
+        (write_csv_records, read_csv_records),
+        (write_jsonl_records, read_jsonl_records),
+    ]:
+        file = io.StringIO()
+        write_records(file, iter(ROWS))
+        file.seek(0)
+
+        rows = list(parse_transaction_records(read_records(file)))
+        assert [row[:6] for row in rows] == [row[1:7] for row in ROWS]
+        assert [row[6] for row in rows] == [Money(1005), Money(333)]
+        assert rows[1][8] == Money(283)  # Credited 3.33 * 0.85 = 2.8305
@@ -0,0 +1,198 @@
+import io
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from models.money import Money
+from services.import_service import (
+    read_csv_records,
+    read_jsonl_records,
+    parse_transaction_record,
+    parse_transaction_records,
+    parse_rate_record,
+    parse_rate_records,
+    chunked,
+)
+
+
+def test_read_csv_records():
+    file = io.StringIO(
+        "type,from_account,amount,from_currency,timestamp\n"
+        "DepositMade,1,10,USD,2024-01-01 10:00:00\n"
+    )
+    assert list(read_csv_records(file)) == [
+        (
+            2,
+            {
+                "type": "DepositMade",
+                "from_account": "1",
+                "amount": "10",
+                "from_currency": "USD",
+                "timestamp": "2024-01-01 10:00:00",
+            },
+        )
+    ]
+
+
+def test_read_jsonl_records_skips_blank_lines():
+    file = io.StringIO('{"type": "DepositMade"}\n\n{"type": "WithdrawalMade"}\n')
+    assert [line for line, _ in read_jsonl_records(file)] == [1, 3]
+
+
+def test_read_jsonl_records_invalid_json():
+    with pytest.raises(ValueError, match="Line 1: invalid JSON"):
+        list(read_jsonl_records(io.StringIO("{oops\n")))
+
+
+# parse_transaction_record
+def test_parse_deposit_defaults_to_single_account():
+    row = parse_transaction_record(
+        {
+            "type": "DepositMade",
+            "from_account": "7",
+            "from_currency": "usd",
+            "amount": "10.005",
+            "timestamp": "2024-01-01T10:00:00",
+        }
+    )
+    assert row == (
+        "DepositMade",
+        7,
+        7,
+        datetime(2024, 1, 1, 10),
+        "USD",
+        "USD",
+        Money(1000),
+        Decimal(1),
+        Money(0),
+    )
+
+
+def test_parse_conversion_rounds_credit_amount():
+    row = parse_transaction_record(
+        {
+            "type": "MoneyTransferred",
+            "from_account": 1,
+            "to_account": 2,
+            "from_currency": "EUR",
+            "to_currency": "GBP",
+            "amount": "10.25",
+            "rate": "1.15",
+            "timestamp": "2024-01-01 10:00:00",
+        }
+    )
+    assert row[2] == 2
+    assert row[8] == Money(1179)  # 11.7875
+
+
+def test_parse_same_currency_transfer_credits_amount():
+    row = parse_transaction_record(
+        {
+            "type": "MoneyTransferred",
+            "from_account": 1,
+            "to_account": 2,
+            "from_currency": "EUR",
+            "amount": "3",
+            "timestamp": "2024-01-01 10:00:00",
+        }
+    )
+    assert row[5] == "EUR"
+    assert row[8] == Money(300)
+
+
+@pytest.mark.parametrize(
+    "changes, message",
+    [
+        ({"type": "Refund"}, "Invalid transaction type"),
+        ({"from_account": "abc"}, "Invalid account ID"),
+        ({"from_currency": "JPY"}, "Invalid currency 'JPY'"),
+        ({"timestamp": "yesterday"}, "Invalid timestamp"),
+        ({"amount": "abc"}, "Invalid amount"),
+        ({"amount": "-1"}, "must be positive"),
+        ({"to_account": "2"}, "must use a single account"),
+    ],
+)
+def test_parse_transaction_record_invalid(changes, message):
+    record = {
+        "type": "WithdrawalMade",
+        "from_account": "1",
+        "from_currency": "USD",
+        "amount": "5",
+        "timestamp": "2024-01-01 10:00:00",
+    }
+    record.update(changes)
+    with pytest.raises(ValueError, match=message):
+        parse_transaction_record(record)
+
+
+def test_parse_transaction_records_requires_sorted_timestamps():
+    records = [
+        (
+            1,
+            {
+                "type": "DepositMade",
+                "from_account": 1,
+                "from_currency": "USD",
+                "amount": 1,
+                "timestamp": "2024-01-02",
+            },
+        ),
+        (
+            2,
+            {
+                "type": "DepositMade",
+                "from_account": 1,
+                "from_currency": "USD",
+                "amount": 1,
+                "timestamp": "2024-01-01",
+            },
+        ),
+    ]
+    with pytest.raises(ValueError, match="Line 2: transactions must be sorted"):
+        list(parse_transaction_records(records))
+
+
+# parse_rate_record
+def rate_record(**changes):
+    record = {
+        "timestamp": "2024-01-01T10:00:00",
+        "from_currency": "usd",
+        "to_currency": "eur",
+        "rate": "0.91",
+    }
+    record.update(changes)
+    return record
+
+
+def test_parse_rate_record():
+    assert parse_rate_record(rate_record()) == (
+        datetime(2024, 1, 1, 10),
+        "USD",
+        "EUR",
+        Decimal("0.91"),
+    )
+
+
+@pytest.mark.parametrize(
+    "changes, message",
+    [
+        ({"to_currency": "XYZ"}, "Invalid currency 'XYZ'"),
+        ({"to_currency": "USD"}, "two different currencies"),
+        ({"timestamp": "yesterday"}, "Invalid timestamp"),
+        ({"rate": "abc"}, "Invalid rate"),
+        ({"rate": "0"}, "must be positive"),
+        ({"rate": "NaN"}, "must be positive"),
+    ],
+)
+def test_parse_rate_record_invalid(changes, message):
+    with pytest.raises(ValueError, match=message):
+        parse_rate_record(rate_record(**changes))
+
+
+def test_parse_rate_records_report_the_line():
+    records = [(2, rate_record()), (3, rate_record(rate="-1"))]
+    with pytest.raises(ValueError, match="Line 3: The rate must be positive"):
+        list(parse_rate_records(records))
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,25 @@
+import pytest
+from datetime import datetime
+from services.pagination import decode_page_token, encode_page_token
+
+
+def test_page_token_round_trip():
+    key = (datetime(2024, 1, 1, 10, 30, 0, 123456), 42)
+    token = encode_page_token(*key)
+    assert decode_page_token(token) == key
+    assert token.isascii() and "=" not in token
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "garbage",
+        encode_page_token(datetime(2024, 1, 1), 1)[:-2],
+        "WyJub3QgYSBkYXRlIiwxXQ",  # ["not a date",1]
+        "WyIyMDI0LTAxLTAxIiwiMSJd",  # ["2024-01-01","1"]
+        "e30",  # {}
+    ],
+)
+def test_invalid_page_token(token):
+    with pytest.raises(ValueError, match="Invalid page token"):
+        decode_page_token(token)
@@ -0,0 +1,55 @@
+from datetime import datetime
+from decimal import Decimal
+from models.currency_exchange import CurrencyExchange
+from services.rate_history import RateHistoryIndex
+
+
+def exchange(id, hour, rate, from_currency="USD", to_currency="EUR"):
+    return CurrencyExchange(
+        id=id,
+        timestamp=datetime(2024, 1, 1, hour),
+        from_currency=from_currency,
+        to_currency=to_currency,
+        rate=Decimal(rate),
+    )
+
+
+def test_rate_at_picks_latest_rate_not_after_timestamp():
+    index = RateHistoryIndex()
+    index.add([exchange(1, 10, "1.10"), exchange(2, 12, "1.20")])
+
+    assert index.rate_at("USD", "EUR", datetime(2024, 1, 1, 9)) is None
+    assert index.rate_at("USD", "EUR", datetime(2024, 1, 1, 10)) == Decimal("1.10")
+    assert index.rate_at("USD", "EUR", datetime(2024, 1, 1, 11)) == Decimal("1.10")
+    assert index.rate_at("USD", "EUR", datetime(2024, 1, 1, 12)) == Decimal("1.20")
+    assert index.rate_at("EUR", "USD", datetime(2024, 1, 1, 12)) is None
+
+
+def test_rates_at_resolves_unsorted_timestamps_in_order():
+    index = RateHistoryIndex()
+    index.add([exchange(1, 10, "1.10"), exchange(2, 12, "1.20")])
+
+    timestamps = [datetime(2024, 1, 1, hour) for hour in (13, 9, 11)]
+
+    assert index.rates_at("USD", "EUR", timestamps) == [
+        Decimal("1.20"),
+        None,
+        Decimal("1.10"),
+    ]
+
+
+def test_add_keeps_out_of_order_rows_sorted():
+    index = RateHistoryIndex()
+    index.add([exchange(1, 12, "1.20")])
+    index.add([exchange(2, 10, "1.10")])
+
+    assert index.rate_at("USD", "EUR", datetime(2024, 1, 1, 11)) == Decimal("1.10")
+    assert index.last_exchange_id == 2
+    assert len(index) == 2
+
+
+def test_same_timestamp_resolves_to_last_added_row():
+    index = RateHistoryIndex()
+    index.add([exchange(1, 10, "1.10"), exchange(2, 10, "1.15")])
+
+    assert index.rate_at("USD", "EUR", datetime(2024, 1, 1, 10)) == Decimal("1.15")
@@ -0,0 +1,139 @@
+from datetime import datetime
+from decimal import Decimal
+from models.currency_exchange import CurrencyExchange
+from services.rate_matrix import RateMatrix
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def exchange(from_currency, to_currency, rate, id=1, hour=0, board_id=None):
+    return CurrencyExchange(
+        id=id,
+        timestamp=datetime(2024, 1, 1, hour),
+        from_currency=from_currency,
+        to_currency=to_currency,
+        rate=Decimal(rate),
+        board_id=board_id,
+    )
+
+
+def legs(exchange):
+    return [(leg.from_currency, leg.to_currency) for leg in exchange.legs]
+
+
+def test_direct_and_missing_pairs():
+    matrix = RateMatrix()
+    matrix.add([exchange("USD", "EUR", "0.9")])
+
+    direct = matrix.get("USD", "EUR")
+    assert (direct.rate, direct.legs) == (Decimal("0.9"), ())
+    assert matrix.get("EUR", "USD") is None
+    assert matrix.get("USD", "JPY") is None
+
+
+def test_missing_pairs_are_derived_along_the_fewest_legs():
+    matrix = RateMatrix()
+    matrix.add(
+        [
+            exchange("EUR", "USD", "1.10", hour=3),
+            exchange("USD", "JPY", "150", hour=1),
+            exchange("JPY", "CHF", "0.006", hour=2),
+        ]
+    )
+
+    derived = matrix.get("EUR", "JPY")
+    assert derived.rate == Decimal("165.00")
+    assert legs(derived) == [("EUR", "USD"), ("USD", "JPY")]
+    assert derived.id is None
+    assert derived.timestamp == datetime(2024, 1, 1, 1)
+
+    assert legs(matrix.get("EUR", "CHF")) == [
+        ("EUR", "USD"),
+        ("USD", "JPY"),
+        ("JPY", "CHF"),
+    ]
+    assert matrix.get("CHF", "EUR") is None
+
+
+def test_base_currency_is_preferred_over_shorter_paths():
+    rates = [
+        exchange("GBP", "EUR", "1.17"),
+        exchange("EUR", "JPY", "160"),
+        exchange("GBP", "CHF", "1.1"),
+        exchange("CHF", "USD", "1.15"),
+        exchange("USD", "JPY", "150"),
+    ]
+    matrix = RateMatrix(base_currency="USD")
+    matrix.add(rates)
+
+    # The base currency is not reachable in one leg from GBP, so the path is used
+    assert legs(matrix.get("GBP", "JPY")) == [("GBP", "EUR"), ("EUR", "JPY")]
+
+    matrix.add([exchange("GBP", "USD", "1.26")])
+    derived = matrix.get("GBP", "JPY")
+    assert legs(derived) == [("GBP", "USD"), ("USD", "JPY")]
+    assert derived.rate == Decimal("189.00")
+
+
+def test_new_rates_reprice_the_derived_rates_using_them():
+    matrix = RateMatrix()
+    matrix.add([exchange("EUR", "USD", "1.10"), exchange("USD", "JPY", "150")])
+
+    matrix.add([exchange("USD", "JPY", "155", id=2, hour=1)])
+    assert matrix.get("EUR", "JPY").rate == Decimal("170.50")
+    assert matrix.get("USD", "JPY").rate == Decimal("155")
+
+    # Older rates and rates added again are ignored
+    matrix.add([exchange("USD", "JPY", "140"), exchange("USD", "JPY", "155", id=2)])
+    assert matrix.get("EUR", "JPY").rate == Decimal("170.50")
+
+    # A rate of its own replaces a derived one
+    matrix.add([exchange("EUR", "JPY", "171", id=3, hour=2)])
+    assert matrix.get("EUR", "JPY").legs == ()
+
+
+def test_refresh_is_due_on_first_use_expiry_and_invalidation():
+    clock = FakeClock()
+    matrix = RateMatrix(ttl=5, clock=clock)
+    assert matrix.expired() and matrix.needs_refresh()
+
+    matrix.add([exchange("USD", "EUR", "0.9")], complete=True)
+    assert not matrix.needs_refresh()
+
+    matrix.invalidate("USD", "EUR")
+    matrix.invalidate("EUR", "USD")
+    assert matrix.needs_refresh() and not matrix.expired()
+    assert matrix.take_invalidated() == [("EUR", "USD"), ("USD", "EUR")]
+    assert matrix.take_invalidated() == []
+
+    clock.now = 5
+    assert matrix.expired()
+    matrix.add([], complete=True)
+    matrix.clear()
+    assert matrix.expired()
+    # Rates stay available while they are reloaded
+    assert matrix.get("USD", "EUR").rate == Decimal("0.9")
+
+
+def test_complete_loads_record_the_last_rate_board():
+    matrix = RateMatrix()
+    matrix.add(
+        [exchange("USD", "EUR", "0.9", board_id=3), exchange("EUR", "USD", "1.1")],
+        complete=True,
+    )
+    assert matrix.board_id == 3
+
+    # Pairs reloaded one by one may skip boards, only complete loads count
+    matrix.add([exchange("USD", "EUR", "0.8", id=2, hour=1, board_id=5)])
+    assert matrix.board_id == 3
+    matrix.add([], complete=True)
+    assert matrix.board_id == 3
+
+    matrix.clear()
+    assert matrix.board_id == 0
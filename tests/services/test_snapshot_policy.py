@@ -0,0 +1,115 @@
+import configparser
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models.account import Account
+from services.snapshot_policy import (
+    EveryNTransactions,
+    EveryTSeconds,
+    ReplayCostThreshold,
+    get_snapshot_policy,
+)
+
+NOW = datetime(2024, 1, 1, 12)
+
+
+def account(transactions_since_snapshot=0, last_snapshot_at=None, legs=None):
+    return Account(
+        id=1,
+        balances={"USD": Decimal(0), "EUR": Decimal(0), "GBP": Decimal(0)},
+        transaction_count=1000,
+        transactions_since_snapshot=transactions_since_snapshot,
+        legs_since_snapshot=transactions_since_snapshot if legs is None else legs,
+        last_snapshot_at=last_snapshot_at,
+    )
+
+
+def config(text):
+    parser = configparser.ConfigParser()
+    parser.read_string(text)
+    return parser
+
+
+def test_every_n_transactions():
+    policy = EveryNTransactions(50)
+    assert not policy.should_snapshot(account(49), NOW)
+    assert policy.should_snapshot(account(50), NOW)
+
+
+def test_every_t_seconds():
+    policy = EveryTSeconds(60)
+    assert policy.should_snapshot(account(), NOW)
+    assert not policy.should_snapshot(
+        account(last_snapshot_at=NOW - timedelta(seconds=59)), NOW
+    )
+    assert policy.should_snapshot(
+        account(last_snapshot_at=NOW - timedelta(seconds=60)), NOW
+    )
+
+
+def test_replay_cost_threshold():
+    policy = ReplayCostThreshold(max_cost=10, leg_cost=0.5)
+    assert policy.estimated_replay_cost(account(19)) == 9.5
+    assert not policy.should_snapshot(account(19), NOW)
+    assert policy.should_snapshot(account(20), NOW)
+
+
+def test_replay_cost_counts_both_legs_of_conversions():
+    every_n = EveryNTransactions(20)
+    replay_cost = ReplayCostThreshold(max_cost=20)
+
+    # 12 deposits or transfers and 4 conversions: 16 transactions, 20 legs
+    mixed = account(16, legs=20)
+    assert not every_n.should_snapshot(mixed, NOW)
+    assert replay_cost.should_snapshot(mixed, NOW)
+
+    # 20 deposits or transfers
+    single_legs = account(20)
+    assert every_n.should_snapshot(single_legs, NOW)
+    assert replay_cost.should_snapshot(single_legs, NOW)
+
+    # 10 conversions replay as many rows as 20 deposits
+    conversions = account(10, legs=20)
+    assert not every_n.should_snapshot(conversions, NOW)
+    assert replay_cost.should_snapshot(conversions, NOW)
+
+
+@pytest.mark.parametrize(
+    "policy",
+    [
+        lambda: EveryNTransactions(0),
+        lambda: EveryTSeconds(0),
+        lambda: ReplayCostThreshold(0),
+    ],
+)
+def test_invalid_policies(policy):
+    with pytest.raises(ValueError):
+        policy()
+
+
+def test_get_snapshot_policy_default():
+    policy = get_snapshot_policy(config(""))
+    assert isinstance(policy, EveryNTransactions)
+    assert policy.transactions == 50
+
+
+@pytest.mark.parametrize(
+    "text, policy_type",
+    [
+        ("[snapshot]\npolicy=transactions\ntransactions=10\n", EveryNTransactions),
+        ("[snapshot]\npolicy=interval\nseconds=3600\n", EveryTSeconds),
+        ("[snapshot]\npolicy=replay_cost\nmax_cost=200\n", ReplayCostThreshold),
+    ],
+)
+def test_get_snapshot_policy(text, policy_type):
+    assert isinstance(get_snapshot_policy(config(text)), policy_type)
+
+
+def test_get_snapshot_policy_missing_setting():
+    with pytest.raises(ValueError, match="requires 'seconds'"):
+        get_snapshot_policy(config("[snapshot]\npolicy=interval\n"))
+
+
+def test_get_snapshot_policy_unknown():
+    with pytest.raises(ValueError, match="Unknown snapshot policy 'daily'"):
+        get_snapshot_policy(config("[snapshot]\npolicy=daily\n"))